@@ -3,53 +3,177 @@ import aiohttp
 import logging
 from requests.auth import HTTPBasicAuth
 
+from GestionAPI.common.cache_etiquetas import obtener_cache_etiquetas
+from GestionAPI.common.rate_limiter import ESTADOS_LIMITADOS, obtener_limitador
+from GestionAPI.common.token_store import obtener_token_store
+from GestionAPI.Andreani.indice_localidades import (
+    IndiceLocalidades,
+    construir_indice,
+    construir_indice_desde_data_arg
+)
+
 # Configurar logger para la API
 logger = logging.getLogger('andreani_api')
 
+# Parámetros de la sesión HTTP compartida
+LIMITE_CONEXIONES = 20
+LIMITE_CONEXIONES_POR_HOST = 10
+TTL_CACHE_DNS_SEG = 300
+KEEPALIVE_SEG = 30
+TIMEOUT_SOLICITUD_SEG = 60
+
+# Intentos ante respuestas 429/503 (el limitador pausa entre uno y otro)
+MAX_INTENTOS_LIMITADA = 3
+
+
 class AndreaniAPI:
-    def __init__(self, base_url, user, password):
+    """
+    Cliente asíncrono de la API de Andreani.
+
+    Mantiene una única sesión HTTP (keep-alive, caché DNS) y un único token para
+    todas las solicitudes. Si la API rechaza el token (401/403) se vuelve a hacer
+    login una sola vez, aunque haya muchas solicitudes concurrentes esperando.
+    El token se comparte con otros procesos a través del almacén de tokens en
+    disco (common/token_store.py): sólo se hace login si no hay uno vigente.
+    Las etiquetas descargadas se guardan en la caché local (common/cache_etiquetas.py),
+    así los reintentos y reimpresiones no vuelven a pedirlas a la API.
+    Todas las solicitudes pasan por el limitador del proveedor
+    (common/rate_limiter.py), que acota la tasa y la concurrencia y se frena
+    ante respuestas 429/503.
+
+    Se recomienda usarlo como context manager para cerrar la sesión al terminar:
+
+        async with AndreaniAPI(base_url, user, password) as api:
+            await api.consultar_estado_envio(numero)
+    """
+
+    PROVEEDOR_TOKEN = 'andreani'
+
+    def __init__(self, base_url, user, password, token_store=None, cache_etiquetas=None, limitador=None):
         self.base_url = base_url
         self.user = user
         self.password = password
         self.token = None
         self._auth_lock = asyncio.Lock() # Agregamos un Lock
+        self._session = None
+        self._token_store = token_store or obtener_token_store()
+        self._identidad_token = f"{user}@{base_url}"
+        self._cache_etiquetas = cache_etiquetas or obtener_cache_etiquetas()
+        self._limitador = limitador
+        self._indice_localidades = None
+        self._indice_lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        await self._get_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+        return False
+
+    async def _get_session(self):
+        """Obtiene o crea la sesión HTTP compartida."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=LIMITE_CONEXIONES,
+                limit_per_host=LIMITE_CONEXIONES_POR_HOST,
+                ttl_dns_cache=TTL_CACHE_DNS_SEG,
+                keepalive_timeout=KEEPALIVE_SEG
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=TIMEOUT_SOLICITUD_SEG)
+            )
+        return self._session
+
+    async def close(self):
+        """Cierra la sesión HTTP."""
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def _obtener_limitador(self):
+        """Limitador propio, o el compartido por todos los clientes de Andreani."""
+        return self._limitador or obtener_limitador(self.PROVEEDOR_TOKEN)
 
     async def _ensure_token(self):
         """Asegura que el token esté disponible antes de continuar."""
         async with self._auth_lock:
             if not self.token:
-                await self._get_auth_token()
+                self.token = self._token_store.obtener(self.PROVEEDOR_TOKEN, self._identidad_token)
+                if self.token:
+                    logger.info("Usando token de Andreani guardado en el almacén de tokens.")
+                else:
+                    await self._get_auth_token()
+
+    async def _renovar_token(self, token_rechazado):
+        """
+        Vuelve a hacer login después de que la API rechazó `token_rechazado`.
+        Si otra solicitud ya lo renovó mientras se esperaba el lock, no se repite el login.
+        """
+        async with self._auth_lock:
+            if self.token == token_rechazado:
+                logger.info("Token rechazado por la API. Obteniendo un token nuevo...")
+                self.token = None
+                self._token_store.invalidar(self.PROVEEDOR_TOKEN, self._identidad_token, token_rechazado)
+                # Otro proceso pudo haber guardado un token nuevo mientras tanto
+                self.token = self._token_store.obtener(self.PROVEEDOR_TOKEN, self._identidad_token)
+                if not self.token:
+                    await self._get_auth_token()
 
     async def _get_auth_token(self):
         """Obtiene el token de autenticación de forma asíncrona."""
         login_url = f"{self.base_url}/login"
-        async with aiohttp.ClientSession() as session:
+        session = await self._get_session()
+        try:
             async with session.get(
                 login_url, auth=aiohttp.BasicAuth(self.user, self.password)
             ) as response:
                 if response.status == 200:
                     self.token = response.headers.get("x-authorization-token")
+                    self._token_store.guardar(self.PROVEEDOR_TOKEN, self._identidad_token, self.token)
                     return self.token
                 else:
                     text = await response.text()
                     logger.error(f"Error al obtener token: {response.status} - {text}")
                     return None
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Error de conexión al obtener token: {e}")
+            return None
 
     async def _make_request(self, method, url, headers=None, params=None, json_data=None):
         """Realiza una solicitud a la API de forma asíncrona y maneja los errores."""
         await self._ensure_token()  # Aseguramos que el token esté disponible
-        headers = headers or {}
-        if self.token:
-            headers["x-authorization-token"] = self.token
-        
-        if method == "POST" and json_data is not None:
-            headers["Content-Type"] = "application/json"
 
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.request(
-                    method, url, headers=headers, params=params, json=json_data
+        limitador = self._obtener_limitador()
+        token_renovado = False
+        for intento in range(MAX_INTENTOS_LIMITADA):
+            token = self.token
+            request_headers = dict(headers or {})
+            if token:
+                request_headers["x-authorization-token"] = token
+
+            if method == "POST" and json_data is not None:
+                request_headers["Content-Type"] = "application/json"
+
+            try:
+                session = await self._get_session()
+                async with limitador, session.request(
+                    method, url, headers=request_headers, params=params, json=json_data
                 ) as response:
+                    limitador.registrar_respuesta(response.status, response.headers.get("Retry-After"))
+                    if response.status in (401, 403) and not token_renovado:
+                        # Token vencido o inválido: re-login (una sola vez) y reintentar
+                        await response.read()
+                        await self._renovar_token(token)
+                        token_renovado = True
+                        continue
+
+                    if response.status in ESTADOS_LIMITADOS and intento < MAX_INTENTOS_LIMITADA - 1:
+                        # El limitador ya pausó y bajó la tasa: se reintenta
+                        await response.read()
+                        continue
+
                     if response.status >= 400:
                         error_body = await response.text()
                         logger.error(f"Error en solicitud a {url}: {response.status} {response.reason} - {error_body}")
@@ -63,12 +187,13 @@ class AndreaniAPI:
                         return await response.json()
                     else:
                         return await response.read()
-        except aiohttp.ClientError as e:
-            logger.error(f"Error de conexión a {url}: {e}")
-            return None
-        except Exception as e:
-            logger.error(f"Error no manejado en solicitud a {url}: {e}")
-            return None
+            except aiohttp.ClientError as e:
+                logger.error(f"Error de conexión a {url}: {e}")
+                return None
+            except Exception as e:
+                logger.error(f"Error no manejado en solicitud a {url}: {e}")
+                return None
+        return None
 
 
     async def buscar_sucursales(self, parametros):
@@ -107,9 +232,19 @@ class AndreaniAPI:
             return None
 
     async def obtener_etiquetas(self, numeroAgrupador):
-        """Obtiene las etiquetas de envío de forma asíncrona."""
+        """
+        Obtiene las etiquetas de envío de forma asíncrona. Si ya se descargaron
+        antes se devuelven desde la caché local.
+        """
+        etiqueta = self._cache_etiquetas.obtener(self.PROVEEDOR_TOKEN, numeroAgrupador)
+        if etiqueta:
+            return etiqueta
+
         url = f"{self.base_url}/v2/ordenes-de-envio/{numeroAgrupador}/etiquetas"
-        return await self._make_request("GET", url)
+        etiqueta = await self._make_request("GET", url)
+        if isinstance(etiqueta, bytes) and etiqueta:
+            self._cache_etiquetas.guardar(self.PROVEEDOR_TOKEN, numeroAgrupador, etiqueta)
+        return etiqueta
 
     async def consultar_estado_envio(self, numeroEnvio):
         """Consulta el estado de un envío de forma asíncrona."""
@@ -136,17 +271,41 @@ class AndreaniAPI:
         url = f"{self.base_url}/v2/envios/{numeroEnvio}/trazas"
         return await self._make_request("GET", url)
 
-    async def obtener_localidades_por_codigo_postal(self, codigo_postal):
-        """Obtiene localidades filtradas por código postal de forma asíncrona."""
+    async def descargar_localidades(self):
+        """Descarga la lista completa de localidades de forma asíncrona."""
         url = f"{self.base_url}/v1/localidades"
-        response = await self._make_request("GET", url)
+        return await self._make_request("GET", url)
 
-        if response:
-            localidades_filtradas = [
-                localidad
-                for localidad in response
-                if codigo_postal in localidad["codigosPostales"]
-            ]
-            return localidades_filtradas
-        else:
-            return []
\ No newline at end of file
+    async def _obtener_indice_localidades(self):
+        """
+        Devuelve el índice local de localidades. Si no existe o venció, lo regenera
+        desde la API (o, si la API falla y no hay índice, desde data_arg.json).
+        """
+        async with self._indice_lock:
+            if self._indice_localidades is None:
+                self._indice_localidades = IndiceLocalidades()
+            indice = self._indice_localidades
+            if indice.vigente():
+                return indice
+
+            loop = asyncio.get_running_loop()
+            localidades = await self.descargar_localidades()
+            indice.cerrar()  # El archivo se reemplaza: se libera antes de regenerarlo
+            try:
+                if localidades:
+                    await loop.run_in_executor(None, construir_indice, localidades, indice.ruta, "api")
+                elif not indice.existe():
+                    logger.warning("No se pudieron descargar las localidades; se genera el índice desde data_arg.json")
+                    await loop.run_in_executor(None, construir_indice_desde_data_arg, indice.ruta)
+                else:
+                    logger.warning("No se pudieron descargar las localidades; se usa el índice vencido")
+            except OSError as e:
+                if not indice.existe():
+                    raise
+                logger.warning(f"No se pudo regenerar el índice de localidades, se usa el existente: {e}")
+            return indice
+
+    async def obtener_localidades_por_codigo_postal(self, codigo_postal):
+        """Obtiene localidades filtradas por código postal desde el índice local."""
+        indice = await self._obtener_indice_localidades()
+        return indice.por_codigo_postal(codigo_postal)
@@ -10,8 +10,17 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.
 
 from GestionAPI.Andreani.andreani_api import AndreaniAPI
 from GestionAPI.common.credenciales import DATA_PROD
-from GestionAPI.Andreani.db_operations_andreani import AndreaniDB
+from GestionAPI.Andreani.db_operations_andreani import AndreaniDB, formatear_fecha_estado
+from GestionAPI.Andreani.consultas import QRY_UPDATE_ENTREGADO, QRY_GET_ENTREGADOS_SIN_SINCRONIZAR
 from GestionAPI.common.logger_config import setup_logger
+from GestionAPI.common.pool import registrar_estadisticas_pools
+from GestionAPI.common.async_db import AsyncDB
+from GestionAPI.Andreani.poller_estados import (
+    EscritorLotes,
+    consultar_estados_concurrente,
+    CONCURRENCIA_DEFECTO,
+    SOLICITUDES_POR_SEGUNDO_DEFECTO
+)
 
 # Configurar logging con archivo
 log_dir = os.path.join(os.path.dirname(__file__), 'logs')
@@ -31,13 +40,13 @@ async def consultar_estado_envio_api(numero_envio: str):
     Returns:
         dict: La información del estado del envío o None si hay un error.
     """
-    api = AndreaniAPI(
-        base_url=DATA_PROD["url"],
-        user=DATA_PROD["user"],
-        password=DATA_PROD["passw"]
-    )
     try:
-        estado_envio = await api.consultar_estado_envio(numero_envio)
+        async with AndreaniAPI(
+            base_url=DATA_PROD["url"],
+            user=DATA_PROD["user"],
+            password=DATA_PROD["passw"]
+        ) as api:
+            estado_envio = await api.consultar_estado_envio(numero_envio)
 
         if estado_envio:
             # Retornar solo los campos requeridos
@@ -53,7 +62,8 @@ async def consultar_estado_envio_api(numero_envio: str):
         logger.error(f"Error al consultar estado del envío {numero_envio}: {e}")
         return None
 
-async def actualizar_estados_envios():
+async def actualizar_estados_envios(concurrencia=CONCURRENCIA_DEFECTO,
+                                    solicitudes_por_segundo=SOLICITUDES_POR_SEGUNDO_DEFECTO):
     """
     Consulta y actualiza los estados de envíos pendientes en la base de datos.
     
@@ -62,69 +72,61 @@ async def actualizar_estados_envios():
     - NUM_SEGUIMIENTO IS NOT NULL
     - estadoIdEnvio <> 18 (o IS NULL)
     
-    Para cada registro, consulta el estado en la API y actualiza la base de datos.
+    Los envíos se consultan en paralelo con un único cliente de la API (acotado por
+    `concurrencia` y `solicitudes_por_segundo`) y los estados se escriben por lotes.
     """
     db = AndreaniDB()
     
     # Obtener envíos pendientes de actualización
     logger.info("Obteniendo envíos pendientes de actualización...")
-    envios_pendientes = db.get_envios_pendientes()
+    envios_pendientes = await db.aio.get_envios_pendientes()
     
     if not envios_pendientes:
         logger.info("No hay envíos pendientes para actualizar.")
         return
     
-    logger.info(f"Se encontraron {len(envios_pendientes)} envíos pendientes.")
+    logger.info(f"Se encontraron {len(envios_pendientes)} envíos pendientes. "
+                f"Concurrencia: {concurrencia}, límite: {solicitudes_por_segundo} solicitudes/s")
+    
+    envios = [
+        {
+            'nro_pedido': registro[0],
+            'num_seguimiento': registro[1],
+            'talon_ped': registro[2] if len(registro) > 2 else None
+        }
+        for registro in envios_pendientes
+    ]
+    
+    escritor = EscritorLotes(db.aio.update_estados_envio_lote)
+    escritor.iniciar()
+    async with AndreaniAPI(
+        base_url=DATA_PROD["url"],
+        user=DATA_PROD["user"],
+        password=DATA_PROD["passw"]
+    ) as api:
+        sin_respuesta = await consultar_estados_concurrente(api, envios, escritor, concurrencia, solicitudes_por_segundo)
+    resultados = await escritor.finalizar()
     
-    # Procesar cada envío
+    envios_con_error = len(sin_respuesta)
     envios_actualizados = 0
-    envios_con_error = 0
     envios_entregados = 0
-    
-    for registro in envios_pendientes:
-        nro_pedido = registro[0]
-        num_seguimiento = registro[1]
-        talon_ped = registro[2] if len(registro) > 2 else None
-        
-        logger.info(f"Procesando pedido {nro_pedido} - Seguimiento: {num_seguimiento} - Talon: {talon_ped}")
-        
-        # Consultar estado del envío en la API
-        estado_info = await consultar_estado_envio_api(num_seguimiento)
-        
-        if estado_info:
-            estado = estado_info.get("estado")
-            estado_id = estado_info.get("estadoId")
-            fecha_estado = estado_info.get("fechaEstado")
-            
-            logger.info(f"Estado obtenido de API: {estado} (ID: {estado_id})")
-            
-            # Actualizar en la base de datos (pasando nro_pedido y talon_ped)
-            if db.update_estado_envio(num_seguimiento, estado, estado_id, fecha_estado, nro_pedido, talon_ped):
-                logger.info(f"✓ Pedido {nro_pedido} actualizado: {estado} (ID: {estado_id})")
-                envios_actualizados += 1
-                
-                # Verificar si se actualizó también RO_T_ESTADO_PEDIDOS_ECOMMERCE
-                if estado_id == 18:
-                    if talon_ped:
-                        logger.info(f"  → Tabla RO_T_ESTADO_PEDIDOS_ECOMMERCE actualizada (Pedido: {nro_pedido}, Talon: {talon_ped})")
-                        envios_entregados += 1
-                    else:
-                        logger.warning(f"  → No se pudo actualizar RO_T_ESTADO_PEDIDOS_ECOMMERCE: falta TALON_PED")
-            else:
-                logger.error(f"✗ Error al actualizar pedido {nro_pedido} en la base de datos")
-                envios_con_error += 1
+    for actualizacion, exitoso in resultados:
+        nro_pedido = actualizacion['nro_pedido']
+        if exitoso:
+            logger.info(f"✓ Pedido {nro_pedido} actualizado: {actualizacion['estado']} (ID: {actualizacion['estado_id']})")
+            envios_actualizados += 1
+            if actualizacion['estado_id'] == 18 and actualizacion['talon_ped']:
+                envios_entregados += 1
         else:
-            logger.warning(f"✗ No se pudo obtener información del envío {num_seguimiento} (Pedido: {nro_pedido})")
+            logger.error(f"✗ Error al actualizar pedido {nro_pedido} en la base de datos")
             envios_con_error += 1
-        
-        # Pequeña pausa entre llamadas a la API
-        await asyncio.sleep(0.5)
     
     logger.info(f"\n=== Resumen de actualización ===")
     logger.info(f"Total envíos procesados: {len(envios_pendientes)}")
     logger.info(f"Actualizados exitosamente: {envios_actualizados}")
     logger.info(f"Envíos entregados (tabla RO_T_ESTADO_PEDIDOS_ECOMMERCE actualizada): {envios_entregados}")
     logger.info(f"Con errores: {envios_con_error}")
+    registrar_estadisticas_pools(logger)
 
 async def sincronizar_entregados():
     """
@@ -132,28 +134,22 @@ async def sincronizar_entregados():
     pero que aún no están marcados como entregados en esa tabla.
     """
     db = AndreaniDB()
+    base = AsyncDB(db.conexion)
     
     logger.info("Buscando envíos con estadoIdEnvio = 18 para sincronizar...")
     
-    # Consultar todos los registros con estado 18
-    query = """
-    SELECT NRO_PEDIDO, TALON_PED, fechaEstadoEnvio
-    FROM SEIN_TABLA_TEMPORAL_SCRIPT
-    WHERE IMP_ROT = 1 
-      AND NUM_SEGUIMIENTO IS NOT NULL 
-      AND estadoIdEnvio = '18'
-    """
-    
-    registros_entregados = db.conexion.ejecutar_consulta(query)
+    # Registros con estado 18 que todavía no figuran como entregados en RO_T_ESTADO_PEDIDOS_ECOMMERCE
+    registros_entregados = await base.fetch(QRY_GET_ENTREGADOS_SIN_SINCRONIZAR)
     
     if not registros_entregados:
         logger.info("No se encontraron registros con estadoIdEnvio = 18 para sincronizar.")
         return
     
-    logger.info(f"Se encontraron {len(registros_entregados)} registros con estado Entregado (18).")
+    logger.info(f"Se encontraron {len(registros_entregados)} registros con estado Entregado (18) sin sincronizar.")
     
     sincronizados = 0
     errores = 0
+    params = []
     
     for registro in registros_entregados:
         nro_pedido = registro[0]
@@ -165,55 +161,24 @@ async def sincronizar_entregados():
             continue
         
         try:
-            # Limpiar valores
-            nro_pedido_limpio = str(nro_pedido).strip()
-            talon_ped_limpio = str(talon_ped).strip()
-            
-            # Convertir fecha si es necesario
-            from datetime import datetime
-            if isinstance(fecha_entregado, str):
-                try:
-                    fecha_dt = datetime.fromisoformat(fecha_entregado.replace('Z', '+00:00'))
-                    fecha_formateada = fecha_dt.strftime('%Y-%m-%d %H:%M:%S')
-                except:
-                    fecha_formateada = fecha_entregado
-            else:
-                # Si ya es datetime, convertir a string
-                try:
-                    fecha_formateada = fecha_entregado.strftime('%Y-%m-%d %H:%M:%S')
-                except:
-                    fecha_formateada = str(fecha_entregado)
-            
-            # Verificar si ya está actualizado
-            query_check = f"""
-            SELECT ENTREGADO 
-            FROM RO_T_ESTADO_PEDIDOS_ECOMMERCE
-            WHERE LTRIM(RTRIM(NRO_PEDIDO)) = '{nro_pedido_limpio}' 
-              AND TALON_PED = {talon_ped_limpio}
-            """
-            
-            resultado_check = db.conexion.ejecutar_consulta(query_check)
-            
-            if resultado_check and len(resultado_check) > 0:
-                entregado_actual = resultado_check[0][0]
-                if entregado_actual == 1 or entregado_actual is True:
-                    # Ya está marcado como entregado
-                    continue
-            
-            # Actualizar
-            from GestionAPI.Andreani.consultas import QRY_UPDATE_ENTREGADO
-            if db.conexion.ejecutar_update(QRY_UPDATE_ENTREGADO, (fecha_formateada, nro_pedido_limpio, talon_ped_limpio)):
-                logger.info(f"✓ Sincronizado - Pedido: {nro_pedido_limpio}, Talon: {talon_ped_limpio}")
-                sincronizados += 1
-            else:
-                logger.warning(f"⚠ No se pudo actualizar - Pedido: {nro_pedido_limpio}, Talon: {talon_ped_limpio} (puede que no exista en la tabla)")
-                
+            fecha_formateada = formatear_fecha_estado(fecha_entregado)
+            params.append((fecha_formateada, str(nro_pedido).strip(), str(talon_ped).strip()))
         except Exception as e:
             logger.error(f"✗ Error al sincronizar Pedido {nro_pedido}: {e}")
             errores += 1
     
+    # Actualizar todos los pedidos por lotes
+    resultados = await base.execute_many(QRY_UPDATE_ENTREGADO, params)
+    for (_, nro_pedido_limpio, talon_ped_limpio), exitoso in zip(params, resultados):
+        if exitoso:
+            logger.info(f"✓ Sincronizado - Pedido: {nro_pedido_limpio}, Talon: {talon_ped_limpio}")
+            sincronizados += 1
+        else:
+            logger.warning(f"⚠ No se pudo actualizar - Pedido: {nro_pedido_limpio}, Talon: {talon_ped_limpio}")
+            errores += 1
+    
     logger.info(f"\n=== Resumen de sincronización ===")
-    logger.info(f"Total registros con estado 18: {len(registros_entregados)}")
+    logger.info(f"Total registros con estado 18 sin sincronizar: {len(registros_entregados)}")
     logger.info(f"Sincronizados exitosamente: {sincronizados}")
     logger.info(f"Con errores: {errores}")
 
@@ -239,6 +204,18 @@ async def main():
         action="store_true",
         help="Sincronizar tabla RO_T_ESTADO_PEDIDOS_ECOMMERCE con registros que tienen estadoIdEnvio=18."
     )
+    parser.add_argument(
+        "--concurrencia",
+        type=int,
+        default=CONCURRENCIA_DEFECTO,
+        help=f"Máximo de consultas simultáneas a la API (por defecto {CONCURRENCIA_DEFECTO})."
+    )
+    parser.add_argument(
+        "--rps",
+        type=float,
+        default=SOLICITUDES_POR_SEGUNDO_DEFECTO,
+        help=f"Máximo de solicitudes por segundo a la API (por defecto {SOLICITUDES_POR_SEGUNDO_DEFECTO})."
+    )
     
     args = parser.parse_args()
     
@@ -247,7 +224,7 @@ async def main():
         await sincronizar_entregados()
     elif args.actualizar:
         # Modo de actualización masiva
-        await actualizar_estados_envios()
+        await actualizar_estados_envios(args.concurrencia, args.rps)
     elif args.numero_envio:
         # Modo de consulta individual con actualización en BD
         db = AndreaniDB()
@@ -258,14 +235,14 @@ async def main():
             print(resultado)
             
             # Obtener el número de pedido y talon_ped desde la base de datos
-            nro_pedido, talon_ped = db.get_pedido_by_seguimiento(args.numero_envio)
+            nro_pedido, talon_ped = await db.aio.get_pedido_by_seguimiento(args.numero_envio)
             
             # Guardar en la base de datos
             estado = resultado.get("estado")
             estado_id = resultado.get("estadoId")
             fecha_estado = resultado.get("fechaEstado")
             
-            if db.update_estado_envio(args.numero_envio, estado, estado_id, fecha_estado, nro_pedido, talon_ped):
+            if await db.aio.update_estado_envio(args.numero_envio, estado, estado_id, fecha_estado, nro_pedido, talon_ped):
                 print(f"\n✓ Estado actualizado en la base de datos para el envío {args.numero_envio}")
                 if estado_id == 18 and nro_pedido and talon_ped:
                     print(f"✓ Tabla RO_T_ESTADO_PEDIDOS_ECOMMERCE también actualizada para el pedido {nro_pedido}, talon {talon_ped}")
@@ -276,7 +253,7 @@ async def main():
     else:
         # Si no se especifica ningún argumento, ejecutar actualización masiva por defecto
         print("Ejecutando actualización masiva de estados de envíos...")
-        await actualizar_estados_envios()
+        await actualizar_estados_envios(args.concurrencia, args.rps)
 
 if __name__ == "__main__":
     # Para ejecutar en Windows con asyncio
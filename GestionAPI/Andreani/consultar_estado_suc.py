@@ -11,6 +11,9 @@ Uso:
     # Actualización masiva (por defecto si no se pasa argumento):
     python consultar_estado_suc.py
 
+    # Ajustar paralelismo y límite de solicitudes por segundo:
+    python consultar_estado_suc.py --actualizar --concurrencia 8 --rps 5
+
     # Actualización masiva explícita:
     python consultar_estado_suc.py --actualizar
 
@@ -29,6 +32,12 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.
 from GestionAPI.Andreani.andreani_api import AndreaniAPI
 from GestionAPI.common.credenciales import DATA_PROD
 from GestionAPI.Andreani.db_operations_andreani import AndreaniSucDB
+from GestionAPI.Andreani.poller_estados import (
+    EscritorLotes,
+    consultar_estados_concurrente,
+    CONCURRENCIA_DEFECTO,
+    SOLICITUDES_POR_SEGUNDO_DEFECTO
+)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -47,14 +56,14 @@ async def consultar_estado_envio_api(numero_envio: str):
     Returns:
         dict con 'estado', 'estadoId' y 'fechaEstado', o None si hay error.
     """
-    api = AndreaniAPI(
-        base_url=DATA_PROD["url"],
-        user=DATA_PROD["user"],
-        password=DATA_PROD["passw"]
-    )
     try:
         logger.info(f"Consultando API de Andreani para el envío: {numero_envio}")
-        estado_envio = await api.consultar_estado_envio(numero_envio)
+        async with AndreaniAPI(
+            base_url=DATA_PROD["url"],
+            user=DATA_PROD["user"],
+            password=DATA_PROD["passw"]
+        ) as api:
+            estado_envio = await api.consultar_estado_envio(numero_envio)
 
         if estado_envio:
             return {
@@ -68,7 +77,8 @@ async def consultar_estado_envio_api(numero_envio: str):
     return None
 
 
-async def actualizar_estados_envios():
+async def actualizar_estados_envios(concurrencia=CONCURRENCIA_DEFECTO,
+                                    solicitudes_por_segundo=SOLICITUDES_POR_SEGUNDO_DEFECTO):
     """
     Consulta y actualiza los estados de envíos pendientes en EB_ENVIOS_WEB_DESDE_SUC.
 
@@ -78,12 +88,13 @@ async def actualizar_estados_envios():
     - estadoIdEnvio NOT IN ('14','18','20') o IS NULL
     - estadoEnvio <> 'RESCATADO'
 
-    Para cada registro consulta el estado en la API y actualiza la base de datos.
+    Los envíos se consultan en paralelo con un único cliente de la API y los estados
+    se escriben por lotes.
     """
     db = AndreaniSucDB()
 
     logger.info("Obteniendo envíos desde sucursal pendientes de actualización...")
-    envios_pendientes = db.get_envios_pendientes()
+    envios_pendientes = await db.aio.get_envios_pendientes()
 
     if not envios_pendientes:
         logger.info("No hay envíos pendientes para actualizar.")
@@ -91,40 +102,29 @@ async def actualizar_estados_envios():
 
     logger.info(f"Se encontraron {len(envios_pendientes)} envíos pendientes.")
 
-    envios_actualizados = 0
-    envios_con_error = 0
-
-    for registro in envios_pendientes:
-        nro_pedido = registro[0]
-        num_seguimiento = registro[1]
-
-        logger.info(f"Procesando pedido {nro_pedido} — Seguimiento: {num_seguimiento}")
-
-        estado_info = await consultar_estado_envio_api(num_seguimiento)
-
-        if estado_info:
-            estado = estado_info.get("estado")
-            estado_id = estado_info.get("estadoId")
-            fecha_estado = estado_info.get("fechaEstado")
+    envios = [{'nro_pedido': registro[0], 'num_seguimiento': registro[1]} for registro in envios_pendientes]
 
-            logger.info(f"Estado obtenido de API: {estado} (ID: {estado_id})")
+    escritor = EscritorLotes(db.aio.update_estados_envio_lote)
+    escritor.iniciar()
+    async with AndreaniAPI(
+        base_url=DATA_PROD["url"],
+        user=DATA_PROD["user"],
+        password=DATA_PROD["passw"]
+    ) as api:
+        sin_respuesta = await consultar_estados_concurrente(api, envios, escritor, concurrencia, solicitudes_por_segundo)
+    resultados = await escritor.finalizar()
 
-            if db.update_estado_envio(num_seguimiento, estado, estado_id, fecha_estado):
-                logger.info(f"✓ Pedido {nro_pedido} actualizado: {estado} (ID: {estado_id})")
-                envios_actualizados += 1
-            else:
-                logger.error(f"✗ Error al actualizar pedido {nro_pedido} en la base de datos")
-                envios_con_error += 1
+    envios_con_error = len(sin_respuesta)
+    envios_actualizados = 0
+    for actualizacion, exitoso in resultados:
+        nro_pedido = actualizacion['nro_pedido']
+        if exitoso:
+            logger.info(f"✓ Pedido {nro_pedido} actualizado: {actualizacion['estado']} (ID: {actualizacion['estado_id']})")
+            envios_actualizados += 1
         else:
-            logger.warning(
-                f"✗ No se pudo obtener información del envío {num_seguimiento} "
-                f"(Pedido: {nro_pedido})"
-            )
+            logger.error(f"✗ Error al actualizar pedido {nro_pedido} en la base de datos")
             envios_con_error += 1
 
-        # Pequeña pausa entre llamadas a la API
-        await asyncio.sleep(0.5)
-
     logger.info("=== Resumen de actualización ===")
     logger.info(f"Total envíos procesados: {len(envios_pendientes)}")
     logger.info(f"Actualizados exitosamente: {envios_actualizados}")
@@ -146,11 +146,23 @@ async def main():
         action="store_true",
         help="Actualizar todos los estados de envíos pendientes en la base de datos."
     )
+    parser.add_argument(
+        "--concurrencia",
+        type=int,
+        default=CONCURRENCIA_DEFECTO,
+        help=f"Máximo de consultas simultáneas a la API (por defecto {CONCURRENCIA_DEFECTO})."
+    )
+    parser.add_argument(
+        "--rps",
+        type=float,
+        default=SOLICITUDES_POR_SEGUNDO_DEFECTO,
+        help=f"Máximo de solicitudes por segundo a la API (por defecto {SOLICITUDES_POR_SEGUNDO_DEFECTO})."
+    )
 
     args = parser.parse_args()
 
     if args.actualizar:
-        await actualizar_estados_envios()
+        await actualizar_estados_envios(args.concurrencia, args.rps)
     elif args.numero_envio:
         db = AndreaniSucDB()
         resultado = await consultar_estado_envio_api(args.numero_envio)
@@ -159,13 +171,13 @@ async def main():
             print("\nInformación del envío:")
             print(resultado)
 
-            nro_pedido, _ = db.get_pedido_by_seguimiento(args.numero_envio)
+            nro_pedido, _ = await db.aio.get_pedido_by_seguimiento(args.numero_envio)
 
             estado = resultado.get("estado")
             estado_id = resultado.get("estadoId")
             fecha_estado = resultado.get("fechaEstado")
 
-            if db.update_estado_envio(args.numero_envio, estado, estado_id, fecha_estado):
+            if await db.aio.update_estado_envio(args.numero_envio, estado, estado_id, fecha_estado):
                 print(
                     f"\n✓ Estado actualizado en la base de datos "
                     f"para el envío {args.numero_envio}"
@@ -177,7 +189,7 @@ async def main():
     else:
         # Por defecto ejecutar actualización masiva
         print("Ejecutando actualización masiva de estados de envíos desde sucursal...")
-        await actualizar_estados_envios()
+        await actualizar_estados_envios(args.concurrencia, args.rps)
 
 
 if __name__ == "__main__":
@@ -146,6 +146,20 @@ SET ENTREGADO = 1, FECHA_ENTREGADO = ?
 WHERE LTRIM(RTRIM(NRO_PEDIDO)) = ? AND TALON_PED = CAST(? AS INT)
 """
 
+QRY_GET_ENTREGADOS_SIN_SINCRONIZAR = """
+SELECT S.NRO_PEDIDO, S.TALON_PED, S.fechaEstadoEnvio
+FROM SEIN_TABLA_TEMPORAL_SCRIPT S
+WHERE S.IMP_ROT = 1 
+  AND S.NUM_SEGUIMIENTO IS NOT NULL 
+  AND S.estadoIdEnvio = '18'
+  AND NOT EXISTS (
+      SELECT 1 FROM RO_T_ESTADO_PEDIDOS_ECOMMERCE E
+      WHERE LTRIM(RTRIM(E.NRO_PEDIDO)) = LTRIM(RTRIM(S.NRO_PEDIDO))
+        AND E.TALON_PED = S.TALON_PED
+        AND E.ENTREGADO = 1
+  )
+"""
+
 QRY_GET_PEDIDO_BY_SEGUIMIENTO = """
 SELECT NRO_PEDIDO, TALON_PED
 FROM SEIN_TABLA_TEMPORAL_SCRIPT
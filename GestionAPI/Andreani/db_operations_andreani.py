@@ -1,5 +1,7 @@
 import logging
+from datetime import datetime
 from GestionAPI.common.conexion import Conexion
+from GestionAPI.common.async_db import AsyncDBMixin
 from GestionAPI.common.credenciales import CENTRAL_LAKERS
 from GestionAPI.Andreani.consultas import (
     QRY_GET_DATA_FROM_SEIN, 
@@ -21,7 +23,22 @@ from GestionAPI.Andreani.consultas import (
 
 logger = logging.getLogger('andreani_rotulos')
 
-class AndreaniDB:
+
+def formatear_fecha_estado(fecha_estado):
+    """Convierte la fecha de la API (ISO 8601) o un datetime al formato de SQL Server."""
+    if isinstance(fecha_estado, str):
+        try:
+            fecha_dt = datetime.fromisoformat(fecha_estado.replace('Z', '+00:00'))
+            return fecha_dt.strftime('%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            logger.warning(f"No se pudo convertir la fecha, usando valor original: {fecha_estado}")
+            return fecha_estado
+    if isinstance(fecha_estado, datetime):
+        return fecha_estado.strftime('%Y-%m-%d %H:%M:%S')
+    return fecha_estado
+
+
+class AndreaniDB(AsyncDBMixin):
     def __init__(self):
         self.db_config = CENTRAL_LAKERS
         self.conexion = Conexion(
@@ -76,6 +93,24 @@ class AndreaniDB:
             logger.error(f"Error al actualizar IMP_ROT para el pedido {nro_pedido}: {e}")
             return False
 
+    def update_imp_rot_lote(self, nros_pedido, chunk_size=500):
+        """
+        Marca IMP_ROT = 1 para muchos pedidos en SEIN_TABLA_TEMPORAL_SCRIPT por lotes.
+
+        Returns:
+            list: Un bool por pedido indicando si se actualizó.
+        """
+        if not nros_pedido:
+            return []
+        try:
+            params = [(f" {nro_pedido}",) for nro_pedido in nros_pedido]
+            resultados = self.conexion.ejecutar_update_lote(QRY_UPDATE_IMP_ROT, params, chunk_size)
+            logger.info(f"IMP_ROT actualizado por lote: {sum(resultados)}/{len(nros_pedido)} pedidos.")
+            return resultados
+        except Exception as e:
+            logger.error(f"Error al actualizar IMP_ROT por lote: {e}")
+            return [False] * len(nros_pedido)
+
     def update_num_seguimiento(self, nro_pedido, numero_envio):
         """
         Actualiza solo el NUM_SEGUIMIENTO para un pedido específico.
@@ -186,6 +221,52 @@ class AndreaniDB:
             logger.error(f"Error al actualizar el estado del envío para el seguimiento {num_seguimiento}: {e}")
             return False
 
+    def update_estados_envio_lote(self, actualizaciones, chunk_size=500):
+        """
+        Actualiza el estado de muchos envíos en SEIN_TABLA_TEMPORAL_SCRIPT por lotes.
+        Para los envíos en estado 18 (Entregado) con NRO_PEDIDO y TALON_PED, también
+        actualiza RO_T_ESTADO_PEDIDOS_ECOMMERCE en un segundo lote.
+
+        Args:
+            actualizaciones (list): Diccionarios con num_seguimiento, estado, estado_id,
+                fecha_estado y opcionalmente nro_pedido y talon_ped.
+            chunk_size (int): Cantidad de filas por lote.
+
+        Returns:
+            list: Un bool por actualización indicando si se actualizó el estado del envío.
+        """
+        if not actualizaciones:
+            return []
+        try:
+            params_estado = [
+                (a['estado'], a['estado_id'], formatear_fecha_estado(a['fecha_estado']), a['num_seguimiento'])
+                for a in actualizaciones
+            ]
+            resultados = self.conexion.ejecutar_update_lote(QRY_UPDATE_ESTADO_ENVIO, params_estado, chunk_size)
+
+            params_entregado = []
+            for a, params, exitoso in zip(actualizaciones, params_estado, resultados):
+                if not exitoso or a['estado_id'] != 18:
+                    continue
+                if a.get('nro_pedido') and a.get('talon_ped'):
+                    params_entregado.append((params[2], str(a['nro_pedido']).strip(), str(a['talon_ped']).strip()))
+                else:
+                    logger.warning(f"⚠ No se puede actualizar RO_T_ESTADO_PEDIDOS_ECOMMERCE: falta NRO_PEDIDO o TALON_PED "
+                                   f"(seguimiento {a['num_seguimiento']})")
+
+            if params_entregado:
+                entregados = self.conexion.ejecutar_update_lote(QRY_UPDATE_ENTREGADO, params_entregado, chunk_size)
+                for params, exitoso in zip(params_entregado, entregados):
+                    if not exitoso:
+                        logger.warning(f"⚠ No se pudo actualizar RO_T_ESTADO_PEDIDOS_ECOMMERCE para el pedido {params[1]}, talon {params[2]}.")
+
+            logger.info(f"Estados de envío actualizados por lote: {sum(resultados)}/{len(actualizaciones)} "
+                        f"({len(params_entregado)} entregados).")
+            return resultados
+        except Exception as e:
+            logger.error(f"Error al actualizar estados de envío por lote: {e}")
+            return [False] * len(actualizaciones)
+
     def get_pedido_by_seguimiento(self, num_seguimiento):
         """
         Obtiene el número de pedido y TALON_PED a partir del número de seguimiento.
@@ -209,7 +290,7 @@ class AndreaniDB:
             return (None, None)
 
 
-class AndreaniSucDB:
+class AndreaniSucDB(AsyncDBMixin):
     """Operaciones de base de datos para pedidos entregados desde sucursal.
     Trabaja sobre la tabla EB_ENVIOS_WEB_DESDE_SUC.
     """
@@ -265,6 +346,19 @@ class AndreaniSucDB:
             logger.error(f"Error al actualizar IMP_ROT para el pedido {nro_pedido}: {e}")
             return False
 
+    def update_imp_rot_lote(self, nros_pedido, chunk_size=500):
+        """Marca IMP_ROT = 1 para muchos pedidos en EB_ENVIOS_WEB_DESDE_SUC por lotes."""
+        if not nros_pedido:
+            return []
+        try:
+            params = [(f" {nro_pedido}",) for nro_pedido in nros_pedido]
+            resultados = self.conexion.ejecutar_update_lote(QRY_UPDATE_IMP_ROT_SUC, params, chunk_size)
+            logger.info(f"IMP_ROT actualizado por lote: {sum(resultados)}/{len(nros_pedido)} pedidos.")
+            return resultados
+        except Exception as e:
+            logger.error(f"Error al actualizar IMP_ROT por lote: {e}")
+            return [False] * len(nros_pedido)
+
     def get_pedidos_sin_imprimir(self):
         """Obtiene pedidos con NUM_SEGUIMIENTO pero (IMP_ROT = 0 o IS NULL) en EB_ENVIOS_WEB_DESDE_SUC."""
         try:
@@ -319,6 +413,26 @@ class AndreaniSucDB:
             logger.error(f"Error al actualizar el estado del envío para el seguimiento {num_seguimiento}: {e}")
             return False
 
+    def update_estados_envio_lote(self, actualizaciones, chunk_size=500):
+        """
+        Actualiza el estado de muchos envíos en EB_ENVIOS_WEB_DESDE_SUC por lotes.
+        Recibe diccionarios con num_seguimiento, estado, estado_id y fecha_estado y
+        devuelve un bool por actualización.
+        """
+        if not actualizaciones:
+            return []
+        try:
+            params = [
+                (a['estado'], a['estado_id'], formatear_fecha_estado(a['fecha_estado']), a['num_seguimiento'])
+                for a in actualizaciones
+            ]
+            resultados = self.conexion.ejecutar_update_lote(QRY_UPDATE_ESTADO_ENVIO_SUC, params, chunk_size)
+            logger.info(f"Estados de envío desde sucursal actualizados por lote: {sum(resultados)}/{len(actualizaciones)}.")
+            return resultados
+        except Exception as e:
+            logger.error(f"Error al actualizar estados de envío desde sucursal por lote: {e}")
+            return [False] * len(actualizaciones)
+
     def get_pedido_by_seguimiento(self, num_seguimiento):
         """Obtiene el número de pedido y TALON_PED a partir del número de seguimiento en EB_ENVIOS_WEB_DESDE_SUC."""
         try:
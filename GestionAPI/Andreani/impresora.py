@@ -10,11 +10,22 @@ import win32ui
 import logging
 import subprocess
 import os
+import io
 import json
+import socket
+import tempfile
 from abc import ABC, abstractmethod
 from enum import Enum
-from typing import Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
 from pathlib import Path
+from urllib.parse import urlparse
+
+from GestionAPI.common.etiquetas_raw import CacheTrabajosRaw, ConversionRawError, LENGUAJE_EPL
+
+try:
+    from pypdf import PdfReader, PdfWriter
+except ImportError:  # Sin pypdf, print_batch imprime cada etiqueta por separado
+    PdfReader = PdfWriter = None
 
 logger = logging.getLogger(__name__)
 
@@ -24,11 +35,43 @@ class PrintMethod(Enum):
     ADOBE = "adobe"
     GHOST = "ghost"
     PDFTOPRINTER = "pdftoprinter"
+    RAW = "raw"
 
 class PrinterError(Exception):
     """Custom exception for printer-related errors"""
     pass
 
+class EtiquetaInvalidaError(PrinterError):
+    """Una etiqueta del lote no se puede leer o combinar (el problema es la etiqueta, no la impresora)"""
+    pass
+
+def combinar_pdfs(contenidos: List[bytes]) -> bytes:
+    """
+    Concatena varios PDF (en memoria) en un único documento de varias páginas.
+
+    Args:
+        contenidos (List[bytes]): PDF a combinar, en el orden de impresión.
+
+    Returns:
+        bytes: El PDF combinado.
+
+    Raises:
+        PrinterError: Si pypdf no está instalado.
+        EtiquetaInvalidaError: Si algún PDF no se puede leer.
+    """
+    if PdfWriter is None:
+        raise PrinterError("pypdf no está instalado: no se pueden combinar etiquetas")
+    writer = PdfWriter()
+    try:
+        for contenido in contenidos:
+            for pagina in PdfReader(io.BytesIO(contenido)).pages:
+                writer.add_page(pagina)
+        salida = io.BytesIO()
+        writer.write(salida)
+    except Exception as e:
+        raise EtiquetaInvalidaError(f"No se pudieron combinar las etiquetas: {e}") from e
+    return salida.getvalue()
+
 class BasePrinter(ABC):
     """Abstract base class for printer implementations"""
     
@@ -352,6 +395,75 @@ class AdobePrinter(BasePrinter):
             logger.error(f"AdobePrinter: Error inesperado - {type(e).__name__}: {e}", exc_info=True)
             return False
 
+class RawPrinter(BasePrinter):
+    """
+    Implementation of raw printing (EPL/ZPL) that bypasses PDF rendering.
+
+    Las etiquetas PDF se convierten una sola vez al lenguaje de la impresora
+    (ver common/etiquetas_raw.py) y el trabajo se envía tal cual a:
+        - tcp://host:9100   Puerto raw de la impresora de red
+        - file://ruta       Archivo (útil para pruebas)
+        - spool://nombre    Cola de Windows con tipo de datos RAW (sin driver)
+    """
+
+    PUERTO_RAW = 9100
+
+    def __init__(self, destino: str, lenguaje: str = LENGUAJE_EPL,
+                 directorio_cache: Optional[str] = None, timeout: float = 10.0):
+        self._destino = destino
+        self._timeout = timeout
+        directorio_cache = directorio_cache or os.path.join(os.path.dirname(os.path.abspath(__file__)), "temp", "raw")
+        self._cache = CacheTrabajosRaw(directorio_cache, lenguaje)
+
+    def trabajo_raw(self, clave: str, contenido: bytes) -> bytes:
+        """Devuelve el trabajo raw de la etiqueta; los PDF se convierten (y cachean) por clave."""
+        if contenido.startswith(b"%PDF"):
+            return self._cache.obtener(clave, contenido)
+        return contenido  # Ya está en lenguaje de impresora
+
+    def enviar(self, datos: bytes) -> bool:
+        """Envía el trabajo raw al destino configurado."""
+        destino = urlparse(self._destino)
+        try:
+            if destino.scheme == "tcp":
+                with socket.create_connection((destino.hostname, destino.port or self.PUERTO_RAW),
+                                              timeout=self._timeout) as conexion:
+                    conexion.sendall(datos)
+            elif destino.scheme == "file":
+                ruta = self._destino[len("file://"):]
+                with open(ruta, "ab") as f:
+                    f.write(datos)
+            elif destino.scheme == "spool":
+                nombre = self._destino[len("spool://"):] or win32print.GetDefaultPrinter()
+                hprinter = win32print.OpenPrinter(nombre)
+                try:
+                    win32print.StartDocPrinter(hprinter, 1, ("Etiquetas", None, "RAW"))
+                    try:
+                        win32print.StartPagePrinter(hprinter)
+                        win32print.WritePrinter(hprinter, datos)
+                        win32print.EndPagePrinter(hprinter)
+                    finally:
+                        win32print.EndDocPrinter(hprinter)
+                finally:
+                    win32print.ClosePrinter(hprinter)
+            else:
+                logger.error(f"RawPrinter: destino no soportado: {self._destino}")
+                return False
+        except Exception as e:
+            logger.error(f"RawPrinter: Error al enviar {len(datos)} bytes a {self._destino}: {type(e).__name__}: {e}")
+            return False
+        logger.info(f"Trabajo raw de {len(datos)} bytes enviado a {self._destino}")
+        return True
+
+    def print_file(self, file_path: Union[str, Path], copies: int = 1) -> bool:
+        try:
+            path = Path(file_path)
+            trabajo = self.trabajo_raw(path.stem, path.read_bytes())
+        except Exception as e:
+            logger.error(f"RawPrinter: No se pudo preparar el trabajo para {file_path}: {type(e).__name__}: {e}")
+            return False
+        return self.enviar(trabajo * copies)
+
 class PrinterManager:
     """
     Clase para gestionar la configuración de impresoras en Windows.
@@ -376,6 +488,7 @@ class PrinterManager:
         config_path = os.path.join(os.path.dirname(__file__), 'config', 'printer_config.json')
         config_method = None
         config_label_printer = None
+        config = {}
 
         if os.path.exists(config_path):
             try:
@@ -390,6 +503,7 @@ class PrinterManager:
         final_print_method = print_method or config_method or PrintMethod.ADOBE
         self._label_printer = label_printer_path or config_label_printer
         self._original_printer = None
+        self._temporales = []
 
         # 3. Configurar el método de impresión
         if isinstance(final_print_method, str):
@@ -409,6 +523,12 @@ class PrinterManager:
                 self._printer = GhostPrinter()
             elif self._print_method == PrintMethod.PDFTOPRINTER:
                 self._printer = PDFtoPrinterPrinter()
+            elif self._print_method == PrintMethod.RAW:
+                self._printer = RawPrinter(
+                    destino=config.get('raw_target') or f"spool://{self._label_printer or ''}",
+                    lenguaje=config.get('raw_language', LENGUAJE_EPL),
+                    directorio_cache=config.get('raw_cache_dir')
+                )
             else: # Incluye ADOBE y cualquier otro caso por defecto
                 self._printer = AdobePrinter()
         except PrinterError as e:
@@ -548,7 +668,171 @@ class PrinterManager:
             bool: True si la impresión fue exitosa, False en caso contrario.
         """
         return self._printer.print_file(file_path, copies)
-    
+
+    def print_batch(self, etiquetas: List[Tuple[str, bytes]], directorio: Optional[str] = None) -> Dict[str, bool]:
+        """
+        Imprime varias etiquetas PDF como un único trabajo.
+
+        Los PDF se combinan en memoria en un solo documento, que se guarda en un único
+        archivo temporal y se envía una sola vez al método de impresión configurado.
+        Si una etiqueta no se puede leer, combinar o convertir a raw, el lote se divide
+        en mitades hasta aislarla. Si lo que falla es el envío a la impresora (no está,
+        está fuera de línea, venció el tiempo), el lote entero se marca sin imprimir de
+        una vez, sin dividirlo ni intentar los trabajos siguientes.
+
+        Args:
+            etiquetas (List[Tuple[str, bytes]]): Pares (clave, PDF); la clave suele ser
+                el número de pedido.
+            directorio (str, optional): Directorio del archivo temporal. Por defecto el
+                temporal del sistema.
+
+        Returns:
+            Dict[str, bool]: Resultado de impresión por clave.
+        """
+        resultados = {}
+        etiquetas = list(etiquetas)
+        if len(etiquetas) > 1 and PdfWriter is None and not isinstance(self._printer, RawPrinter):
+            logger.warning("pypdf no está instalado: las etiquetas se imprimen de a una")
+            lotes = [[etiqueta] for etiqueta in etiquetas]
+        else:
+            lotes = [etiquetas] if etiquetas else []
+
+        for indice, lote in enumerate(lotes):
+            if not self._imprimir_lote(lote, directorio, resultados):
+                self._marcar_sin_imprimir([etiqueta for resto in lotes[indice + 1:] for etiqueta in resto], resultados)
+                break
+        return resultados
+
+    def _imprimir_lote(self, etiquetas, directorio, resultados) -> bool:
+        """
+        Imprime `etiquetas` en un trabajo y registra el resultado de cada clave.
+
+        Returns:
+            bool: False si falló la impresora; el llamador no debe enviar más trabajos.
+        """
+        try:
+            trabajo = self._preparar_trabajo(etiquetas, directorio)
+        except (EtiquetaInvalidaError, ConversionRawError) as e:
+            if len(etiquetas) == 1:
+                logger.error(f"La etiqueta {etiquetas[0][0]} no se puede imprimir: {e}")
+                resultados[etiquetas[0][0]] = False
+                return True
+            mitad = len(etiquetas) // 2
+            logger.warning(f"Etiqueta inválida en el lote de {len(etiquetas)} ({e}); se divide para aislarla")
+            if not self._imprimir_lote(etiquetas[:mitad], directorio, resultados):
+                self._marcar_sin_imprimir(etiquetas[mitad:], resultados)
+                return False
+            return self._imprimir_lote(etiquetas[mitad:], directorio, resultados)
+        except Exception as e:
+            logger.error(f"Error al preparar el lote de {len(etiquetas)} etiquetas: {type(e).__name__}: {e}")
+            self._marcar_sin_imprimir(etiquetas, resultados)
+            return False
+
+        try:
+            if isinstance(self._printer, RawPrinter):
+                exitoso = self._printer.enviar(trabajo)
+            else:
+                exitoso = self.print_file(trabajo)
+        except Exception as e:
+            logger.error(f"Error al imprimir lote de {len(etiquetas)} etiquetas: {type(e).__name__}: {e}")
+            exitoso = False
+
+        if not exitoso:
+            logger.error(f"Falló la impresora con el lote de {len(etiquetas)} etiquetas; quedan sin imprimir")
+            self._marcar_sin_imprimir(etiquetas, resultados)
+            return False
+        logger.info(f"Lote de {len(etiquetas)} etiquetas enviado a imprimir en un solo trabajo")
+        for clave, _ in etiquetas:
+            resultados[clave] = True
+        return True
+
+    def _preparar_trabajo(self, etiquetas, directorio):
+        """Trabajo raw (bytes) o ruta del PDF temporal con todas las etiquetas."""
+        if isinstance(self._printer, RawPrinter):
+            # Los trabajos raw se concatenan directamente, sin combinar PDF
+            return b"".join(self._printer.trabajo_raw(clave, pdf) for clave, pdf in etiquetas)
+        if PdfWriter is None:
+            contenido = etiquetas[0][1]
+        else:
+            # También con una sola etiqueta: así un PDF ilegible se distingue de una falla de la impresora
+            contenido = combinar_pdfs([pdf for _, pdf in etiquetas])
+        return self._guardar_temporal(contenido, directorio)
+
+    @staticmethod
+    def _marcar_sin_imprimir(etiquetas, resultados) -> None:
+        for clave, _ in etiquetas:
+            resultados[clave] = False
+
+    def _guardar_temporal(self, contenido: bytes, directorio: Optional[str]) -> str:
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        descriptor, ruta = tempfile.mkstemp(prefix="etiquetas_", suffix=".pdf", dir=directorio)
+        with os.fdopen(descriptor, "wb") as f:
+            f.write(contenido)
+        self._temporales.append(ruta)
+        return ruta
+
+    def limpiar_temporales(self, timeout: float = 60.0) -> None:
+        """
+        Elimina los archivos temporales de print_batch una vez que el spooler terminó,
+        ya que algunos métodos (Adobe, Win32) leen el archivo después de devolver el control.
+        """
+        if not self._temporales:
+            return
+        self.esperar_spooler(0, timeout)
+        for ruta in self._temporales:
+            try:
+                os.remove(ruta)
+            except OSError as e:
+                logger.warning(f"No se pudo eliminar el archivo temporal {ruta}: {e}")
+        self._temporales = []
+
+    def trabajos_en_cola(self, printer_name: Optional[str] = None) -> int:
+        """
+        Obtiene la cantidad de trabajos pendientes en el spooler de Windows.
+
+        Args:
+            printer_name (str, optional): Impresora a consultar. Por defecto la predeterminada.
+
+        Returns:
+            int: Cantidad de trabajos en cola.
+        """
+        hprinter = win32print.OpenPrinter(printer_name or self.current_printer)
+        try:
+            return len(win32print.EnumJobs(hprinter, 0, -1, 1))
+        finally:
+            win32print.ClosePrinter(hprinter)
+
+    def esperar_spooler(self, max_trabajos: int = 0, timeout: float = 60.0, intervalo: float = 0.25) -> bool:
+        """
+        Espera hasta que el spooler tenga como máximo `max_trabajos` pendientes.
+
+        Reemplaza las pausas fijas después de cada impresión: se sigue apenas la
+        impresora consumió los trabajos anteriores.
+
+        Args:
+            max_trabajos (int): Trabajos pendientes tolerados (0 = cola vacía).
+            timeout (float): Segundos máximos de espera.
+            intervalo (float): Segundos entre consultas al spooler.
+
+        Returns:
+            bool: True si se alcanzó el objetivo, False si venció el tiempo o falló la consulta.
+        """
+        import time
+        limite = time.monotonic() + timeout
+        while True:
+            try:
+                pendientes = self.trabajos_en_cola()
+            except Exception as e:
+                logger.warning(f"No se pudo consultar el spooler de impresión: {e}")
+                return False
+            if pendientes <= max_trabajos:
+                return True
+            if time.monotonic() >= limite:
+                logger.warning(f"El spooler sigue con {pendientes} trabajos después de {timeout}s")
+                return False
+            time.sleep(intervalo)
+
     @staticmethod
     def list_printers() -> list:
         """
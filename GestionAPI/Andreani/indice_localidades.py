@@ -0,0 +1,250 @@
+"""
+Índice local de localidades de Andreani.
+
+La lista de localidades (/v1/localidades de la API, o data_arg.json) tiene
+~20.000 entradas y cambia muy poco. En lugar de descargarla o recorrerla en
+cada búsqueda, se vuelca una vez en un archivo SQLite indexado por código
+postal y por provincia/localidad. Las consultas abren el archivo en sólo
+lectura con mmap, por lo que varios procesos lo comparten sin cargarlo entero
+en memoria, y cada búsqueda es una lectura de índice.
+
+El índice guarda la fecha en que se generó; pasado TTL_INDICE_SEG se considera
+vencido y AndreaniAPI lo regenera desde la API.
+
+Uso:
+    python indice_localidades.py            # Regenera el índice desde data_arg.json
+    python indice_localidades.py --api      # Regenera el índice desde la API (DATA_PROD)
+"""
+
+import sys
+import os
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+import argparse
+import asyncio
+import json
+import logging
+import sqlite3
+import tempfile
+import time
+
+logger = logging.getLogger('andreani_api')
+
+DIRECTORIO_ANDREANI = os.path.dirname(os.path.abspath(__file__))
+RUTA_INDICE_DEFECTO = os.path.join(DIRECTORIO_ANDREANI, 'config', 'localidades.sqlite')
+RUTA_DATA_ARG = os.path.join(DIRECTORIO_ANDREANI, 'data_arg.json')
+
+# Vigencia del índice antes de regenerarlo desde la API
+TTL_INDICE_SEG = 7 * 86400
+
+# Bytes del archivo que SQLite puede mapear en memoria (el índice pesa ~2 MB)
+MMAP_BYTES = 64 * 1024 * 1024
+
+_ESQUEMA = """
+CREATE TABLE localidades (
+    id INTEGER PRIMARY KEY,
+    id_prov_localidad TEXT,
+    localidad TEXT NOT NULL,
+    partido TEXT,
+    provincia TEXT NOT NULL,
+    codigos_postales TEXT NOT NULL
+);
+CREATE INDEX ix_localidades_provincia ON localidades (provincia, localidad);
+CREATE TABLE codigos_postales (
+    codigo_postal TEXT NOT NULL,
+    localidad_id INTEGER NOT NULL,
+    PRIMARY KEY (codigo_postal, localidad_id)
+) WITHOUT ROWID;
+CREATE TABLE meta (
+    clave TEXT PRIMARY KEY,
+    valor TEXT
+);
+"""
+
+
+def construir_indice(localidades, ruta=RUTA_INDICE_DEFECTO, origen=""):
+    """
+    Genera el índice a partir de la lista de localidades (formato de la API).
+
+    Se escribe en un archivo temporal y se reemplaza el índice existente de forma
+    atómica, para que otros procesos nunca lean un índice a medio construir.
+
+    Args:
+        localidades (list): Diccionarios con idDeProvLocalidad, localidad, partido,
+            provincia y codigosPostales.
+        ruta (str): Ruta del archivo de índice.
+        origen (str): Descripción del origen de los datos (se guarda como metadato).
+
+    Returns:
+        int: Cantidad de localidades indexadas.
+    """
+    directorio = os.path.dirname(ruta) or "."
+    os.makedirs(directorio, exist_ok=True)
+    descriptor, temporal = tempfile.mkstemp(prefix=".localidades-", suffix=".tmp", dir=directorio)
+    os.close(descriptor)
+
+    try:
+        conn = sqlite3.connect(temporal)
+        try:
+            conn.executescript(_ESQUEMA)
+            filas_localidades = []
+            filas_cp = set()
+            for id_localidad, item in enumerate(localidades, start=1):
+                codigos = [str(cp) for cp in item.get("codigosPostales") or []]
+                filas_localidades.append((
+                    id_localidad,
+                    item.get("idDeProvLocalidad"),
+                    item.get("localidad"),
+                    item.get("partido"),
+                    item.get("provincia"),
+                    json.dumps(codigos)
+                ))
+                filas_cp.update((cp, id_localidad) for cp in codigos)
+
+            conn.executemany("INSERT INTO localidades VALUES (?, ?, ?, ?, ?, ?)", filas_localidades)
+            conn.executemany("INSERT INTO codigos_postales VALUES (?, ?)", sorted(filas_cp))
+            conn.executemany(
+                "INSERT INTO meta VALUES (?, ?)",
+                [("generado", str(time.time())), ("origen", origen)]
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        os.replace(temporal, ruta)
+    except Exception:
+        try:
+            os.remove(temporal)
+        except OSError:
+            pass
+        raise
+
+    logger.info(f"Índice de localidades generado: {len(filas_localidades)} localidades, "
+                f"{len(filas_cp)} códigos postales (origen: {origen or 'desconocido'})")
+    return len(filas_localidades)
+
+
+def construir_indice_desde_data_arg(ruta=RUTA_INDICE_DEFECTO, ruta_json=RUTA_DATA_ARG):
+    """Genera el índice desde el archivo data_arg.json incluido en el repositorio."""
+    with open(ruta_json, "r", encoding="utf-8") as f:
+        localidades = json.load(f)
+    return construir_indice(localidades, ruta, origen=os.path.basename(ruta_json))
+
+
+class IndiceLocalidades:
+    """
+    Consultas de sólo lectura sobre el índice de localidades.
+
+    Args:
+        ruta (str, optional): Ruta del archivo de índice.
+        ttl (float, optional): Segundos tras los cuales el índice se considera vencido.
+    """
+
+    def __init__(self, ruta=RUTA_INDICE_DEFECTO, ttl=TTL_INDICE_SEG):
+        self.ruta = ruta
+        self.ttl = ttl
+        self._conn = None
+        self._mtime = None
+
+    def _conexion(self):
+        """Abre (o reabre si el archivo fue regenerado) la conexión de sólo lectura."""
+        mtime = os.path.getmtime(self.ruta)
+        if self._conn is None or mtime != self._mtime:
+            self.cerrar()
+            uri = "file:" + self.ruta.replace("\\", "/") + "?mode=ro"
+            self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute(f"PRAGMA mmap_size = {MMAP_BYTES}")
+            self._mtime = mtime
+        return self._conn
+
+    def cerrar(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def existe(self):
+        return os.path.exists(self.ruta)
+
+    def antiguedad_seg(self):
+        """Segundos desde que se generó el índice, o None si no existe o no se puede leer."""
+        if not self.existe():
+            return None
+        try:
+            fila = self._conexion().execute("SELECT valor FROM meta WHERE clave = 'generado'").fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"No se pudo leer el índice de localidades {self.ruta}: {e}")
+            return None
+        return time.time() - float(fila["valor"]) if fila else None
+
+    def vigente(self):
+        antiguedad = self.antiguedad_seg()
+        return antiguedad is not None and antiguedad < self.ttl
+
+    @staticmethod
+    def _a_diccionario(fila):
+        return {
+            "idDeProvLocalidad": fila["id_prov_localidad"],
+            "localidad": fila["localidad"],
+            "partido": fila["partido"],
+            "provincia": fila["provincia"],
+            "codigosPostales": json.loads(fila["codigos_postales"]),
+        }
+
+    def por_codigo_postal(self, codigo_postal):
+        """Localidades que incluyen el código postal (mismo formato que la API)."""
+        filas = self._conexion().execute(
+            "SELECT l.* FROM codigos_postales c JOIN localidades l ON l.id = c.localidad_id "
+            "WHERE c.codigo_postal = ? ORDER BY l.id",
+            (str(codigo_postal),)
+        ).fetchall()
+        return [self._a_diccionario(fila) for fila in filas]
+
+    def provincias(self):
+        filas = self._conexion().execute(
+            "SELECT DISTINCT provincia FROM localidades ORDER BY provincia"
+        ).fetchall()
+        return [fila["provincia"] for fila in filas]
+
+    def localidades(self, provincia):
+        filas = self._conexion().execute(
+            "SELECT DISTINCT localidad FROM localidades WHERE provincia = ? ORDER BY localidad",
+            (provincia,)
+        ).fetchall()
+        return [fila["localidad"] for fila in filas]
+
+    def codigos_postales(self, provincia, localidad):
+        filas = self._conexion().execute(
+            "SELECT codigos_postales FROM localidades WHERE provincia = ? AND localidad = ?",
+            (provincia, localidad)
+        ).fetchall()
+        return sorted({cp for fila in filas for cp in json.loads(fila["codigos_postales"])})
+
+
+async def _construir_desde_api(ruta):
+    from GestionAPI.Andreani.andreani_api import AndreaniAPI
+    from GestionAPI.common.credenciales import DATA_PROD
+
+    async with AndreaniAPI(DATA_PROD["url"], DATA_PROD["user"], DATA_PROD["passw"]) as api:
+        localidades = await api.descargar_localidades()
+    if not localidades:
+        raise RuntimeError("La API no devolvió localidades")
+    return construir_indice(localidades, ruta, origen="api")
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Regenera el índice local de localidades de Andreani.")
+    parser.add_argument("--api", action="store_true", help="Descargar las localidades de la API en lugar de usar data_arg.json.")
+    parser.add_argument("--ruta", default=RUTA_INDICE_DEFECTO, help="Ruta del archivo de índice.")
+    args = parser.parse_args()
+
+    if args.api:
+        asyncio.run(_construir_desde_api(args.ruta))
+    else:
+        construir_indice_desde_data_arg(args.ruta)
+
+
+if __name__ == "__main__":
+    main()
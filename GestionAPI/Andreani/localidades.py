@@ -1,5 +1,12 @@
 #esto realiza un filtro a data_arg para obtener el provincia, localidad y codigo postal de un usuario.
-import json
+import sys
+import os
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from GestionAPI.Andreani.indice_localidades import IndiceLocalidades, construir_indice_desde_data_arg
+
 
 def eleccion_usuario(lista):
     if lista:
@@ -18,44 +25,35 @@ def eleccion_usuario(lista):
         return index
 
 
-# Cargar el archivo JSON
-with open("data_arg.json", "r") as f:
-    data_arg = json.load(f)
-
-#lista de provincias de Argentina:
-nombres_provincias = list({item["provincia"] for item in data_arg})
-nombres_provincias.sort()
-
-print('Provincias disponibles:')
-index = eleccion_usuario(nombres_provincias)
-provincia_seleccionada = nombres_provincias[index]
-#print(provincia_seleccionada)
-
-#lista de localidades de la provincia seleccionada:
-nombres_localidades = []
-
-for i in data_arg:
-    if i['provincia'] == provincia_seleccionada:
-        nombres_localidades.append(i["localidad"])
+def main():
+    # Las búsquedas se responden desde el índice local; si no existe se genera desde data_arg.json
+    indice = IndiceLocalidades()
+    if not indice.existe():
+        construir_indice_desde_data_arg(indice.ruta)
 
-nombres_localidades.sort()
+    #lista de provincias de Argentina:
+    nombres_provincias = indice.provincias()
 
-print(f'Localidades disponibles en la provincia de {provincia_seleccionada}:')
-index = eleccion_usuario(nombres_localidades)
-localidad_seleccionada = nombres_localidades[index]
+    print('Provincias disponibles:')
+    index = eleccion_usuario(nombres_provincias)
+    provincia_seleccionada = nombres_provincias[index]
 
+    #lista de localidades de la provincia seleccionada:
+    nombres_localidades = indice.localidades(provincia_seleccionada)
 
-# lista de codigos postales de la localidad seleccionada por el usuario:
-codigos_postales = []
+    print(f'Localidades disponibles en la provincia de {provincia_seleccionada}:')
+    index = eleccion_usuario(nombres_localidades)
+    localidad_seleccionada = nombres_localidades[index]
 
-for i in data_arg:
-    if i['localidad'] == localidad_seleccionada:
-        codigos_postales.extend(i["codigosPostales"])
+    # lista de codigos postales de la localidad seleccionada por el usuario:
+    codigos_postales = indice.codigos_postales(provincia_seleccionada, localidad_seleccionada)
 
-codigos_postales.sort()
+    print(f'Codigos postales disponibles en la localidad de {localidad_seleccionada}:')
+    index = eleccion_usuario(codigos_postales)
+    codigo_postal_seleccionado = codigos_postales[index]
 
-print(f'Codigos postales disponibles en la localidad de {localidad_seleccionada}:')
-index = eleccion_usuario(codigos_postales)
-codigo_postal_seleccionado = codigos_postales[index]
+    return provincia_seleccionada, localidad_seleccionada, codigo_postal_seleccionado
 
 
+if __name__ == "__main__":
+    main()
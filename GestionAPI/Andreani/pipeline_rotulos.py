@@ -0,0 +1,140 @@
+"""
+Pipeline de descarga, guardado e impresión de rótulos de Andreani.
+
+Usado por sync_rotulos_andreani.py. Las etiquetas se descargan en paralelo y
+entran a una cola apenas llega cada una; un único trabajador de impresión las
+consume en orden de llegada, ejecutando la impresión (bloqueante) en un hilo
+aparte para no frenar las descargas. Las etiquetas que ya están en la cola
+cuando la impresora se libera se envían juntas como un solo trabajo
+(PrinterManager.print_batch). En lugar de una pausa fija después de cada
+trabajo, se espera a que el spooler baje de unos pocos trabajos pendientes.
+IMP_ROT se marca en la base con un único update por trabajo, apenas termina de
+imprimirse: si el proceso se corta, a lo sumo las etiquetas del último trabajo
+quedan sin marcar y se vuelven a imprimir.
+"""
+
+import asyncio
+import logging
+
+logger = logging.getLogger('andreani_rotulos')
+
+# Parámetros del pipeline
+TAMANO_COLA_ETIQUETAS = 20       # Etiquetas descargadas esperando impresión
+MAX_ETIQUETAS_POR_TRABAJO = 50   # Etiquetas combinadas en un mismo trabajo de impresión
+MAX_TRABAJOS_EN_SPOOLER = 2      # Trabajos pendientes tolerados antes de enviar otro
+TIMEOUT_SPOOLER_SEG = 60.0
+
+
+async def imprimir_etiquetas_en_pipeline(pedidos, obtener_etiqueta, imprimir_lote, marcar_impresos,
+                                         esperar_spooler=None, finalizar=None,
+                                         max_por_trabajo=MAX_ETIQUETAS_POR_TRABAJO):
+    """
+    Descarga e imprime las etiquetas de los pedidos y marca IMP_ROT.
+
+    Args:
+        pedidos (list): Diccionarios con numeroPedido y numeroAgrupador.
+        obtener_etiqueta (callable): Corrutina que recibe el número de agrupador y
+            devuelve el PDF (bytes) o None (p. ej. AndreaniAPI.obtener_etiquetas).
+        imprimir_lote (callable): Función bloqueante que recibe una lista de
+            (numeroPedido, PDF) y devuelve {numeroPedido: bool}
+            (p. ej. PrinterManager.print_batch).
+        marcar_impresos (callable): Función bloqueante que recibe una lista de
+            números de pedido y devuelve un bool por cada uno
+            (p. ej. AndreaniDB.update_imp_rot_lote).
+        esperar_spooler (callable, optional): Función bloqueante (max_trabajos, timeout)
+            que espera a que el spooler se descongestione (p. ej. PrinterManager.esperar_spooler).
+        finalizar (callable, optional): Función bloqueante que se ejecuta al terminar
+            de imprimir (p. ej. PrinterManager.limpiar_temporales).
+        max_por_trabajo (int): Máximo de etiquetas combinadas en un trabajo (1 = de a una).
+
+    Returns:
+        dict: Contadores impresos, errores_descarga, errores_impresion, errores_db y trabajos.
+    """
+    loop = asyncio.get_running_loop()
+    cola = asyncio.Queue(maxsize=TAMANO_COLA_ETIQUETAS)
+    stats = {"impresos": 0, "errores_descarga": 0, "errores_impresion": 0, "errores_db": 0, "trabajos": 0}
+
+    async def descargar(pedido):
+        nro_pedido = pedido["numeroPedido"]
+        try:
+            contenido = await obtener_etiqueta(pedido["numeroAgrupador"])
+        except Exception as e:
+            logger.error(f"Error al obtener etiqueta para el pedido {nro_pedido}: {e}")
+            contenido = None
+        if not contenido:
+            logger.error(f"No se obtuvo la etiqueta del pedido {nro_pedido}")
+            stats["errores_descarga"] += 1
+            return
+        await cola.put((nro_pedido, contenido))
+
+    async def descargar_todas():
+        try:
+            await asyncio.gather(*(descargar(pedido) for pedido in pedidos))
+        finally:
+            await cola.put(None)
+
+    def imprimir(etiquetas):
+        logger.info(f"Iniciando impresión de {len(etiquetas)} etiquetas: {', '.join(n for n, _ in etiquetas)}")
+        resultados = imprimir_lote(etiquetas)
+        if esperar_spooler and any(resultados.values()):
+            # Contrapresión: no se envía otro trabajo hasta que la impresora vaya consumiendo
+            esperar_spooler(MAX_TRABAJOS_EN_SPOOLER, TIMEOUT_SPOOLER_SEG)
+        return resultados
+
+    async def marcar(nros_pedido):
+        try:
+            resultados = await loop.run_in_executor(None, marcar_impresos, nros_pedido)
+        except Exception as e:
+            logger.error(f"Error al actualizar IMP_ROT para {len(nros_pedido)} pedidos: {e}")
+            resultados = [False] * len(nros_pedido)
+        for nro_pedido, exitoso in zip(nros_pedido, resultados):
+            if exitoso:
+                logger.info(f"[OK] Base de datos actualizada (IMP_ROT=1) - Pedido: {nro_pedido}")
+            else:
+                logger.error(f"[ERROR] No se pudo actualizar IMP_ROT en la base de datos - Pedido: {nro_pedido}")
+                stats["errores_db"] += 1
+
+    async def trabajador_impresion():
+        terminado = False
+        while not terminado:
+            item = await cola.get()
+            if item is None:
+                break
+            # Se suman al trabajo las etiquetas que ya llegaron mientras se imprimía el anterior
+            etiquetas = [item]
+            while len(etiquetas) < max_por_trabajo and not cola.empty():
+                siguiente = cola.get_nowait()
+                if siguiente is None:
+                    terminado = True
+                    break
+                etiquetas.append(siguiente)
+
+            try:
+                resultados = await loop.run_in_executor(None, imprimir, etiquetas)
+            except Exception as e:
+                logger.error(f"[ERROR] EXCEPCION AL IMPRIMIR {len(etiquetas)} etiquetas - {type(e).__name__}: {e}",
+                             exc_info=True)
+                resultados = {}
+            stats["trabajos"] += 1
+
+            impresos = []
+            for nro_pedido, _ in etiquetas:
+                if resultados.get(nro_pedido):
+                    logger.info(f"[OK] Etiqueta enviada a imprimir correctamente - Pedido: {nro_pedido}")
+                    stats["impresos"] += 1
+                    impresos.append(nro_pedido)
+                else:
+                    logger.error(f"[ERROR] ERROR DE IMPRESION - Pedido: {nro_pedido}\n"
+                                 f"  - NOTA: Si el problema persiste, ejecutar diagnostico_impresion.py")
+                    stats["errores_impresion"] += 1
+
+            # Se marca antes del próximo trabajo, para no reimprimir lo ya impreso si el proceso se corta
+            if impresos:
+                await marcar(impresos)
+
+        if finalizar:
+            await loop.run_in_executor(None, finalizar)
+
+    await asyncio.gather(descargar_todas(), trabajador_impresion())
+    logger.info(f"Pipeline de rótulos finalizado: {stats}")
+    return stats
@@ -0,0 +1,139 @@
+"""
+Consulta concurrente de estados de envío en la API de Andreani.
+
+Usado por consultar_estado.py y consultar_estado_suc.py. Un único cliente
+AndreaniAPI (un solo login) atiende a todas las consultas, que se lanzan en
+paralelo acotadas por el limitador compartido de Andreani (common/rate_limiter.py),
+configurado con la concurrencia y las solicitudes por segundo pedidas. Los estados obtenidos se acumulan y se escriben en la base por lotes
+desde un hilo aparte, mientras siguen las consultas.
+"""
+
+import asyncio
+import logging
+
+from GestionAPI.common.rate_limiter import configurar_limitador
+
+logger = logging.getLogger('consultar_estado')
+
+# Proveedor cuyo limitador compartido usa AndreaniAPI
+PROVEEDOR = 'andreani'
+
+# Valores por defecto del poller
+CONCURRENCIA_DEFECTO = 8
+SOLICITUDES_POR_SEGUNDO_DEFECTO = 5.0
+TAMANO_LOTE_DEFECTO = 200
+INTERVALO_ESCRITURA_SEG = 5.0
+
+
+class EscritorLotes:
+    """
+    Acumula actualizaciones y las escribe en la base por lotes.
+
+    Args:
+        escribir_lote (callable): Función que recibe una lista de actualizaciones
+            y devuelve un bool por cada una. Puede ser una corrutina (p. ej.
+            AndreaniDB.aio.update_estados_envio_lote, que corre en el executor de
+            la base) o una función sincrónica, que se ejecuta en un hilo aparte
+            para no bloquear el event loop.
+        tamano_lote (int): Cantidad de actualizaciones que dispara una escritura.
+        intervalo (float): Segundos máximos que una actualización espera en el buffer.
+    """
+
+    def __init__(self, escribir_lote, tamano_lote=TAMANO_LOTE_DEFECTO, intervalo=INTERVALO_ESCRITURA_SEG):
+        self._escribir_lote = escribir_lote
+        self.tamano_lote = tamano_lote
+        self.intervalo = intervalo
+        self._cola = asyncio.Queue()
+        self._tarea = None
+        self.resultados = []  # Lista de (actualizacion, exitoso)
+
+    def iniciar(self):
+        self._tarea = asyncio.create_task(self._procesar())
+
+    async def agregar(self, actualizacion):
+        await self._cola.put(actualizacion)
+
+    async def finalizar(self):
+        """Escribe lo pendiente y espera a que termine el escritor."""
+        await self._cola.put(None)
+        await self._tarea
+        return self.resultados
+
+    async def _procesar(self):
+        lote = []
+        terminado = False
+        while not terminado:
+            try:
+                item = await asyncio.wait_for(self._cola.get(), timeout=self.intervalo)
+            except asyncio.TimeoutError:
+                pass  # Pasó el intervalo sin novedades: se escribe lo acumulado
+            else:
+                if item is None:
+                    terminado = True
+                else:
+                    lote.append(item)
+                if not terminado and len(lote) < self.tamano_lote:
+                    continue
+
+            if lote:
+                await self._escribir(lote)
+                lote = []
+
+    async def _escribir(self, lote):
+        try:
+            if asyncio.iscoroutinefunction(self._escribir_lote):
+                exitos = await self._escribir_lote(lote)
+            else:
+                exitos = await asyncio.get_running_loop().run_in_executor(None, self._escribir_lote, lote)
+        except Exception as e:
+            logger.error(f"Error al escribir lote de {len(lote)} actualizaciones: {e}")
+            exitos = [False] * len(lote)
+        self.resultados.extend(zip(lote, exitos))
+
+
+async def consultar_estados_concurrente(api, envios, escritor, concurrencia=CONCURRENCIA_DEFECTO,
+                                        solicitudes_por_segundo=SOLICITUDES_POR_SEGUNDO_DEFECTO):
+    """
+    Consulta el estado de muchos envíos en paralelo y envía los resultados al escritor.
+
+    Args:
+        api (AndreaniAPI): Cliente compartido por todas las consultas.
+        envios (list): Diccionarios con al menos 'num_seguimiento' y 'nro_pedido';
+            el resto de las claves se copian a la actualización.
+        escritor (EscritorLotes): Destino de las actualizaciones obtenidas.
+        concurrencia (int): Máximo de solicitudes en vuelo.
+        solicitudes_por_segundo (float): Tasa máxima sostenida de solicitudes.
+
+    Returns:
+        list: Envíos para los que no se pudo obtener el estado.
+    """
+    # AndreaniAPI pasa cada solicitud por el limitador compartido del proveedor:
+    # se configura con estos límites en lugar de sumar otra cubeta y otro semáforo
+    limitador = configurar_limitador(PROVEEDOR, solicitudes_por_segundo, concurrencia)
+    sin_respuesta = []
+
+    async def consultar(envio):
+        num_seguimiento = envio['num_seguimiento']
+        try:
+            estado_envio = await api.consultar_estado_envio(num_seguimiento)
+        except Exception as e:
+            logger.error(f"Error al consultar estado del envío {num_seguimiento}: {e}")
+            estado_envio = None
+
+        if not estado_envio:
+            logger.warning(f"✗ No se pudo obtener información del envío {num_seguimiento} (Pedido: {envio['nro_pedido']})")
+            sin_respuesta.append(envio)
+            return
+
+        logger.info(f"Pedido {envio['nro_pedido']} - Seguimiento {num_seguimiento}: "
+                    f"{estado_envio.get('estado')} (ID: {estado_envio.get('estadoId')})")
+        await escritor.agregar(dict(
+            envio,
+            estado=estado_envio.get("estado"),
+            estado_id=estado_envio.get("estadoId"),
+            fecha_estado=estado_envio.get("fechaEstado")
+        ))
+
+    await asyncio.gather(*(consultar(envio) for envio in envios))
+    logger.info(f"Consultas finalizadas. Espera acumulada por límite de tasa: {limitador.segundos_espera:.1f}s")
+    return sin_respuesta
@@ -1,4 +1,5 @@
 import asyncio
+import functools
 import platform
 import json
 import sys
@@ -12,6 +13,7 @@ sys.path.insert(0, project_root)
 
 # Ahora que agregamos el directorio raíz al path, podemos importar nuestros módulos
 from GestionAPI.Andreani.impresora import PrinterManager
+from GestionAPI.Andreani.pipeline_rotulos import imprimir_etiquetas_en_pipeline
 
 from GestionAPI.Andreani.andreani_api import AndreaniAPI
 from GestionAPI.Andreani.db_operations_andreani import AndreaniDB
@@ -138,14 +140,6 @@ async def process_orders_and_get_labels() -> None:
         
         logger.info(f"Total de pedidos a procesar para impresión: {len(orders_to_print)}")
         
-        # PASO 4: Obtener etiquetas para todos los pedidos
-        label_tasks = []
-        for order_info in orders_to_print:
-            label_tasks.append(api.obtener_etiquetas(order_info["numeroAgrupador"]))
-        
-        # Obtener todas las etiquetas
-        labels_results = await asyncio.gather(*label_tasks, return_exceptions=True)
-
         # Cargar configuración de impresora desde printer_config.json
         config_path = os.path.join(os.path.dirname(__file__), 'config', 'printer_config.json')
         printer_config = {}
@@ -180,92 +174,17 @@ async def process_orders_and_get_labels() -> None:
                     logger.info(f"- {printer['name']} ({printer['port']})")
                 return
             
-            # Procesar y guardar las etiquetas
-            for order_info, label_result in zip(orders_to_print, labels_results):
-                if isinstance(label_result, Exception):
-                    logger.error(f"Error al obtener etiqueta para el pedido {order_info['numeroPedido']}: {label_result}")
-                    continue
-
-                try:
-                    # Crear un directorio temporal dedicado si no existe
-                    temp_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "temp")
-                    if not os.path.exists(temp_dir):
-                        os.makedirs(temp_dir)
-                    
-                    # Crear nombre de archivo único para cada etiqueta
-                    filename = f"etiqueta_{order_info['numeroPedido']}.pdf"
-                    filepath = os.path.join(temp_dir, filename)
-                    
-                    # Asegurarse de que el archivo anterior se elimine si existe
-                    if os.path.exists(filepath):
-                        try:
-                            os.remove(filepath)
-                        except Exception as e:
-                            logger.warning(f"No se pudo eliminar el archivo temporal existente: {e}")
-                    
-                    with open(filepath, "wb") as etiqueta_file:
-                        etiqueta_file.write(label_result)
-                    logger.info(f"Etiqueta guardada como '{filepath}' para el pedido {order_info['numeroPedido']}")
-                    
-                    # Verificar que el archivo PDF se haya guardado correctamente
-                    if not os.path.exists(filepath):
-                        logger.error(f"ERROR CRÍTICO: El archivo de etiqueta no se pudo guardar en {filepath}")
-                        continue
-                    
-                    file_size = os.path.getsize(filepath)
-                    if file_size == 0:
-                        logger.error(f"ERROR CRÍTICO: El archivo de etiqueta está vacío (0 bytes) - Pedido: {order_info['numeroPedido']}")
-                        continue
-                    
-                    logger.debug(f"Archivo PDF validado - Tamaño: {file_size} bytes")
-                    
-                    # Imprimir la etiqueta
-                    try:
-                        logger.info(f"Iniciando impresión de etiqueta - Pedido: {order_info['numeroPedido']}")
-                        logger.debug(f"Método: {printer_method}, Impresora: {printer_path}")
-                        
-                        print_result = printer_manager.print_file(filepath)
-                        
-                        if print_result:
-                            logger.info(f"[OK] Etiqueta enviada a imprimir correctamente - Pedido: {order_info['numeroPedido']}")
-                            # Marcar como impreso (IMP_ROT = 1)
-                            if andreani_db.update_imp_rot(order_info['numeroPedido']):
-                                logger.info(f"[OK] Base de datos actualizada (IMP_ROT=1) - Pedido: {order_info['numeroPedido']}")
-                            else:
-                                logger.error(f"[ERROR] No se pudo actualizar IMP_ROT en la base de datos - Pedido: {order_info['numeroPedido']}")
-                        else:
-                            logger.error(
-                                f"[ERROR] ERROR DE IMPRESION - Pedido: {order_info['numeroPedido']}\n"
-                                f"  - Archivo: {filepath}\n"
-                                f"  - Tamano: {file_size} bytes\n"
-                                f"  - Metodo de impresion: {printer_method}\n"
-                                f"  - Impresora: {printer_path}\n"
-                                f"  - Verificar: Conectividad de red, estado de la impresora, permisos de archivo\n"
-                                f"  - NOTA: Si el problema persiste, ejecutar diagnostico_impresion.py"
-                            )
-                    except Exception as print_error:
-                        logger.error(
-                            f"[ERROR] EXCEPCION AL IMPRIMIR - Pedido: {order_info['numeroPedido']}\n"
-                            f"  - Error: {type(print_error).__name__}: {str(print_error)}\n"
-                            f"  - Archivo: {filepath}\n"
-                            f"  - Metodo: {printer_method}\n"
-                            f"  - Impresora: {printer_path}",
-                            exc_info=True
-                        )
-                        
-                    # Dar tiempo a Adobe Reader para procesar el archivo
-                    import time
-                    time.sleep(5)  # Esperar 5 segundos
-                    
-                    # Opcionalmente, eliminar el archivo PDF después de imprimir
-                    try:
-                        os.remove(filepath)
-                        logger.debug(f"Archivo temporal {filename} eliminado")
-                    except Exception as e:
-                        logger.warning(f"No se pudo eliminar el archivo temporal {filename}: {e}")
-                    
-                except Exception as e:
-                    logger.error(f"Error al procesar la etiqueta para el pedido {order_info['numeroPedido']}: {e}")
+            # PASO 4: Descargar, imprimir y marcar las etiquetas en pipeline: las etiquetas
+            # descargadas se combinan en un solo trabajo de impresión e IMP_ROT se actualiza por lotes
+            temp_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "temp")
+            await imprimir_etiquetas_en_pipeline(
+                orders_to_print,
+                obtener_etiqueta=api.obtener_etiquetas,
+                imprimir_lote=functools.partial(printer_manager.print_batch, directorio=temp_dir),
+                marcar_impresos=andreani_db.update_imp_rot_lote,
+                esperar_spooler=printer_manager.esperar_spooler,
+                finalizar=printer_manager.limpiar_temporales
+            )
         
         except Exception as e:
             logger.error(f"Error en el proceso de impresión: {e}")
@@ -277,6 +196,8 @@ async def process_orders_and_get_labels() -> None:
 
     except Exception as e:
         logger.error(f"Error general en el proceso: {e}")
+    finally:
+        await api.close()
 
 if __name__ == "__main__":
     logger.info("Iniciando proceso de sincronización de rótulos Andreani")
@@ -210,6 +210,8 @@ async def process_orders_and_get_labels() -> None:
 
     except Exception as e:
         logger.error(f"Error general en el proceso: {e}")
+    finally:
+        await api.close()
 
 
 if __name__ == "__main__":
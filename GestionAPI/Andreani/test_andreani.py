@@ -21,10 +21,10 @@ class TestAndreani(unittest.IsolatedAsyncioTestCase):
             base_url_qa = DATA_QA["url"]
             user = DATA_QA["user"]
             password = DATA_QA["passw"]
-            api = AndreaniAPI(base_url_qa, user, password)
-            self.assertIsNotNone(api, "La inicialización de AndreaniAPI falló.")
-            # Realizar una llamada simple para verificar la conexión y autenticación
-            token = await api._get_auth_token()
+            async with AndreaniAPI(base_url_qa, user, password) as api:
+                self.assertIsNotNone(api, "La inicialización de AndreaniAPI falló.")
+                # Realizar una llamada simple para verificar la conexión y autenticación
+                token = await api._get_auth_token()
             self.assertIsNotNone(token, "La obtención del token de autenticación falló.")
             print("Conexión a la API de Andreani exitosa.")
         except Exception as e:
@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import asyncio
+import unittest
+import sys
+import os
+import tempfile
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from GestionAPI.Andreani.andreani_api import AndreaniAPI
+from GestionAPI.common.cache_etiquetas import CacheEtiquetas
+from GestionAPI.common.rate_limiter import LimitadorProveedor
+from GestionAPI.common.token_store import TokenStore
+from GestionAPI.Andreani.indice_localidades import IndiceLocalidades
+
+
+class TestAndreaniAPISesion(unittest.IsolatedAsyncioTestCase):
+    """Pruebas de sesión y renovación de token contra un servidor HTTP local."""
+
+    async def asyncSetUp(self):
+        self.logins = 0
+        self.token_valido = "token-1"
+
+        async def login(request):
+            self.logins += 1
+            await asyncio.sleep(0.01)
+            self.token_valido = f"token-{self.logins}"
+            return web.Response(headers={"x-authorization-token": self.token_valido})
+
+        self.limitar_proxima = False
+
+        async def envio(request):
+            if self.limitar_proxima:
+                self.limitar_proxima = False
+                return web.Response(status=429, headers={"Retry-After": "0"})
+            if request.headers.get("x-authorization-token") != self.token_valido:
+                return web.Response(status=401, text="token vencido")
+            return web.json_response({"numero": request.match_info["numero"], "estadoId": 5})
+
+        self.descargas_localidades = 0
+
+        async def localidades(request):
+            self.descargas_localidades += 1
+            return web.json_response([
+                {"idDeProvLocalidad": "1", "localidad": "BECCAR", "partido": "SAN ISIDRO",
+                 "provincia": "BUENOS AIRES", "codigosPostales": ["1643"]},
+            ])
+
+        self.descargas_etiquetas = 0
+
+        async def etiquetas(request):
+            self.descargas_etiquetas += 1
+            return web.Response(body=b"%PDF-" + request.match_info["agrupador"].encode(),
+                                content_type="application/pdf")
+
+        app = web.Application()
+        app.router.add_get("/login", login)
+        app.router.add_get("/v1/localidades", localidades)
+        app.router.add_get("/v2/envios/{numero}", envio)
+        app.router.add_get("/v2/ordenes-de-envio/{agrupador}/etiquetas", etiquetas)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.base_url = str(self.server.make_url("")).rstrip("/")
+
+        self.directorio = tempfile.TemporaryDirectory()
+        self.store = TokenStore(os.path.join(self.directorio.name, "tokens.json"))
+        self.cache = CacheEtiquetas(os.path.join(self.directorio.name, "etiquetas"))
+        self.limitador = LimitadorProveedor("andreani", tasa=1000, concurrencia=20)
+
+    async def asyncTearDown(self):
+        await self.server.close()
+        self.directorio.cleanup()
+
+    def _api(self):
+        return AndreaniAPI(self.base_url, "user", "pass", token_store=self.store, cache_etiquetas=self.cache,
+                           limitador=self.limitador)
+
+    async def test_reutiliza_sesion_y_token(self):
+        """Varias solicitudes usan un solo login y una sola sesión."""
+        async with self._api() as api:
+            sesion = await api._get_session()
+            for numero in ("1", "2", "3"):
+                respuesta = await api.consultar_estado_envio(numero)
+                self.assertEqual(respuesta["numero"], numero)
+            self.assertIs(await api._get_session(), sesion)
+
+        self.assertEqual(self.logins, 1)
+        self.assertTrue(sesion.closed)
+
+    async def test_relogin_unico_ante_401_concurrentes(self):
+        """Con el token vencido, una ráfaga de solicitudes dispara un solo re-login."""
+        async with self._api() as api:
+            await api.consultar_estado_envio("0")
+            self.token_valido = "token-rotado-por-el-servidor"
+
+            respuestas = await asyncio.gather(*(api.consultar_estado_envio(str(i)) for i in range(10)))
+
+        self.assertTrue(all(r and r["estadoId"] == 5 for r in respuestas))
+        self.assertEqual(self.logins, 2)
+
+    async def test_reutiliza_token_guardado_por_otro_proceso(self):
+        """Un segundo cliente toma el token del almacén en disco sin volver a hacer login."""
+        async with self._api() as api:
+            await api.consultar_estado_envio("1")
+
+        async with self._api() as otra_api:
+            respuesta = await otra_api.consultar_estado_envio("2")
+
+        self.assertEqual(respuesta["numero"], "2")
+        self.assertEqual(self.logins, 1)
+
+    async def test_localidades_se_descargan_una_vez(self):
+        """Las búsquedas por código postal se responden desde el índice local."""
+        async with self._api() as api:
+            api._indice_localidades = IndiceLocalidades(os.path.join(self.directorio.name, "localidades.sqlite"))
+            for _ in range(3):
+                localidades = await api.obtener_localidades_por_codigo_postal("1643")
+                self.assertEqual([l["localidad"] for l in localidades], ["BECCAR"])
+            self.assertEqual(await api.obtener_localidades_por_codigo_postal("9999"), [])
+            api._indice_localidades.cerrar()
+
+        self.assertEqual(self.descargas_localidades, 1)
+
+    async def test_reintenta_ante_429(self):
+        """Un 429 frena al limitador y la solicitud se reintenta."""
+        async with self._api() as api:
+            self.limitar_proxima = True
+            respuesta = await api.consultar_estado_envio("7")
+
+        self.assertEqual(respuesta["numero"], "7")
+        self.assertEqual(self.limitador.stats["limitadas"], 1)
+        self.assertLess(self.limitador.tasa, 1000)
+
+    async def test_etiquetas_se_descargan_una_vez(self):
+        """Las reimpresiones se sirven desde la caché de etiquetas."""
+        async with self._api() as api:
+            for _ in range(2):
+                self.assertEqual(await api.obtener_etiquetas("A1"), b"%PDF-A1")
+        async with self._api() as api:
+            self.assertEqual(await api.obtener_etiquetas("A1"), b"%PDF-A1")
+            self.assertEqual(await api.obtener_etiquetas("B2"), b"%PDF-B2")
+
+        self.assertEqual(self.descargas_etiquetas, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import io
+import importlib
+import unittest
+import sys
+import os
+import socket
+import tempfile
+import threading
+from unittest.mock import MagicMock, patch
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+try:
+    from pypdf import PdfReader, PdfWriter
+except ImportError:
+    PdfWriter = None
+
+
+def _pdf(paginas=1):
+    writer = PdfWriter()
+    for _ in range(paginas):
+        writer.add_blank_page(width=288, height=432)
+    salida = io.BytesIO()
+    writer.write(salida)
+    return salida.getvalue()
+
+
+@unittest.skipIf(PdfWriter is None, "pypdf no está instalado")
+class TestImpresionPorLote(unittest.TestCase):
+    """Pruebas de PrinterManager.print_batch (sin impresora real)."""
+
+    def setUp(self):
+        # impresora.py importa pywin32, que sólo existe en Windows
+        modulos_win32 = {nombre: MagicMock() for nombre in ("win32print", "win32api", "win32ui")}
+        self._parche = patch.dict(sys.modules, modulos_win32)
+        self._parche.start()
+        self.impresora = importlib.import_module("GestionAPI.Andreani.impresora")
+        self.directorio = tempfile.TemporaryDirectory()
+
+        self.manager = self.impresora.PrinterManager.__new__(self.impresora.PrinterManager)
+        self.manager._temporales = []
+        self.manager._printer = MagicMock()
+        self.trabajos = []
+
+    def tearDown(self):
+        self._parche.stop()
+        sys.modules.pop("GestionAPI.Andreani.impresora", None)
+        self.directorio.cleanup()
+
+    def _registrar_trabajo(self, ruta, copies=1):
+        paginas = len(PdfReader(ruta).pages)
+        self.trabajos.append(paginas)
+        return paginas
+
+    def test_un_solo_trabajo_para_todo_el_lote(self):
+        """Las etiquetas se combinan en un único PDF y se envían una sola vez."""
+        self.manager._printer.print_file.side_effect = self._registrar_trabajo
+        etiquetas = [(str(i), _pdf()) for i in range(4)]
+
+        resultados = self.manager.print_batch(etiquetas, directorio=self.directorio.name)
+
+        self.assertEqual(resultados, {"0": True, "1": True, "2": True, "3": True})
+        self.assertEqual(self.trabajos, [4])
+
+    def test_bisecciona_hasta_aislar_la_etiqueta_que_falla(self):
+        """Si una etiqueta no se puede combinar, se divide el lote para marcar cada pedido con precisión."""
+        etiquetas = [(str(i), _pdf()) for i in range(4)]
+        etiquetas[2] = ("2", b"no es un pdf")
+
+        def imprimir(ruta, copies=1):
+            try:
+                return bool(self._registrar_trabajo(ruta))
+            except Exception:
+                return False
+        self.manager._printer.print_file.side_effect = imprimir
+
+        resultados = self.manager.print_batch(etiquetas, directorio=self.directorio.name)
+
+        self.assertEqual(resultados, {"0": True, "1": True, "2": False, "3": True})
+        # [0, 1] se imprime en un trabajo; [2, 3] no se puede combinar y se divide
+        self.assertEqual(self.trabajos, [2, 1])
+
+        with patch.object(self.manager, "esperar_spooler", return_value=True):
+            self.manager.limpiar_temporales()
+        self.assertEqual(os.listdir(self.directorio.name), [])
+
+    def test_impresora_caida_falla_el_lote_una_sola_vez(self):
+        """Si falla el envío, el lote se marca sin imprimir sin dividirlo."""
+        self.manager._printer.print_file.return_value = False
+        etiquetas = [(str(i), _pdf()) for i in range(8)]
+
+        resultados = self.manager.print_batch(etiquetas, directorio=self.directorio.name)
+
+        self.assertEqual(resultados, {str(i): False for i in range(8)})
+        self.assertEqual(self.manager._printer.print_file.call_count, 1)
+
+    def test_sin_pypdf_deja_de_enviar_tras_la_falla_de_la_impresora(self):
+        """Imprimiendo de a una, la primera falla de la impresora corta el resto."""
+        self.manager._printer.print_file.return_value = False
+        etiquetas = [(str(i), _pdf()) for i in range(3)]
+
+        with patch.object(self.impresora, "PdfWriter", None):
+            resultados = self.manager.print_batch(etiquetas, directorio=self.directorio.name)
+
+        self.assertEqual(resultados, {"0": False, "1": False, "2": False})
+        self.assertEqual(self.manager._printer.print_file.call_count, 1)
+
+    def test_raw_aisla_la_etiqueta_que_no_se_puede_convertir(self):
+        """Una ConversionRawError divide el lote; el resto se envía."""
+        from GestionAPI.common.etiquetas_raw import ConversionRawError
+
+        def trabajo_raw(clave, contenido):
+            if clave == "1":
+                raise ConversionRawError("PDF sin texto")
+            return contenido
+        self.manager._printer = MagicMock(spec=self.impresora.RawPrinter)
+        self.manager._printer.trabajo_raw.side_effect = trabajo_raw
+        self.manager._printer.enviar.return_value = True
+
+        resultados = self.manager.print_batch([(str(i), f"^XA{i}^XZ".encode()) for i in range(4)])
+
+        self.assertEqual(resultados, {"0": True, "1": False, "2": True, "3": True})
+        enviados = [llamada.args[0] for llamada in self.manager._printer.enviar.call_args_list]
+        self.assertEqual(enviados, [b"^XA0^XZ", b"^XA2^XZ^XA3^XZ"])
+
+    def test_raw_falla_de_envio_no_divide_el_lote(self):
+        """Si la impresora raw no responde, se intenta una sola conexión."""
+        self.manager._printer = MagicMock(spec=self.impresora.RawPrinter)
+        self.manager._printer.trabajo_raw.side_effect = lambda clave, contenido: contenido
+        self.manager._printer.enviar.return_value = False
+
+        resultados = self.manager.print_batch([(str(i), b"^XA^XZ") for i in range(4)])
+
+        self.assertEqual(resultados, {str(i): False for i in range(4)})
+        self.assertEqual(self.manager._printer.enviar.call_count, 1)
+
+
+class TestImpresionRaw(unittest.TestCase):
+    """Pruebas de RawPrinter contra un puerto 9100 simulado."""
+
+    def setUp(self):
+        modulos_win32 = {nombre: MagicMock() for nombre in ("win32print", "win32api", "win32ui")}
+        self._parche = patch.dict(sys.modules, modulos_win32)
+        self._parche.start()
+        self.impresora = importlib.import_module("GestionAPI.Andreani.impresora")
+        self.directorio = tempfile.TemporaryDirectory()
+
+        self.servidor = socket.create_server(("127.0.0.1", 0))
+        self.recibido = []
+        self._hilo = threading.Thread(target=self._atender, daemon=True)
+        self._hilo.start()
+
+    def tearDown(self):
+        self.servidor.close()
+        self._parche.stop()
+        sys.modules.pop("GestionAPI.Andreani.impresora", None)
+        self.directorio.cleanup()
+
+    def _atender(self):
+        conexion, _ = self.servidor.accept()
+        with conexion:
+            while datos := conexion.recv(4096):
+                self.recibido.append(datos)
+
+    def test_lote_raw_en_una_sola_conexion(self):
+        """Las etiquetas ya en ZPL se envían concatenadas, sin pasar por PDF."""
+        puerto = self.servidor.getsockname()[1]
+        manager = self.impresora.PrinterManager.__new__(self.impresora.PrinterManager)
+        manager._temporales = []
+        manager._printer = self.impresora.RawPrinter(
+            f"tcp://127.0.0.1:{puerto}", lenguaje="zpl", directorio_cache=self.directorio.name
+        )
+
+        resultados = manager.print_batch([("A", b"^XA^FDA^XZ"), ("B", b"^XA^FDB^XZ")])
+        self._hilo.join(timeout=5)
+
+        self.assertEqual(resultados, {"A": True, "B": True})
+        self.assertEqual(b"".join(self.recibido), b"^XA^FDA^XZ^XA^FDB^XZ")
+
+
+if __name__ == '__main__':
+    unittest.main()
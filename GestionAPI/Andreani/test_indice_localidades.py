@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+import unittest
+import sys
+import os
+import tempfile
+from unittest.mock import patch
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from GestionAPI.Andreani.indice_localidades import (
+    IndiceLocalidades,
+    construir_indice,
+    construir_indice_desde_data_arg,
+    RUTA_DATA_ARG
+)
+
+LOCALIDADES = [
+    {"idDeProvLocalidad": "1", "localidad": "SAN ISIDRO", "partido": "SAN ISIDRO",
+     "provincia": "BUENOS AIRES", "codigosPostales": ["1642", "1643"]},
+    {"idDeProvLocalidad": "2", "localidad": "BECCAR", "partido": "SAN ISIDRO",
+     "provincia": "BUENOS AIRES", "codigosPostales": ["1643"]},
+    {"idDeProvLocalidad": "3", "localidad": "SAN ISIDRO", "partido": "CAPITAL",
+     "provincia": "CATAMARCA", "codigosPostales": ["4700"]},
+]
+
+
+class TestIndiceLocalidades(unittest.TestCase):
+    """Pruebas del índice local de localidades."""
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.ruta = os.path.join(self.directorio.name, "localidades.sqlite")
+
+    def tearDown(self):
+        self.directorio.cleanup()
+
+    def test_busquedas(self):
+        """Código postal, provincias, localidades y códigos postales por provincia/localidad."""
+        construir_indice(LOCALIDADES, self.ruta)
+        indice = IndiceLocalidades(self.ruta)
+
+        self.assertEqual(indice.por_codigo_postal("1643"), LOCALIDADES[:2])
+        self.assertEqual(indice.por_codigo_postal("9999"), [])
+        self.assertEqual(indice.provincias(), ["BUENOS AIRES", "CATAMARCA"])
+        self.assertEqual(indice.localidades("BUENOS AIRES"), ["BECCAR", "SAN ISIDRO"])
+        # La misma localidad en otra provincia no mezcla sus códigos postales
+        self.assertEqual(indice.codigos_postales("BUENOS AIRES", "SAN ISIDRO"), ["1642", "1643"])
+        indice.cerrar()
+
+    def test_vencimiento_y_regeneracion(self):
+        """El índice vence según su TTL y se relee al regenerarse."""
+        indice = IndiceLocalidades(self.ruta, ttl=60)
+        self.assertFalse(indice.vigente())
+
+        construir_indice(LOCALIDADES[:1], self.ruta)
+        self.assertTrue(indice.vigente())
+        with patch('GestionAPI.Andreani.indice_localidades.time.time', return_value=indice.antiguedad_seg() + 1e12):
+            self.assertFalse(indice.vigente())
+
+        indice.cerrar()
+        construir_indice(LOCALIDADES, self.ruta)
+        self.assertEqual(len(indice.por_codigo_postal("1643")), 2)
+        indice.cerrar()
+
+    def test_equivalente_al_filtro_lineal_sobre_data_arg(self):
+        """Sobre data_arg.json devuelve lo mismo que el filtro lineal anterior."""
+        construir_indice_desde_data_arg(self.ruta)
+        indice = IndiceLocalidades(self.ruta)
+        with open(RUTA_DATA_ARG, encoding="utf-8") as f:
+            data_arg = json.load(f)
+
+        for codigo_postal in ("1644", "5590", "6660"):
+            esperado = [item for item in data_arg if codigo_postal in item["codigosPostales"]]
+            self.assertEqual(indice.por_codigo_postal(codigo_postal), esperado)
+        indice.cerrar()
+
+
+if __name__ == '__main__':
+    unittest.main()
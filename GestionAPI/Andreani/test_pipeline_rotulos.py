@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import asyncio
+import unittest
+import sys
+import os
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from GestionAPI.Andreani.pipeline_rotulos import imprimir_etiquetas_en_pipeline
+
+
+class TestPipelineRotulos(unittest.IsolatedAsyncioTestCase):
+    """Pruebas del pipeline descarga → impresión → IMP_ROT."""
+
+    async def asyncSetUp(self):
+        self.trabajos = []
+        self.lotes_imp_rot = []
+
+    def _imprimir_lote(self, etiquetas):
+        self.trabajos.append([nro_pedido for nro_pedido, _ in etiquetas])
+        return {nro_pedido: nro_pedido != "FALLA" for nro_pedido, _ in etiquetas}
+
+    def _marcar(self, nros_pedido):
+        self.lotes_imp_rot.append(list(nros_pedido))
+        return [True] * len(nros_pedido)
+
+    async def test_imprime_en_orden_de_llegada_y_marca_cada_trabajo(self):
+        """Cada trabajo lleva las etiquetas que ya llegaron, en orden de descarga, y se marca al terminar."""
+        demoras = {"A": 0.05, "B": 0.0, "C": 0.02}
+
+        async def obtener_etiqueta(agrupador):
+            await asyncio.sleep(demoras[agrupador])
+            return b"%PDF-" + agrupador.encode()
+
+        pedidos = [{"numeroPedido": p, "numeroAgrupador": p} for p in ("A", "B", "C")]
+        stats = await imprimir_etiquetas_en_pipeline(
+            pedidos, obtener_etiqueta, self._imprimir_lote, self._marcar, max_por_trabajo=1
+        )
+
+        self.assertEqual(self.trabajos, [["B"], ["C"], ["A"]])
+        self.assertEqual(self.lotes_imp_rot, [["B"], ["C"], ["A"]])
+        self.assertEqual(stats["impresos"], 3)
+
+    async def test_marca_imp_rot_antes_del_siguiente_trabajo(self):
+        """Si el proceso se corta, sólo puede quedar sin marcar el trabajo en curso."""
+        eventos = []
+
+        def imprimir_lote(etiquetas):
+            eventos.append(("imprimir", etiquetas[0][0]))
+            return {nro_pedido: True for nro_pedido, _ in etiquetas}
+
+        async def obtener_etiqueta(agrupador):
+            return b"%PDF-"
+
+        pedidos = [{"numeroPedido": p, "numeroAgrupador": p} for p in ("A", "B")]
+        await imprimir_etiquetas_en_pipeline(
+            pedidos, obtener_etiqueta, imprimir_lote,
+            lambda nros: eventos.append(("marcar", nros[0])) or [True] * len(nros), max_por_trabajo=1
+        )
+
+        self.assertEqual(eventos, [("imprimir", "A"), ("marcar", "A"), ("imprimir", "B"), ("marcar", "B")])
+
+    async def test_combina_etiquetas_disponibles_en_un_trabajo(self):
+        """Las etiquetas que esperan en la cola se imprimen juntas."""
+        async def obtener_etiqueta(agrupador):
+            return b"%PDF-"
+
+        pedidos = [{"numeroPedido": str(i), "numeroAgrupador": str(i)} for i in range(5)]
+        finalizados = []
+        stats = await imprimir_etiquetas_en_pipeline(
+            pedidos, obtener_etiqueta, self._imprimir_lote, self._marcar,
+            finalizar=lambda: finalizados.append(True)
+        )
+
+        self.assertEqual(self.trabajos, [["0", "1", "2", "3", "4"]])
+        self.assertEqual(self.lotes_imp_rot, [["0", "1", "2", "3", "4"]])
+        self.assertEqual((stats["impresos"], stats["trabajos"]), (5, 1))
+        self.assertEqual(finalizados, [True])
+
+    async def test_errores_no_marcan_imp_rot(self):
+        """Las etiquetas que no se descargan o no se imprimen no se marcan como impresas."""
+        async def obtener_etiqueta(agrupador):
+            return None if agrupador == "SIN_ETIQUETA" else b"%PDF-"
+
+        esperas = []
+        pedidos = [{"numeroPedido": p, "numeroAgrupador": p} for p in ("OK", "SIN_ETIQUETA", "FALLA")]
+        stats = await imprimir_etiquetas_en_pipeline(
+            pedidos, obtener_etiqueta, self._imprimir_lote, self._marcar,
+            esperar_spooler=lambda max_trabajos, timeout: esperas.append(max_trabajos) or True
+        )
+
+        self.assertEqual(self.lotes_imp_rot, [["OK"]])
+        self.assertEqual((stats["impresos"], stats["errores_descarga"], stats["errores_impresion"]), (1, 1, 1))
+        self.assertTrue(esperas)
+
+
+if __name__ == '__main__':
+    unittest.main()
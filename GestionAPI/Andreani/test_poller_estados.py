@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import unittest
+import sys
+import os
+from unittest.mock import AsyncMock
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from GestionAPI.common.rate_limiter import obtener_limitador
+from GestionAPI.Andreani.poller_estados import EscritorLotes, consultar_estados_concurrente
+
+
+class TestPollerEstados(unittest.IsolatedAsyncioTestCase):
+    """Pruebas del poller concurrente de estados (sin API ni base reales)."""
+
+    async def test_consulta_todos_y_escribe_por_lotes(self):
+        """Cada estado obtenido llega al escritor y se escribe en lotes del tamaño pedido."""
+        api = AsyncMock()
+        api.consultar_estado_envio.side_effect = lambda numero: (
+            None if numero == "S3" else {"estado": "En viaje", "estadoId": 5, "fechaEstado": "2026-01-01T10:00:00"}
+        )
+        lotes = []
+        escritor = EscritorLotes(lambda lote: lotes.append(list(lote)) or [True] * len(lote), tamano_lote=2)
+        envios = [{"nro_pedido": f"P{i}", "num_seguimiento": f"S{i}"} for i in range(5)]
+
+        escritor.iniciar()
+        sin_respuesta = await consultar_estados_concurrente(api, envios, escritor, concurrencia=3,
+                                                            solicitudes_por_segundo=1000)
+        resultados = await escritor.finalizar()
+
+        self.assertEqual([e["num_seguimiento"] for e in sin_respuesta], ["S3"])
+        self.assertEqual(len(resultados), 4)
+        self.assertTrue(all(exitoso for _, exitoso in resultados))
+        self.assertEqual([len(lote) for lote in lotes], [2, 2])
+        self.assertEqual(resultados[0][0]["estado_id"], 5)
+        self.assertEqual(api.consultar_estado_envio.await_count, 5)
+        # Los límites pedidos quedan en el limitador compartido que usa AndreaniAPI
+        limitador = obtener_limitador('andreani')
+        self.assertEqual((limitador.tasa, limitador.concurrencia), (1000, 3))
+
+    async def test_error_de_escritura_marca_el_lote_fallido(self):
+        """Si la escritura del lote lanza una excepción, sus filas quedan como fallidas."""
+        def escribir(lote):
+            raise RuntimeError("base caída")
+
+        escritor = EscritorLotes(escribir, tamano_lote=10)
+        escritor.iniciar()
+        await escritor.agregar({"nro_pedido": "P1"})
+        resultados = await escritor.finalizar()
+
+        self.assertEqual(resultados, [({"nro_pedido": "P1"}, False)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -12,20 +12,30 @@ import logging
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 
+from GestionAPI.common.rate_limiter import LimitadorProveedor, obtener_limitador
+
 logger = logging.getLogger('hasar_conteo')
 
 class HasarAPIClient:
     """
     Cliente API asíncrono para interactuar con las APIs de HasarServicios.
     Maneja autenticación con Bearer token y consultas de datos de conteo de personas.
+    Las solicitudes pasan por el limitador del proveedor (common/rate_limiter.py).
     """
+
+    PROVEEDOR = 'hasar'
     
-    def __init__(self):
+    def __init__(self, limitador: Optional[LimitadorProveedor] = None):
         """
         Inicializa el cliente API de HasarServicios.
         Las URLs y tokens se pasan dinámicamente en cada llamada desde la configuración de BD.
+
+        Args:
+            limitador (LimitadorProveedor, optional): Limitador de solicitudes. Por defecto
+                el compartido por todos los clientes de Hasar.
         """
         self._session = None
+        self._limitador = limitador
     
     async def _get_session(self):
         """
@@ -75,11 +85,13 @@ class HasarAPIClient:
             'Content-Type': 'application/json'
         }
         
+        limitador = self._limitador or obtener_limitador(self.PROVEEDOR)
         for intento in range(max_retries):
             try:
                 session = await self._get_session()
                 
-                async with session.get(url, headers=headers) as response:
+                async with limitador, session.get(url, headers=headers) as response:
+                    limitador.registrar_respuesta(response.status, response.headers.get('Retry-After'))
                     
                     if response.status == 200:
                         data = await response.json()
@@ -99,16 +111,13 @@ class HasarAPIClient:
                         logger.error(f"Endpoint no encontrado (404): {url}")
                         return None  # No reintentar en endpoints no encontrados
                     
-                    elif response.status == 429:
-                        # Rate limit: respetar Retry-After si viene en el header, sino backoff propio
-                        retry_after = response.headers.get('Retry-After')
-                        espera = int(retry_after) if retry_after and retry_after.isdigit() else 5 * (2 ** intento)
+                    elif response.status in (429, 503):
+                        # Rate limit: el limitador respeta Retry-After (o aplica su backoff) antes del próximo intento
                         if intento < max_retries - 1:
-                            logger.warning(f"Rate limit (429) en {url}. Reintentando en {espera}s (intento {intento + 1}/{max_retries})")
-                            await asyncio.sleep(espera)
+                            logger.warning(f"Rate limit ({response.status}) en {url}. Reintentando (intento {intento + 1}/{max_retries})")
                             continue
                         else:
-                            logger.error(f"Rate limit (429) persistente después de {max_retries} intentos: {url}")
+                            logger.error(f"Rate limit ({response.status}) persistente después de {max_retries} intentos: {url}")
                             return None
 
                     elif response.status >= 500:
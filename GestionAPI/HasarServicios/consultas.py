@@ -72,6 +72,76 @@ WHEN NOT MATCHED THEN
     VALUES (source.FECHA, source.FECHA_HORA, source.NRO_SUCURS, source.INGRESOS, source.MERODEO, GETDATE());
 """
 
+# Tablas temporales (de sesión) usadas como staging para los MERGE por lote
+STAGING_INGRESOS = "#HASAR_STAGING_INGRESOS"
+STAGING_INGRESOS_HORA = "#HASAR_STAGING_INGRESOS_HORA"
+
+# Copian los tipos de las columnas de la tabla destino
+QRY_CREAR_STAGING_INGRESOS = f"""
+SELECT TOP 0 FECHA, NRO_SUCURS, INGRESOS, MERODEO
+INTO {STAGING_INGRESOS} FROM BI_T_INGRESOS_SUCURSALES
+"""
+
+QRY_CREAR_STAGING_INGRESOS_HORA = f"""
+SELECT TOP 0 FECHA, FECHA_HORA, NRO_SUCURS, INGRESOS, MERODEO
+INTO {STAGING_INGRESOS_HORA} FROM BI_T_INGRESOS_SUCURSALES
+"""
+
+QRY_INSERT_STAGING_INGRESOS = f"""
+INSERT INTO {STAGING_INGRESOS} (FECHA, NRO_SUCURS, INGRESOS, MERODEO) VALUES (?, ?, ?, ?)
+"""
+
+QRY_INSERT_STAGING_INGRESOS_HORA = f"""
+INSERT INTO {STAGING_INGRESOS_HORA} (FECHA, FECHA_HORA, NRO_SUCURS, INGRESOS, MERODEO) VALUES (?, ?, ?, ?, ?)
+"""
+
+# MERGE set-based desde la temporal; devuelve (insertados, actualizados)
+QRY_MERGE_INGRESOS_LOTE = f"""
+SET NOCOUNT ON;
+DECLARE @acciones TABLE (ACCION NVARCHAR(10));
+
+MERGE INTO BI_T_INGRESOS_SUCURSALES AS target
+USING {STAGING_INGRESOS} AS source
+ON target.FECHA = source.FECHA AND target.NRO_SUCURS = source.NRO_SUCURS AND target.FECHA_HORA IS NULL
+WHEN MATCHED THEN
+    UPDATE SET
+        INGRESOS = source.INGRESOS,
+        MERODEO = source.MERODEO,
+        CREATED_AT = GETDATE()
+WHEN NOT MATCHED THEN
+    INSERT (FECHA, NRO_SUCURS, INGRESOS, MERODEO, CREATED_AT)
+    VALUES (source.FECHA, source.NRO_SUCURS, source.INGRESOS, source.MERODEO, GETDATE())
+OUTPUT $action INTO @acciones;
+
+SELECT
+    SUM(CASE WHEN ACCION = 'INSERT' THEN 1 ELSE 0 END),
+    SUM(CASE WHEN ACCION = 'UPDATE' THEN 1 ELSE 0 END)
+FROM @acciones;
+"""
+
+QRY_MERGE_INGRESOS_HORA_LOTE = f"""
+SET NOCOUNT ON;
+DECLARE @acciones TABLE (ACCION NVARCHAR(10));
+
+MERGE INTO BI_T_INGRESOS_SUCURSALES AS target
+USING {STAGING_INGRESOS_HORA} AS source
+ON target.FECHA_HORA = source.FECHA_HORA AND target.NRO_SUCURS = source.NRO_SUCURS
+WHEN MATCHED THEN
+    UPDATE SET
+        INGRESOS = source.INGRESOS,
+        MERODEO = source.MERODEO,
+        CREATED_AT = GETDATE()
+WHEN NOT MATCHED THEN
+    INSERT (FECHA, FECHA_HORA, NRO_SUCURS, INGRESOS, MERODEO, CREATED_AT)
+    VALUES (source.FECHA, source.FECHA_HORA, source.NRO_SUCURS, source.INGRESOS, source.MERODEO, GETDATE())
+OUTPUT $action INTO @acciones;
+
+SELECT
+    SUM(CASE WHEN ACCION = 'INSERT' THEN 1 ELSE 0 END),
+    SUM(CASE WHEN ACCION = 'UPDATE' THEN 1 ELSE 0 END)
+FROM @acciones;
+"""
+
 # Query para verificar datos existentes en un rango de fechas (útil para testing)
 QRY_VERIFICAR_DATOS = """
 SELECT 
@@ -17,18 +17,36 @@ sys.path.insert(0, project_root)
 import logging
 from datetime import datetime
 from GestionAPI.common.conexion import Conexion
+from GestionAPI.common.async_db import AsyncDBMixin
+from GestionAPI.common.staging import aplicar_con_staging
 from GestionAPI.common.credenciales import POWER_BI_CONTROL, POWER_BI_CONTROL_FRANQUICIAS
 from GestionAPI.HasarServicios.consultas import (
     QRY_OBTENER_CONFIG,
     QRY_CONTAR_TOTAL,
     QRY_MERGE_INGRESOS,
     QRY_MERGE_INGRESOS_HORA,
-    QRY_VERIFICAR_DATOS
+    QRY_VERIFICAR_DATOS,
+    STAGING_INGRESOS,
+    STAGING_INGRESOS_HORA,
+    QRY_CREAR_STAGING_INGRESOS,
+    QRY_CREAR_STAGING_INGRESOS_HORA,
+    QRY_INSERT_STAGING_INGRESOS,
+    QRY_INSERT_STAGING_INGRESOS_HORA,
+    QRY_MERGE_INGRESOS_LOTE,
+    QRY_MERGE_INGRESOS_HORA_LOTE
 )
 
 logger = logging.getLogger(__name__)
 
-class HasarDB:
+# Filas por executemany al cargar las tablas temporales
+CHUNK_SIZE_STAGING = 1000
+
+
+def _stats_vacias():
+    return {'insertados': 0, 'actualizados': 0, 'por_fila': 0, 'errores': 0}
+
+
+class HasarDB(AsyncDBMixin):
     """
     Clase para manejar operaciones de base de datos del módulo HasarServicios.
     Soporta conexiones dinámicas a múltiples bases de datos.
@@ -219,6 +237,109 @@ class HasarDB:
             logger.error(f"Error al guardar datos horarios en {database_name}: {e}")
             return False
 
+    def upsert_ingresos_lote(self, database_name, filas):
+        """
+        Inserta o actualiza muchos registros DIARIOS con un único MERGE set-based:
+        las filas se cargan en una tabla temporal con fast_executemany y se
+        combinan con BI_T_INGRESOS_SUCURSALES en una sola transacción.
+        Si el lote falla, se reintenta fila por fila con upsert_ingresos.
+
+        Args:
+            database_name (str): Nombre de la base de datos donde insertar
+            filas (list): Tuplas (fecha, nro_sucurs, ingresos, merodeo)
+
+        Returns:
+            dict: Conteos insertados, actualizados, por_fila (guardados en el reintento
+                fila por fila, que no distingue inserción de actualización) y errores
+        """
+        filas = [(fecha, nro_sucurs, ingresos if ingresos is not None else 0, merodeo)
+                 for fecha, nro_sucurs, ingresos, merodeo in filas]
+        stats = self._merge_lote(
+            database_name, filas, STAGING_INGRESOS, QRY_CREAR_STAGING_INGRESOS,
+            QRY_INSERT_STAGING_INGRESOS, QRY_MERGE_INGRESOS_LOTE, "diarios"
+        )
+        if stats is not None:
+            return stats
+
+        logger.warning(f"Reintentando fila por fila los {len(filas)} registros diarios de {database_name}")
+        stats = _stats_vacias()
+        for fecha, nro_sucurs, ingresos, merodeo in filas:
+            if self.upsert_ingresos(database_name, fecha, nro_sucurs, ingresos, merodeo):
+                stats['por_fila'] += 1  # El MERGE por fila no distingue inserción de actualización
+            else:
+                stats['errores'] += 1
+        return stats
+
+    def upsert_ingresos_hora_lote(self, database_name, filas):
+        """
+        Inserta o actualiza muchos registros HORARIOS con un único MERGE set-based
+        (ver upsert_ingresos_lote). Si el lote falla, se reintenta fila por fila.
+
+        Args:
+            database_name (str): Nombre de la base de datos donde insertar
+            filas (list): Tuplas (fecha, fecha_hora, nro_sucurs, ingresos, merodeo)
+
+        Returns:
+            dict: Conteos insertados, actualizados, por_fila (guardados en el reintento
+                fila por fila, que no distingue inserción de actualización) y errores
+        """
+        filas = [(fecha, fecha_hora, nro_sucurs, ingresos if ingresos is not None else 0, merodeo)
+                 for fecha, fecha_hora, nro_sucurs, ingresos, merodeo in filas]
+        stats = self._merge_lote(
+            database_name, filas, STAGING_INGRESOS_HORA, QRY_CREAR_STAGING_INGRESOS_HORA,
+            QRY_INSERT_STAGING_INGRESOS_HORA, QRY_MERGE_INGRESOS_HORA_LOTE, "horarios"
+        )
+        if stats is not None:
+            return stats
+
+        logger.warning(f"Reintentando fila por fila los {len(filas)} registros horarios de {database_name}")
+        stats = _stats_vacias()
+        for fecha, fecha_hora, nro_sucurs, ingresos, merodeo in filas:
+            if self.upsert_ingresos_hora(database_name, fecha, fecha_hora, nro_sucurs, ingresos, merodeo):
+                stats['por_fila'] += 1
+            else:
+                stats['errores'] += 1
+        return stats
+
+    def _merge_lote(self, database_name, filas, staging, qry_crear, qry_insert, qry_merge, descripcion):
+        """
+        Carga `filas` en la tabla temporal `staging` y ejecuta el MERGE, todo en una
+        transacción sobre una única conexión.
+
+        Returns:
+            dict con los conteos del MERGE, o None si el lote falló.
+        """
+        if not filas:
+            return _stats_vacias()
+
+        conexion = self._get_connection(database_name)
+        if not conexion:
+            return None
+        cursor = conexion.conectar()
+        if not cursor:
+            logger.error(f"No se pudo obtener cursor para {database_name}")
+            return None
+
+        def merge(cursor):
+            cursor.execute(qry_merge)
+            return cursor.fetchone()
+
+        try:
+            insertados, actualizados = aplicar_con_staging(
+                cursor, conexion.connection, staging, qry_crear, qry_insert, filas, merge,
+                tamano_lote=CHUNK_SIZE_STAGING
+            )
+            stats = dict(_stats_vacias(), insertados=insertados or 0, actualizados=actualizados or 0)
+            logger.info(f"MERGE de {len(filas)} registros {descripcion} en {database_name}: "
+                        f"{stats['insertados']} insertados, {stats['actualizados']} actualizados")
+            return stats
+        except Exception as e:
+            logger.error(f"Error en el MERGE por lote de registros {descripcion} en {database_name}: {e}")
+            return None
+        finally:
+            cursor.close()
+            conexion.connection.close()
+
     def verificar_datos_guardados(self, database_name, fecha_inicio, fecha_fin):
         """
         Verifica los datos guardados en un rango de fechas (útil para testing).
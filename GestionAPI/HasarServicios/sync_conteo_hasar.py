@@ -28,151 +28,153 @@ from GestionAPI.HasarServicios.api_hasar import HasarAPIClient
 logger = setup_logger('hasar_conteo', log_path=os.path.join(os.path.dirname(__file__), 'logs', 'app.log'))
 
 
+async def _obtener_dashboard(api_client: HasarAPIClient, config: Dict[str, Any]):
+    """
+    Consulta la API de un dashboard.
+
+    Returns:
+        Tupla (nombre_dashboard, respuesta, error); error es None si la llamada no lanzó excepción.
+    """
+    nombre_dashboard = config['NOMBRE_DASHBOARD']
+    try:
+        return nombre_dashboard, await api_client.obtener_datos(config['API'], config['Token']), None
+    except Exception as e:
+        return nombre_dashboard, None, e
+
+
+def _acumular_diaria(api_client, nombre_dashboard, respuesta, fecha_inicio, fecha_fin, datos_por_fecha):
+    """Agrega los valores de una API diaria (ingresos o merodeo) al acumulado por fecha."""
+    datos_extraidos = api_client.extraer_datos(respuesta)
+
+    es_ingreso = 'ingreso' in nombre_dashboard.lower()
+    es_merodeo = 'merodeo' in nombre_dashboard.lower()
+
+    for item in datos_extraidos:
+        fecha_obj = api_client.parsear_fecha(item['fecha'])
+
+        if not fecha_obj:
+            continue
+
+        if not (fecha_inicio <= fecha_obj <= fecha_fin):
+            continue
+
+        fecha_key = fecha_obj.date()
+
+        if es_ingreso:
+            datos_por_fecha[fecha_key]['ingresos'] = item['valor']
+        elif es_merodeo:
+            datos_por_fecha[fecha_key]['merodeo'] = item['valor']
+
+
+def _acumular_horaria(api_client, nombre_dashboard, respuesta, fecha_inicio, fecha_fin, datos_por_fecha_hora):
+    """Agrega los valores de una API horaria (ingresos o merodeo) al acumulado por fecha y hora."""
+    datos_extraidos = api_client.extraer_datos(respuesta)
+
+    es_ingreso = 'merodeo' not in nombre_dashboard.lower()
+    es_merodeo = 'merodeo' in nombre_dashboard.lower()
+
+    for item in datos_extraidos:
+        fecha_hora_obj = api_client.parsear_fecha_hora(item['fecha'])
+
+        if not fecha_hora_obj:
+            continue
+
+        # Filtrar por rango de fechas (comparar solo la porción date)
+        if not (fecha_inicio <= fecha_hora_obj <= fecha_fin):
+            continue
+
+        if es_ingreso:
+            datos_por_fecha_hora[fecha_hora_obj]['ingresos'] = item['valor']
+        elif es_merodeo:
+            datos_por_fecha_hora[fecha_hora_obj]['merodeo'] = item['valor']
+
+
 async def procesar_sucursal(
     api_client: HasarAPIClient, 
-    db: HasarDB, 
     nro_sucursal: int, 
     configs_sucursal: List[Dict[str, Any]],
     fecha_inicio: datetime,
     fecha_fin: datetime
 ) -> Dict[str, Any]:
     """
-    Procesa todas las APIs de una sucursal de forma concurrente.
+    Procesa todas las APIs de una sucursal de forma concurrente y arma las filas
+    a guardar. La escritura se hace después, en un MERGE por base de datos (ver main).
     
     Args:
         api_client: Cliente API configurado
-        db: Instancia de HasarDB
         nro_sucursal: Número de sucursal a procesar
         configs_sucursal: Lista de configuraciones de APIs para esta sucursal
         fecha_inicio: Fecha inicial del rango a sincronizar
         fecha_fin: Fecha final del rango a sincronizar
         
     Returns:
-        Dict con estadísticas del procesamiento
+        Dict con estadísticas del procesamiento, la base destino y las filas
+        diarias (fecha, nro_sucurs, ingresos, merodeo) y horarias
+        (fecha, fecha_hora, nro_sucurs, ingresos, merodeo)
     """
+    # Determinar la base de datos destino (todas las APIs de la sucursal usan la misma BD)
     estadisticas = {
         'sucursal': nro_sucursal,
+        'database': configs_sucursal[0]['DATA_BASE'],
         'apis_procesadas': 0,
         'apis_fallidas': 0,
-        'registros_guardados': 0,
-        'registros_horarios_guardados': 0,
+        'filas_diarias': [],
+        'filas_horarias': [],
         'errores': []
     }
 
-    # Determinar la base de datos destino (todas las APIs de la sucursal usan la misma BD)
-    database_name = configs_sucursal[0]['DATA_BASE']
-
-    # Llamar todas las APIs de la sucursal en paralelo
-    tareas_api = []
-    for config in configs_sucursal:
-        tarea = api_client.obtener_datos(config['API'], config['Token'])
-        tareas_api.append((config['NOMBRE_DASHBOARD'], tarea))
-
-    # Esperar a que todas las APIs respondan
-    resultados_apis = {}
-    for nombre_dashboard, tarea in tareas_api:
-        try:
-            respuesta = await tarea
-            if respuesta:
-                resultados_apis[nombre_dashboard] = respuesta
-                estadisticas['apis_procesadas'] += 1
-            else:
-                estadisticas['apis_fallidas'] += 1
-                estadisticas['errores'].append(f"API {nombre_dashboard}: sin datos")
-        except Exception as e:
-            logger.error(f"Error al procesar API '{nombre_dashboard}' de sucursal {nro_sucursal}: {e}")
-            estadisticas['apis_fallidas'] += 1
-            estadisticas['errores'].append(f"API {nombre_dashboard}: {str(e)}")
-
-    if not resultados_apis:
-        return estadisticas
-
-    # Separar APIs diarias de horarias por nombre de dashboard
-    # Horarias: contienen "x hora" en el nombre (ej: "IN x HORA", "Merodeo MES X hora")
-    apis_diarias = {k: v for k, v in resultados_apis.items() if 'x hora' not in k.lower()}
-    apis_horarias = {k: v for k, v in resultados_apis.items() if 'x hora' in k.lower()}
+    # Llamar todas las APIs de la sucursal en paralelo (el límite por host lo ponen
+    # el TCPConnector y el limitador del cliente) y procesar cada respuesta apenas llega
+    tareas_api = [
+        asyncio.create_task(_obtener_dashboard(api_client, config))
+        for config in configs_sucursal
+    ]
 
-    # --- Procesar APIs DIARIAS ---
     datos_por_fecha = defaultdict(lambda: {'ingresos': None, 'merodeo': None})
-
-    for nombre_dashboard, respuesta in apis_diarias.items():
-        datos_extraidos = api_client.extraer_datos(respuesta)
-
-        es_ingreso = 'ingreso' in nombre_dashboard.lower()
-        es_merodeo = 'merodeo' in nombre_dashboard.lower()
-
-        for item in datos_extraidos:
-            fecha_obj = api_client.parsear_fecha(item['fecha'])
-
-            if not fecha_obj:
-                continue
-
-            if not (fecha_inicio <= fecha_obj <= fecha_fin):
-                continue
-
-            fecha_key = fecha_obj.date()
-
-            if es_ingreso:
-                datos_por_fecha[fecha_key]['ingresos'] = item['valor']
-            elif es_merodeo:
-                datos_por_fecha[fecha_key]['merodeo'] = item['valor']
-
-    for fecha, valores in datos_por_fecha.items():
-        try:
-            exito = db.upsert_ingresos(
-                database_name=database_name,
-                fecha=fecha,
-                nro_sucurs=nro_sucursal,
-                ingresos=valores['ingresos'],
-                merodeo=valores['merodeo']
-            )
-            if exito:
-                estadisticas['registros_guardados'] += 1
-        except Exception as e:
-            logger.error(f"Error al guardar datos diarios de sucursal {nro_sucursal}, fecha {fecha}: {e}")
-            estadisticas['errores'].append(f"Diario {fecha}: {str(e)}")
-
-    # --- Procesar APIs HORARIAS ---
     datos_por_fecha_hora = defaultdict(lambda: {'ingresos': None, 'merodeo': None})
 
-    for nombre_dashboard, respuesta in apis_horarias.items():
-        datos_extraidos = api_client.extraer_datos(respuesta)
-
-        es_ingreso = 'merodeo' not in nombre_dashboard.lower()
-        es_merodeo = 'merodeo' in nombre_dashboard.lower()
-
-        for item in datos_extraidos:
-            fecha_hora_obj = api_client.parsear_fecha_hora(item['fecha'])
+    for tarea in asyncio.as_completed(tareas_api):
+        nombre_dashboard, respuesta, error = await tarea
+        if error is not None:
+            logger.error(f"Error al procesar API '{nombre_dashboard}' de sucursal {nro_sucursal}: {error}")
+            estadisticas['apis_fallidas'] += 1
+            estadisticas['errores'].append(f"API {nombre_dashboard}: {str(error)}")
+            continue
+        if not respuesta:
+            estadisticas['apis_fallidas'] += 1
+            estadisticas['errores'].append(f"API {nombre_dashboard}: sin datos")
+            continue
 
-            if not fecha_hora_obj:
-                continue
+        estadisticas['apis_procesadas'] += 1
+        # Horarias: contienen "x hora" en el nombre (ej: "IN x HORA", "Merodeo MES X hora")
+        if 'x hora' in nombre_dashboard.lower():
+            _acumular_horaria(api_client, nombre_dashboard, respuesta, fecha_inicio, fecha_fin, datos_por_fecha_hora)
+        else:
+            _acumular_diaria(api_client, nombre_dashboard, respuesta, fecha_inicio, fecha_fin, datos_por_fecha)
+
+    estadisticas['filas_diarias'] = [
+        (fecha, nro_sucursal, valores['ingresos'], valores['merodeo'])
+        for fecha, valores in datos_por_fecha.items()
+    ]
+    estadisticas['filas_horarias'] = [
+        (fecha_hora.date(), fecha_hora, nro_sucursal, valores['ingresos'], valores['merodeo'])
+        for fecha_hora, valores in datos_por_fecha_hora.items()
+    ]
+    return estadisticas
 
-            # Filtrar por rango de fechas (comparar solo la porción date)
-            if not (fecha_inicio <= fecha_hora_obj <= fecha_fin):
-                continue
 
-            if es_ingreso:
-                datos_por_fecha_hora[fecha_hora_obj]['ingresos'] = item['valor']
-            elif es_merodeo:
-                datos_por_fecha_hora[fecha_hora_obj]['merodeo'] = item['valor']
-
-    for fecha_hora, valores in datos_por_fecha_hora.items():
-        try:
-            exito = db.upsert_ingresos_hora(
-                database_name=database_name,
-                fecha=fecha_hora.date(),
-                fecha_hora=fecha_hora,
-                nro_sucurs=nro_sucursal,
-                ingresos=valores['ingresos'],
-                merodeo=valores['merodeo']
-            )
-            if exito:
-                estadisticas['registros_horarios_guardados'] += 1
-        except Exception as e:
-            logger.error(f"Error al guardar datos horarios de sucursal {nro_sucursal}, fecha_hora {fecha_hora}: {e}")
-            estadisticas['errores'].append(f"Horario {fecha_hora}: {str(e)}")
+def guardar_base(db: HasarDB, database_name: str, filas_diarias: list, filas_horarias: list) -> Dict[str, Any]:
+    """
+    Guarda todas las filas de una base de datos con un MERGE por granularidad.
+    Es bloqueante: se ejecuta con db.en_hilo para no frenar el event loop.
 
-    return estadisticas
+    Returns:
+        Dict con los conteos de cada MERGE ('diarios' y 'horarios')
+    """
+    return {
+        'diarios': db.upsert_ingresos_lote(database_name, filas_diarias),
+        'horarios': db.upsert_ingresos_hora_lote(database_name, filas_horarias),
+    }
 
 
 async def main():
@@ -191,11 +193,11 @@ async def main():
         db = HasarDB()
         api_client = HasarAPIClient()
         
-        # Obtener estadísticas de configuración
-        stats_config = db.obtener_estadisticas_config()
-        
-        # Obtener configuración de sucursales activas
-        configuraciones = db.obtener_configuracion_sucursales()
+        # Obtener estadísticas y configuración de sucursales activas (en paralelo)
+        stats_config, configuraciones = await asyncio.gather(
+            db.aio.obtener_estadisticas_config(),
+            db.aio.obtener_configuracion_sucursales()
+        )
         
         if not configuraciones:
             logger.error("No hay sucursales activas configuradas")
@@ -215,7 +217,6 @@ async def main():
         for nro_sucursal, configs in configs_por_sucursal.items():
             tarea = procesar_sucursal(
                 api_client=api_client,
-                db=db,
                 nro_sucursal=nro_sucursal,
                 configs_sucursal=configs,
                 fecha_inicio=datetime.combine(fecha_inicio, datetime.min.time()),
@@ -226,13 +227,14 @@ async def main():
         # Esperar a que todas las sucursales se procesen
         resultados = await asyncio.gather(*tareas_sucursales, return_exceptions=True)
         
-        # Consolidar estadísticas
+        # Consolidar estadísticas y agrupar las filas por base de datos destino
         total_apis_procesadas = 0
         total_apis_fallidas = 0
-        total_registros_guardados = 0
-        total_registros_horarios_guardados = 0
+        totales = {granularidad: {'insertados': 0, 'actualizados': 0, 'por_fila': 0}
+                   for granularidad in ('diarios', 'horarios')}
         sucursales_exitosas = 0
         sucursales_con_errores = 0
+        filas_por_base = defaultdict(lambda: {'diarias': [], 'horarias': [], 'sucursales': []})
 
         for resultado in resultados:
             if isinstance(resultado, Exception):
@@ -241,14 +243,36 @@ async def main():
             elif isinstance(resultado, dict):
                 total_apis_procesadas += resultado.get('apis_procesadas', 0)
                 total_apis_fallidas += resultado.get('apis_fallidas', 0)
-                total_registros_guardados += resultado.get('registros_guardados', 0)
-                total_registros_horarios_guardados += resultado.get('registros_horarios_guardados', 0)
 
-                if resultado.get('registros_guardados', 0) > 0 or resultado.get('registros_horarios_guardados', 0) > 0:
-                    sucursales_exitosas += 1
+                if resultado['filas_diarias'] or resultado['filas_horarias']:
+                    destino = filas_por_base[resultado['database']]
+                    destino['diarias'].extend(resultado['filas_diarias'])
+                    destino['horarias'].extend(resultado['filas_horarias'])
+                    destino['sucursales'].append(resultado['sucursal'])
                 if resultado.get('errores'):
                     sucursales_con_errores += 1
 
+        # Un MERGE por base y granularidad, en el executor de la base (las bases se escriben en paralelo)
+        bases = list(filas_por_base)
+        guardados = await asyncio.gather(*(
+            db.en_hilo(guardar_base, db, base, filas_por_base[base]['diarias'], filas_por_base[base]['horarias'])
+            for base in bases
+        ), return_exceptions=True)
+
+        for base, guardado in zip(bases, guardados):
+            if isinstance(guardado, Exception):
+                logger.error(f"Error al guardar datos en {base}: {guardado}")
+                sucursales_con_errores += len(filas_por_base[base]['sucursales'])
+                continue
+            for granularidad, total in totales.items():
+                for clave in total:
+                    total[clave] += guardado[granularidad][clave]
+            if guardado['diarios']['errores'] or guardado['horarios']['errores']:
+                logger.error(f"{base}: {guardado['diarios']['errores']} registros diarios y "
+                             f"{guardado['horarios']['errores']} horarios no se pudieron guardar")
+            else:
+                sucursales_exitosas += len(filas_por_base[base]['sucursales'])
+
         # Cerrar sesión HTTP
         await api_client.close()
 
@@ -258,12 +282,13 @@ async def main():
         logger.info("RESUMEN")
         logger.info("=" * 80)
         logger.info(f"Sucursales procesadas: {sucursales_exitosas} | Con errores: {sucursales_con_errores}")
-        logger.info(f"Registros diarios actualizados: {total_registros_guardados}")
-        logger.info(f"Registros horarios actualizados: {total_registros_horarios_guardados}")
+        for granularidad, total in totales.items():
+            logger.info(f"Registros {granularidad}: {total['insertados']} insertados, "
+                        f"{total['actualizados']} actualizados, {total['por_fila']} guardados fila por fila")
         logger.info(f"Duración: {duracion.total_seconds():.1f} segundos")
         logger.info("=" * 80)
 
-        total_guardados = total_registros_guardados + total_registros_horarios_guardados
+        total_guardados = sum(sum(total.values()) for total in totales.values())
         if total_guardados > 0:
             logger.info("✓ Sincronización completada exitosamente")
         else:
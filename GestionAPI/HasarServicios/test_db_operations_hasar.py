@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import unittest
+import sys
+import os
+from datetime import date, datetime
+from unittest.mock import patch
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from GestionAPI.common.mock_db import conexion_mock, registro_de_llamadas, sentencias
+from GestionAPI.HasarServicios.consultas import (
+    STAGING_INGRESOS,
+    STAGING_INGRESOS_HORA,
+    QRY_INSERT_STAGING_INGRESOS,
+    QRY_MERGE_INGRESOS_LOTE
+)
+from GestionAPI.HasarServicios.db_operations_hasar import HasarDB
+
+BASE = 'BASE_SUC'
+
+
+def _filas_diarias(cantidad):
+    return [(date(2026, 4, 6), sucursal, 100 + sucursal, None) for sucursal in range(cantidad)]
+
+
+class TestMergeLote(unittest.TestCase):
+    """Pruebas del guardado de ingresos diarios y horarios por lote sobre un cursor Mock."""
+
+    def setUp(self):
+        self.db = HasarDB()
+        self.conexion, self.raw, self.cursor = conexion_mock(BASE)
+        # Orden entre las sentencias del cursor y la devolución de la conexión al pool
+        self.orden = registro_de_llamadas(execute=self.cursor.execute, close=self.raw.close)
+        patcher = patch.object(HasarDB, '_get_connection', return_value=self.conexion)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _drop_antes_de_devolver(self):
+        """Índices del último DROP de la temporal y de la devolución de la conexión al pool."""
+        llamadas = self.orden.mock_calls
+        drops = [i for i, llamada in enumerate(llamadas)
+                 if llamada[0] == 'execute' and 'DROP TABLE' in llamada.args[0]]
+        cierres = [i for i, llamada in enumerate(llamadas) if llamada[0] == 'close']
+        return drops, cierres
+
+    @patch('GestionAPI.HasarServicios.db_operations_hasar.CHUNK_SIZE_STAGING', 2)
+    def test_crea_staging_carga_por_bloques_y_hace_merge(self):
+        self.cursor.fetchone.return_value = (3, 2)
+        filas = _filas_diarias(5)
+
+        stats = self.db.upsert_ingresos_lote(BASE, filas)
+
+        self.assertEqual(stats, {'insertados': 3, 'actualizados': 2, 'por_fila': 0, 'errores': 0})
+        self.assertTrue(self.cursor.fast_executemany)
+        ejecutadas = sentencias(self.cursor)
+        self.assertTrue(any(f"INTO {STAGING_INGRESOS} FROM" in sql for sql in ejecutadas))
+        self.assertIn(QRY_MERGE_INGRESOS_LOTE, ejecutadas)
+        lotes = [llamada.args for llamada in self.cursor.executemany.call_args_list]
+        self.assertEqual(lotes, [(QRY_INSERT_STAGING_INGRESOS, filas[0:2]),
+                                 (QRY_INSERT_STAGING_INGRESOS, filas[2:4]),
+                                 (QRY_INSERT_STAGING_INGRESOS, filas[4:5])])
+        self.raw.commit.assert_called_once()
+
+    def test_ingresos_nulos_se_cargan_como_cero(self):
+        """Igual que upsert_ingresos: INGRESOS NULL se guarda 0 y MERODEO queda NULL."""
+        self.cursor.fetchone.return_value = (1, 0)
+
+        self.db.upsert_ingresos_lote(BASE, [(date(2026, 4, 6), 7, None, None)])
+
+        self.assertEqual(self.cursor.executemany.call_args.args[1], [(date(2026, 4, 6), 7, 0, None)])
+
+    def test_conteos_nulos_sin_acciones(self):
+        """Si el MERGE no hizo nada, SUM devuelve NULL y los conteos quedan en cero."""
+        self.cursor.fetchone.return_value = (None, None)
+
+        stats = self.db.upsert_ingresos_hora_lote(
+            BASE, [(date(2026, 4, 6), datetime(2026, 4, 6, 13), 7, 40, 150)])
+
+        self.assertEqual(stats, {'insertados': 0, 'actualizados': 0, 'por_fila': 0, 'errores': 0})
+        self.assertTrue(any(f"INTO {STAGING_INGRESOS_HORA} FROM" in sql for sql in sentencias(self.cursor)))
+
+    def test_lote_vacio_no_abre_conexion(self):
+        stats = self.db.upsert_ingresos_lote(BASE, [])
+
+        self.assertEqual(stats, {'insertados': 0, 'actualizados': 0, 'por_fila': 0, 'errores': 0})
+        self.conexion._pool.adquirir.assert_not_called()
+
+    def test_temporal_se_elimina_antes_de_devolver_la_conexion(self):
+        self.cursor.fetchone.return_value = (1, 0)
+
+        self.db.upsert_ingresos_lote(BASE, _filas_diarias(1))
+
+        drops, cierres = self._drop_antes_de_devolver()
+        self.assertEqual(len(cierres), 1)
+        self.assertTrue(drops and drops[-1] < cierres[0])
+
+    def test_lote_fallido_elimina_temporal_y_devuelve_none(self):
+        """Si el lote falla se revierte, se elimina la temporal y luego se devuelve la conexión."""
+        self.cursor.executemany.side_effect = Exception("String or binary data would be truncated")
+
+        stats = self.db._merge_lote(BASE, _filas_diarias(2), STAGING_INGRESOS, "", "", "", "diarios")
+
+        self.assertIsNone(stats)
+        self.raw.rollback.assert_called_once()
+        drops, cierres = self._drop_antes_de_devolver()
+        self.assertEqual(len(cierres), 1)
+        self.assertTrue(drops and drops[-1] < cierres[0])
+        self.assertIn(f"IF OBJECT_ID('tempdb..{STAGING_INGRESOS}') IS NOT NULL DROP TABLE {STAGING_INGRESOS}",
+                      sentencias(self.cursor)[-1])
+
+
+class TestReintentoPorFila(unittest.TestCase):
+    """Pruebas del reintento fila por fila cuando el MERGE por lote falla."""
+
+    def test_lote_fallido_reintenta_por_fila(self):
+        """Las filas guardadas por el reintento se cuentan aparte, no como actualizadas."""
+        db = HasarDB()
+        filas = _filas_diarias(3)
+        with patch.object(db, '_merge_lote', return_value=None), \
+                patch.object(db, 'upsert_ingresos', side_effect=[True, False, True]) as por_fila:
+            stats = db.upsert_ingresos_lote(BASE, filas)
+
+        self.assertEqual(por_fila.call_count, 3)
+        por_fila.assert_any_call(BASE, *filas[1])
+        self.assertEqual(stats, {'insertados': 0, 'actualizados': 0, 'por_fila': 2, 'errores': 1})
+
+    def test_lote_horario_fallido_reintenta_por_fila(self):
+        db = HasarDB()
+        filas = [(date(2026, 4, 6), datetime(2026, 4, 6, hora), 7, 10, None) for hora in (13, 14)]
+        with patch.object(db, '_merge_lote', return_value=None), \
+                patch.object(db, 'upsert_ingresos_hora', return_value=True) as por_fila:
+            stats = db.upsert_ingresos_hora_lote(BASE, filas)
+
+        por_fila.assert_called_with(BASE, *filas[1])
+        self.assertEqual(stats, {'insertados': 0, 'actualizados': 0, 'por_fila': 2, 'errores': 0})
+
+    def test_lote_exitoso_no_reintenta(self):
+        db = HasarDB()
+        por_lote = {'insertados': 1, 'actualizados': 0, 'por_fila': 0, 'errores': 0}
+        with patch.object(db, '_merge_lote', return_value=por_lote), \
+                patch.object(db, 'upsert_ingresos') as por_fila:
+            stats = db.upsert_ingresos_lote(BASE, _filas_diarias(1))
+
+        por_fila.assert_not_called()
+        self.assertEqual(stats, por_lote)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import unittest
+import sys
+import os
+import asyncio
+from datetime import date, datetime
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from GestionAPI.HasarServicios.api_hasar import HasarAPIClient
+from GestionAPI.HasarServicios.sync_conteo_hasar import procesar_sucursal
+
+
+def _respuesta(puntos):
+    """Respuesta de la API de un dashboard con la serie {key: value} indicada."""
+    return {'report': {'data': {'series': [{'data': [{'key': k, 'value': v} for k, v in puntos.items()]}]}}}
+
+
+RESPUESTAS = {
+    'api/ingresos': _respuesta({'05-04-2026': 999, '06-04-2026': 324, '07-04-2026': 410}),
+    'api/merodeo': _respuesta({'06-04-2026': 1200}),
+    'api/ingresos_hora': _respuesta({'06-04-2026 1:00 PM': 40, '06-04-2026 2:00 PM': 55}),
+    'api/merodeo_hora': _respuesta({'06-04-2026 1:00 PM': 150}),
+    'api/vacia': None,
+}
+
+
+class ClienteFalso(HasarAPIClient):
+    """Cliente con los parsers reales y obtener_datos simulado (sin HTTP)."""
+
+    def __init__(self):
+        super().__init__()
+        self.en_vuelo = 0
+        self.max_en_vuelo = 0
+
+    async def obtener_datos(self, url, token, max_retries=3):
+        self.en_vuelo += 1
+        self.max_en_vuelo = max(self.max_en_vuelo, self.en_vuelo)
+        try:
+            await asyncio.sleep(0.05)
+            if url == 'api/falla':
+                raise ConnectionError("timeout del dashboard")
+            return RESPUESTAS[url]
+        finally:
+            self.en_vuelo -= 1
+
+
+def _config(nombre, api):
+    return {'NOMBRE_DASHBOARD': nombre, 'API': api, 'Token': 't', 'DATA_BASE': 'BASE_SUC'}
+
+
+class TestProcesarSucursal(unittest.IsolatedAsyncioTestCase):
+    """Pruebas del procesamiento concurrente de los dashboards de una sucursal."""
+
+    async def asyncSetUp(self):
+        self.cliente = ClienteFalso()
+        self.configs = [
+            _config('Ingresos MES', 'api/ingresos'),
+            _config('Merodeo MES', 'api/merodeo'),
+            _config('IN x HORA', 'api/ingresos_hora'),
+            _config('Merodeo MES X hora', 'api/merodeo_hora'),
+            _config('Ingresos Backup', 'api/falla'),
+        ]
+        self.stats = await procesar_sucursal(
+            self.cliente, 12, self.configs, datetime(2026, 4, 6), datetime(2026, 4, 7, 23, 59)
+        )
+
+    async def test_dashboards_en_paralelo(self):
+        """Todos los dashboards de la sucursal se consultan a la vez."""
+        self.assertEqual(self.cliente.max_en_vuelo, len(self.configs))
+
+    async def test_un_dashboard_fallido_solo_cuenta_como_fallido(self):
+        self.assertEqual(self.stats['apis_procesadas'], 4)
+        self.assertEqual(self.stats['apis_fallidas'], 1)
+        self.assertEqual(len(self.stats['errores']), 1)
+        self.assertIn('Ingresos Backup', self.stats['errores'][0])
+        self.assertEqual(self.stats['database'], 'BASE_SUC')
+
+    async def test_filas_diarias_y_horarias(self):
+        """Las filas combinan ingresos y merodeo por fecha (y hora), dentro del rango pedido."""
+        self.assertCountEqual(self.stats['filas_diarias'], [
+            (date(2026, 4, 6), 12, 324, 1200),
+            (date(2026, 4, 7), 12, 410, None),
+        ])
+        self.assertCountEqual(self.stats['filas_horarias'], [
+            (date(2026, 4, 6), datetime(2026, 4, 6, 13), 12, 40, 150),
+            (date(2026, 4, 6), datetime(2026, 4, 6, 14), 12, 55, None),
+        ])
+
+    async def test_respuesta_vacia_cuenta_como_fallida(self):
+        stats = await procesar_sucursal(
+            ClienteFalso(), 3, [_config('Ingresos MES', 'api/vacia')], datetime(2026, 4, 6), datetime(2026, 4, 7)
+        )
+
+        self.assertEqual((stats['apis_procesadas'], stats['apis_fallidas']), (0, 1))
+        self.assertEqual(stats['filas_diarias'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,21 +1,59 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import asyncio
+import aiohttp
 import requests
 import logging
 from GestionAPI.common.credenciales import JAUSER
+from GestionAPI.common.lector_json import LectorArregloJSON
+from GestionAPI.common.token_store import obtener_token_store
 
 logger = logging.getLogger(__name__)
 
+# Timeouts (segundos): conexión y lectura entre fragmentos; el listado completo puede tardar más
+TIMEOUT_CONEXION_SEG = 15
+TIMEOUT_LECTURA_SEG = 120
+# Bytes leídos por vez al decodificar los listados de stock
+TAMANO_FRAGMENTO = 64 * 1024
+
+RUTA_STOCK_NACIONAL = "magaya/items-jiwory"
+RUTA_STOCK_FISCAL = "magaya/items-jiwory-fiscal"
+
+
 class JauserAPI:
-    def __init__(self):
+    """
+    Cliente de la API de Jauser.
+
+    Las llamadas sincrónicas comparten una requests.Session (keep-alive) y
+    obtener_stock_depositos consulta los dos depósitos en paralelo con aiohttp.
+    En ambos casos la respuesta se pide comprimida (gzip) y el arreglo 'Items'
+    se decodifica a medida que llega (common/lector_json.py), sin guardar el
+    texto completo además de los items.
+    """
+
+    PROVEEDOR_TOKEN = 'jauser'
+
+    def __init__(self, token_store=None):
         self.base_url = "https://api-jys.jauser.global/api/"
         self.credentials = JAUSER # Asegúrate de tener una sección 'jauser' en tu archivo de credenciales
         if not self.credentials:
             logger.error("No se encontraron credenciales para Jauser.")
             raise ValueError("Credenciales de Jauser no encontradas.")
+        # El token se comparte entre procesos a través del almacén en disco
+        self._token_store = token_store or obtener_token_store()
+        self._identidad_token = f"{self.credentials.get('username')}@{self.base_url}"
+        self.session = requests.Session()
+        self.session.headers.update({"Accept-Encoding": "gzip, deflate"})
+        self._token_lock = None
 
     def get_token(self):
+        """Devuelve el token guardado si sigue vigente; si no, hace login y lo guarda."""
+        token = self._token_store.obtener(self.PROVEEDOR_TOKEN, self._identidad_token)
+        if token:
+            logger.info("Usando token de Jauser guardado en el almacén de tokens.")
+            return token
+
         login_url = f"{self.base_url}login"
         headers = {"Content-Type": "application/json"}
         data = {
@@ -24,11 +62,13 @@ class JauserAPI:
         }
         try:
             logger.info(f"Intentando obtener token de {login_url}")
-            resp = requests.post(login_url, headers=headers, json=data)
+            resp = self.session.post(login_url, headers=headers, json=data,
+                                     timeout=(TIMEOUT_CONEXION_SEG, TIMEOUT_LECTURA_SEG))
             resp.raise_for_status() # Lanza una excepción para códigos de estado de error (4xx o 5xx)
             token = resp.json().get('token') # Ajusta según la respuesta real de la API
             if token:
                 logger.info("Token obtenido.")
+                self._token_store.guardar(self.PROVEEDOR_TOKEN, self._identidad_token, token)
                 return token
             else:
                 logger.error("No se encontró token en la respuesta: %s", resp.text)
@@ -37,32 +77,102 @@ class JauserAPI:
             logger.error(f"Error al obtener token: {e}")
             return None
 
-    def get_stock_nacional(self, token):
-        stock_url = f"{self.base_url}magaya/items-jiwory"
-        headers = {
+    def invalidar_token(self, token):
+        """Descarta `token` del almacén para que el próximo get_token haga login."""
+        self._token_store.invalidar(self.PROVEEDOR_TOKEN, self._identidad_token, token)
+
+    def _renovar_token(self, token_rechazado):
+        """Descarta el token rechazado y obtiene uno nuevo (o el que otro proceso ya guardó)."""
+        logger.info("Token rechazado por Jauser. Obteniendo un token nuevo...")
+        self.invalidar_token(token_rechazado)
+        return self.get_token()
+
+    def _headers(self, token):
+        return {
             "Authorization": f"token {token}",
             "Content-Type": "application/json"
-            }
-        try:
-            logger.info(f"Consultando stock nacional desde {stock_url}")
-            resp = requests.get(stock_url, headers=headers)
-            resp.raise_for_status()
-            return resp.json().get('Items', []) # Asume que el stock está en la clave 'Items'
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Error al obtener stock nacional: {e}")
-            return None
+        }
+
+    def _get_items(self, url, token, descripcion):
+        """GET de un listado de stock; si el token fue rechazado, lo renueva y reintenta una vez."""
+        for intento in range(2):
+            try:
+                logger.info(f"Consultando {descripcion} desde {url}")
+                with self.session.get(url, headers=self._headers(token), stream=True,
+                                      timeout=(TIMEOUT_CONEXION_SEG, TIMEOUT_LECTURA_SEG)) as resp:
+                    if resp.status_code in (401, 403) and intento == 0:
+                        token = self._renovar_token(token)
+                        if not token:
+                            return None
+                        continue
+                    resp.raise_for_status()
+                    # iter_content ya entrega los bytes descomprimidos
+                    lector = LectorArregloJSON('Items') # Asume que el stock está en la clave 'Items'
+                    items = []
+                    for fragmento in resp.iter_content(TAMANO_FRAGMENTO):
+                        items.extend(lector.alimentar(fragmento))
+                    items.extend(lector.finalizar())
+                    return items
+            except (requests.exceptions.RequestException, ValueError) as e:
+                logger.error(f"Error al obtener {descripcion}: {e}")
+                return None
+        return None
+
+    def get_stock_nacional(self, token):
+        return self._get_items(f"{self.base_url}{RUTA_STOCK_NACIONAL}", token, "stock nacional")
 
     def get_stock_fiscal(self, token):
-        stock_url = f"{self.base_url}magaya/items-jiwory-fiscal"
-        headers = {
-            "Authorization": f"token {token}",
-            "Content-Type": "application/json"
-            }
-        try:
-            logger.info(f"Consultando stock fiscal desde {stock_url}")
-            resp = requests.get(stock_url, headers=headers)
-            resp.raise_for_status()
-            return resp.json().get('Items', []) # Asume que el stock está en la clave 'Items'
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Error al obtener stock fiscal: {e}")
-            return None
+        return self._get_items(f"{self.base_url}{RUTA_STOCK_FISCAL}", token, "stock fiscal")
+
+    async def _renovar_token_async(self, token_rechazado, token_actual):
+        """
+        Renueva el token una sola vez aunque las dos consultas lo vean rechazado.
+        token_actual es una lista de un elemento compartida por las consultas en curso.
+        """
+        async with self._token_lock:
+            if token_actual[0] == token_rechazado:
+                loop = asyncio.get_running_loop()
+                token_actual[0] = await loop.run_in_executor(None, self._renovar_token, token_rechazado)
+            return token_actual[0]
+
+    async def _get_items_async(self, session, url, token_actual, descripcion):
+        """Versión asíncrona de _get_items sobre la sesión aiohttp compartida."""
+        for intento in range(2):
+            token = token_actual[0]
+            try:
+                logger.info(f"Consultando {descripcion} desde {url}")
+                async with session.get(url, headers=self._headers(token)) as resp:
+                    if resp.status in (401, 403) and intento == 0:
+                        if not await self._renovar_token_async(token, token_actual):
+                            return None
+                        continue
+                    resp.raise_for_status()
+                    # aiohttp descomprime gzip/deflate al leer el contenido
+                    lector = LectorArregloJSON('Items')
+                    items = []
+                    async for fragmento in resp.content.iter_chunked(TAMANO_FRAGMENTO):
+                        items.extend(lector.alimentar(fragmento))
+                    items.extend(lector.finalizar())
+                    return items
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                logger.error(f"Error al obtener {descripcion}: {e}")
+                return None
+        return None
+
+    async def obtener_stock_depositos(self, token):
+        """
+        Consulta el stock nacional y el fiscal en paralelo.
+
+        Returns:
+            tuple: (stock_nacional, stock_fiscal); cada uno es None si su consulta falló.
+        """
+        self._token_lock = asyncio.Lock()
+        token_actual = [token]
+        timeout = aiohttp.ClientTimeout(sock_connect=TIMEOUT_CONEXION_SEG, sock_read=TIMEOUT_LECTURA_SEG)
+        connector = aiohttp.TCPConnector(limit_per_host=2)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, auto_decompress=True) as session:
+            stock_nacional, stock_fiscal = await asyncio.gather(
+                self._get_items_async(session, f"{self.base_url}{RUTA_STOCK_NACIONAL}", token_actual, "stock nacional"),
+                self._get_items_async(session, f"{self.base_url}{RUTA_STOCK_FISCAL}", token_actual, "stock fiscal")
+            )
+        return stock_nacional, stock_fiscal
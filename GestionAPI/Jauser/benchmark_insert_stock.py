@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark de la carga de stock de Jauser (filas por segundo).
+
+Genera items sintéticos con la forma de la respuesta de la API y los inserta en
+una tabla temporal con la misma definición que jauser_stock, primero con la
+carga anterior (un cursor.execute por item) y luego con insertar_filas
+(fast_executemany + setinputsizes, commit por lote). Verifica que ambas cargas
+dejen la misma cantidad de filas y muestra filas/s y la aceleración.
+
+Necesita un SQL Server al que conectarse por ODBC, por ejemplo un contenedor local:
+
+    docker run -e ACCEPT_EULA=Y -e MSSQL_SA_PASSWORD=Clave.Segura1 -p 1433:1433 \\
+        mcr.microsoft.com/mssql/server:2022-latest
+
+Uso:
+    python benchmark_insert_stock.py --conexion "DRIVER={ODBC Driver 17 for SQL Server};SERVER=localhost,1433;UID=sa;PWD=Clave.Segura1;TrustServerCertificate=yes"
+    python benchmark_insert_stock.py --filas 50000 --lotes 1000 5000   # usa JAUSER_BENCHMARK_ODBC si no se pasa --conexion
+    python benchmark_insert_stock.py --filas-anterior 2000             # la carga anterior se mide sobre menos filas
+"""
+
+import sys
+import os
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, project_root)
+
+import argparse
+import random
+import time
+
+import pyodbc
+
+from GestionAPI.Jauser.consultas import QRY_CREAR_TABLA_STOCK, QRY_INSERT_STOCK_ITEMS
+from GestionAPI.common.staging import insertar_filas
+from GestionAPI.Jauser.db_operations_jauser import (
+    CHUNK_SIZE_INSERT,
+    TAMANOS_STOCK_ITEMS,
+    fila_item
+)
+
+TABLA_BENCHMARK = "#jauser_stock_benchmark"
+
+
+def _generar_items(cantidad: int, semilla: int = 42):
+    """Items sintéticos con los campos y largos típicos del listado de stock."""
+    rng = random.Random(semilla)
+    modelos = ["CARTERAS DE CUERO", "BILLETERAS", "MOCHILAS", "CINTURONES", ""]
+    return [
+        {
+            "Piezas": str(rng.randint(0, 500)),
+            "Descripción": f"ARTÍCULO {rng.choice(['BAUL', 'TOTE', 'CLUTCH'])} {i:06d}",
+            "Código": f"XC4WBA{i:07d}",
+            "Model": rng.choice(modelos)
+        }
+        for i in range(cantidad)
+    ]
+
+
+def _recrear_tabla(cursor, conexion):
+    cursor.execute(f"IF OBJECT_ID('tempdb..{TABLA_BENCHMARK}') IS NOT NULL DROP TABLE {TABLA_BENCHMARK}")
+    cursor.execute(QRY_CREAR_TABLA_STOCK.format(tabla=TABLA_BENCHMARK))
+    conexion.commit()
+
+
+def _insertar_fila_por_fila(cursor, conexion, filas, _tamano_lote):
+    """Carga anterior de insert_stock_data (un round trip por item), conservada sólo para comparar."""
+    sql = QRY_INSERT_STOCK_ITEMS.format(tabla=TABLA_BENCHMARK)
+    for fila in filas:
+        cursor.execute(sql, fila)
+    conexion.commit()
+
+
+def _insertar_masivo(cursor, conexion, filas, tamano_lote):
+    insertar_filas(cursor, QRY_INSERT_STOCK_ITEMS.format(tabla=TABLA_BENCHMARK), filas,
+                   TAMANOS_STOCK_ITEMS, conexion, tamano_lote)
+
+
+def _medir(conexion, funcion, filas, tamano_lote):
+    """Devuelve las filas por segundo de `funcion` sobre una tabla vacía, verificando el conteo."""
+    cursor = conexion.cursor()
+    try:
+        _recrear_tabla(cursor, conexion)
+        inicio = time.perf_counter()
+        funcion(cursor, conexion, filas, tamano_lote)
+        duracion = time.perf_counter() - inicio
+        cursor.execute(f"SELECT COUNT(*) FROM {TABLA_BENCHMARK}")
+        insertadas = cursor.fetchone()[0]
+        if insertadas != len(filas):
+            raise AssertionError(f"Se insertaron {insertadas} filas de {len(filas)}")
+        return len(filas) / duracion
+    finally:
+        cursor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la carga de stock de Jauser.")
+    parser.add_argument("--conexion", default=os.environ.get("JAUSER_BENCHMARK_ODBC"),
+                        help="Cadena de conexión ODBC (por defecto, la variable JAUSER_BENCHMARK_ODBC).")
+    parser.add_argument("--filas", type=int, default=20_000, help="Items a insertar con la carga masiva.")
+    parser.add_argument("--filas-anterior", type=int, default=None,
+                        help="Items para la carga anterior (por defecto, los mismos que --filas).")
+    parser.add_argument("--lotes", type=int, nargs="+", default=[CHUNK_SIZE_INSERT],
+                        help="Tamaños de lote a probar en la carga masiva.")
+    args = parser.parse_args()
+
+    if not args.conexion:
+        parser.error("Indicar --conexion o la variable de entorno JAUSER_BENCHMARK_ODBC.")
+
+    items = _generar_items(max(args.filas, args.filas_anterior or 0))
+    filas = [fila_item(item, "82") for item in items]
+    filas_anterior = filas[:args.filas_anterior or args.filas]
+
+    conexion = pyodbc.connect(args.conexion, autocommit=False)
+    try:
+        print(f"Carga anterior (execute por item), {len(filas_anterior):,} filas...")
+        velocidad_anterior = _medir(conexion, _insertar_fila_por_fila, filas_anterior, None)
+        print(f"{'carga':>28} {'filas/s':>12} {'aceleración':>12}")
+        print(f"{'execute por item':>28} {velocidad_anterior:>12,.0f} {1:>11.1f}x")
+
+        for tamano_lote in args.lotes:
+            velocidad = _medir(conexion, _insertar_masivo, filas[:args.filas], tamano_lote)
+            print(f"{f'fast_executemany lote {tamano_lote}':>28} {velocidad:>12,.0f} "
+                  f"{velocidad / velocidad_anterior:>11.1f}x")
+    finally:
+        conexion.close()
+
+
+if __name__ == "__main__":
+    main()
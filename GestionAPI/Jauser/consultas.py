@@ -54,3 +54,111 @@ FROM jauser_stock
 WHERE codigo LIKE ?
 ORDER BY tipo_deposito
 """
+
+# --- Sincronización incremental y recarga completa ---
+
+TABLA_STOCK = "jauser_stock"
+# Tabla sombra de la recarga completa y nombre que toma la tabla reemplazada
+TABLA_STOCK_NUEVA = "jauser_stock_nueva"
+TABLA_STOCK_ANTERIOR = "jauser_stock_anterior"
+
+# Definición de la tabla de stock (se usa también para la tabla sombra)
+QRY_CREAR_TABLA_STOCK = """
+CREATE TABLE {tabla} (
+    id INT IDENTITY(1,1) PRIMARY KEY,
+    piezas VARCHAR(50),
+    descripcion VARCHAR(255),
+    codigo VARCHAR(100),
+    model VARCHAR(255),
+    tipo_deposito VARCHAR(20), -- 'NACIONAL' o 'FISCAL'
+    fecha_actualizacion DATETIME DEFAULT GETDATE(),
+    hash_item CHAR(40) NULL -- Huella de Código + depósito + Piezas + Descripción + Model
+)
+"""
+
+QRY_CREAR_INDICES_STOCK = """
+CREATE INDEX idx_jauser_stock_codigo ON {tabla}(codigo);
+CREATE INDEX idx_jauser_stock_tipo ON {tabla}(tipo_deposito);
+CREATE INDEX idx_jauser_stock_fecha ON {tabla}(fecha_actualizacion);
+"""
+
+# Las tablas creadas antes de la sincronización incremental no tienen la huella
+QRY_AGREGAR_COLUMNA_HASH = """
+IF COL_LENGTH('jauser_stock', 'hash_item') IS NULL
+    ALTER TABLE jauser_stock ADD hash_item CHAR(40) NULL
+"""
+
+# Estado guardado con el que se compara el stock de la API
+QRY_OBTENER_SNAPSHOT = """
+SELECT id, tipo_deposito, codigo, hash_item
+FROM jauser_stock
+ORDER BY id
+"""
+
+# Tabla temporal con los cambios a aplicar: operacion 'A' (alta), 'M' (modificación) o 'B' (baja)
+STAGING_CAMBIOS = "#jauser_stock_cambios"
+
+QRY_CREAR_STAGING_CAMBIOS = f"""
+CREATE TABLE {STAGING_CAMBIOS} (
+    operacion CHAR(1) NOT NULL,
+    id INT NULL,
+    piezas VARCHAR(50),
+    descripcion VARCHAR(255),
+    codigo VARCHAR(100),
+    model VARCHAR(255),
+    tipo_deposito VARCHAR(20),
+    hash_item CHAR(40)
+)
+"""
+
+QRY_INSERT_STAGING_CAMBIOS = f"""
+INSERT INTO {STAGING_CAMBIOS} (operacion, id, piezas, descripcion, codigo, model, tipo_deposito, hash_item)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+QRY_APLICAR_BAJAS = f"""
+DELETE S
+FROM jauser_stock AS S
+INNER JOIN {STAGING_CAMBIOS} AS C ON C.id = S.id
+WHERE C.operacion = 'B'
+"""
+
+QRY_APLICAR_MODIFICACIONES = f"""
+UPDATE S
+SET piezas = C.piezas,
+    descripcion = C.descripcion,
+    codigo = C.codigo,
+    model = C.model,
+    tipo_deposito = C.tipo_deposito,
+    hash_item = C.hash_item,
+    fecha_actualizacion = GETDATE()
+FROM jauser_stock AS S
+INNER JOIN {STAGING_CAMBIOS} AS C ON C.id = S.id
+WHERE C.operacion = 'M'
+"""
+
+QRY_APLICAR_ALTAS = f"""
+INSERT INTO jauser_stock (piezas, descripcion, codigo, model, tipo_deposito, hash_item)
+SELECT piezas, descripcion, codigo, model, tipo_deposito, hash_item
+FROM {STAGING_CAMBIOS}
+WHERE operacion = 'A'
+"""
+
+# Carga sin huella (insert_stock_data, después de clear_stock_table)
+QRY_INSERT_STOCK_ITEMS = """
+INSERT INTO {tabla} (piezas, descripcion, codigo, model, tipo_deposito)
+VALUES (?, ?, ?, ?, ?)
+"""
+
+QRY_INSERT_STOCK = """
+INSERT INTO {tabla} (piezas, descripcion, codigo, model, tipo_deposito, hash_item)
+VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+QRY_BORRAR_TABLA_SI_EXISTE = "IF OBJECT_ID('{tabla}', 'U') IS NOT NULL DROP TABLE {tabla}"
+
+# Intercambio de la tabla sombra: los renombres se confirman juntos, en una transacción
+QRY_INTERCAMBIAR_TABLAS = f"""
+EXEC sp_rename '{TABLA_STOCK}', '{TABLA_STOCK_ANTERIOR}';
+EXEC sp_rename '{TABLA_STOCK_NUEVA}', '{TABLA_STOCK}';
+"""
@@ -9,12 +9,159 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..
 # Añade la ruta de la raíz del proyecto a sys.path
 sys.path.insert(0, project_root)
 
+import hashlib
 import logging
+import pyodbc
+from collections import defaultdict, deque
 from GestionAPI.common.conexion import Conexion
+from GestionAPI.common.staging import aplicar_con_staging, insertar_filas
 from GestionAPI.common.credenciales import CENTRAL_TASKY
+from GestionAPI.Jauser.consultas import (
+    TABLA_STOCK,
+    TABLA_STOCK_NUEVA,
+    TABLA_STOCK_ANTERIOR,
+    QRY_CREAR_TABLA_STOCK,
+    QRY_CREAR_INDICES_STOCK,
+    QRY_AGREGAR_COLUMNA_HASH,
+    QRY_OBTENER_SNAPSHOT,
+    STAGING_CAMBIOS,
+    QRY_CREAR_STAGING_CAMBIOS,
+    QRY_INSERT_STAGING_CAMBIOS,
+    QRY_APLICAR_BAJAS,
+    QRY_APLICAR_MODIFICACIONES,
+    QRY_APLICAR_ALTAS,
+    QRY_INSERT_STOCK_ITEMS,
+    QRY_INSERT_STOCK,
+    QRY_BORRAR_TABLA_SI_EXISTE,
+    QRY_INTERCAMBIAR_TABLAS
+)
 
 logger = logging.getLogger(__name__)
 
+# Filas por executemany en las cargas masivas (y por commit, cuando la carga confirma por lotes)
+CHUNK_SIZE_INSERT = 5000
+
+# Tipos y tamaños de los parámetros (setinputsizes), iguales a las columnas de jauser_stock.
+# Con fast_executemany el driver reserva los buffers de cada lote a partir de estos tamaños
+# en lugar de deducirlos de los valores. Los textos se declaran como SQL_WVARCHAR porque
+# pyodbc envía los str de Python como texto ancho.
+TAMANOS_STOCK_ITEMS = [
+    (pyodbc.SQL_WVARCHAR, 50, 0),   # piezas
+    (pyodbc.SQL_WVARCHAR, 255, 0),  # descripcion
+    (pyodbc.SQL_WVARCHAR, 100, 0),  # codigo
+    (pyodbc.SQL_WVARCHAR, 255, 0),  # model
+    (pyodbc.SQL_WVARCHAR, 20, 0),   # tipo_deposito
+]
+TAMANOS_STOCK = TAMANOS_STOCK_ITEMS + [(pyodbc.SQL_WCHAR, 40, 0)]  # hash_item
+TAMANOS_STAGING_CAMBIOS = [(pyodbc.SQL_WCHAR, 1, 0), (pyodbc.SQL_INTEGER, 0, 0)] + TAMANOS_STOCK
+
+
+# Largo de jauser_stock.codigo (VARCHAR(100)) y página de códigos de las columnas VARCHAR
+LARGO_CODIGO = 100
+CODIFICACION_VARCHAR = 'cp1252'
+
+
+def _texto(valor):
+    return '' if valor is None else str(valor)
+
+
+def _columna(valor):
+    # Las columnas son de texto: se envían como str, aunque la API devuelva números
+    return None if valor is None else str(valor)
+
+
+def _codigo_guardado(codigo):
+    """
+    Código tal como lo compara la tabla: recortado a VARCHAR(100), sin espacios
+    finales (SQL Server los ignora al comparar) y con los caracteres que no entran
+    en la página de códigos reemplazados, igual para el snapshot y para la API.
+    """
+    texto = _texto(codigo)[:LARGO_CODIGO].rstrip()
+    return texto.encode(CODIFICACION_VARCHAR, errors='replace').decode(CODIFICACION_VARCHAR)
+
+
+def fila_item(item, tipo_deposito):
+    """Valores de un item de la API en el orden de la tabla: (piezas, descripcion, codigo, model, tipo_deposito)."""
+    codigo = _columna(item.get('Código', ''))
+    return (
+        _columna(item.get('Piezas', '')),
+        _columna(item.get('Descripción', '')),
+        None if codigo is None else codigo[:LARGO_CODIGO],
+        _columna(item.get('Model', '')),
+        _columna(tipo_deposito)
+    )
+
+
+def calcular_hash_item(item, tipo_deposito):
+    """Huella del item: Código + tipo_deposito + Piezas + Descripción + Model."""
+    partes = (item.get('Código'), tipo_deposito, item.get('Piezas'), item.get('Descripción'), item.get('Model'))
+    return hashlib.sha1('\x1f'.join(_texto(p) for p in partes).encode('utf-8')).hexdigest()
+
+
+def calcular_cambios(snapshot, stock_por_deposito):
+    """
+    Compara el stock de la API con el guardado y devuelve sólo lo que cambió.
+
+    Primero se emparejan los items con las filas que guardan su misma huella
+    (sin cambios). La huella se calcula sobre los valores de la API, así que un
+    item que no cambió se reconoce aunque su código se haya guardado recortado o
+    con otra página de códigos. Lo que queda se empareja por (tipo_deposito,
+    código normalizado), en el orden de los ids, y son modificaciones; las filas
+    sin hash_item (anteriores a la columna) también se resuelven por este paso.
+
+    Args:
+        snapshot (list): Filas (id, tipo_deposito, codigo, hash_item) ordenadas por id.
+        stock_por_deposito (dict): {tipo_deposito: items de la API}.
+
+    Returns:
+        tuple: (altas, modificaciones, bajas, sin_cambios). Las altas son tuplas
+            fila_item + hash, las modificaciones (id,) + fila_item + hash y las bajas ids.
+    """
+    por_hash = defaultdict(deque)
+    for id_fila, tipo_deposito, codigo, hash_item in snapshot:
+        if hash_item:
+            por_hash[(_texto(tipo_deposito).rstrip(), hash_item)].append(id_fila)
+    emparejados = set()
+
+    pendientes = []
+    sin_cambios = 0
+    for tipo_deposito, items in stock_por_deposito.items():
+        for item in items:
+            hash_item = calcular_hash_item(item, tipo_deposito)
+            ids = por_hash.get((_texto(tipo_deposito).rstrip(), hash_item))
+            if ids:
+                emparejados.add(ids.popleft())
+                sin_cambios += 1
+            else:
+                pendientes.append((tipo_deposito, item, hash_item))
+
+    por_codigo = defaultdict(deque)
+    restantes = []
+    for id_fila, tipo_deposito, codigo, _ in snapshot:
+        if id_fila not in emparejados:
+            por_codigo[(_texto(tipo_deposito).rstrip(), _codigo_guardado(codigo))].append(id_fila)
+            restantes.append(id_fila)
+
+    altas, modificaciones = [], []
+    for tipo_deposito, item, hash_item in pendientes:
+        ids = por_codigo.get((_texto(tipo_deposito).rstrip(), _codigo_guardado(item.get('Código'))))
+        if ids:
+            id_fila = ids.popleft()
+            emparejados.add(id_fila)
+            modificaciones.append((id_fila,) + fila_item(item, tipo_deposito) + (hash_item,))
+        else:
+            altas.append(fila_item(item, tipo_deposito) + (hash_item,))
+
+    bajas = [id_fila for id_fila in restantes if id_fila not in emparejados]
+    return altas, modificaciones, bajas, sin_cambios
+
+
+def _aplicar_cambios(cursor):
+    cursor.execute(QRY_APLICAR_BAJAS)
+    cursor.execute(QRY_APLICAR_MODIFICACIONES)
+    cursor.execute(QRY_APLICAR_ALTAS)
+
+
 class JauserDB:
     def __init__(self):
         self.db_config = CENTRAL_TASKY
@@ -50,6 +197,8 @@ class JauserDB:
             if cursor:
                 cursor.execute(sql_create_table)
                 self.conexion.connection.commit()
+                cursor.execute(QRY_AGREGAR_COLUMNA_HASH)
+                self.conexion.connection.commit()
                 logger.info("Tabla jauser_stock creada exitosamente")
                 cursor.close()
                 self.conexion.connection.close()
@@ -74,34 +223,146 @@ class JauserDB:
             logger.error(f"Error al limpiar tabla: {e}")
             return False
     
-    def insert_stock_data(self, stock_items, tipo_deposito):
-        """Inserta los nuevos datos de stock en la tabla"""
+    def insert_stock_data(self, stock_items, tipo_deposito, tamano_lote=CHUNK_SIZE_INSERT):
+        """
+        Inserta los nuevos datos de stock en la tabla.
+
+        Los items se envían en lotes con fast_executemany (un round trip por lote en
+        lugar de uno por item) y cada lote se confirma por separado.
+        """
         try:
             cursor = self.conexion.conectar()
             if cursor:
-                sql_insert = """
-                INSERT INTO jauser_stock (piezas, descripcion, codigo, model, tipo_deposito)
-                VALUES (?, ?, ?, ?, ?)
-                """
-                
-                for item in stock_items:
-                    cursor.execute(sql_insert, (
-                        item.get('Piezas', ''),
-                        item.get('Descripción', ''),
-                        item.get('Código', ''),
-                        item.get('Model', ''),
-                        tipo_deposito
-                    ))
-                
-                self.conexion.connection.commit()
-                cursor.close()
-                self.conexion.connection.close()
+                filas = [fila_item(item, tipo_deposito) for item in stock_items]
+                try:
+                    insertar_filas(cursor, QRY_INSERT_STOCK_ITEMS.format(tabla=TABLA_STOCK), filas,
+                                   TAMANOS_STOCK_ITEMS, self.conexion.connection, tamano_lote)
+                finally:
+                    cursor.close()
+                    self.conexion.connection.close()
                 logger.info(f"{len(stock_items)} items de stock {tipo_deposito} insertados exitosamente")
                 return True
         except Exception as e:
             logger.error(f"Error al insertar datos: {e}")
             return False
     
+    def sincronizar_stock_incremental(self, stock_por_deposito):
+        """
+        Aplica sólo las diferencias entre el stock de la API y la tabla.
+
+        Compara la huella de cada item con la guardada en hash_item, carga las
+        altas, modificaciones y bajas en una tabla temporal y las aplica con tres
+        sentencias set-based en una sola transacción: los lectores nunca ven la
+        tabla vacía ni a medio cargar, y los items sin cambios no se reescriben.
+
+        Args:
+            stock_por_deposito (dict): {tipo_deposito: items de la API} de todos los depósitos.
+
+        Returns:
+            dict: {'altas', 'modificaciones', 'bajas', 'sin_cambios'}, o None si falló.
+        """
+        cursor = self.conexion.conectar()
+        if not cursor:
+            return None
+        conexion = self.conexion.connection
+
+        try:
+            cursor.execute(QRY_AGREGAR_COLUMNA_HASH)
+            conexion.commit()
+            cursor.execute(QRY_OBTENER_SNAPSHOT)
+            snapshot = cursor.fetchall()
+
+            altas, modificaciones, bajas, sin_cambios = calcular_cambios(snapshot, stock_por_deposito)
+            stats = {
+                'altas': len(altas),
+                'modificaciones': len(modificaciones),
+                'bajas': len(bajas),
+                'sin_cambios': sin_cambios
+            }
+            filas = (
+                [('A', None) + alta for alta in altas]
+                + [('M',) + modificacion for modificacion in modificaciones]
+                + [('B', id_fila, None, None, None, None, None, None) for id_fila in bajas]
+            )
+            if filas:
+                aplicar_con_staging(cursor, conexion, STAGING_CAMBIOS, QRY_CREAR_STAGING_CAMBIOS,
+                                    QRY_INSERT_STAGING_CAMBIOS, filas, _aplicar_cambios,
+                                    TAMANOS_STAGING_CAMBIOS, CHUNK_SIZE_INSERT)
+
+            logger.info(f"Stock sincronizado en forma incremental: {stats['altas']} altas, "
+                        f"{stats['modificaciones']} modificaciones, {stats['bajas']} bajas, "
+                        f"{stats['sin_cambios']} sin cambios")
+            return stats
+        except Exception as e:
+            logger.error(f"Error en la sincronización incremental de stock: {e}")
+            try:
+                conexion.rollback()
+            except Exception:
+                pass
+            return None
+        finally:
+            cursor.close()
+            conexion.close()
+
+    def recargar_stock_completo(self, stock_por_deposito):
+        """
+        Recarga todo el stock en una tabla sombra y la intercambia con la actual.
+
+        La carga se hace en jauser_stock_nueva; al terminar, los dos sp_rename se
+        confirman en una misma transacción, así los lectores pasan del stock
+        anterior al nuevo sin ver nunca la tabla vacía.
+
+        Args:
+            stock_por_deposito (dict): {tipo_deposito: items de la API} de todos los depósitos.
+
+        Returns:
+            int: Cantidad de items cargados, o None si falló (la tabla actual queda intacta).
+        """
+        filas = [
+            fila_item(item, tipo_deposito) + (calcular_hash_item(item, tipo_deposito),)
+            for tipo_deposito, items in stock_por_deposito.items()
+            for item in items
+        ]
+
+        cursor = self.conexion.conectar()
+        if not cursor:
+            return None
+        conexion = self.conexion.connection
+
+        try:
+            cursor.execute(QRY_BORRAR_TABLA_SI_EXISTE.format(tabla=TABLA_STOCK_NUEVA))
+            cursor.execute(QRY_BORRAR_TABLA_SI_EXISTE.format(tabla=TABLA_STOCK_ANTERIOR))
+            cursor.execute(QRY_CREAR_TABLA_STOCK.format(tabla=TABLA_STOCK_NUEVA))
+            conexion.commit()
+
+            insertar_filas(cursor, QRY_INSERT_STOCK.format(tabla=TABLA_STOCK_NUEVA), filas, TAMANOS_STOCK, conexion,
+                           CHUNK_SIZE_INSERT)
+            # Los índices se crean después de la carga, que así es más rápida
+            cursor.execute(QRY_CREAR_INDICES_STOCK.format(tabla=TABLA_STOCK_NUEVA))
+            conexion.commit()
+
+            cursor.execute(f"SELECT OBJECT_ID('{TABLA_STOCK}', 'U')")
+            if cursor.fetchone()[0] is None:
+                cursor.execute(f"EXEC sp_rename '{TABLA_STOCK_NUEVA}', '{TABLA_STOCK}'")
+            else:
+                cursor.execute(QRY_INTERCAMBIAR_TABLAS)
+            conexion.commit()
+            cursor.execute(QRY_BORRAR_TABLA_SI_EXISTE.format(tabla=TABLA_STOCK_ANTERIOR))
+            conexion.commit()
+
+            logger.info(f"Stock recargado por completo: {len(filas)} items (tabla sombra intercambiada)")
+            return len(filas)
+        except Exception as e:
+            logger.error(f"Error en la recarga completa de stock: {e}")
+            try:
+                conexion.rollback()
+            except Exception:
+                pass
+            return None
+        finally:
+            cursor.close()
+            conexion.close()
+
     def get_stock_count(self, tipo_deposito=None):
         """Obtiene el conteo de registros en la tabla de stock"""
         try:
@@ -9,6 +9,8 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..
 # Añade la ruta de la raíz del proyecto a sys.path
 sys.path.insert(0, project_root)
 
+import argparse
+import asyncio
 import logging
 from GestionAPI.common.logger_config import setup_logger
 from GestionAPI.Jauser.api_jauser import JauserAPI
@@ -17,8 +19,8 @@ from GestionAPI.Jauser.db_operations_jauser import JauserDB
 # Configurar el logger
 logger = setup_logger('sync_stock_jauser')
 
-def main():
-    logger.info("Iniciando sincronización de stock de Jauser...")
+def main(modo="incremental"):
+    logger.info(f"Iniciando sincronización de stock de Jauser (modo {modo})...")
 
     # Inicializar la API y la DB
     api = JauserAPI()
@@ -32,42 +34,36 @@ def main():
             return
         logger.info("Token de autenticación obtenido exitosamente.")
 
-        # 2. Consultar stock Nacional
-        stock_nacional = api.get_stock_nacional(token)
+        # 2. Consultar stock Nacional y Fiscal en paralelo
+        stock_nacional, stock_fiscal = asyncio.run(api.obtener_stock_depositos(token))
         if stock_nacional is None:
             logger.error("No se pudo obtener el stock nacional.")
             return
         logger.info(f"Stock nacional obtenido: {len(stock_nacional)} items.")
 
-        # 3. Consultar stock Fiscal
-        stock_fiscal = api.get_stock_fiscal(token)
         if stock_fiscal is None:
             logger.error("No se pudo obtener el stock fiscal.")
             return
         logger.info(f"Stock fiscal obtenido: {len(stock_fiscal)} items.")
 
-        # Combinar los stocks si es necesario o procesarlos por separado
-        # Por ahora, vamos a procesar ambos sets de datos.
-        all_stock_items = stock_nacional + stock_fiscal # O manejar por separado según necesites
-        logger.info(f"Total de items de stock a procesar: {len(all_stock_items)}.")
+        logger.info(f"Total de items de stock a procesar: {len(stock_nacional) + len(stock_fiscal)}.")
 
-        # 4. Eliminar datos existentes en la tabla y insertar los nuevos
-        if stock_nacional or stock_fiscal:
-            db.clear_stock_table()
-            logger.info("Datos de stock existentes eliminados de la tabla.")
-            if stock_nacional:
-                db.insert_stock_data(stock_nacional, "82")
-                logger.info("Datos de stock nacional insertados en la tabla.")
-            if stock_fiscal:
-                db.insert_stock_data(stock_fiscal, "83")
-                logger.info("Datos de stock fiscal insertados en la tabla.")
-        else:
+        # 3. Aplicar los cambios en la tabla
+        if not (stock_nacional or stock_fiscal):
             logger.warning("No se obtuvieron datos de stock, via api.")
             return
 
-        # # 5. Almacenar los nuevos datos
-        # db.insert_stock_data(all_stock_items)
-        # logger.info("Nuevos datos de stock insertados en la tabla.")
+        stock_por_deposito = {"82": stock_nacional, "83": stock_fiscal}
+        if modo == "completo":
+            # Recarga en una tabla sombra y la intercambia con la actual
+            if db.recargar_stock_completo(stock_por_deposito) is None:
+                logger.error("No se pudo recargar el stock completo.")
+                return
+        else:
+            # Sólo altas, modificaciones y bajas respecto de lo ya guardado
+            if db.sincronizar_stock_incremental(stock_por_deposito) is None:
+                logger.error("No se pudo aplicar la sincronización incremental de stock.")
+                return
 
         logger.info("Sincronización de stock de Jauser finalizada exitosamente.")
 
@@ -75,4 +71,8 @@ def main():
         logger.error(f"Ocurrió un error durante la sincronización: {e}")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Sincroniza el stock de Jauser con la base de datos.")
+    parser.add_argument("--modo", choices=["incremental", "completo"], default="incremental",
+                        help="incremental: aplica sólo los cambios; completo: recarga en tabla sombra y la intercambia.")
+    args = parser.parse_args()
+    main(args.modo)
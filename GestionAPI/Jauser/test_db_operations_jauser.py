@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import unittest
+import sys
+import os
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from GestionAPI.Jauser.db_operations_jauser import (
+    LARGO_CODIGO,
+    calcular_cambios,
+    calcular_hash_item,
+    fila_item
+)
+
+
+def _item(codigo, piezas='1', descripcion='CARTERA', model='CUERO'):
+    return {'Piezas': piezas, 'Descripción': descripcion, 'Código': codigo, 'Model': model}
+
+
+def _snapshot(guardados):
+    """Filas (id, tipo_deposito, codigo, hash_item) como las devuelve QRY_OBTENER_SNAPSHOT."""
+    return [(id_fila, tipo, item['Código'], calcular_hash_item(item, tipo)) for id_fila, tipo, item in guardados]
+
+
+class TestFilaYHash(unittest.TestCase):
+    """Pruebas de los valores y la huella de un item de la API."""
+
+    def test_fila_en_el_orden_de_la_tabla(self):
+        self.assertEqual(fila_item({'Piezas': 5, 'Descripción': 'BAUL', 'Código': 'XC1', 'Model': None}, 'NACIONAL'),
+                         ('5', 'BAUL', 'XC1', None, 'NACIONAL'))
+
+    def test_campos_faltantes_y_nulos(self):
+        self.assertEqual(fila_item({}, 'FISCAL'), ('', '', '', '', 'FISCAL'))
+        self.assertEqual(fila_item({'Código': None}, 'FISCAL')[2], None)
+
+    def test_codigo_recortado_al_largo_de_la_columna(self):
+        self.assertEqual(fila_item(_item('X' * 150), 'NACIONAL')[2], 'X' * LARGO_CODIGO)
+
+    def test_hash_cambia_con_cada_campo(self):
+        base = calcular_hash_item(_item('XC1'), 'NACIONAL')
+
+        self.assertEqual(len(base), 40)
+        self.assertEqual(calcular_hash_item(_item('XC1'), 'NACIONAL'), base)
+        for distinto in (calcular_hash_item(_item('XC2'), 'NACIONAL'),
+                         calcular_hash_item(_item('XC1'), 'FISCAL'),
+                         calcular_hash_item(_item('XC1', piezas='2'), 'NACIONAL'),
+                         calcular_hash_item(_item('XC1', descripcion='BOLSO'), 'NACIONAL'),
+                         calcular_hash_item(_item('XC1', model=None), 'NACIONAL')):
+            self.assertNotEqual(distinto, base)
+
+    def test_hash_con_nulos(self):
+        """None y '' dan la misma huella, como en la columna de texto."""
+        self.assertEqual(calcular_hash_item(_item('XC1', model=None), 'NACIONAL'),
+                         calcular_hash_item(_item('XC1', model=''), 'NACIONAL'))
+        self.assertEqual(len(calcular_hash_item({}, None)), 40)
+
+
+class TestCalcularCambios(unittest.TestCase):
+    """Pruebas de la comparación entre el stock de la API y el guardado."""
+
+    def test_sin_cambios(self):
+        items = [_item('XC1'), _item('XC2')]
+        snapshot = _snapshot([(1, 'NACIONAL', items[0]), (2, 'NACIONAL', items[1])])
+
+        self.assertEqual(calcular_cambios(snapshot, {'NACIONAL': items}), ([], [], [], 2))
+
+    def test_altas_modificaciones_y_bajas(self):
+        snapshot = _snapshot([(1, 'NACIONAL', _item('XC1')), (2, 'NACIONAL', _item('XC2')),
+                              (3, 'NACIONAL', _item('XC3'))])
+        api = [_item('XC1'), _item('XC2', piezas='9'), _item('XC4')]
+
+        altas, modificaciones, bajas, sin_cambios = calcular_cambios(snapshot, {'NACIONAL': api})
+
+        self.assertEqual(altas, [fila_item(api[2], 'NACIONAL') + (calcular_hash_item(api[2], 'NACIONAL'),)])
+        self.assertEqual(modificaciones, [(2,) + fila_item(api[1], 'NACIONAL') + (calcular_hash_item(api[1], 'NACIONAL'),)])
+        self.assertEqual(bajas, [3])
+        self.assertEqual(sin_cambios, 1)
+
+    def test_codigos_duplicados_en_un_deposito(self):
+        """Las repeticiones de un código se emparejan una a una, sin reescribir las que no cambiaron."""
+        guardados = [_item('XC1', piezas='1'), _item('XC1', piezas='2'), _item('XC1', piezas='3')]
+        snapshot = _snapshot([(10 + i, 'NACIONAL', item) for i, item in enumerate(guardados)])
+        # La API devuelve las repeticiones en otro orden, con una cambiada y otra menos
+        api = [_item('XC1', piezas='3'), _item('XC1', piezas='7')]
+
+        altas, modificaciones, bajas, sin_cambios = calcular_cambios(snapshot, {'NACIONAL': api})
+
+        self.assertEqual(sin_cambios, 1)
+        self.assertEqual(altas, [])
+        self.assertEqual([m[0] for m in modificaciones], [10])
+        self.assertEqual(modificaciones[0][1], '7')
+        self.assertEqual(bajas, [11])
+
+    def test_duplicados_identicos(self):
+        item = _item('XC1')
+        snapshot = _snapshot([(1, 'NACIONAL', item), (2, 'NACIONAL', item)])
+
+        self.assertEqual(calcular_cambios(snapshot, {'NACIONAL': [item, item, item]})[0],
+                         [fila_item(item, 'NACIONAL') + (calcular_hash_item(item, 'NACIONAL'),)])
+        self.assertEqual(calcular_cambios(snapshot, {'NACIONAL': [item]})[2:], ([2], 1))
+
+    def test_item_que_cambia_de_deposito(self):
+        """Un item que pasa de NACIONAL a FISCAL es baja en uno y alta en el otro."""
+        item = _item('XC1')
+        snapshot = _snapshot([(1, 'NACIONAL', item), (2, 'FISCAL', _item('XC2'))])
+
+        altas, modificaciones, bajas, sin_cambios = calcular_cambios(
+            snapshot, {'NACIONAL': [], 'FISCAL': [_item('XC2'), item]})
+
+        self.assertEqual(altas, [fila_item(item, 'FISCAL') + (calcular_hash_item(item, 'FISCAL'),)])
+        self.assertEqual((modificaciones, bajas, sin_cambios), ([], [1], 1))
+
+    def test_campos_nulos(self):
+        item = {'Piezas': None, 'Descripción': None, 'Código': None, 'Model': None}
+        snapshot = [(1, 'NACIONAL', None, calcular_hash_item(item, 'NACIONAL'))]
+
+        self.assertEqual(calcular_cambios(snapshot, {'NACIONAL': [item]}), ([], [], [], 1))
+
+        altas, modificaciones, bajas, _ = calcular_cambios(snapshot, {'NACIONAL': [dict(item, Piezas='4')]})
+        self.assertEqual(([m[0] for m in modificaciones], altas, bajas), ([1], [], []))
+
+    def test_fila_anterior_sin_hash_se_modifica(self):
+        """Una fila con hash_item NULL se empareja por código y se reescribe con su huella, sin borrarla."""
+        item = _item('XC1')
+        snapshot = [(1, 'NACIONAL', 'XC1', None)]
+
+        altas, modificaciones, bajas, sin_cambios = calcular_cambios(snapshot, {'NACIONAL': [item]})
+
+        self.assertEqual(modificaciones, [(1,) + fila_item(item, 'NACIONAL') + (calcular_hash_item(item, 'NACIONAL'),)])
+        self.assertEqual((altas, bajas, sin_cambios), ([], [], 0))
+
+    def test_bajas_solo_de_ids_que_ya_no_estan(self):
+        snapshot = _snapshot([(1, 'NACIONAL', _item('XC1')), (2, 'NACIONAL', _item('XC2')),
+                              (3, 'FISCAL', _item('XC3')), (4, 'FISCAL', _item('XC4'))])
+        snapshot.append((5, 'NACIONAL', 'XC5', None))
+        api = {'NACIONAL': [_item('XC2', piezas='8'), _item('XC5')], 'FISCAL': [_item('XC4')]}
+
+        bajas = calcular_cambios(snapshot, api)[2]
+
+        self.assertEqual(bajas, [1, 3])
+
+    def test_codigo_guardado_recortado_o_convertido_no_se_reinserta(self):
+        """Un código recortado, con espacios finales o convertido a la página de códigos sigue emparejando."""
+        largo, espacios = _item('L' * 130), _item('XC1  ')
+        guardados = [(1, 'NACIONAL', 'L' * LARGO_CODIGO, calcular_hash_item(largo, 'NACIONAL')),
+                     (2, 'NACIONAL', 'XC1', None),
+                     (3, 'NACIONAL', 'XC?2', None)]
+
+        # Sin cambios: la huella guardada corresponde a los valores de la API
+        self.assertEqual(calcular_cambios(guardados[:1], {'NACIONAL': [largo]}), ([], [], [], 1))
+
+        # Cambiados o sin huella: se emparejan por el código normalizado, nunca alta + baja
+        altas, modificaciones, bajas, _ = calcular_cambios(
+            guardados, {'NACIONAL': [_item('L' * 130, piezas='5'), espacios, _item('XCĀ2')]})
+        self.assertEqual(sorted(m[0] for m in modificaciones), [1, 2, 3])
+        self.assertEqual((altas, bajas), ([], []))
+
+
+if __name__ == '__main__':
+    unittest.main()
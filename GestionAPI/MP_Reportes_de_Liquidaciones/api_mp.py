@@ -9,26 +9,46 @@ Maneja la creación, consulta, espera y descarga de reportes mediante la API ofi
 import asyncio
 import aiohttp
 import logging
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, AsyncIterator
+
+from GestionAPI.common.rate_limiter import ESTADOS_LIMITADOS, LimitadorProveedor, obtener_limitador
 
 logger = logging.getLogger("mp_liquidaciones")
 
 MP_BASE_URL = "https://api.mercadopago.com"
 
+# Tamaño de cada bloque leído del cuerpo de la respuesta al descargar en streaming
+TAMANO_BLOQUE_DESCARGA = 64 * 1024
+
+
+class DescargaReporteError(Exception):
+    """No se pudo descargar (o se interrumpió la descarga de) un reporte."""
+    pass
+
 
 class MercadoPagoAPIClient:
     """
     Cliente API asíncrono para interactuar con los endpoints de Reportes de Liquidaciones de Mercado Pago.
     Usa Bearer token para autenticación y aiohttp para las llamadas HTTP.
+    Las solicitudes pasan por el limitador del proveedor (common/rate_limiter.py).
     """
 
-    def __init__(self, access_token: str):
+    PROVEEDOR = "mercadopago"
+
+    def __init__(self, access_token: str, limitador: Optional[LimitadorProveedor] = None):
         """
         Args:
             access_token (str): Token de acceso de la cuenta de Mercado Pago.
+            limitador (LimitadorProveedor, optional): Limitador de solicitudes. Por defecto
+                el compartido por todos los clientes de Mercado Pago.
         """
         self._access_token = access_token
         self._session: Optional[aiohttp.ClientSession] = None
+        self._limitador = limitador
+
+    def _obtener_limitador(self) -> LimitadorProveedor:
+        """Limitador propio, o el compartido por todos los clientes de Mercado Pago."""
+        return self._limitador or obtener_limitador(self.PROVEEDOR)
 
     async def _get_session(self) -> aiohttp.ClientSession:
         """Obtiene o reutiliza la sesión HTTP con configuración optimizada."""
@@ -56,10 +76,12 @@ class MercadoPagoAPIClient:
             Respuesta deserializada (dict o list) o None en caso de error.
         """
         url = f"{MP_BASE_URL}{endpoint}"
+        limitador = self._obtener_limitador()
         for intento in range(max_retries):
             try:
                 session = await self._get_session()
-                async with session.get(url, **kwargs) as response:
+                async with limitador, session.get(url, **kwargs) as response:
+                    limitador.registrar_respuesta(response.status, response.headers.get("Retry-After"))
                     if response.status == 200:
                         content_type = response.headers.get("Content-Type", "")
                         if "json" in content_type:
@@ -71,6 +93,8 @@ class MercadoPagoAPIClient:
                     if response.status == 404:
                         logger.error(f"Recurso no encontrado (404): {url}")
                         return None
+                    if response.status in ESTADOS_LIMITADOS and intento < max_retries - 1:
+                        continue  # El limitador ya pausó y bajó la tasa
                     if response.status >= 500 and intento < max_retries - 1:
                         await asyncio.sleep(2 ** intento)
                         continue
@@ -101,15 +125,19 @@ class MercadoPagoAPIClient:
             Respuesta JSON deserializada o None en caso de error.
         """
         url = f"{MP_BASE_URL}{endpoint}"
+        limitador = self._obtener_limitador()
         for intento in range(max_retries):
             try:
                 session = await self._get_session()
-                async with session.post(url, json=payload) as response:
+                async with limitador, session.post(url, json=payload) as response:
+                    limitador.registrar_respuesta(response.status, response.headers.get("Retry-After"))
                     if response.status in (200, 201, 202):  # 202 = Accepted (creación asíncrona)
                         return await response.json()
                     if response.status == 401:
                         logger.error("Error de autenticación (401). Verificar access_token.")
                         return None
+                    if response.status in ESTADOS_LIMITADOS and intento < max_retries - 1:
+                        continue  # El limitador ya pausó y bajó la tasa
                     if response.status >= 500 and intento < max_retries - 1:
                         await asyncio.sleep(2 ** intento)
                         continue
@@ -135,15 +163,19 @@ class MercadoPagoAPIClient:
     ) -> Optional[Dict[str, Any]]:
         """Ejecuta un PUT con reintentos."""
         url = f"{MP_BASE_URL}{endpoint}"
+        limitador = self._obtener_limitador()
         for intento in range(max_retries):
             try:
                 session = await self._get_session()
-                async with session.put(url, json=payload) as response:
+                async with limitador, session.put(url, json=payload) as response:
+                    limitador.registrar_respuesta(response.status, response.headers.get("Retry-After"))
                     if response.status == 200:
                         return await response.json()
                     if response.status == 401:
                         logger.error("Error de autenticación (401). Verificar access_token.")
                         return None
+                    if response.status in ESTADOS_LIMITADOS and intento < max_retries - 1:
+                        continue  # El limitador ya pausó y bajó la tasa
                     if response.status >= 500 and intento < max_retries - 1:
                         await asyncio.sleep(2 ** intento)
                         continue
@@ -304,8 +336,10 @@ class MercadoPagoAPIClient:
         # El endpoint de descarga devuelve el CSV directamente (no JSON)
         session = await self._get_session()
         url = f"{MP_BASE_URL}/v1/account/release_report/{file_name}"
+        limitador = self._obtener_limitador()
         try:
-            async with session.get(url) as response:
+            async with limitador, session.get(url) as response:
+                limitador.registrar_respuesta(response.status, response.headers.get("Retry-After"))
                 if response.status == 200:
                     contenido = await response.read()
                     logger.debug(
@@ -327,6 +361,62 @@ class MercadoPagoAPIClient:
             logger.error(f"Error de conexión al descargar '{file_name}': {e}")
             return None
 
+    async def iterar_reporte(
+        self, file_name: str, tamano_bloque: int = TAMANO_BLOQUE_DESCARGA, max_retries: int = 3
+    ) -> AsyncIterator[bytes]:
+        """
+        Descarga el CSV del reporte en streaming, entregando el cuerpo de la respuesta
+        en bloques de bytes a medida que llega, sin cargarlo completo en memoria.
+
+        El limitador acota sólo el envío de la solicitud: el lugar se libera al recibir
+        el estado HTTP y no durante toda la descarga. Si la respuesta es 429/503 (el
+        limitador ya pausó y bajó la tasa) se reintenta antes de entregar ningún bloque.
+
+        Args:
+            file_name (str): Nombre del archivo del reporte.
+            tamano_bloque (int): Tamaño máximo de cada bloque en bytes.
+            max_retries (int): Intentos ante respuestas 429/503.
+
+        Yields:
+            bytes: Bloques consecutivos del CSV.
+
+        Raises:
+            DescargaReporteError: Si la respuesta no es 200 o la conexión se corta.
+        """
+        logger.debug(f"Descargando reporte en streaming: {file_name}")
+        session = await self._get_session()
+        url = f"{MP_BASE_URL}/v1/account/release_report/{file_name}"
+        # Sin límite total: un reporte grande puede tardar más que el timeout de la sesión
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=120)
+        total = 0
+        limitador = self._obtener_limitador()
+        try:
+            for intento in range(max_retries):
+                async with limitador:
+                    response = await session.get(url, timeout=timeout)
+                    limitador.registrar_respuesta(response.status, response.headers.get("Retry-After"))
+                try:
+                    if response.status in ESTADOS_LIMITADOS and intento < max_retries - 1:
+                        continue  # El limitador ya pausó y bajó la tasa
+                    if response.status == 401:
+                        raise DescargaReporteError("Error de autenticación (401) al descargar reporte.")
+                    if response.status != 200:
+                        text = await response.text()
+                        raise DescargaReporteError(
+                            f"Error HTTP {response.status} al descargar '{file_name}': {text}"
+                        )
+                    async for bloque in response.content.iter_chunked(tamano_bloque):
+                        total += len(bloque)
+                        yield bloque
+                    break
+                finally:
+                    response.release()
+        except asyncio.TimeoutError as e:
+            raise DescargaReporteError(f"Timeout al descargar el reporte '{file_name}'.") from e
+        except aiohttp.ClientError as e:
+            raise DescargaReporteError(f"Error de conexión al descargar '{file_name}': {e}") from e
+        logger.debug(f"Reporte descargado. Tamaño: {total} bytes.")
+
     async def close(self):
         """Cierra la sesión HTTP de forma explícita."""
         if self._session and not self._session.closed:
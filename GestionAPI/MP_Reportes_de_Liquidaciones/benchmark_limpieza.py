@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Micro-benchmark de la etapa de limpieza del reporte de liquidaciones.
+
+Genera un CSV sintético con el mismo formato que el reporte de Mercado Pago,
+lo lee con _leer_csv y compara la limpieza anterior (lambda por celda, replace
+sobre todo el DataFrame) contra el plan de conversión vectorizado de
+_limpiar_dataframe. Verifica además que ambos produzcan los mismos valores.
+
+Uso:
+    python benchmark_limpieza.py                # 500.000 filas
+    python benchmark_limpieza.py --filas 100000 --repeticiones 3
+"""
+
+import sys
+import os
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, project_root)
+
+import argparse
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from GestionAPI.MP_Reportes_de_Liquidaciones.consultas import (
+    CSV_TO_DB_COLUMNS,
+    DECIMAL_COLUMNS,
+    INT_COLUMNS,
+    DATETIME_COLUMNS,
+    BOOL_COLUMNS,
+    CATEGORY_COLUMNS,
+)
+from GestionAPI.MP_Reportes_de_Liquidaciones.sync_liquidaciones_mp import (
+    _leer_csv,
+    _limpiar_dataframe,
+)
+
+
+def _generar_csv(ruta: str, filas: int, semilla: int = 42):
+    """Escribe un CSV sintético separado por ';' con todas las columnas del reporte."""
+    rng = np.random.default_rng(semilla)
+    datos = {}
+
+    for key in CSV_TO_DB_COLUMNS:
+        if key in DECIMAL_COLUMNS:
+            valores = np.round(rng.uniform(-50000, 50000, filas), 2).astype(str)
+        elif key in INT_COLUMNS:
+            valores = rng.integers(1, 10**10, filas).astype(str)
+        elif key in DATETIME_COLUMNS:
+            segundos = rng.integers(0, 5 * 86400, filas)
+            fechas = pd.Timestamp("2026-04-19T03:00:00Z") + pd.to_timedelta(segundos, unit="s")
+            valores = fechas.strftime("%Y-%m-%dT%H:%M:%S.000-03:00").to_numpy()
+        elif key in BOOL_COLUMNS:
+            valores = rng.choice(["true", "false", "TRUE", "0", "1"], filas)
+        elif key in CATEGORY_COLUMNS:
+            valores = rng.choice([f"{key.lower()}_{i}" for i in range(8)], filas)
+        else:
+            valores = np.char.add(f"{key.lower()}-", rng.integers(0, 10**9, filas).astype(str))
+
+        valores = np.asarray(valores, dtype=object)
+        # ~10% de celdas vacías, como en los reportes reales
+        valores[rng.random(filas) < 0.1] = ""
+        datos[key] = valores
+
+    pd.DataFrame(datos).to_csv(ruta, sep=";", index=False)
+
+
+def _limpiar_dataframe_anterior(df: pd.DataFrame) -> pd.DataFrame:
+    """Implementación previa de _limpiar_dataframe, conservada sólo para comparar."""
+    df.replace({"": None, "nan": None, "NaN": None, "None": None}, inplace=True)
+
+    db_to_csv_key = {v: k for k, v in CSV_TO_DB_COLUMNS.items()}
+
+    for col in df.columns:
+        csv_key = db_to_csv_key.get(col, col)
+        if csv_key in DECIMAL_COLUMNS:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+        elif csv_key in INT_COLUMNS:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+            df[col] = df[col].where(df[col].notna(), other=None)
+        elif csv_key in DATETIME_COLUMNS or col in ("FECHA_LIQUIDACION", "TRANSACTION_APPROVAL_DATE"):
+            df[col] = pd.to_datetime(df[col], errors="coerce", utc=True)
+            if hasattr(df[col], "dt") and hasattr(df[col].dt, "tz"):
+                df[col] = df[col].dt.tz_localize(None) if df[col].dt.tz is None else df[col].dt.tz_convert(None)
+        elif csv_key in BOOL_COLUMNS or col == "IS_RELEASED":
+            df[col] = df[col].map(
+                lambda x: True if str(x).strip().lower() in ("true", "1", "yes")
+                          else (False if str(x).strip().lower() in ("false", "0", "no") else None)
+            )
+    return df
+
+
+def _medir(funcion, df_original: pd.DataFrame, repeticiones: int):
+    """Devuelve (mejor tiempo en segundos, resultado de la última ejecución)."""
+    mejor = None
+    resultado = None
+    for _ in range(repeticiones):
+        df = df_original.copy()
+        inicio = time.perf_counter()
+        resultado = funcion(df)
+        duracion = time.perf_counter() - inicio
+        mejor = duracion if mejor is None else min(mejor, duracion)
+    return mejor, resultado
+
+
+def _verificar_equivalencia(anterior: pd.DataFrame, nuevo: pd.DataFrame):
+    """Compara los valores de ambos resultados tratando todos los nulos como iguales."""
+    for col in anterior.columns:
+        a = anterior[col].astype(object)
+        b = nuevo[col].astype(object)
+        nulos_a = a.isna().to_numpy()
+        nulos_b = b.isna().to_numpy()
+        if not np.array_equal(nulos_a, nulos_b):
+            raise AssertionError(f"Los nulos de la columna {col} no coinciden")
+        iguales = (a[~nulos_a].to_numpy() == b[~nulos_b].to_numpy())
+        if not np.all(iguales):
+            raise AssertionError(f"Los valores de la columna {col} no coinciden")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la limpieza del reporte de liquidaciones.")
+    parser.add_argument("--filas", type=int, default=500_000, help="Cantidad de filas del CSV sintético.")
+    parser.add_argument("--repeticiones", type=int, default=1, help="Repeticiones por implementación (se toma la mejor).")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "reporte_sintetico.csv")
+
+        print(f"Generando CSV sintético de {args.filas:,} filas...")
+        _generar_csv(ruta, args.filas)
+        print(f"Tamaño del CSV: {os.path.getsize(ruta) / 1024 / 1024:.1f} MB")
+
+        df = _leer_csv(ruta)
+
+    tiempo_anterior, resultado_anterior = _medir(_limpiar_dataframe_anterior, df, args.repeticiones)
+    tiempo_nuevo, resultado_nuevo = _medir(_limpiar_dataframe, df, args.repeticiones)
+
+    _verificar_equivalencia(resultado_anterior, resultado_nuevo)
+
+    memoria_anterior = resultado_anterior.memory_usage(deep=True).sum() / 1024 / 1024
+    memoria_nueva = resultado_nuevo.memory_usage(deep=True).sum() / 1024 / 1024
+
+    print(f"Limpieza anterior:    {tiempo_anterior:8.2f} s  ({memoria_anterior:,.0f} MB)")
+    print(f"Limpieza vectorizada: {tiempo_nuevo:8.2f} s  ({memoria_nueva:,.0f} MB)")
+    print(f"Aceleración: {tiempo_anterior / tiempo_nuevo:.1f}x  (resultados equivalentes)")
+
+
+if __name__ == "__main__":
+    main()
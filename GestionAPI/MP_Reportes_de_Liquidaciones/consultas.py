@@ -6,6 +6,9 @@ Define el mapeo de columnas CSV → tabla SQL y el template MERGE.
 # Nombre de la tabla destino
 TABLE_NAME = "MP_T_REPORTE_DE_LIQUIDACIONES"
 
+# Tabla temporal (de sesión) usada como staging para el MERGE por lote
+STAGING_TABLE_NAME = "#MP_STAGING_LIQUIDACIONES"
+
 # Columnas clave usadas en el ON del MERGE (identifica unicidad de registro)
 MERGE_KEY_COLUMNS = ["FECHA_LIQUIDACION", "SOURCE_ID", "RECORD_TYPE", "DESCRIPTION"]
 
@@ -92,3 +95,11 @@ DATETIME_COLUMNS = {
 BOOL_COLUMNS = {
     "IS_RELEASED",
 }
+
+# Columnas de texto con pocos valores distintos (se cargan como category para ahorrar memoria)
+CATEGORY_COLUMNS = {
+    "RECORD_TYPE", "DESCRIPTION", "PAYMENT_METHOD", "PAYMENT_METHOD_TYPE",
+    "CURRENCY", "BUSINESS_UNIT", "SUB_UNIT", "FRANCHISE", "SHIPMENT_MODE",
+    "PAYER_ID_TYPE", "STORE_NAME", "POS_NAME", "POI_WALLET_NAME",
+    "POI_BANK_NAME", "ISSUER_NAME",
+}
@@ -4,6 +4,12 @@
 """
 Operaciones de base de datos para el módulo MP-Reportes_de_Liquidaciones.
 Maneja el upsert (MERGE) de registros en la tabla MP_T_REPORTE_DE_LIQUIDACIONES.
+
+Modos de upsert:
+  - "lote" (por defecto): carga el DataFrame en una tabla temporal con fast_executemany
+    y ejecuta un único MERGE set-based.
+  - "fila": un MERGE parametrizado por fila; más lento, pero permite identificar
+    exactamente qué filas fallan.
 """
 
 import sys
@@ -17,17 +23,23 @@ import pandas as pd
 from typing import Optional
 
 from GestionAPI.common.conexion import Conexion
+from GestionAPI.common.async_db import AsyncDBMixin
+from GestionAPI.common.staging import aplicar_con_staging
 from GestionAPI.common.credenciales import CENTRAL_LAKERS
 from GestionAPI.MP_Reportes_de_Liquidaciones.consultas import (
     TABLE_NAME,
     MERGE_KEY_COLUMNS,
     CSV_TO_DB_COLUMNS,
+    STAGING_TABLE_NAME,
 )
 
 logger = logging.getLogger("mp_liquidaciones")
 
+# Filas por executemany al cargar la tabla temporal
+CHUNK_SIZE_STAGING = 1000
+
 
-class MercadoPagoDB:
+class MercadoPagoDB(AsyncDBMixin):
     """
     Clase para manejar las operaciones de base de datos del módulo MP-Reportes_de_Liquidaciones.
     Utiliza la base LAKER_SA en el servidor XL-TANGO.
@@ -92,25 +104,105 @@ WHEN MATCHED THEN
         CREATED_AT = GETDATE()
 WHEN NOT MATCHED THEN
     INSERT ({insert_cols}, CREATED_AT)
-    VALUES ({insert_vals}, GETDATE());
+    VALUES ({insert_vals}, GETDATE())
+OUTPUT $action;
 """
         return query
 
-    def upsert_liquidaciones(self, df: pd.DataFrame) -> dict:
+    def _build_merge_staging_query(self, db_columns: list) -> str:
+        """
+        Construye el MERGE set-based desde la tabla temporal hacia la tabla destino.
+
+        Si el reporte trae varias filas con la misma clave se toma la última cargada,
+        igual que en el modo fila donde cada MERGE pisa al anterior. Las acciones del
+        MERGE se devuelven agregadas como (insertados, actualizados).
+
+        Args:
+            db_columns (list): Lista de nombres de columnas DB cargadas en la tabla temporal.
+
+        Returns:
+            str: Lote T-SQL que ejecuta el MERGE y devuelve los conteos.
+        """
+        non_key_cols = [c for c in db_columns if c not in MERGE_KEY_COLUMNS]
+        key_cols = [c for c in MERGE_KEY_COLUMNS if c in db_columns]
+
+        columnas = ", ".join(db_columns)
+        on_conditions = " AND ".join(
+            [f"ISNULL(target.{c}, '') = ISNULL(source.{c}, '')" for c in key_cols]
+        )
+        update_set = ",\n        ".join(
+            [f"target.{c} = source.{c}" for c in non_key_cols]
+        )
+        insert_vals = ", ".join([f"source.{c}" for c in db_columns])
+
+        query = f"""
+SET NOCOUNT ON;
+DECLARE @acciones TABLE (ACCION NVARCHAR(10));
+
+MERGE INTO {TABLE_NAME} AS target
+USING (
+    SELECT {columnas}
+    FROM (
+        SELECT {columnas},
+               ROW_NUMBER() OVER (PARTITION BY {", ".join(key_cols)} ORDER BY _FILA DESC) AS _ORDEN
+        FROM {STAGING_TABLE_NAME}
+    ) AS ultimas
+    WHERE _ORDEN = 1
+) AS source
+ON (
+    {on_conditions}
+)
+WHEN MATCHED THEN
+    UPDATE SET
+        {update_set},
+        CREATED_AT = GETDATE()
+WHEN NOT MATCHED THEN
+    INSERT ({columnas}, CREATED_AT)
+    VALUES ({insert_vals}, GETDATE())
+OUTPUT $action INTO @acciones;
+
+SELECT
+    SUM(CASE WHEN ACCION = 'INSERT' THEN 1 ELSE 0 END),
+    SUM(CASE WHEN ACCION = 'UPDATE' THEN 1 ELSE 0 END)
+FROM @acciones;
+"""
+        return query
+
+    @staticmethod
+    def _filas_para_sql(df: pd.DataFrame) -> list:
+        """
+        Convierte el DataFrame en una lista de tuplas con tipos nativos de Python,
+        reemplazando NaN/NaT y cadenas vacías por None (NULL en DB).
+        """
+        filas = []
+        for fila in df.astype(object).itertuples(index=False, name=None):
+            filas.append(tuple(
+                None if (v == "" if isinstance(v, str) else pd.isna(v))
+                else (v.to_pydatetime() if isinstance(v, pd.Timestamp) else v)
+                for v in fila
+            ))
+        return filas
+
+    def upsert_liquidaciones(self, df: pd.DataFrame, modo: str = "lote") -> dict:
         """
         Inserta o actualiza los registros del DataFrame en MP_T_REPORTE_DE_LIQUIDACIONES.
-        Para cada fila ejecuta un MERGE: si la clave (FECHA_LIQUIDACION, SOURCE_ID,
-        RECORD_TYPE, DESCRIPTION) ya existe, actualiza; si no, inserta.
+        Si la clave (FECHA_LIQUIDACION, SOURCE_ID, RECORD_TYPE, DESCRIPTION) ya existe,
+        actualiza; si no, inserta.
 
         Args:
             df (pd.DataFrame): DataFrame con columnas en nombres de DB (ya renombradas).
+            modo (str): "lote" para el MERGE set-based vía tabla temporal, o "fila" para
+                un MERGE por fila (diagnóstico de filas con errores). Si el modo lote
+                falla, se reintenta automáticamente en modo fila.
 
         Returns:
-            dict: {"insertados": int, "actualizados_aprox": int, "errores": int}
+            dict: {"insertados": int, "actualizados": int, "errores": int}
         """
+        stats = {"insertados": 0, "actualizados": 0, "errores": 0}
+
         if df.empty:
             logger.warning("DataFrame vacío. No hay registros para procesar.")
-            return {"insertados": 0, "actualizados_aprox": 0, "errores": 0}
+            return stats
 
         # Filtrar solo las columnas que existen en el CSV_TO_DB_COLUMNS (columnas DB válidas)
         columnas_db_validas = list(CSV_TO_DB_COLUMNS.values())
@@ -118,12 +210,78 @@ WHEN NOT MATCHED THEN
 
         if not df_cols:
             logger.error("El DataFrame no tiene columnas reconocibles para el MERGE.")
-            return {"insertados": 0, "actualizados_aprox": 0, "errores": 0}
+            return stats
 
-        merge_query = self._build_merge_query(df_cols)
-        df_subset = df[df_cols]
+        filas = self._filas_para_sql(df[df_cols])
+
+        if modo == "lote":
+            resultado = self._upsert_lote(df_cols, filas)
+            if resultado is not None:
+                return resultado
+            logger.warning("Reintentando el upsert en modo fila para identificar las filas con error.")
+
+        return self._upsert_por_fila(df_cols, filas)
+
+    def _upsert_lote(self, df_cols: list, filas: list) -> Optional[dict]:
+        """
+        Carga las filas en la tabla temporal con fast_executemany y ejecuta un único MERGE.
+        Todo ocurre en una sola transacción.
+
+        Returns:
+            dict con los conteos reales del MERGE, o None si el lote falló.
+        """
+        conexion = self._get_connection()
+        cursor = conexion.conectar()
+        if not cursor:
+            logger.error("No se pudo obtener cursor para la base de datos.")
+            return None
 
-        stats = {"insertados": 0, "actualizados_aprox": 0, "errores": 0}
+        columnas = ", ".join(df_cols)
+        placeholders = ", ".join(["?" for _ in df_cols])
+
+        merge_query = self._build_merge_staging_query(df_cols)
+
+        def merge(cursor):
+            cursor.execute(merge_query)
+            return cursor.fetchone()
+
+        try:
+            insertados, actualizados = aplicar_con_staging(
+                cursor,
+                conexion.connection,
+                STAGING_TABLE_NAME,
+                # Copia la estructura (tipos) de las columnas de la tabla destino
+                f"SELECT TOP 0 {columnas}, IDENTITY(INT, 1, 1) AS _FILA INTO {STAGING_TABLE_NAME} FROM {TABLE_NAME}",
+                f"INSERT INTO {STAGING_TABLE_NAME} ({columnas}) VALUES ({placeholders})",
+                filas,
+                merge,
+                tamano_lote=CHUNK_SIZE_STAGING,
+            )
+
+            stats = {
+                "insertados": insertados or 0,
+                "actualizados": actualizados or 0,
+                "errores": 0,
+            }
+            logger.info(
+                f"MERGE por lote completado. Filas: {len(filas)} | "
+                f"Insertadas: {stats['insertados']} | Actualizadas: {stats['actualizados']}"
+            )
+            return stats
+        except Exception as e:
+            logger.error(f"Error durante el upsert por lote: {e}")
+            return None
+        finally:
+            cursor.close()
+            conexion.connection.close()
+
+    def _upsert_por_fila(self, df_cols: list, filas: list) -> dict:
+        """
+        Ejecuta un MERGE parametrizado por fila. Las filas con error se registran
+        en el log y no impiden procesar el resto.
+        """
+        merge_query = self._build_merge_query(df_cols)
+        stats = {"insertados": 0, "actualizados": 0, "errores": 0}
 
         conexion = self._get_connection()
         cursor = conexion.conectar()
@@ -132,22 +290,22 @@ WHEN NOT MATCHED THEN
             return stats
 
         try:
-            for idx, row in df_subset.iterrows():
-                params = [
-                    None if (pd.isna(v) if not isinstance(v, str) else v == "") else v
-                    for v in row.tolist()
-                ]
+            for idx, params in enumerate(filas):
                 try:
                     cursor.execute(merge_query, params)
-                    stats["insertados"] += 1  # aproximado (MERGE no diferencia fácilmente)
+                    accion = cursor.fetchone()
+                    if accion and accion[0] == "UPDATE":
+                        stats["actualizados"] += 1
+                    else:
+                        stats["insertados"] += 1
                 except Exception as e:
-                    logger.error(f"Error en MERGE fila {idx}: {e}")
+                    logger.error(f"Error en MERGE fila {idx}: {e} | Valores: {params}")
                     stats["errores"] += 1
 
             conexion.connection.commit()
             logger.info(
-                f"MERGE completado. Filas procesadas: {stats['insertados']} | "
-                f"Errores: {stats['errores']}"
+                f"MERGE por fila completado. Insertadas: {stats['insertados']} | "
+                f"Actualizadas: {stats['actualizados']} | Errores: {stats['errores']}"
             )
         except Exception as e:
             logger.error(f"Error crítico durante el proceso de upsert: {e}")
@@ -8,10 +8,10 @@ Flujo:
   1. Configurar el reporte para usar encabezados en inglés (KEY names).
   2. Solicitar la creación del reporte para los últimos 5 días.
   3. Esperar (polling) hasta que el reporte esté disponible.
-  4. Descargar el CSV y guardarlo temporalmente en temp/.
-  5. Procesar el CSV con Pandas (renombrar columnas, limpiar tipos).
-  6. Hacer upsert en la tabla MP_T_REPORTE_DE_LIQUIDACIONES en SQL Server.
-  7. Eliminar el archivo temporal.
+  4. Descargar el CSV en streaming (sin archivos temporales).
+  5. Procesar el CSV con Pandas por bloques de filas (renombrar columnas, limpiar tipos).
+  6. Hacer upsert de cada bloque en la tabla MP_T_REPORTE_DE_LIQUIDACIONES en SQL Server,
+     en paralelo con la descarga del resto del reporte.
 
 Proceso asíncrono mediante asyncio.
 """
@@ -24,13 +24,17 @@ sys.path.insert(0, project_root)
 
 import asyncio
 import io
+import queue
+import re
+import threading
 from datetime import datetime, timedelta, timezone
 
+import numpy as np
 import pandas as pd
 
 from GestionAPI.common.logger_config import setup_logger
 from GestionAPI.common.credenciales import MERCADOPAGO
-from GestionAPI.MP_Reportes_de_Liquidaciones.api_mp import MercadoPagoAPIClient
+from GestionAPI.MP_Reportes_de_Liquidaciones.api_mp import MercadoPagoAPIClient, DescargaReporteError
 from GestionAPI.MP_Reportes_de_Liquidaciones.db_operations_mp import MercadoPagoDB
 from GestionAPI.MP_Reportes_de_Liquidaciones.consultas import (
     CSV_TO_DB_COLUMNS,
@@ -38,6 +42,7 @@ from GestionAPI.MP_Reportes_de_Liquidaciones.consultas import (
     INT_COLUMNS,
     DATETIME_COLUMNS,
     BOOL_COLUMNS,
+    CATEGORY_COLUMNS,
 )
 
 _module_dir = os.path.dirname(__file__)
@@ -47,7 +52,10 @@ logger = setup_logger(
     log_path=os.path.join(_module_dir, "logs", "app.log"),
 )
 
-TEMP_DIR = os.path.join(_module_dir, "temp")
+# Filas por bloque al parsear el CSV; cada bloque se limpia y se sube por separado
+FILAS_POR_BLOQUE = 20_000
+# Bloques de bytes descargados que pueden esperar en memoria a ser parseados
+MAX_BLOQUES_EN_COLA = 32
 
 # Encabezados en español → KEY inglés (fallback si report_translation != 'en')
 SPANISH_TO_KEY = {
@@ -148,24 +156,34 @@ def _calcular_rango_fechas() -> tuple:
     )
 
 
-def _guardar_csv_temporal(contenido: bytes, file_name: str) -> str:
-    """
-    Guarda el contenido binario del CSV en el directorio temp/.
+def _detectar_separador(primera_linea: str) -> str:
+    """MP puede usar ; o , como separador; se decide por el encabezado."""
+    return ";" if primera_linea.count(";") > primera_linea.count(",") else ","
 
-    Returns:
-        str: Ruta absoluta del archivo guardado.
+
+def _normalizar_columnas(df: pd.DataFrame) -> pd.DataFrame:
     """
-    os.makedirs(TEMP_DIR, exist_ok=True)
-    ruta = os.path.join(TEMP_DIR, file_name)
-    with open(ruta, "wb") as f:
-        f.write(contenido)
-    logger.debug(f"CSV temporal guardado en: {ruta}")
-    return ruta
+    Normaliza los encabezados del CSV y los renombra a sus nombres de columna DB.
+    Si los encabezados vienen en español, primero los traduce a KEY inglés.
+    """
+    # Normalizar encabezados: quitar espacios extra
+    df.columns = [c.strip() for c in df.columns]
+
+    # Si los encabezados están en español, traducirlos a KEY inglés
+    if df.columns[0] not in CSV_TO_DB_COLUMNS:
+        df.rename(columns=SPANISH_TO_KEY, inplace=True)
+
+    # Renombrar de KEY CSV → columna DB
+    df.rename(columns=CSV_TO_DB_COLUMNS, inplace=True)
+
+    return df
 
 
 def _leer_csv(ruta: str) -> pd.DataFrame:
     """
-    Lee el archivo CSV del reporte de MP y devuelve un DataFrame con columnas renombradas a sus KEY DB names.
+    Lee un archivo CSV del reporte de MP completo y devuelve un DataFrame con columnas
+    renombradas a sus KEY DB names. La sincronización usa la lectura en streaming;
+    esta función queda para pruebas y benchmarks sobre archivos locales.
 
     Args:
         ruta (str): Ruta al archivo CSV.
@@ -173,35 +191,244 @@ def _leer_csv(ruta: str) -> pd.DataFrame:
     Returns:
         pd.DataFrame con columnas nombradas según CSV_TO_DB_COLUMNS.
     """
-    # Intentar detectar el separador (MP puede usar ; o ,)
     with open(ruta, "r", encoding="utf-8-sig") as f:
-        primera_linea = f.readline()
-
-    separador = ";" if primera_linea.count(";") > primera_linea.count(",") else ","
+        separador = _detectar_separador(f.readline())
 
     df = pd.read_csv(ruta, sep=separador, encoding="utf-8-sig", dtype=str)
     logger.debug(f"CSV leído: {len(df)} filas, {len(df.columns)} columnas. Separador: '{separador}'")
 
-    # Normalizar encabezados: quitar espacios extra
-    df.columns = [c.strip() for c in df.columns]
+    return _normalizar_columnas(df)
 
-    # Si los encabezados están en español, traducirlos a KEY inglés
-    if df.columns[0] not in CSV_TO_DB_COLUMNS:
-        df.rename(columns=SPANISH_TO_KEY, inplace=True)
-        logger.info("Encabezados traducidos de español a KEY inglés.")
 
-    # Renombrar de KEY CSV → columna DB
-    df.rename(columns=CSV_TO_DB_COLUMNS, inplace=True)
+class _LectorCola(io.RawIOBase):
+    """
+    Archivo binario de sólo lectura alimentado por una cola de bloques de bytes.
 
-    return df
+    La tarea de descarga (en el event loop) pone bloques en la cola y pandas los lee
+    desde un hilo aparte. `None` marca el fin del stream y una excepción en la cola
+    se relanza en el hilo lector.
+    """
+
+    def __init__(self, cola: queue.Queue):
+        self._cola = cola
+        self._pendiente = memoryview(b"")
+        self._fin = False
+
+    def readable(self):
+        return True
+
+    def devolver(self, datos: bytes):
+        """Reinserta bytes ya leídos al principio del stream."""
+        self._pendiente = memoryview(datos + bytes(self._pendiente))
+
+    def readinto(self, buffer):
+        while not self._pendiente and not self._fin:
+            item = self._cola.get()
+            if item is None:
+                self._fin = True
+            elif isinstance(item, BaseException):
+                raise item
+            else:
+                self._pendiente = memoryview(item)
+
+        n = min(len(buffer), len(self._pendiente))
+        buffer[:n] = self._pendiente[:n]
+        self._pendiente = self._pendiente[n:]
+        return n
+
+
+def _poner_en_cola(cola: queue.Queue, item, detenido: threading.Event) -> bool:
+    """Encola con espera, abandonando si el lector ya terminó. Se ejecuta en un hilo."""
+    while not detenido.is_set():
+        try:
+            cola.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _procesar_stream_csv(lector: _LectorCola, db: MercadoPagoDB, detenido: threading.Event) -> dict:
+    """
+    Parsea el CSV desde el stream en bloques de FILAS_POR_BLOQUE filas y hace el upsert
+    de cada bloque. Se ejecuta en un hilo aparte mientras la descarga continúa.
+
+    Returns:
+        dict: {"filas", "bloques", "insertados", "actualizados", "errores"}
+    """
+    stats = {"filas": 0, "bloques": 0, "insertados": 0, "actualizados": 0, "errores": 0}
+    try:
+        # El separador se detecta sobre el encabezado y luego se devuelve al stream
+        primera_linea = lector.readline()
+        lector.devolver(primera_linea)
+        separador = _detectar_separador(primera_linea.decode("utf-8-sig", errors="replace"))
+        logger.debug(f"Separador detectado: '{separador}'")
+
+        texto = io.TextIOWrapper(io.BufferedReader(lector), encoding="utf-8-sig", newline="")
+        bloques = pd.read_csv(texto, sep=separador, dtype=str, chunksize=FILAS_POR_BLOQUE)
+
+        for df in bloques:
+            if df.empty:
+                continue
+            df = _limpiar_dataframe(_normalizar_columnas(df))
+            resultado = db.upsert_liquidaciones(df)
+
+            stats["filas"] += len(df)
+            stats["bloques"] += 1
+            for clave in ("insertados", "actualizados", "errores"):
+                stats[clave] += resultado[clave]
+            logger.debug(f"Bloque {stats['bloques']} procesado: {len(df)} filas (acumulado {stats['filas']}).")
+    except pd.errors.EmptyDataError:
+        pass  # CSV sin encabezado ni filas: se informa como reporte vacío
+    finally:
+        detenido.set()
+
+    return stats
+
+
+async def _sincronizar_reporte_streaming(api_client: MercadoPagoAPIClient, file_name: str,
+                                         db: MercadoPagoDB) -> dict:
+    """
+    Descarga el reporte en streaming y lo procesa por bloques a medida que llega.
+
+    La descarga corre en el event loop y deja los bloques de bytes en una cola acotada;
+    un hilo lee de esa cola con pandas, limpia y hace el upsert de cada bloque de filas.
+    Así la memoria se mantiene acotada sin importar el tamaño del reporte y las
+    escrituras en la base se solapan con la descarga.
+
+    Raises:
+        DescargaReporteError: Si la descarga falla.
+    """
+    loop = asyncio.get_running_loop()
+    cola = queue.Queue(maxsize=MAX_BLOQUES_EN_COLA)
+    detenido = threading.Event()
+    procesamiento = asyncio.ensure_future(db.en_hilo(_procesar_stream_csv, _LectorCola(cola), db, detenido))
+
+    error_descarga = None
+    descarga = api_client.iterar_reporte(file_name)
+    try:
+        async for bloque in descarga:
+            if not await loop.run_in_executor(None, _poner_en_cola, cola, bloque, detenido):
+                break  # El procesamiento terminó antes (error); no tiene sentido seguir descargando
+    except Exception as e:
+        error_descarga = e
+    finally:
+        await descarga.aclose()
+        # Fin del stream (o el error de descarga, que el hilo lector relanza)
+        await loop.run_in_executor(None, _poner_en_cola, cola, error_descarga, detenido)
+
+    stats = await procesamiento
+    if error_descarga:
+        raise error_descarga
+    return stats
+
+
+# Valores que el reporte usa para representar "sin dato"
+_VALORES_NULOS = ["", "nan", "NaN", "None"]
+_VALORES_VERDADEROS = ["true", "1", "yes"]
+_VALORES_FALSOS = ["false", "0", "no"]
+_FORMATO_FECHA_LOCAL = "%Y-%m-%dT%H:%M:%S.%f"
+_PATRON_OFFSET = re.compile(r"[+-]\d\d:\d\d")
+
+
+def _construir_plan_conversion() -> dict:
+    """
+    Arma el plan de conversión {columna DB: tipo} a partir de los conjuntos de
+    columnas tipadas de consultas.py (expresados en KEY del CSV).
+    Las columnas que no figuran en el plan se tratan como texto.
+    """
+    tipos_por_key = (
+        [(k, "decimal") for k in DECIMAL_COLUMNS]
+        + [(k, "entero") for k in INT_COLUMNS]
+        + [(k, "fecha") for k in DATETIME_COLUMNS]
+        + [(k, "booleano") for k in BOOL_COLUMNS]
+        + [(k, "categoria") for k in CATEGORY_COLUMNS]
+    )
+    return {CSV_TO_DB_COLUMNS.get(key, key): tipo for key, tipo in tipos_por_key}
+
+
+# Se calcula una sola vez al importar el módulo
+PLAN_CONVERSION = _construir_plan_conversion()
+
+
+def _a_decimal(serie: pd.Series) -> pd.Series:
+    return pd.to_numeric(serie, errors="coerce")
+
+
+def _a_entero(serie: pd.Series) -> pd.Series:
+    valores = pd.to_numeric(serie, errors="coerce")
+    # Entero nullable (Int64) salvo que el reporte traiga decimales en la columna
+    if np.array_equal(valores.dropna(), np.floor(valores.dropna())):
+        return valores.astype("Int64")
+    return valores
+
+
+def _desfases_utc(offsets) -> dict:
+    """Traduce los sufijos '-03:00' distintos que aparecen en la columna a Timedelta."""
+    desfases = {}
+    for offset in offsets:
+        if _PATRON_OFFSET.fullmatch(offset):
+            signo = -1 if offset[0] == "-" else 1
+            desfases[offset] = signo * pd.Timedelta(hours=int(offset[1:3]), minutes=int(offset[4:6]))
+    return desfases
+
+
+def _a_fecha(serie: pd.Series) -> pd.Series:
+    """
+    Convierte a datetime UTC sin zona horaria (compatible con pyodbc / SQL Server).
+
+    El reporte usa el formato fijo '2026-04-19T10:33:12.000-03:00': la parte local se
+    parsea con formato explícito y el desfase se resuelve una vez por valor distinto,
+    lo que evita el parseo genérico con zona horaria celda por celda. Las celdas con
+    otro formato se convierten con el parseo genérico.
+    """
+    texto = serie.astype("string")
+    offsets = texto.str.slice(-6)
+    locales = pd.to_datetime(texto.str.slice(0, -6), format=_FORMATO_FECHA_LOCAL, errors="coerce")
+    desfases = offsets.map(_desfases_utc(offsets.dropna().unique())).astype("timedelta64[ns]")
+    fechas = locales - desfases
+
+    pendientes = fechas.isna() & texto.notna()
+    if pendientes.any():
+        fechas[pendientes] = pd.to_datetime(texto[pendientes], errors="coerce", utc=True).dt.tz_convert(None)
+    return fechas
+
+
+def _a_booleano(serie: pd.Series) -> pd.Series:
+    normalizada = serie.astype("string").str.strip().str.lower()
+    verdaderos = normalizada.isin(_VALORES_VERDADEROS).to_numpy(dtype=bool)
+    falsos = normalizada.isin(_VALORES_FALSOS).to_numpy(dtype=bool)
+    resultado = pd.Series(verdaderos, index=serie.index, dtype="boolean")
+    resultado[~(verdaderos | falsos)] = pd.NA
+    return resultado
+
+
+def _a_texto(serie: pd.Series) -> pd.Series:
+    return serie.mask(serie.isin(_VALORES_NULOS))
+
+
+def _a_categoria(serie: pd.Series) -> pd.Series:
+    return _a_texto(serie).astype("category")
+
+
+_CONVERSORES = {
+    "decimal": _a_decimal,
+    "entero": _a_entero,
+    "fecha": _a_fecha,
+    "booleano": _a_booleano,
+    "categoria": _a_categoria,
+}
 
 
 def _limpiar_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Aplica conversiones de tipos y limpieza de datos al DataFrame.
+    Aplica conversiones de tipos y limpieza de datos al DataFrame según PLAN_CONVERSION.
+
+    - Columnas de texto: cadenas vacías y 'nan'/'NaN'/'None' pasan a NULL.
+    - Decimales a float, enteros a Int64 nullable, fechas a datetime sin zona horaria,
+      booleanos a boolean nullable y texto de baja cardinalidad a category.
 
-    - Reemplaza cadenas vacías y 'nan' por None (NULL en DB).
-    - Convierte columnas decimales, enteras, datetime y booleanas.
+    Todas las conversiones son vectorizadas (por columna, sin funciones Python por celda).
 
     Args:
         df (pd.DataFrame): DataFrame crudo con columnas renombradas.
@@ -209,30 +436,9 @@ def _limpiar_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         pd.DataFrame limpio listo para el upsert.
     """
-    # Reemplazar cadenas vacías y 'nan' por NaN
-    df.replace({"": None, "nan": None, "NaN": None, "None": None}, inplace=True)
-
-    # Columnas DB a KEY para la conversión de tipos
-    db_to_csv_key = {v: k for k, v in CSV_TO_DB_COLUMNS.items()}
-
-    # Convertir decimales
     for col in df.columns:
-        csv_key = db_to_csv_key.get(col, col)
-        if csv_key in DECIMAL_COLUMNS:
-            df[col] = pd.to_numeric(df[col], errors="coerce")
-        elif csv_key in INT_COLUMNS:
-            df[col] = pd.to_numeric(df[col], errors="coerce")
-            df[col] = df[col].where(df[col].notna(), other=None)
-        elif csv_key in DATETIME_COLUMNS or col in ("FECHA_LIQUIDACION", "TRANSACTION_APPROVAL_DATE"):
-            df[col] = pd.to_datetime(df[col], errors="coerce", utc=True)
-            # Convertir a timezone-naive para compatibilidad con pyodbc / SQL Server
-            if hasattr(df[col], "dt") and hasattr(df[col].dt, "tz"):
-                df[col] = df[col].dt.tz_localize(None) if df[col].dt.tz is None else df[col].dt.tz_convert(None)
-        elif csv_key in BOOL_COLUMNS or col == "IS_RELEASED":
-            df[col] = df[col].map(
-                lambda x: True if str(x).strip().lower() in ("true", "1", "yes") 
-                          else (False if str(x).strip().lower() in ("false", "0", "no") else None)
-            )
+        conversor = _CONVERSORES.get(PLAN_CONVERSION.get(col), _a_texto)
+        df[col] = conversor(df[col])
 
     logger.debug(f"DataFrame limpiado. Total filas: {len(df)}")
     return df
@@ -244,7 +450,6 @@ async def main():
     """
     inicio_proceso = datetime.now()
     api_client = MercadoPagoAPIClient(access_token=MERCADOPAGO["access_token"])
-    ruta_temp = None
 
     try:
         # 1. Calcular rango de fechas (últimos 5 días sin incluir el día actual)
@@ -277,38 +482,32 @@ async def main():
                 logger.error("El reporte no estuvo disponible en el tiempo de espera (20 min). Abortando.")
                 return
 
-        # 5. Descargar el CSV
-        contenido_csv = await api_client.descargar_reporte(file_name)
-        if not contenido_csv:
-            logger.error("No se pudo descargar el reporte. Abortando sincronización.")
+        # 6. Descargar, limpiar y hacer upsert por bloques en streaming
+        db = MercadoPagoDB()
+        try:
+            stats = await _sincronizar_reporte_streaming(api_client, file_name, db)
+        except DescargaReporteError as e:
+            logger.error(f"No se pudo descargar el reporte: {e}. Abortando sincronización.")
             return
 
-        # 6. Guardar CSV en temp/
-        ruta_temp = _guardar_csv_temporal(contenido_csv, file_name)
-
-        # 7. Leer con Pandas
-        df = _leer_csv(ruta_temp)
-        if df.empty:
+        if stats["filas"] == 0:
             logger.warning("El reporte descargado no contiene datos.")
             return
 
-        # 8. Limpiar y convertir tipos
-        df = _limpiar_dataframe(df)
-
-        # 9. Upsert en SQL Server
-        db = MercadoPagoDB()
-        stats = db.upsert_liquidaciones(df)
-
         # Resumen final
         duracion = datetime.now() - inicio_proceso
         if stats["errores"] == 0:
             logger.info(
-                f"Sincronización completada. Filas: {stats['insertados']} | "
+                f"Sincronización completada. Filas: {stats['filas']} en {stats['bloques']} bloques | "
+                f"Insertadas: {stats['insertados']} | "
+                f"Actualizadas: {stats['actualizados']} | "
                 f"Duración: {duracion.total_seconds():.1f}s"
             )
         else:
             logger.warning(
-                f"Sincronización completada con errores. Filas: {stats['insertados']} | "
+                f"Sincronización completada con errores. Filas: {stats['filas']} | "
+                f"Insertadas: {stats['insertados']} | "
+                f"Actualizadas: {stats['actualizados']} | "
                 f"Errores: {stats['errores']} | Duración: {duracion.total_seconds():.1f}s"
             )
 
@@ -318,13 +517,6 @@ async def main():
 
     finally:
         await api_client.close()
-        # Eliminar CSV temporal
-        if ruta_temp and os.path.exists(ruta_temp):
-            try:
-                os.remove(ruta_temp)
-                logger.debug(f"Archivo temporal eliminado: {ruta_temp}")
-            except OSError as e:
-                logger.warning(f"No se pudo eliminar el archivo temporal '{ruta_temp}': {e}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import unittest
+import sys
+import os
+from unittest.mock import patch
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from GestionAPI.common.mock_db import conexion_mock, sentencias
+from GestionAPI.MP_Reportes_de_Liquidaciones.consultas import STAGING_TABLE_NAME
+from GestionAPI.MP_Reportes_de_Liquidaciones.db_operations_mp import MercadoPagoDB
+
+COLUMNAS = ["FECHA_LIQUIDACION", "SOURCE_ID", "RECORD_TYPE", "DESCRIPTION", "GROSS_AMOUNT"]
+
+
+class TestUpsertLote(unittest.TestCase):
+    """Pruebas del upsert por lote (tabla temporal + MERGE set-based) sin base real."""
+
+    def setUp(self):
+        self.db = MercadoPagoDB()
+        self.conexion, self.raw, self.cursor = conexion_mock('base_mp')
+        patcher = patch.object(MercadoPagoDB, '_get_connection', return_value=self.conexion)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch('GestionAPI.MP_Reportes_de_Liquidaciones.db_operations_mp.CHUNK_SIZE_STAGING', 2)
+    def test_carga_staging_y_devuelve_conteos_del_merge(self):
+        """Las filas se cargan por bloques y los conteos salen del SELECT sobre OUTPUT $action."""
+        self.cursor.fetchone.return_value = (3, 2)
+        filas = [("2026-04-19", f"S{i}", "release", "payment", 10.0) for i in range(5)]
+
+        stats = self.db._upsert_lote(COLUMNAS, filas)
+
+        self.assertEqual(stats, {"insertados": 3, "actualizados": 2, "errores": 0})
+        self.assertTrue(self.cursor.fast_executemany)
+        lotes = [llamada.args[1] for llamada in self.cursor.executemany.call_args_list]
+        self.assertEqual(lotes, [filas[0:2], filas[2:4], filas[4:5]])
+        self.assertEqual(self.raw.commit.call_count, 1)
+        self.assertIn(f"DROP TABLE {STAGING_TABLE_NAME}", sentencias(self.cursor))
+        self.raw.close.assert_called_once()
+
+    def test_conteos_nulos_sin_acciones(self):
+        """Si el MERGE no hizo nada, SUM devuelve NULL y los conteos quedan en cero."""
+        self.cursor.fetchone.return_value = (None, None)
+
+        stats = self.db._upsert_lote(COLUMNAS, [("2026-04-19", "S1", "release", "payment", 1.0)])
+
+        self.assertEqual(stats, {"insertados": 0, "actualizados": 0, "errores": 0})
+
+    def test_merge_toma_la_ultima_fila_de_cada_clave(self):
+        """El MERGE deduplica por la clave quedándose con la última fila cargada (_FILA)."""
+        self.cursor.fetchone.return_value = (1, 0)
+
+        self.db._upsert_lote(COLUMNAS, [("2026-04-19", "S1", "release", "payment", 1.0)])
+
+        merge = next(sql for sql in sentencias(self.cursor) if "MERGE INTO" in sql)
+        self.assertIn("ROW_NUMBER() OVER (PARTITION BY FECHA_LIQUIDACION, SOURCE_ID, RECORD_TYPE, DESCRIPTION "
+                      "ORDER BY _FILA DESC)", merge)
+        self.assertIn("WHERE _ORDEN = 1", merge)
+        self.assertIn("OUTPUT $action INTO @acciones", merge)
+        staging = next(sql for sql in sentencias(self.cursor) if "INTO " + STAGING_TABLE_NAME in sql)
+        self.assertIn("IDENTITY(INT, 1, 1) AS _FILA", staging)
+
+    def test_error_en_lote_revierte_y_devuelve_none(self):
+        """Si el lote falla se revierte, se elimina la temporal, se devuelve la conexión y el resultado es None."""
+        self.cursor.executemany.side_effect = Exception("String or binary data would be truncated")
+
+        stats = self.db._upsert_lote(COLUMNAS, [("2026-04-19", "S1", "release", "payment", 1.0)])
+
+        self.assertIsNone(stats)
+        self.raw.rollback.assert_called_once()
+        self.assertEqual(sentencias(self.cursor)[-1],
+                         f"IF OBJECT_ID('tempdb..{STAGING_TABLE_NAME}') IS NOT NULL DROP TABLE {STAGING_TABLE_NAME}")
+        self.raw.close.assert_called_once()
+
+
+class TestUpsertLiquidaciones(unittest.TestCase):
+    """Pruebas de la elección entre modo lote y modo fila."""
+
+    def _df(self):
+        import pandas as pd
+        return pd.DataFrame([{"FECHA_LIQUIDACION": "2026-04-19", "SOURCE_ID": "S1", "RECORD_TYPE": "release",
+                              "DESCRIPTION": "payment", "GROSS_AMOUNT": 1.0}])
+
+    def test_lote_fallido_reintenta_por_fila(self):
+        """Cuando el MERGE por lote falla, las filas se reprocesan con un MERGE por fila."""
+        db = MercadoPagoDB()
+        por_fila = {"insertados": 1, "actualizados": 0, "errores": 0}
+        with patch.object(db, '_upsert_lote', return_value=None) as lote, \
+                patch.object(db, '_upsert_por_fila', return_value=por_fila) as fila:
+            stats = db.upsert_liquidaciones(self._df())
+
+        lote.assert_called_once()
+        fila.assert_called_once_with(lote.call_args.args[0], lote.call_args.args[1])
+        self.assertEqual(stats, por_fila)
+
+    def test_lote_exitoso_no_usa_modo_fila(self):
+        db = MercadoPagoDB()
+        por_lote = {"insertados": 0, "actualizados": 1, "errores": 0}
+        with patch.object(db, '_upsert_lote', return_value=por_lote), \
+                patch.object(db, '_upsert_por_fila') as fila:
+            stats = db.upsert_liquidaciones(self._df())
+
+        fila.assert_not_called()
+        self.assertEqual(stats, por_lote)
+
+    def test_upsert_por_fila_cuenta_acciones_y_errores(self):
+        """El modo fila lee la acción del OUTPUT $action de cada MERGE y aísla las filas con error."""
+        db = MercadoPagoDB()
+        conexion, raw, cursor = conexion_mock('base_mp')
+        cursor.execute.side_effect = [None, Exception("fila inválida"), None]
+        cursor.fetchone.side_effect = [("INSERT",), ("UPDATE",)]
+        filas = [("2026-04-19", f"S{i}", "release", "payment", 1.0) for i in range(3)]
+
+        with patch.object(MercadoPagoDB, '_get_connection', return_value=conexion):
+            stats = db._upsert_por_fila(COLUMNAS, filas)
+
+        self.assertEqual(stats, {"insertados": 1, "actualizados": 1, "errores": 1})
+        raw.commit.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import unittest
+import sys
+import os
+import asyncio
+import io
+import queue
+import threading
+from unittest.mock import Mock, patch
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+import pandas as pd
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from GestionAPI.common.rate_limiter import LimitadorProveedor
+from GestionAPI.MP_Reportes_de_Liquidaciones import api_mp
+from GestionAPI.MP_Reportes_de_Liquidaciones.api_mp import MercadoPagoAPIClient
+from GestionAPI.MP_Reportes_de_Liquidaciones.sync_liquidaciones_mp import (
+    _LectorCola,
+    _limpiar_dataframe,
+    _normalizar_columnas,
+    _procesar_stream_csv,
+)
+
+CSV_REPORTE = (
+    "\ufeffDATE;SOURCE_ID;RECORD_TYPE;DESCRIPTION;GROSS_AMOUNT;INSTALLMENTS;PAYER_NAME\n"
+    "2026-04-19T10:33:12.000-03:00;1001;release;payment;1500.50;3;José Pérez\n"
+    "2026-04-19T11:00:00.000-03:00;1002;release;refund;-200;;Ñandú SRL\n"
+    "2026-04-20T09:15:45.000-03:00;1003;release;payment;;1;\n"
+)
+
+
+def _db_que_registra():
+    """DB falsa que guarda cada DataFrame recibido en upsert_liquidaciones."""
+    db = Mock()
+    db.recibidos = []
+
+    def upsert(df):
+        db.recibidos.append(df.copy())
+        return {"insertados": len(df), "actualizados": 0, "errores": 0}
+
+    db.upsert_liquidaciones.side_effect = upsert
+    return db
+
+
+def _procesar_en_fragmentos(datos, tamano):
+    """Carga `datos` en la cola en fragmentos de `tamano` bytes y lo procesa como el script."""
+    cola = queue.Queue()
+    for inicio in range(0, len(datos), tamano):
+        cola.put(datos[inicio:inicio + tamano])
+    cola.put(None)
+    db = _db_que_registra()
+    stats = _procesar_stream_csv(_LectorCola(cola), db, threading.Event())
+    return stats, db.recibidos
+
+
+def _esperado():
+    df = pd.read_csv(io.StringIO(CSV_REPORTE.lstrip("\ufeff")), sep=";", dtype=str)
+    return _limpiar_dataframe(_normalizar_columnas(df))
+
+
+class TestProcesarStreamCsv(unittest.TestCase):
+    """Pruebas del parseo en streaming del reporte de liquidaciones."""
+
+    def test_fragmentos_arbitrarios_igual_a_read_csv(self):
+        """Con el encabezado y los caracteres UTF-8 partidos entre fragmentos, el resultado es el de read_csv."""
+        datos = CSV_REPORTE.encode("utf-8")
+        esperado = _esperado()
+
+        for tamano in (1, 5, 7, 64, len(datos)):
+            with self.subTest(tamano=tamano):
+                stats, recibidos = _procesar_en_fragmentos(datos, tamano)
+
+                # Menos filas que FILAS_POR_BLOQUE: un único bloque
+                self.assertEqual(len(recibidos), 1)
+                pd.testing.assert_frame_equal(recibidos[0], esperado)
+                self.assertEqual(stats["filas"], 3)
+                self.assertEqual(stats["insertados"], 3)
+
+    @patch("GestionAPI.MP_Reportes_de_Liquidaciones.sync_liquidaciones_mp.FILAS_POR_BLOQUE", 2)
+    def test_bloques_de_filas(self):
+        """Con más filas que FILAS_POR_BLOQUE se hace un upsert por bloque, sin perder filas."""
+        stats, recibidos = _procesar_en_fragmentos(CSV_REPORTE.encode("utf-8"), 9)
+
+        self.assertEqual([len(df) for df in recibidos], [2, 1])
+        # Las categorías difieren entre bloques, así que se comparan los valores
+        pd.testing.assert_frame_equal(pd.concat(recibidos).astype(object), _esperado().astype(object))
+        self.assertEqual(stats["bloques"], 2)
+
+    def test_reporte_vacio(self):
+        stats, recibidos = _procesar_en_fragmentos(b"", 4)
+
+        self.assertEqual(recibidos, [])
+        self.assertEqual(stats["filas"], 0)
+
+    def test_error_de_descarga_se_relanza(self):
+        """Un error puesto en la cola por la descarga se relanza en el hilo lector."""
+        cola = queue.Queue()
+        cola.put(CSV_REPORTE.encode("utf-8")[:40])
+        cola.put(api_mp.DescargaReporteError("conexión cortada"))
+        detenido = threading.Event()
+
+        with self.assertRaises(api_mp.DescargaReporteError):
+            _procesar_stream_csv(_LectorCola(cola), _db_que_registra(), detenido)
+        self.assertTrue(detenido.is_set())
+
+
+class TestIterarReporte(unittest.IsolatedAsyncioTestCase):
+    """Pruebas de la descarga en streaming contra un servidor HTTP local."""
+
+    async def asyncSetUp(self):
+        self.solicitudes = 0
+        self.respuestas = []
+
+        async def reporte(request):
+            self.solicitudes += 1
+            estado = self.respuestas.pop(0) if self.respuestas else 200
+            if estado != 200:
+                return web.Response(status=estado, headers={"Retry-After": "0"})
+            respuesta = web.StreamResponse()
+            await respuesta.prepare(request)
+            for linea in CSV_REPORTE.encode("utf-8").splitlines(keepends=True):
+                await respuesta.write(linea)
+            return respuesta
+
+        app = web.Application()
+        app.router.add_get("/v1/account/release_report/{nombre}", reporte)
+        self.servidor = TestServer(app)
+        await self.servidor.start_server()
+        patcher = patch.object(api_mp, "MP_BASE_URL", str(self.servidor.make_url("")).rstrip("/"))
+        patcher.start()
+        self.addAsyncCleanup(self.servidor.close)
+        self.addCleanup(patcher.stop)
+
+        self.limitador = LimitadorProveedor("mercadopago", tasa=1000, concurrencia=1)
+        self.cliente = MercadoPagoAPIClient("token", limitador=self.limitador)
+        self.addAsyncCleanup(self.cliente.close)
+
+    async def _descargar(self, tamano_bloque=16):
+        return b"".join([bloque async for bloque in self.cliente.iterar_reporte("r.csv", tamano_bloque)])
+
+    async def test_reintenta_si_la_descarga_fue_limitada(self):
+        """Un 429 se registra en el limitador y la descarga se reintenta."""
+        self.respuestas = [429]
+
+        contenido = await self._descargar()
+
+        self.assertEqual(contenido, CSV_REPORTE.encode("utf-8"))
+        self.assertEqual(self.solicitudes, 2)
+        self.assertEqual(self.limitador.stats["limitadas"], 1)
+
+    async def test_no_retiene_el_limitador_durante_la_descarga(self):
+        """El lugar del limitador se libera al recibir el estado, antes de leer el cuerpo."""
+        descarga = self.cliente.iterar_reporte("r.csv", 16)
+        await descarga.__anext__()
+
+        # Con concurrencia 1, otra solicitud puede entrar mientras la descarga sigue en curso
+        await asyncio.wait_for(self.limitador.__aenter__(), timeout=1)
+        await self.limitador.__aexit__(None, None, None)
+        await descarga.aclose()
+
+    async def test_error_persistente(self):
+        self.respuestas = [500]
+
+        with self.assertRaises(api_mp.DescargaReporteError):
+            await self._descargar()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,14 +6,27 @@ pero que quedaron pendientes en nuestra base de datos.
 
 import sys
 import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from common.db_operations import DatabaseOperations
-from common.logger_config import setup_logger
+# Obtiene la ruta del directorio padre (la raíz del proyecto)
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+# Añade la ruta de la raíz del proyecto a sys.path
+sys.path.insert(0, project_root)
+
+from GestionAPI.common.db_operations import DatabaseConnection
+from GestionAPI.common.credenciales import LOCALES_LAKERS
+from GestionAPI.common.logger_config import setup_logger
 
 # Configurar logger
 logger = setup_logger(__name__, 'logs/actualizar_estados.log')
 
+def _conectar_base():
+    return DatabaseConnection(
+        server=LOCALES_LAKERS['server'],
+        database=LOCALES_LAKERS['database'],
+        user=LOCALES_LAKERS['user'],
+        password=LOCALES_LAKERS['password']
+    )
+
 def actualizar_estados_procesados():
     """
     Actualiza el estado de comprobantes específicos que ya fueron procesados en Solar
@@ -32,7 +45,7 @@ def actualizar_estados_procesados():
         return False
     
     try:
-        db = DatabaseOperations()
+        db = _conectar_base()
         
         # Mostrar comprobantes que se van a actualizar
         print("Comprobantes que se marcarán como procesados:")
@@ -45,11 +58,8 @@ def actualizar_estados_procesados():
             print("Operación cancelada")
             return False
         
-        # Crear string de comprobantes para SQL
-        comprobantes_str = "('" + "', '".join(comprobantes_procesados) + "')"
-        
-        # Actualizar estados
-        if db.actualizar_estado_sync(comprobantes_str):
+        # Actualizar estados (por bloques, unidos contra una tabla temporal)
+        if db.actualizar_estado_sync(comprobantes_procesados):
             logger.info(f"Estados actualizados exitosamente para {len(comprobantes_procesados)} comprobantes")
             print(f"✅ {len(comprobantes_procesados)} comprobantes marcados como procesados")
             return True
@@ -68,7 +78,7 @@ def consultar_pendientes():
     Consulta los comprobantes que están pendientes de sincronizar
     """
     try:
-        db = DatabaseOperations()
+        db = _conectar_base()
         cursor = db.conectar()
         
         if cursor:
@@ -0,0 +1,36 @@
+"""
+Agrupación de los detalles de venta por comprobante para informarVentas.
+
+Los scripts de Solar (sync_ventas_Solar, syncVentas y syncVentasXcomp) leen los
+encabezados y los detalles en dos consultas y luego tienen que asociar a cada
+encabezado sus líneas de detalle. Recorrer la lista de comprobantes ya armados
+por cada línea (y de nuevo por cada encabezado) es cuadrático; acá se hace en
+una sola pasada con un diccionario indexado por Comprobante, y cada encabezado
+busca su detalle en O(1).
+"""
+
+
+def agrupar_detalles(detalles, armar_item):
+    """
+    Agrupa las líneas de detalle por comprobante en una sola pasada.
+
+    Args:
+        detalles (iterable): Filas con la columna 'Comprobante' (p. ej. de Conexion.iterar_consulta).
+        armar_item (callable): Recibe una línea y devuelve el item a informar, o None si
+            la línea se descarta. Cada script conserva así sus propias reglas de filtrado.
+
+    Returns:
+        dict: {Comprobante: [items]} en el orden en que aparecen los comprobantes.
+            Los comprobantes cuyas líneas se descartaron todas no figuran.
+    """
+    agrupados = {}
+    for detalle in detalles:
+        item = armar_item(detalle)
+        if item is None:
+            continue
+        items = agrupados.get(detalle['Comprobante'])
+        if items is None:
+            agrupados[detalle['Comprobante']] = [item]
+        else:
+            items.append(item)
+    return agrupados
@@ -1,23 +1,60 @@
 import requests
 import json
 import logging
-from urllib3.exceptions import InsecureRequestWarning
+import re
 import certifi
 
+from GestionAPI.common.token_store import obtener_token_store
+
 # Configurar el logger
 logger = logging.getLogger('solar_sync')
 
-# Suprimir advertencias de certificados no verificados
-requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
+# Comprobantes por solicitud en informar_ventas_por_lotes
+TAMANO_LOTE_VENTAS = 50
+
+def _numero_en_mensaje(mensaje):
+    """Número XXXX-XXXXXXXX del comprobante nombrado en un mensaje de Solar, o None."""
+    # Buscar pattern: "EL COMPROBANTE FACB 0001-21500040 YA ESTA REGISTRADO"
+    match = re.search(r'COMPROBANTE\s+(FAC[AB]|NCR[AB])\s+(\d{4}-\d{8})', mensaje)
+    if match:
+        return match.group(2)
+    # Fallback: buscar cualquier patrón XXXX-XXXXXXXX en el mensaje
+    match = re.search(r'(\d{4}-\d{8})', mensaje)
+    return match.group(1) if match else None
+
+
+def _numero_comparable(numero):
+    """
+    Punto de venta y número como entero, para comparar el número del mensaje con
+    NroComprobante del payload (que va recortado a 12 caracteres).
+    """
+    digitos = re.sub(r'\D', '', str(numero or ''))
+    return int(digitos) if digitos else None
+
 
 class SolarApiClient:
-    def __init__(self, base_url="https://conectados.fortinmaure.com.ar/SolutionsRE_BackEnd/api"):
+    PROVEEDOR_TOKEN = 'solar'
+
+    def __init__(self, base_url="https://conectados.fortinmaure.com.ar/SolutionsRE_BackEnd/api", token_store=None):
         self.base_url = base_url
         self.session = requests.Session()
-        # Desactivar verificación SSL temporalmente para pruebas
-        self.session.verify = False
+        # Credenciales y ventas viajan por TLS: se verifica el certificado con el bundle de certifi
+        self.session.verify = certifi.where()
+        # El token se comparte entre procesos a través del almacén en disco
+        self._token_store = token_store or obtener_token_store()
+        self._credentials = None
+
+    def _identidad_token(self, credentials):
+        return f"{credentials['usuario']}@{self.base_url}"
 
     def obtener_token(self, credentials):
+        """Devuelve el token guardado si sigue vigente; si no, lo solicita y lo guarda."""
+        self._credentials = credentials
+        token = self._token_store.obtener(self.PROVEEDOR_TOKEN, self._identidad_token(credentials))
+        if token:
+            logger.info("Usando token de Solar guardado en el almacén de tokens")
+            return token
+
         try:
             url = f"{self.base_url}/autenticacion/obtenerTokenAcceso"
             headers = {"Content-Type": "application/json"}
@@ -34,6 +71,7 @@ class SolarApiClient:
             
             if token:
                 logger.info("Token obtenido exitosamente")
+                self._token_store.guardar(self.PROVEEDOR_TOKEN, self._identidad_token(credentials), token)
                 return token
             else:
                 logger.error("No se pudo obtener el token de acceso")
@@ -43,74 +81,173 @@ class SolarApiClient:
             logger.error(f"Error en la solicitud de token: {str(e)}")
             return None
 
-    def informar_ventas(self, token, ventas, comprobantes_originales=None):
+    def _post_ventas(self, token, ventas):
+        """
+        Envía el payload a informarVentas, renovando el token una vez si Solar lo rechaza.
+
+        Returns:
+            tuple: (response, token vigente)
+        """
+        url = f"{self.base_url}/monitoring/informarVentas"
+        headers = {
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json"
+        }
+
+        response = self.session.post(url, json=ventas, headers=headers)
+
+        if response.status_code == 401 and self._credentials:
+            # Token vencido o revocado: se descarta del almacén y se reintenta una vez
+            logger.info("Token rechazado por Solar. Obteniendo un token nuevo...")
+            self._token_store.invalidar(self.PROVEEDOR_TOKEN, self._identidad_token(self._credentials), token)
+            nuevo_token = self.obtener_token(self._credentials)
+            if nuevo_token:
+                token = nuevo_token
+                headers = dict(headers, Authorization=f"Bearer {nuevo_token}")
+                response = self.session.post(url, json=ventas, headers=headers)
+        return response, token
+
+    def informar_ventas_por_lotes(self, token, id_cliente, comprobantes, claves, tamano_lote=TAMANO_LOTE_VENTAS):
+        """
+        Informa muchos comprobantes agrupándolos de a `tamano_lote` por solicitud.
+
+        Si Solar rechaza un lote con 422 (un comprobante inválido invalida todo el
+        payload), el lote se parte en mitades y se reenvía cada una, hasta aislar los
+        comprobantes con problemas: un backlog con algunos documentos malos se informa
+        igual en pocas solicitudes. Un comprobante aislado que Solar informa como
+        "YA ESTA REGISTRADO" se considera sincronizado, y también un lote entero cuando
+        todos los mensajes del rechazo lo dicen y nombran a cada comprobante del lote,
+        sin partirlo. Ante otros errores (red, 5xx)
+        el lote completo queda pendiente para la próxima corrida.
+
+        Args:
+            token (str): Token de acceso.
+            id_cliente (str): IdCliente del payload.
+            comprobantes (list): Registros de comprobante (Fecha, Hora, ..., Detalles, Pagos).
+            claves (list): Identificador de cada comprobante (N_COMP), en el mismo orden.
+            tamano_lote (int): Máximo de comprobantes por solicitud.
+
+        Returns:
+            tuple: (claves sincronizadas, claves con error)
+        """
+        exitosos, fallidos = [], []
+        pendientes = [
+            (comprobantes[inicio:inicio + tamano_lote], claves[inicio:inicio + tamano_lote])
+            for inicio in range(0, len(comprobantes), tamano_lote)
+        ]
+        solicitudes = 0
+        while pendientes:
+            lote, claves_lote = pendientes.pop(0)
+            solicitudes += 1
+            try:
+                response, token = self._post_ventas(token, {"IdCliente": id_cliente, "Comprobantes": lote})
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Error en la solicitud de informar ventas ({len(lote)} comprobantes): {str(e)}")
+                fallidos.extend(claves_lote)
+                continue
+
+            if response.status_code == 201:
+                exitosos.extend(claves_lote)
+            elif response.status_code == 422 and self._todos_ya_registrados(response, lote):
+                logger.warning(f"Los {len(lote)} comprobantes del lote ya estaban registrados en Solar")
+                exitosos.extend(claves_lote)
+            elif response.status_code == 422 and len(lote) > 1:
+                mitad = len(lote) // 2
+                logger.warning(f"Lote de {len(lote)} comprobantes rechazado (422); se divide para aislar los inválidos")
+                pendientes[:0] = [(lote[:mitad], claves_lote[:mitad]), (lote[mitad:], claves_lote[mitad:])]
+            elif response.status_code == 422 and 'YA ESTA REGISTRADO' in response.text:
+                # Solar puede no devolver Mensajes; para uno solo alcanza con el texto
+                logger.warning(f"El comprobante {claves_lote[0]} ya estaba registrado en Solar")
+                exitosos.extend(claves_lote)
+            else:
+                self._registrar_error(response, claves_lote)
+                fallidos.extend(claves_lote)
+
+        logger.info(f"Ventas informadas por lotes: {len(exitosos)} sincronizadas, {len(fallidos)} con error, "
+                    f"{solicitudes} solicitudes")
+        return exitosos, fallidos
+
+    @staticmethod
+    def _todos_ya_registrados(response, lote):
+        """
+        True si el rechazo sólo informa comprobantes ya registrados: todos los
+        Mensajes dicen "YA ESTA REGISTRADO" y cada comprobante del lote aparece
+        nombrado en alguno (Solar puede repetir el mensaje de un mismo comprobante).
+        """
         try:
-            url = f"{self.base_url}/monitoring/informarVentas"
-            headers = {
-                "Authorization": f"Bearer {token}",
-                "Content-Type": "application/json"
-            }
+            mensajes = response.json().get('Mensajes')
+        except Exception:
+            return False
+        if not isinstance(mensajes, list) or not mensajes:
+            return False
+        registrados = set()
+        for msg in mensajes:
+            mensaje = str(msg.get('mensaje', '')) if isinstance(msg, dict) else ''
+            if 'YA ESTA REGISTRADO' not in mensaje:
+                return False
+            numero = _numero_en_mensaje(mensaje)
+            if numero:
+                registrados.add(_numero_comparable(numero))
+        return all(_numero_comparable(registro.get('NroComprobante')) in registrados for registro in lote)
 
-            response = self.session.post(url, json=ventas, headers=headers)
+    def informar_ventas(self, token, ventas, comprobantes_originales=None):
+        try:
+            response, _ = self._post_ventas(token, ventas)
             
             if response.status_code == 201:
                 logger.info("Ventas informadas exitosamente")
                 return True
             else:
-                try:
-                    error_detail = response.json()
-                    
-                    # Procesar mensajes de Solar para mostrar de forma más clara
-                    if 'Mensajes' in error_detail and isinstance(error_detail['Mensajes'], list):
-                        # Agrupar mensajes únicos para evitar duplicados
-                        mensajes_unicos = {}
-                        comprobantes_duplicados = set()
-                        
-                        for msg in error_detail['Mensajes']:
-                            mensaje = msg.get('mensaje', '')
-                            if 'YA ESTA REGISTRADO' in mensaje:
-                                # Extraer número de comprobante del mensaje
-                                import re
-                                # Buscar pattern: "EL COMPROBANTE FACB 0001-21500040 YA ESTA REGISTRADO"
-                                match = re.search(r'COMPROBANTE\s+(FAC[AB]|NCR[AB])\s+(\d{4}-\d{8})', mensaje)
-                                if match:
-                                    comprobantes_duplicados.add(match.group(2))
-                                else:
-                                    # Fallback: buscar cualquier patrón XXXX-XXXXXXXX en el mensaje
-                                    fallback_match = re.search(r'(\d{4}-\d{8})', mensaje)
-                                    if fallback_match:
-                                        comprobantes_duplicados.add(fallback_match.group(1))
-                            
-                            if mensaje not in mensajes_unicos:
-                                mensajes_unicos[mensaje] = 1
-                            else:
-                                mensajes_unicos[mensaje] += 1
-                        
-                        if comprobantes_duplicados:
-                            # Mostrar directamente los comprobantes originales del lote actual
-                            if comprobantes_originales:
-                                logger.error(f"Error al informar ventas: {response.status_code} - COMPROBANTES YA REGISTRADOS: {', '.join(comprobantes_originales)}")
-                            else:
-                                logger.error(f"Error al informar ventas: {response.status_code} - COMPROBANTES YA REGISTRADOS: {', '.join(comprobantes_duplicados)}")
-                        
-                        # Log mensajes únicos con su cantidad (solo para mensajes no repetitivos)
-                        for mensaje, cantidad in mensajes_unicos.items():
-                            if cantidad == 1:  # Solo mostrar mensajes únicos, no los repetitivos
-                                # Convertir mensaje individual para mostrar comprobante original
-                                mensaje_convertido = mensaje
-                                if comprobantes_originales and 'YA ESTA REGISTRADO' in mensaje:
-                                    # Para el primer comprobante original como referencia
-                                    if len(comprobantes_originales) > 0:
-                                        mensaje_convertido = f"EL COMPROBANTE {comprobantes_originales[0]} YA ESTA REGISTRADO"
-                                logger.warning(f"Error detalle: {mensaje_convertido}")
-                    else:
-                        logger.error(f"Error al informar ventas: {response.status_code} - {error_detail}")
-                        
-                except Exception as e:
-                    error_detail = response.text
-                    logger.error(f"Error al informar ventas: {response.status_code} - {error_detail}")
+                self._registrar_error(response, comprobantes_originales)
                 return False
 
         except requests.exceptions.RequestException as e:
             logger.error(f"Error en la solicitud de informar ventas: {str(e)}")
-            return False
\ No newline at end of file
+            return False
+
+    def _registrar_error(self, response, comprobantes_originales=None):
+        """Escribe en el log el rechazo de informarVentas, resumiendo los mensajes de Solar."""
+        try:
+            error_detail = response.json()
+            
+            # Procesar mensajes de Solar para mostrar de forma más clara
+            if 'Mensajes' in error_detail and isinstance(error_detail['Mensajes'], list):
+                # Agrupar mensajes únicos para evitar duplicados
+                mensajes_unicos = {}
+                comprobantes_duplicados = set()
+                
+                for msg in error_detail['Mensajes']:
+                    mensaje = msg.get('mensaje', '')
+                    if 'YA ESTA REGISTRADO' in mensaje:
+                        numero = _numero_en_mensaje(mensaje)
+                        if numero:
+                            comprobantes_duplicados.add(numero)
+                    
+                    if mensaje not in mensajes_unicos:
+                        mensajes_unicos[mensaje] = 1
+                    else:
+                        mensajes_unicos[mensaje] += 1
+                
+                if comprobantes_duplicados:
+                    # Mostrar directamente los comprobantes originales del lote actual
+                    if comprobantes_originales:
+                        logger.error(f"Error al informar ventas: {response.status_code} - COMPROBANTES YA REGISTRADOS: {', '.join(comprobantes_originales)}")
+                    else:
+                        logger.error(f"Error al informar ventas: {response.status_code} - COMPROBANTES YA REGISTRADOS: {', '.join(comprobantes_duplicados)}")
+                
+                # Log mensajes únicos con su cantidad (solo para mensajes no repetitivos)
+                for mensaje, cantidad in mensajes_unicos.items():
+                    if cantidad == 1:  # Solo mostrar mensajes únicos, no los repetitivos
+                        # Convertir mensaje individual para mostrar comprobante original
+                        mensaje_convertido = mensaje
+                        if comprobantes_originales and 'YA ESTA REGISTRADO' in mensaje:
+                            # Para el primer comprobante original como referencia
+                            if len(comprobantes_originales) > 0:
+                                mensaje_convertido = f"EL COMPROBANTE {comprobantes_originales[0]} YA ESTA REGISTRADO"
+                        logger.warning(f"Error detalle: {mensaje_convertido}")
+            else:
+                logger.error(f"Error al informar ventas: {response.status_code} - {error_detail}")
+                
+        except Exception as e:
+            error_detail = response.text
+            logger.error(f"Error al informar ventas: {response.status_code} - {error_detail}")
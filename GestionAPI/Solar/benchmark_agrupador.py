@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Micro-benchmark de la agrupación de detalles de venta por comprobante.
+
+Genera encabezados y líneas de detalle sintéticas con la forma de qry_ventasEnc /
+qry_ventasDetalle y compara, para tamaños crecientes, el armado anterior (buscar
+el comprobante en la lista por cada línea y luego por cada encabezado) contra
+agrupar_detalles. Verifica que ambos produzcan el mismo resultado y muestra el
+tiempo por línea: constante en la versión nueva, creciente en la anterior.
+
+Uso:
+    python benchmark_agrupador.py                         # 1.000 a 8.000 comprobantes
+    python benchmark_agrupador.py --comprobantes 2000 4000 --lineas 5
+"""
+
+import sys
+import os
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, project_root)
+
+import argparse
+import random
+import time
+
+from GestionAPI.common.filas import clase_fila
+from GestionAPI.Solar.agrupador import agrupar_detalles
+
+COLUMNAS_DETALLE = ["Comprobante", "Detalle.CodArticulo", "Detalle.Cantidad", "Detalle.Importe", "Detalle.IVA"]
+
+
+def _armar_item(detalle):
+    return {
+        "DescripcionItem": detalle["Detalle.CodArticulo"],
+        "Cantidad": str(detalle["Detalle.Cantidad"]),
+        "ImporteNeto": str(detalle["Detalle.Importe"]),
+        "ImporteImpuestos": str(detalle["Detalle.IVA"])
+    }
+
+
+def _generar_filas(comprobantes: int, lineas: int, semilla: int = 42):
+    """Devuelve (números de comprobante, filas de detalle) con las líneas mezcladas como en el cursor."""
+    rng = random.Random(semilla)
+    numeros = [f"FCB0001{i:08d}" for i in range(comprobantes)]
+    filas = []
+    for numero in numeros:
+        for linea in range(rng.randint(1, 2 * lineas - 1)):
+            importe = round(rng.uniform(100, 50000), 2)
+            filas.append((numero, f"ART{linea:05d}", rng.randint(1, 5), importe, round(importe * 0.21, 2)))
+    rng.shuffle(filas)
+    return numeros, filas
+
+
+def _agrupar_anterior(filas, numeros):
+    """Implementación previa (lista + búsqueda lineal), conservada sólo para comparar."""
+    dict_VentasDetalle = [dict(zip(COLUMNAS_DETALLE, fila)) for fila in filas]
+    DetalleVentas = []
+    for detalle in dict_VentasDetalle:
+        comprobante_encontrado = False
+        for registro in DetalleVentas:
+            if registro["Comprobante"] == detalle["Comprobante"]:
+                comprobante_encontrado = True
+                registro["Detalle"].append(_armar_item(detalle))
+                break
+        if not comprobante_encontrado:
+            DetalleVentas.append({"Comprobante": detalle["Comprobante"], "Detalle": [_armar_item(detalle)]})
+    return [next((item["Detalle"] for item in DetalleVentas if item["Comprobante"] == numero), None)
+            for numero in numeros]
+
+
+def _agrupar_nuevo(filas, numeros):
+    # Filas con nombre, como las devuelve Conexion.iterar_consulta
+    detalle_ventas = agrupar_detalles(map(clase_fila(tuple(COLUMNAS_DETALLE)), filas), _armar_item)
+    return [detalle_ventas.get(numero) for numero in numeros]
+
+
+def _medir(funcion, *args):
+    inicio = time.perf_counter()
+    resultado = funcion(*args)
+    return time.perf_counter() - inicio, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la agrupación de detalles de Solar.")
+    parser.add_argument("--comprobantes", type=int, nargs="+", default=[1000, 2000, 4000, 8000],
+                        help="Cantidades de comprobantes a probar.")
+    parser.add_argument("--lineas", type=int, default=3, help="Líneas de detalle promedio por comprobante.")
+    args = parser.parse_args()
+
+    print(f"{'comprobantes':>12} {'líneas':>8} {'anterior (s)':>13} {'nuevo (s)':>10} "
+          f"{'µs/línea nuevo':>15} {'aceleración':>12}")
+    for comprobantes in args.comprobantes:
+        numeros, filas = _generar_filas(comprobantes, args.lineas)
+        tiempo_anterior, resultado_anterior = _medir(_agrupar_anterior, filas, numeros)
+        tiempo_nuevo, resultado_nuevo = _medir(_agrupar_nuevo, filas, numeros)
+        if resultado_anterior != resultado_nuevo:
+            raise AssertionError(f"Los resultados no coinciden con {comprobantes} comprobantes")
+
+        print(f"{comprobantes:>12,} {len(filas):>8,} {tiempo_anterior:>13.3f} {tiempo_nuevo:>10.4f} "
+              f"{tiempo_nuevo / len(filas) * 1e6:>15.2f} {tiempo_anterior / tiempo_nuevo:>11.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,27 @@
 from GestionAPI.common.conexion import Conexion
-from GestionAPI.common.credenciales import LOCALES_LAKERS
-from GestionAPI.Solar import Apis
+from GestionAPI.common.credenciales import LOCALES_LAKERS, API_SOLAR
+from GestionAPI.Solar.api_client import SolarApiClient, TAMANO_LOTE_VENTAS
 from GestionAPI.Solar.consultas import qry_ventasEnc,qry_ventasDetalle
+from GestionAPI.Solar.agrupador import agrupar_detalles
 
 import json
 
+def armar_item_detalle(detalle):
+    """Arma el item de informarVentas para una línea de detalle."""
+    return {
+        "DescripcionItem": detalle['Detalle.CodArticulo'],
+        "Cantidad": str(detalle['Detalle.Cantidad']),
+        "ImporteNeto": str(detalle['Detalle.Importe']),
+        "ImporteImpuestos": str(detalle['Detalle.IVA'])
+    }
+
+
 # Crear una instancia de la clase Conexion
 conexion = Conexion(server=LOCALES_LAKERS['server'], database=LOCALES_LAKERS['database'], user=LOCALES_LAKERS['user'], password=LOCALES_LAKERS['password'])
 
 """     Ventas Encabezados """
-# Obtener ventas pendientes de sincronizar (Solo encabezados)
-ventasEnc = conexion.ejecutar_consulta(qry_ventasEnc)
+# Obtener ventas pendientes de sincronizar (Solo encabezados, filas con nombre)
+ventasEnc = conexion.consultar_filas(qry_ventasEnc)
 
 if not ventasEnc:
     print("No hay ventas pendientes de sincronizar")
@@ -19,74 +30,31 @@ else:
     print("Hay {} ventas pendientes de sincronizar".format(len(ventasEnc)))
 
     # obtener token
-    token = Apis.obtenerToken_Solar()
-    resultadoSync = False
+    api_client = SolarApiClient()
+    token = api_client.obtener_token(API_SOLAR)
     if token:
-        # Convertir los resultados en una lista de diccionarios
-        columnas_ventasEnc = conexion.obtener_nombres_columnas(qry_ventasEnc)
-        resultados_ventasEnc = [dict(zip(columnas_ventasEnc, fila)) for fila in ventasEnc]
+        resultados_ventasEnc = ventasEnc
         # print(resultados_ventasEnc)
 
 
         """     Ventas Detalle """
-        # Ejecutar la consulta y obtener los resultados
-        lista_ventasDetalle = conexion.ejecutar_consulta(qry_ventasDetalle)
-        # Obtener los nombres de las columnas para la consulta ventasDetalle
-        columnas_ventasDetalle = conexion.obtener_nombres_columnas(qry_ventasDetalle)
-        dict_VentasDetalle = [dict(zip(columnas_ventasDetalle, fila)) for fila in lista_ventasDetalle]
-        
-        # Armar estructura de detalle
-        DetalleVentas = []
-        for detalle in dict_VentasDetalle:
-            comprobante_encontrado = False
-            for registro in DetalleVentas:
-                if registro['Comprobante'] == detalle['Comprobante']:
-                    comprobante_encontrado = True
-                    registro['Detalle'].append({
-                        "DescripcionItem": detalle['Detalle.CodArticulo'],
-                        "Cantidad": str(detalle['Detalle.Cantidad']),
-                        "ImporteNeto": str(detalle['Detalle.Importe']),
-                        "ImporteImpuestos": str(detalle['Detalle.IVA'])
-                    })
-                    break
-
-            if not comprobante_encontrado:
-                DetalleVentas.append({
-                    'Comprobante': detalle['Comprobante'],
-                    'Detalle': [{
-                        "DescripcionItem": detalle['Detalle.CodArticulo'],
-                        "Cantidad": str(detalle['Detalle.Cantidad']),
-                        "ImporteNeto": str(detalle['Detalle.Importe']),
-                        "ImporteImpuestos": str(detalle['Detalle.IVA'])
-                    }]
-                })
+        # Armar estructura de detalle: una sola pasada sobre las filas a medida que
+        # llegan del servidor (una única ejecución de la consulta), indexada por comprobante
+        DetalleVentas = agrupar_detalles(
+            conexion.iterar_consulta(qry_ventasDetalle),
+            armar_item_detalle
+        )
 
         # print('DetalleVentas',DetalleVentas)
 
-        # Armar estructura de Json
-        data = []
-        data.append({
-            "IdCliente": "000040", 
-            "Comprobantes": []
-        })
-        comprobante = []
-        # comprobante.append({
-        #     "Fecha": "26-03-2021", 
-        #     "Hora": "18:15:00", 
-        #     "IdComprobante": "02", 
-        #     "PtoVenta": "0001", 
-        #     "NroComprobante": "", 
-        #     "Detalles": [], 
-        #     "Pagos": []
-        # })
-    
+        # Armar estructura de Json: todos los comprobantes, que se informan por lotes
+        comprobantes = []
+        listComp = []
 
         for EncVentas in resultados_ventasEnc:
             # Encontrar el detalle del comprobante específico 
             comprobante_buscar = EncVentas['NroComprobante']
-            # print(comprobante_buscar)
-            detalle_variable = next((item["Detalle"] for item in DetalleVentas if item["Comprobante"] == comprobante_buscar), None) 
-            # print(detalle_variable)
+            detalle_variable = DetalleVentas.get(comprobante_buscar)
             
             registro = {
                 "Fecha": EncVentas['Fecha'],
@@ -101,40 +69,24 @@ else:
                 }]
             }
             
-            # Reemplazar el valor en "Comprobantes" de la variable "data" 
-            data[0]["Comprobantes"] = [registro]
-
-            # informar ventas
-            resultadoSync = Apis.informarVentas_Solar(token, data[0])
-            if resultadoSync:
-                print("Información de ventas sincronizada con Solar")
-                # Actualizar estado en el historial
-                actEstado = conexion.actEstadoSync(EncVentas['NroComprobante'])
-                if actEstado:
-                    print("Estado actualizado en la base de datos")
-                else:
-                    print("Error al actualizar estado en la base de datos")
+            comprobantes.append(registro)
+            listComp.append(EncVentas['NroComprobante'])
+
+        # Informar ventas de a TAMANO_LOTE_VENTAS comprobantes por solicitud
+        sincronizados, con_error = api_client.informar_ventas_por_lotes(
+            token, "000040", comprobantes, listComp, tamano_lote=TAMANO_LOTE_VENTAS
+        )
+        print(f"Información de ventas sincronizada con Solar: {len(sincronizados)} comprobantes, {len(con_error)} con error")
+        for nro_comprobante in con_error:
+            print(f"Error al informar con Solar el comprobante {nro_comprobante}")
+
+        # Actualizar estado en el historial de todos los sincronizados, por bloques
+        if sincronizados:
+            if conexion.actEstadoSyncLote(sincronizados):
+                print("Estado actualizado en la base de datos")
             else:
-                print("Error al informar ventas con Solar")
-
-
-            
-
-        # # Agregar cada nuevo comprobante a la lista existente en "Comprobantes"
-        # data[0]["Comprobantes"].extend(comprobante)
-
-
+                print("Error al actualizar estado en la base de datos")
 
-        #     if resultadoSync:
-        #         # print("Información de ventas sincronizada con Solar")
-        #         # data = json.dumps(data)
-        #         print(data[0])
-        #     else:
-        #         # print("Error al sincronizar información de ventas con Solar")
-        #         data = json.dumps(data)
-        #         # print(data[0])
-        # else:
-        #     print("Error al obtener token para sincronizar información de ventas con Solar")
     else:
         print("Error al obtener token para sincronizar información de ventas con Solar")
         exit()
@@ -10,15 +10,40 @@ from GestionAPI.common.conexion import Conexion
 from GestionAPI.common.credenciales import LOCALES_LAKERS
 from GestionAPI.Solar import Apis
 from GestionAPI.Solar.consultas import qry_ventasEnc,qry_ventasDetalle
+from GestionAPI.Solar.agrupador import agrupar_detalles
 
 import json
 
+def armar_item_detalle(detalle):
+    """Arma el item de informarVentas para una línea de detalle, o None si se filtra."""
+    # Validar datos antes de agregar
+    cantidad = detalle.get('Detalle.Cantidad', 0) or 0
+    importe = detalle.get('Detalle.Importe', 0) or 0
+    iva = detalle.get('Detalle.IVA', 0) or 0
+    
+    # Filtrar items con ImporteNeto = 0 para evitar error 422
+    if importe <= 0:
+        print(f"ADVERTENCIA: Item filtrado por ImporteNeto = {importe} - Comprobante: {detalle.get('Comprobante')}")
+        return None
+    
+    # Log para debug si hay otros problemas
+    if not cantidad:
+        print(f"ADVERTENCIA: Cantidad = 0 pero ImporteNeto válido - Cantidad: {cantidad}, Importe: {importe}, Comprobante: {detalle.get('Comprobante')}")
+    
+    return {
+        "DescripcionItem": detalle.get('Detalle.CodArticulo', ''),
+        "Cantidad": str(cantidad),
+        "ImporteNeto": str(importe),
+        "ImporteImpuestos": str(iva)
+    }
+
+
 # Crear una instancia de la clase Conexion
 conexion = Conexion(server=LOCALES_LAKERS['server'], database=LOCALES_LAKERS['database'], user=LOCALES_LAKERS['user'], password=LOCALES_LAKERS['password'])
 
 """     Ventas Encabezados """
-# Obtener ventas pendientes de sincronizar (Solo encabezados)
-ventasEnc = conexion.ejecutar_consulta(qry_ventasEnc)
+# Obtener ventas pendientes de sincronizar (Solo encabezados, filas con nombre)
+ventasEnc = conexion.consultar_filas(qry_ventasEnc)
 
 if not ventasEnc:
     print("No hay ventas pendientes de sincronizar")
@@ -30,73 +55,17 @@ else:
     token = Apis.obtenerToken_Solar()
     resultadoSync = False
     if token:
-        # Convertir los resultados en una lista de diccionarios
-        columnas_ventasEnc = conexion.obtener_nombres_columnas(qry_ventasEnc)
-        resultados_ventasEnc = [dict(zip(columnas_ventasEnc, fila)) for fila in ventasEnc]
+        resultados_ventasEnc = ventasEnc
         # print(resultados_ventasEnc)
 
 
         """     Ventas Detalle """
-        # Ejecutar la consulta y obtener los resultados
-        lista_ventasDetalle = conexion.ejecutar_consulta(qry_ventasDetalle)
-        # Obtener los nombres de las columnas para la consulta ventasDetalle
-        columnas_ventasDetalle = conexion.obtener_nombres_columnas(qry_ventasDetalle)
-        dict_VentasDetalle = [dict(zip(columnas_ventasDetalle, fila)) for fila in lista_ventasDetalle]
-        
-        # Armar estructura de detalle
-        DetalleVentas = []
-        for detalle in dict_VentasDetalle:
-            comprobante_encontrado = False
-            for registro in DetalleVentas:
-                if registro['Comprobante'] == detalle['Comprobante']:
-                    comprobante_encontrado = True
-                    
-                    # Validar datos antes de agregar
-                    cantidad = detalle.get('Detalle.Cantidad', 0) or 0
-                    importe = detalle.get('Detalle.Importe', 0) or 0
-                    iva = detalle.get('Detalle.IVA', 0) or 0
-                    
-                    # Filtrar items con ImporteNeto = 0 para evitar error 422
-                    if importe <= 0:
-                        print(f"ADVERTENCIA: Item filtrado por ImporteNeto = {importe} - Comprobante: {detalle.get('Comprobante')}")
-                        continue
-                    
-                    # Log para debug si hay otros problemas
-                    if not cantidad:
-                        print(f"ADVERTENCIA: Cantidad = 0 pero ImporteNeto válido - Cantidad: {cantidad}, Importe: {importe}, Comprobante: {detalle.get('Comprobante')}")
-                    
-                    registro['Detalle'].append({
-                        "DescripcionItem": detalle.get('Detalle.CodArticulo', ''),
-                        "Cantidad": str(cantidad),
-                        "ImporteNeto": str(importe),
-                        "ImporteImpuestos": str(iva)
-                    })
-                    break
-
-            if not comprobante_encontrado:
-                # Validar datos antes de crear nuevo registro
-                cantidad = detalle.get('Detalle.Cantidad', 0) or 0
-                importe = detalle.get('Detalle.Importe', 0) or 0
-                iva = detalle.get('Detalle.IVA', 0) or 0
-                
-                # Filtrar items con ImporteNeto = 0 para evitar error 422
-                if importe <= 0:
-                    print(f"ADVERTENCIA: Item filtrado por ImporteNeto = {importe} - Comprobante: {detalle.get('Comprobante')}")
-                    continue
-                
-                # Log para debug si hay otros problemas
-                if not cantidad:
-                    print(f"ADVERTENCIA: Cantidad = 0 pero ImporteNeto válido - Cantidad: {cantidad}, Importe: {importe}, Comprobante: {detalle.get('Comprobante')}")
-                
-                DetalleVentas.append({
-                    'Comprobante': detalle['Comprobante'],
-                    'Detalle': [{
-                        "DescripcionItem": detalle.get('Detalle.CodArticulo', ''),
-                        "Cantidad": str(cantidad),
-                        "ImporteNeto": str(importe),
-                        "ImporteImpuestos": str(iva)
-                    }]
-                })
+        # Armar estructura de detalle: una sola pasada sobre las filas a medida que
+        # llegan del servidor (una única ejecución de la consulta), indexada por comprobante
+        DetalleVentas = agrupar_detalles(
+            conexion.iterar_consulta(qry_ventasDetalle),
+            armar_item_detalle
+        )
 
         # print('DetalleVentas',DetalleVentas)
 
@@ -122,7 +91,7 @@ else:
             # Encontrar el detalle del comprobante específico 
             comprobante_buscar = EncVentas['NroComprobante']
             # print(comprobante_buscar)
-            detalle_variable = next((item["Detalle"] for item in DetalleVentas if item["Comprobante"] == comprobante_buscar), None) 
+            detalle_variable = DetalleVentas.get(comprobante_buscar)
             # print(detalle_variable)
             
             # Calcular Importe dinámicamente como suma de ImporteNeto + ImporteImpuestos
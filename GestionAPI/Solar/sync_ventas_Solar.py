@@ -7,10 +7,44 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..
 sys.path.insert(0, project_root)
 import logging
 from GestionAPI.common.logger_config import setup_logger
-from GestionAPI.common.db_operations import DatabaseConnection
-from GestionAPI.Solar.api_client import SolarApiClient
+from GestionAPI.common.conexion import Conexion
+from GestionAPI.Solar.api_client import SolarApiClient, TAMANO_LOTE_VENTAS
 from GestionAPI.common.credenciales import LOCALES_LAKERS, API_SOLAR
 from GestionAPI.Solar.consultas import qry_ventasEnc, qry_ventasDetalle
+from GestionAPI.Solar.agrupador import agrupar_detalles
+
+logger = logging.getLogger('solar_sync')
+
+def _armar_item_detalle(detalle):
+    """Arma el item de informarVentas para una línea de detalle, o None si se filtra."""
+    # Validar datos antes de agregar
+    cantidad = detalle.get('Detalle.Cantidad', 0) or 0
+    importe = detalle.get('Detalle.Importe', 0) or 0
+    iva = detalle.get('Detalle.IVA', 0) or 0
+    
+    # Filtrar items problemáticos de manera inteligente:
+    # - Solo filtrar si ImporteNeto = 0 Y Cantidad = 0 (items vacíos/nulos)
+    # - NO filtrar items negativos legítimos (devoluciones, descuentos)
+    if importe == 0 and cantidad == 0:
+        logger.debug(f"Item vacío filtrado - Comprobante: {detalle.get('Comprobante')}")
+        return None
+    
+    # Log para debug de items negativos (son legítimos)
+    if importe < 0:
+        logger.debug(f"Item negativo incluido (devolución/descuento) - ImporteNeto: {importe}, Comprobante: {detalle.get('Comprobante')}")
+    
+    # Log para debug si hay otros problemas
+    if not cantidad:
+        logger.warning(f"Cantidad = 0 pero ImporteNeto válido - Cantidad: {cantidad}, Importe: {importe}, Comprobante: {detalle.get('Comprobante')}")
+    
+    return {
+        "DescripcionItem": detalle.get('Detalle.CodArticulo', ''),
+        "Cantidad": str(cantidad),
+        "Alicuota": str(detalle.get('Detalle.Alicuota', 0) or 0),
+        "Rubro": str(detalle.get('Detalle.Rubro', 0) or 0),
+        "ImporteNeto": str(importe),
+        "ImporteImpuestos": str(iva)
+    }
 
 def main():
     # Configurar el logger
@@ -18,15 +52,15 @@ def main():
     
     try:
         # Inicializar conexión a la base de datos
-        db = DatabaseConnection(
+        db = Conexion(
             server=LOCALES_LAKERS['server'],
             database=LOCALES_LAKERS['database'],
             user=LOCALES_LAKERS['user'],
             password=LOCALES_LAKERS['password']
         )
 
-        # Obtener ventas pendientes
-        ventas_enc = db.ejecutar_consulta(qry_ventasEnc)
+        # Obtener ventas pendientes (filas con nombre, en una sola ejecución)
+        ventas_enc = db.consultar_filas(qry_ventasEnc)
         if not ventas_enc:
             logger.info("No hay ventas pendientes de sincronizar")
             return
@@ -41,98 +75,20 @@ def main():
             logger.error("No se pudo obtener el token de acceso")
             return
 
-# Convertir los resultados en una lista de diccionarios
-        columnas_ventasEnc = db.obtener_nombres_columnas(qry_ventasEnc)
-        resultados_ventasEnc = [dict(zip(columnas_ventasEnc, fila)) for fila in ventas_enc]
-        # print(resultados_ventasEnc)
+        resultados_ventasEnc = ventas_enc
 
 
         """     Ventas Detalle """
-        # Ejecutar la consulta y obtener los resultados
-        lista_ventasDetalle = db.ejecutar_consulta(qry_ventasDetalle)
-        # Obtener los nombres de las columnas para la consulta ventasDetalle
-        columnas_ventasDetalle = db.obtener_nombres_columnas(qry_ventasDetalle)
-        dict_VentasDetalle = [dict(zip(columnas_ventasDetalle, fila)) for fila in lista_ventasDetalle]
-        
-        # Armar estructura de detalle
-        DetalleVentas = []
-        for detalle in dict_VentasDetalle:
-            comprobante_encontrado = False
-            for registro in DetalleVentas:
-                if registro['Comprobante'] == detalle['Comprobante']:
-                    comprobante_encontrado = True
-                    
-                    # Validar datos antes de agregar
-                    cantidad = detalle.get('Detalle.Cantidad', 0) or 0
-                    importe = detalle.get('Detalle.Importe', 0) or 0
-                    iva = detalle.get('Detalle.IVA', 0) or 0
-                    
-                    # Filtrar items problemáticos de manera inteligente:
-                    # - Solo filtrar si ImporteNeto = 0 Y Cantidad = 0 (items vacíos/nulos)
-                    # - NO filtrar items negativos legítimos (devoluciones, descuentos)
-                    if importe == 0 and cantidad == 0:
-                        logger.debug(f"Item vacío filtrado - Comprobante: {detalle.get('Comprobante')}")
-                        continue
-                    
-                    # Log para debug de items negativos (son legítimos)
-                    if importe < 0:
-                        logger.debug(f"Item negativo incluido (devolución/descuento) - ImporteNeto: {importe}, Comprobante: {detalle.get('Comprobante')}")
-                    
-                    # Log para debug si hay otros problemas
-                    if not cantidad:
-                        logger.warning(f"Cantidad = 0 pero ImporteNeto válido - Cantidad: {cantidad}, Importe: {importe}, Comprobante: {detalle.get('Comprobante')}")
-                    
-                    registro['Detalle'].append({
-                        "DescripcionItem": detalle.get('Detalle.CodArticulo', ''),
-                        "Cantidad": str(cantidad),
-                        "Alicuota": str(detalle.get('Detalle.Alicuota', 0) or 0),
-                        "Rubro": str(detalle.get('Detalle.Rubro', 0) or 0),
-                        "ImporteNeto": str(importe),
-                        "ImporteImpuestos": str(iva)
-                    })
-                    break
-
-            if not comprobante_encontrado:
-                # Validar datos antes de crear nuevo registro
-                cantidad = detalle.get('Detalle.Cantidad', 0) or 0
-                importe = detalle.get('Detalle.Importe', 0) or 0
-                iva = detalle.get('Detalle.IVA', 0) or 0
-                
-                # Filtrar items problemáticos de manera inteligente:
-                # - Solo filtrar si ImporteNeto = 0 Y Cantidad = 0 (items vacíos/nulos)
-                # - NO filtrar items negativos legítimos (devoluciones, descuentos)
-                if importe == 0 and cantidad == 0:
-                    logger.debug(f"Item vacío filtrado - Comprobante: {detalle.get('Comprobante')}")
-                    continue
-                
-                # Log para debug de items negativos (son legítimos)
-                if importe < 0:
-                    logger.debug(f"Item negativo incluido (devolución/descuento) - ImporteNeto: {importe}, Comprobante: {detalle.get('Comprobante')}")
-                
-                # Log para debug si hay otros problemas
-                if not cantidad:
-                    logger.warning(f"Cantidad = 0 pero ImporteNeto válido - Cantidad: {cantidad}, Importe: {importe}, Comprobante: {detalle.get('Comprobante')}")
-                
-                DetalleVentas.append({
-                    'Comprobante': detalle['Comprobante'],
-                    'Detalle': [{
-                        "DescripcionItem": detalle.get('Detalle.CodArticulo', ''),
-                        "Cantidad": str(cantidad),
-                        "Alicuota": str(detalle.get('Detalle.Alicuota', 0) or 0),
-                        "Rubro": str(detalle.get('Detalle.Rubro', 0) or 0),
-                        "ImporteNeto": str(importe),
-                        "ImporteImpuestos": str(iva)
-                    }]
-                })
+        # Armar estructura de detalle: una sola pasada sobre las filas a medida que
+        # llegan del servidor (una única ejecución de la consulta), indexada por comprobante
+        DetalleVentas = agrupar_detalles(
+            db.iterar_consulta(qry_ventasDetalle),
+            _armar_item_detalle
+        )
 
         # print('Sync_ventas_Solar-DetalleVentas',DetalleVentas)
 
-        # Armar estructura de Json
-        data = []
-        data.append({
-            "IdCliente": "000040", 
-            "Comprobantes": []
-        })
+        # Armar estructura de Json: todos los comprobantes, que se informan por lotes
         comprobante = []
         listComp = []    
 
@@ -140,7 +96,7 @@ def main():
             # Encontrar el detalle del comprobante específico 
             comprobante_buscar = EncVentas['NroComprobante']
             # print(comprobante_buscar)
-            detalle_variable = next((item["Detalle"] for item in DetalleVentas if item["Comprobante"] == comprobante_buscar), None) 
+            detalle_variable = DetalleVentas.get(comprobante_buscar)
             # print(detalle_variable)
             
             # Calcular Importe dinámicamente como suma de ImporteNeto + ImporteImpuestos
@@ -184,35 +140,22 @@ def main():
             comprobante.append(registro)
             listComp.append(EncVentas['NroComprobante'])
 
-        # print(listComp)
-        # Agregar cada nuevo comprobante a la lista existente en "Comprobantes"
-        data[0]["Comprobantes"].extend(comprobante)
-
-        # Convertir la lista de comprobantes en un string separado por comas y encerrado entre paréntesis
-        comprobantes_str = "('" + "', '".join(listComp) + "')"
-
         logger.info(f"Preparando envío de {len(listComp)} comprobantes: {', '.join(listComp)}")
 
-        # Informar ventas (pasar lista de comprobantes originales para errores útiles)
-        resultado_api = api_client.informar_ventas(token, data[0], listComp)
-        if resultado_api:
-            # comprobantes_str = "('" + "', '".join(data['comprobantes']) + "')"
-            if db.actualizar_estado_sync(comprobantes_str):
-                logger.info("Proceso de sincronización completado exitosamente")
+        # Informar ventas de a TAMANO_LOTE_VENTAS comprobantes por solicitud; los
+        # rechazados se aíslan y quedan pendientes para la próxima corrida
+        sincronizados, con_error = api_client.informar_ventas_por_lotes(
+            token, "000040", comprobante, listComp, tamano_lote=TAMANO_LOTE_VENTAS
+        )
+        if con_error:
+            logger.error(f"{len(con_error)} comprobantes no se pudieron informar: {', '.join(con_error)}")
+
+        # Marcar como sincronizados sólo los que Solar aceptó (o ya tenía registrados)
+        if sincronizados:
+            if db.actEstadoSyncLote(sincronizados):
+                logger.info(f"Proceso de sincronización completado: {len(sincronizados)} comprobantes sincronizados")
             else:
                 logger.error("Error al actualizar estado de sincronización")
-        else:
-            # Verificar si es un error de comprobantes ya registrados (422)
-            logger.warning("Error en API - verificando si comprobantes ya están procesados...")
-            
-            # Si los comprobantes ya están registrados en Solar, marcarlos como procesados
-            # ACTIVAR: Descomentar las siguientes líneas para marcar automáticamente como procesados
-            if db.actualizar_estado_sync(comprobantes_str):
-                logger.warning("Comprobantes marcados como procesados (ya estaban registrados en Solar)")
-            else:
-                logger.error("Error al actualizar estado tras detectar comprobantes duplicados")
-            
-            # logger.error("Error al informar ventas")
 
     except Exception as e:
         logger.error(f"Error en el proceso de sincronización: {str(e)}", exc_info=True)
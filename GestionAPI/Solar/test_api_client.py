@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import unittest
+import sys
+import os
+from unittest.mock import Mock, patch
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+import certifi
+import requests
+
+from GestionAPI.Solar.api_client import SolarApiClient
+
+
+def _respuesta(status_code, mensajes=None):
+    """Respuesta de informarVentas; con `mensajes`, el cuerpo trae la lista Mensajes de Solar."""
+    response = Mock(status_code=status_code)
+    cuerpo = {'Mensajes': [{'mensaje': mensaje} for mensaje in mensajes]} if mensajes is not None else {}
+    response.json.return_value = cuerpo
+    response.text = str(cuerpo)
+    return response
+
+
+def _ya_registrado(clave):
+    return f"EL COMPROBANTE FACB {clave} YA ESTA REGISTRADO"
+
+
+def _comprobantes(cantidad):
+    claves = [f"0001-{numero:08d}" for numero in range(cantidad)]
+    return [{'NroComprobante': clave} for clave in claves], claves
+
+
+class TestInformarVentasPorLotes(unittest.TestCase):
+    """Pruebas del envío por lotes y la bisección de lotes rechazados, sin HTTP real."""
+
+    def setUp(self):
+        self.cliente = SolarApiClient(token_store=Mock())
+        self.enviados = []
+
+    def _simular_solar(self, invalidos=(), ya_registrados=()):
+        """_post_ventas falso: rechaza con 422 el lote que tenga algún comprobante inválido o ya registrado."""
+        def post_ventas(token, ventas):
+            claves = [registro['NroComprobante'] for registro in ventas['Comprobantes']]
+            self.enviados.append(claves)
+            mensajes = [f"COMPROBANTE {clave} INVALIDO" for clave in claves if clave in invalidos]
+            mensajes += [_ya_registrado(clave) for clave in claves if clave in ya_registrados]
+            return (_respuesta(422, mensajes) if mensajes else _respuesta(201)), token
+        return patch.object(self.cliente, '_post_ventas', side_effect=post_ventas)
+
+    def test_un_comprobante_invalido_queda_aislado(self):
+        comprobantes, claves = _comprobantes(50)
+
+        with self._simular_solar(invalidos={claves[17]}):
+            exitosos, fallidos = self.cliente.informar_ventas_por_lotes('t', '000040', comprobantes, claves)
+
+        self.assertEqual(fallidos, [claves[17]])
+        self.assertCountEqual(exitosos, claves[:17] + claves[18:])
+        # Bisección: 1 + 2 por nivel (log2(50) ≈ 6 niveles), lejos de 50 solicitudes
+        self.assertLessEqual(len(self.enviados), 1 + 2 * 6)
+        self.assertEqual(self.enviados[0], claves)
+
+    def test_lotes_de_tamano_lote(self):
+        comprobantes, claves = _comprobantes(5)
+
+        with self._simular_solar():
+            exitosos, fallidos = self.cliente.informar_ventas_por_lotes(
+                't', '000040', comprobantes, claves, tamano_lote=2)
+
+        self.assertEqual([len(lote) for lote in self.enviados], [2, 2, 1])
+        self.assertEqual((exitosos, fallidos), (claves, []))
+
+    def test_comprobante_ya_registrado_cuenta_como_sincronizado(self):
+        comprobantes, claves = _comprobantes(4)
+
+        with self._simular_solar(ya_registrados={claves[2]}):
+            exitosos, fallidos = self.cliente.informar_ventas_por_lotes('t', '000040', comprobantes, claves)
+
+        self.assertEqual(fallidos, [])
+        self.assertCountEqual(exitosos, claves)
+        self.assertIn([claves[2]], self.enviados)
+
+    def test_lote_entero_ya_registrado_se_acepta_sin_partir(self):
+        """Si todos los mensajes dicen YA ESTA REGISTRADO, el lote se acepta en una sola solicitud."""
+        comprobantes, claves = _comprobantes(50)
+
+        with self._simular_solar(ya_registrados=set(claves)):
+            exitosos, fallidos = self.cliente.informar_ventas_por_lotes('t', '000040', comprobantes, claves)
+
+        self.assertEqual((exitosos, fallidos), (claves, []))
+        self.assertEqual(len(self.enviados), 1)
+
+    def test_mensaje_repetido_no_acepta_un_comprobante_valido(self):
+        """Dos mensajes del mismo comprobante no alcanzan para aceptar un lote de dos: se parte."""
+        comprobantes, claves = _comprobantes(2)
+        respuestas = {
+            tuple(claves): _respuesta(422, [_ya_registrado(claves[0])] * 2),
+            (claves[0],): _respuesta(422, [_ya_registrado(claves[0])]),
+            (claves[1],): _respuesta(201),
+        }
+
+        def post_ventas(token, ventas):
+            enviados = tuple(registro['NroComprobante'] for registro in ventas['Comprobantes'])
+            self.enviados.append(list(enviados))
+            return respuestas[enviados], token
+
+        with patch.object(self.cliente, '_post_ventas', side_effect=post_ventas):
+            exitosos, fallidos = self.cliente.informar_ventas_por_lotes('t', '000040', comprobantes, claves)
+
+        self.assertEqual(self.enviados, [claves, [claves[0]], [claves[1]]])
+        self.assertEqual((exitosos, fallidos), (claves, []))
+
+    def test_numero_recortado_del_payload_coincide_con_el_mensaje(self):
+        """NroComprobante va recortado a 12 caracteres; se compara por punto de venta y número."""
+        comprobantes, claves = _comprobantes(2)
+        for registro in comprobantes:
+            registro['NroComprobante'] = registro['NroComprobante'][-12:]
+        respuesta = _respuesta(422, [_ya_registrado(clave) for clave in claves])
+
+        with patch.object(self.cliente, '_post_ventas', return_value=(respuesta, 't')) as post:
+            exitosos, fallidos = self.cliente.informar_ventas_por_lotes('t', '000040', comprobantes, claves)
+
+        post.assert_called_once()
+        self.assertEqual((exitosos, fallidos), (claves, []))
+
+    def test_ya_registrado_mezclado_con_invalido_se_parte(self):
+        comprobantes, claves = _comprobantes(4)
+
+        with self._simular_solar(invalidos={claves[0]}, ya_registrados={claves[3]}):
+            exitosos, fallidos = self.cliente.informar_ventas_por_lotes('t', '000040', comprobantes, claves)
+
+        self.assertEqual(fallidos, [claves[0]])
+        self.assertCountEqual(exitosos, claves[1:])
+
+    def test_error_5xx_deja_el_lote_pendiente(self):
+        comprobantes, claves = _comprobantes(10)
+        respuesta = _respuesta(503)
+        respuesta.json.side_effect = ValueError("sin JSON")
+
+        with patch.object(self.cliente, '_post_ventas', return_value=(respuesta, 't')) as post:
+            exitosos, fallidos = self.cliente.informar_ventas_por_lotes('t', '000040', comprobantes, claves)
+
+        post.assert_called_once()
+        self.assertEqual((exitosos, fallidos), ([], claves))
+
+    def test_error_de_red_deja_el_lote_pendiente(self):
+        comprobantes, claves = _comprobantes(3)
+
+        with patch.object(self.cliente, '_post_ventas', side_effect=requests.exceptions.ConnectionError("caída")):
+            exitosos, fallidos = self.cliente.informar_ventas_por_lotes('t', '000040', comprobantes, claves)
+
+        self.assertEqual((exitosos, fallidos), ([], claves))
+
+
+class TestPostVentas(unittest.TestCase):
+    """Pruebas de la renovación del token ante un 401 de informarVentas."""
+
+    def test_verifica_certificados(self):
+        cliente = SolarApiClient(token_store=Mock())
+
+        self.assertEqual(cliente.session.verify, certifi.where())
+
+    def test_401_renueva_el_token_una_vez(self):
+        token_store = Mock()
+        cliente = SolarApiClient(token_store=token_store)
+        cliente._credentials = {'usuario': 'u', 'clave': 'c'}
+        cliente.session = Mock()
+        cliente.session.post.side_effect = [_respuesta(401), _respuesta(201), _respuesta(201)]
+        comprobantes, claves = _comprobantes(3)
+
+        with patch.object(cliente, 'obtener_token', return_value='nuevo') as obtener:
+            exitosos, fallidos = cliente.informar_ventas_por_lotes(
+                'viejo', '000040', comprobantes, claves, tamano_lote=2)
+
+        self.assertEqual((exitosos, fallidos), (claves, []))
+        obtener.assert_called_once()
+        token_store.invalidar.assert_called_once_with('solar', 'u@' + cliente.base_url, 'viejo')
+        autorizaciones = [llamada.kwargs['headers']['Authorization'] for llamada in cliente.session.post.call_args_list]
+        # El segundo lote ya usa el token renovado
+        self.assertEqual(autorizaciones, ['Bearer viejo', 'Bearer nuevo', 'Bearer nuevo'])
+
+    def test_401_persistente_no_reintenta_mas_de_una_vez(self):
+        cliente = SolarApiClient(token_store=Mock())
+        cliente._credentials = {'usuario': 'u', 'clave': 'c'}
+        cliente.session = Mock()
+        cliente.session.post.return_value = _respuesta(401)
+        comprobantes, claves = _comprobantes(1)
+
+        with patch.object(cliente, 'obtener_token', return_value='nuevo'):
+            exitosos, fallidos = cliente.informar_ventas_por_lotes('viejo', '000040', comprobantes, claves)
+
+        self.assertEqual(cliente.session.post.call_count, 2)
+        self.assertEqual((exitosos, fallidos), ([], claves))
+
+
+if __name__ == '__main__':
+    unittest.main()
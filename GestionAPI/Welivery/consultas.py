@@ -62,6 +62,15 @@ FROM RO_T_ESTADO_PEDIDOS_ECOMMERCE
 WHERE NRO_PEDIDO = ? AND TALON_PED = CAST(? AS INT)
 """
 
+# Pedidos de un bloque que existen en RO_T_ESTADO_PEDIDOS_ECOMMERCE (una consulta por bloque).
+# {valores} se reemplaza por un "(?, ?)" por pedido: (NRO_PEDIDO, TALON_PED)
+QRY_PEDIDOS_EN_ECOMMERCE = """
+SELECT E.NRO_PEDIDO, E.TALON_PED
+FROM RO_T_ESTADO_PEDIDOS_ECOMMERCE AS E
+INNER JOIN (VALUES {valores}) AS P (NRO_PEDIDO, TALON_PED)
+    ON E.NRO_PEDIDO = P.NRO_PEDIDO AND E.TALON_PED = CAST(P.TALON_PED AS INT)
+"""
+
 # Consulta para obtener un pedido específico por número de seguimiento
 QRY_GET_PEDIDO_BY_SEGUIMIENTO = """
 SELECT NRO_PEDIDO, NUM_SEGUIMIENTO, TALON_PED, estadoEnvio, estadoIdEnvio
@@ -8,6 +8,7 @@ from typing import List, Optional, Tuple, Dict, Any
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from common.conexion import Conexion
+from common.async_db import AsyncDBMixin
 from common.credenciales import CENTRAL_LAKERS
 from consultas import (
     QRY_GET_PEDIDOS_PENDIENTES,
@@ -16,6 +17,7 @@ from consultas import (
     QRY_UPDATE_ESTADO_ENVIO,
     QRY_UPDATE_ENTREGADO,
     QRY_CHECK_PEDIDO_ECOMMERCE,
+    QRY_PEDIDOS_EN_ECOMMERCE,
     QRY_GET_PEDIDO_BY_SEGUIMIENTO,
     QRY_GET_PEDIDOS_SIN_IMPRIMIR,
     QRY_UPDATE_IMP_ROT
@@ -24,7 +26,16 @@ from consultas import (
 # Usar el logger configurado por el módulo padre
 logger = logging.getLogger('welivery_sync')
 
-class WeliveryDB:
+# Pedidos por consulta de existencia en ecommerce (2 parámetros por pedido, límite de 2100)
+TAMANO_BLOQUE_EXISTENCIA = 1000
+
+def _clave_pedido(nro_pedido, talon_ped) -> Tuple[str, str]:
+    """Clave de comparación de un pedido: NRO_PEDIDO sin espacios y TALON_PED como en CAST(? AS INT)."""
+    talon = str(talon_ped).strip()
+    return str(nro_pedido).strip(), str(int(talon)) if talon.lstrip('-').isdigit() else talon
+
+
+class WeliveryDB(AsyncDBMixin):
     """
     Clase para manejar todas las operaciones de base de datos relacionadas con Welivery.
     Interactúa con las tablas SEIN_TABLA_TEMPORAL_SCRIPT y RO_T_ESTADO_PEDIDOS_ECOMMERCE.
@@ -210,6 +221,30 @@ class WeliveryDB:
             logger.error(f"Error al verificar existencia del pedido {nro_pedido}: {e}")
             return False
 
+    def _pedidos_en_ecommerce(self, pedidos: List[Tuple[str, str]], chunk_size: int = TAMANO_BLOQUE_EXISTENCIA) -> set:
+        """
+        Verifica por bloques qué pedidos existen en RO_T_ESTADO_PEDIDOS_ECOMMERCE.
+        
+        Args:
+            pedidos (List[Tuple]): Pares (NRO_PEDIDO con el espacio inicial, TALON_PED)
+            chunk_size (int): Pedidos por consulta
+            
+        Returns:
+            set: Claves (_clave_pedido) de los pedidos existentes. Un bloque cuya
+                consulta falla no aporta claves, igual que _check_pedido_exists_in_ecommerce.
+        """
+        existentes = set()
+        for inicio in range(0, len(pedidos), chunk_size):
+            bloque = pedidos[inicio:inicio + chunk_size]
+            sql = QRY_PEDIDOS_EN_ECOMMERCE.format(valores=", ".join(["(?, ?)"] * len(bloque)))
+            params = [valor for pedido in bloque for valor in pedido]
+            resultado = self.conexion.ejecutar_consulta_con_parametros(sql, params)
+            if resultado is None:
+                logger.error(f"Error al verificar existencia en ecommerce de {len(bloque)} pedidos")
+                continue
+            existentes.update(_clave_pedido(nro_pedido, talon_ped) for nro_pedido, talon_ped in resultado)
+        return existentes
+
     def get_pedido_by_seguimiento(self, num_seguimiento: str) -> Optional[Tuple]:
         """
         Obtiene información de un pedido por número de seguimiento.
@@ -234,9 +269,11 @@ class WeliveryDB:
             logger.error(f"Error al buscar pedido por seguimiento {num_seguimiento}: {e}")
             return None
 
-    def process_bulk_status_update(self, status_updates: List[Dict[str, Any]]) -> Dict[str, int]:
+    def process_bulk_status_update(self, status_updates: List[Dict[str, Any]],
+                                   chunk_size: int = 500) -> Dict[str, int]:
         """
         Procesa actualizaciones masivas de estados.
+        Las actualizaciones se envían por lotes (fast_executemany) en lugar de una por pedido.
         
         Args:
             status_updates (List[Dict]): Lista de diccionarios con información de actualizaciones
@@ -250,9 +287,11 @@ class WeliveryDB:
                     'fecha_estado': datetime (opcional)
                 }
             ]
+            chunk_size (int): Cantidad de filas por lote
             
         Returns:
-            Dict[str, int]: Estadísticas de la operación
+            Dict[str, int]: Estadísticas de la operación ('entregados' cuenta los
+                pedidos COMPLETADO cuyo UPDATE en ecommerce se aplicó)
         """
         stats = {
             'procesados': 0,
@@ -263,44 +302,70 @@ class WeliveryDB:
         
         logger.info(f"Iniciando procesamiento masivo de {len(status_updates)} actualizaciones")
         
+        # Armar los parámetros de todas las actualizaciones para enviarlas por lotes
+        validos = []
+        params_estado = []
         for update in status_updates:
             stats['procesados'] += 1
             
             try:
-                nro_pedido = update['nro_pedido']
-                talon_ped = update['talon_ped']
-                estado_texto = update['estado_texto']
-                estado_id = update['estado_id']
-                fecha_estado = update.get('fecha_estado')
-                
-                # Actualizar estado en SEIN_TABLA_TEMPORAL_SCRIPT
-                if self.update_estado_envio(nro_pedido, talon_ped, estado_texto, estado_id, fecha_estado):
-                    stats['exitosos'] += 1
-                    
-                    # Si el estado es COMPLETADO (3), intentar actualizar la tabla de ecommerce
-                    if estado_id == 3:
-                        # Verificar PRIMERO si el pedido existe en ecommerce
-                        if self._check_pedido_exists_in_ecommerce(nro_pedido, talon_ped):
-                            if self.update_entregado(nro_pedido, talon_ped, fecha_estado):
-                                stats['entregados'] += 1
-                            else:
-                                logger.warning(f"Error técnico al marcar como entregado: {nro_pedido}")
-                else:
-                    stats['errores'] += 1
-                    
+                fecha_estado = update.get('fecha_estado') or datetime.now()
+                # Agregar espacio al inicio del número de pedido para evitar errores de SQL Server
+                nro_pedido_formatted = f" {update['nro_pedido'].strip()}"
+                params_estado.append((update['estado_texto'], update['estado_id'], fecha_estado,
+                                      nro_pedido_formatted, update['talon_ped']))
+                validos.append(update)
             except Exception as e:
                 logger.error(f"Error procesando actualización: {e}")
                 stats['errores'] += 1
         
+        # Actualizar estados en SEIN_TABLA_TEMPORAL_SCRIPT
+        resultados = self.conexion.ejecutar_update_lote(QRY_UPDATE_ESTADO_ENVIO, params_estado, chunk_size)
+        
+        params_entregado = []
+        for update, params, exitoso in zip(validos, params_estado, resultados):
+            if not exitoso:
+                logger.warning(f"No se pudo actualizar estado para pedido {update['nro_pedido']}")
+                stats['errores'] += 1
+                continue
+            
+            stats['exitosos'] += 1
+            
+            # Si el estado es COMPLETADO (3), marcarlo como entregado en la tabla de ecommerce
+            if update['estado_id'] == 3:
+                params_entregado.append((params[2], params[3], params[4]))
+        
+        # Sólo los pedidos que existen en ecommerce (una consulta por bloque, no una por pedido)
+        if params_entregado:
+            existentes = self._pedidos_en_ecommerce([(params[1], params[2]) for params in params_entregado],
+                                                    chunk_size=TAMANO_BLOQUE_EXISTENCIA)
+            params_entregado = [params for params in params_entregado
+                                if _clave_pedido(params[1], params[2]) in existentes]
+        
+        if params_entregado:
+            resultados = self.conexion.ejecutar_update_lote(QRY_UPDATE_ENTREGADO, params_entregado, chunk_size)
+            for params, exitoso in zip(params_entregado, resultados):
+                if exitoso:
+                    stats['entregados'] += 1
+                else:
+                    logger.warning(f"Error técnico al marcar como entregado: {params[1].strip()}")
+        
         logger.info(f"Procesamiento masivo completado: {stats}")
         return stats
 
     def close_connection(self):
-        """Cierra la conexión a la base de datos."""
+        """
+        Registra las estadísticas del pool de conexiones.
+        Las conexiones físicas quedan en el pool compartido y se cierran al finalizar el proceso.
+        """
         try:
             if self.conexion:
-                # Aquí podrías agregar lógica para cerrar la conexión si tu clase Conexión lo soporta
-                pass
+                stats = self.conexion.estadisticas_pool()
+                logger.info(
+                    f"Pool de conexiones: {stats['checkouts']} consultas, "
+                    f"{stats['conexiones_creadas']} conexiones abiertas, "
+                    f"{stats['reutilizadas']} reutilizadas, {stats['esperas']} esperas"
+                )
         except Exception as e:
             logger.error(f"Error al cerrar conexión: {e}")
 
@@ -125,12 +125,13 @@ async def process_and_print_labels() -> None:
                 os.makedirs(temp_dir)
                 logger.info(f"Directorio temporal creado: {temp_dir}")
             
-            # Procesar cada pedido
+            # Descargar las etiquetas; se imprimen todas juntas en un único trabajo
+            etiquetas = []
+            talones = {}
             for order_info in orders_to_print:
                 try:
                     nro_pedido = order_info['numeroPedido']
                     num_seguimiento = order_info['numeroSeguimiento']
-                    talon_ped = order_info['talonPed']
                     
                     logger.info(f"Procesando pedido {nro_pedido} - Seguimiento: {num_seguimiento}")
                     
@@ -138,14 +139,6 @@ async def process_and_print_labels() -> None:
                     filename = f"etiqueta_welivery_{nro_pedido}.pdf"
                     filepath = os.path.join(temp_dir, filename)
                     
-                    # Eliminar archivo anterior si existe
-                    if os.path.exists(filepath):
-                        try:
-                            os.remove(filepath)
-                            logger.debug(f"Archivo anterior eliminado: {filepath}")
-                        except Exception as e:
-                            logger.warning(f"No se pudo eliminar el archivo temporal existente: {e}")
-                    
                     # Descargar la etiqueta
                     logger.info(f"Descargando etiqueta para pedido {nro_pedido}...")
                     download_success = await api.download_label(num_seguimiento, filepath)
@@ -159,59 +152,51 @@ async def process_and_print_labels() -> None:
                         logger.error(f"ERROR CRÍTICO: El archivo de etiqueta no se pudo guardar en {filepath}")
                         continue
                     
-                    file_size = os.path.getsize(filepath)
-                    if file_size == 0:
-                        logger.error(f"ERROR CRÍTICO: El archivo de etiqueta está vacío (0 bytes) - Pedido: {nro_pedido}")
-                        continue
-                    
-                    logger.info(f"Etiqueta descargada correctamente - Tamaño: {file_size} bytes")
-                    
-                    # Imprimir la etiqueta
-                    try:
-                        logger.info(f"Iniciando impresión de etiqueta - Pedido: {nro_pedido}")
-                        logger.debug(f"Método: {printer_method}, Impresora: {printer_path}")
-                        
-                        print_result = printer_manager.print_file(filepath)
-                        
-                        if print_result:
-                            logger.info(f"[OK] Etiqueta enviada a imprimir correctamente - Pedido: {nro_pedido}")
-                            # Marcar como impreso (IMP_ROT = 1)
-                            if welivery_db.update_imp_rot(nro_pedido, talon_ped):
-                                logger.info(f"[OK] Base de datos actualizada (IMP_ROT=1) - Pedido: {nro_pedido}")
-                            else:
-                                logger.error(f"[ERROR] No se pudo actualizar IMP_ROT en la base de datos - Pedido: {nro_pedido}")
-                        else:
-                            logger.error(
-                                f"[ERROR] ERROR DE IMPRESION - Pedido: {nro_pedido}\n"
-                                f"  - Archivo: {filepath}\n"
-                                f"  - Tamaño: {file_size} bytes\n"
-                                f"  - Método de impresión: {printer_method}\n"
-                                f"  - Impresora: {printer_path}\n"
-                                f"  - Verificar: Conectividad de red, estado de la impresora, permisos de archivo"
-                            )
-                    except Exception as print_error:
-                        logger.error(
-                            f"[ERROR] EXCEPCION AL IMPRIMIR - Pedido: {nro_pedido}\n"
-                            f"  - Error: {type(print_error).__name__}: {str(print_error)}\n"
-                            f"  - Archivo: {filepath}\n"
-                            f"  - Método: {printer_method}\n"
-                            f"  - Impresora: {printer_path}",
-                            exc_info=True
-                        )
-                    
-                    # Dar tiempo al sistema para procesar el archivo
-                    import time
-                    time.sleep(3)
-                    
-                    # Opcionalmente, eliminar el archivo PDF después de imprimir
+                    with open(filepath, "rb") as etiqueta_file:
+                        contenido = etiqueta_file.read()
                     try:
                         os.remove(filepath)
-                        logger.debug(f"Archivo temporal {filename} eliminado")
                     except Exception as e:
                         logger.warning(f"No se pudo eliminar el archivo temporal {filename}: {e}")
                     
+                    if not contenido:
+                        logger.error(f"ERROR CRÍTICO: El archivo de etiqueta está vacío (0 bytes) - Pedido: {nro_pedido}")
+                        continue
+                    
+                    logger.info(f"Etiqueta descargada correctamente - Tamaño: {len(contenido)} bytes")
+                    etiquetas.append((nro_pedido, contenido))
+                    talones[nro_pedido] = order_info['talonPed']
+                    
                 except Exception as e:
                     logger.error(f"Error al procesar el pedido {order_info.get('numeroPedido', 'desconocido')}: {e}", exc_info=True)
+            
+            if not etiquetas:
+                logger.info("No se descargó ninguna etiqueta para imprimir")
+                return
+            
+            # Imprimir todas las etiquetas como un único trabajo (si falla, se divide el lote)
+            logger.info(f"Iniciando impresión de {len(etiquetas)} etiquetas en un solo trabajo")
+            logger.debug(f"Método: {printer_method}, Impresora: {printer_path}")
+            resultados = printer_manager.print_batch(etiquetas, directorio=temp_dir)
+            
+            for nro_pedido, _ in etiquetas:
+                if resultados.get(nro_pedido):
+                    logger.info(f"[OK] Etiqueta enviada a imprimir correctamente - Pedido: {nro_pedido}")
+                    # Marcar como impreso (IMP_ROT = 1)
+                    if welivery_db.update_imp_rot(nro_pedido, talones[nro_pedido]):
+                        logger.info(f"[OK] Base de datos actualizada (IMP_ROT=1) - Pedido: {nro_pedido}")
+                    else:
+                        logger.error(f"[ERROR] No se pudo actualizar IMP_ROT en la base de datos - Pedido: {nro_pedido}")
+                else:
+                    logger.error(
+                        f"[ERROR] ERROR DE IMPRESION - Pedido: {nro_pedido}\n"
+                        f"  - Método de impresión: {printer_method}\n"
+                        f"  - Impresora: {printer_path}\n"
+                        f"  - Verificar: Conectividad de red, estado de la impresora, permisos de archivo"
+                    )
+            
+            # Los temporales se eliminan cuando el spooler terminó con el trabajo
+            printer_manager.limpiar_temporales()
         
         except Exception as e:
             logger.error(f"Error en el proceso de impresión: {e}", exc_info=True)
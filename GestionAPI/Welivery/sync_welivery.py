@@ -67,7 +67,7 @@ class WeliverySync:
         
         try:
             # Obtener pedidos pendientes de envío
-            pedidos = self.db.get_pedidos_pendientes_envio()
+            pedidos = await self.db.aio.get_pedidos_pendientes_envio()
             
             if not pedidos:
                 logger.info("No hay pedidos pendientes de envío")
@@ -84,7 +84,7 @@ class WeliverySync:
                         num_seguimiento = str(order_id_tienda).strip()
                         
                         # Actualizar número de seguimiento en la base de datos
-                        if self.db.update_numero_seguimiento(str(nro_pedido), str(talon_ped), num_seguimiento):
+                        if await self.db.aio.update_numero_seguimiento(str(nro_pedido), str(talon_ped), num_seguimiento):
                             self.stats['envios_creados'] += 1
                             logger.info(f"Envío creado exitosamente para pedido {nro_pedido} - NUM_SEGUIMIENTO: {num_seguimiento}")
                         else:
@@ -117,7 +117,7 @@ class WeliverySync:
         
         try:
             # Obtener pedidos pendientes de entrega
-            pedidos = self.db.get_pedidos_pendientes_entrega()
+            pedidos = await self.db.aio.get_pedidos_pendientes_entrega()
             
             if not pedidos:
                 logger.info("No hay pedidos pendientes de actualización de estado")
@@ -163,7 +163,7 @@ class WeliverySync:
             
             # Procesar actualizaciones masivas
             if updates:
-                bulk_stats = self.db.process_bulk_status_update(updates)
+                bulk_stats = await self.db.aio.process_bulk_status_update(updates)
                 
                 # Actualizar estadísticas
                 self.stats['estados_actualizados'] += bulk_stats['exitosos']
@@ -301,7 +301,7 @@ class WeliverySync:
                 }
                 
                 # Buscar en BD local
-                pedido_local = self.db.get_pedido_by_seguimiento(num_seguimiento)
+                pedido_local = await self.db.aio.get_pedido_by_seguimiento(num_seguimiento)
                 if pedido_local:
                     result['pedido_local'] = {
                         'nro_pedido': pedido_local[0],
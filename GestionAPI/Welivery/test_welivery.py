@@ -125,6 +125,38 @@ class TestWeliveryDB(unittest.TestCase):
         self.db.conexion.ejecutar_update.assert_called_once()
 
 
+    def test_process_bulk_cuenta_entregados_solo_si_existen_en_ecommerce(self):
+        """Los COMPLETADO se filtran con una consulta por bloque; los que no están en ecommerce no cuentan."""
+        self.db.conexion.ejecutar_update_lote = Mock(side_effect=lambda sql, filas, chunk: [True] * len(filas))
+        self.db.conexion.ejecutar_consulta_con_parametros = Mock(return_value=[(" 123", 99)])
+        updates = [
+            {'nro_pedido': '123', 'talon_ped': '99', 'num_seguimiento': 'T1', 'estado_texto': 'COMPLETADO', 'estado_id': 3},
+            {'nro_pedido': '124', 'talon_ped': '99', 'num_seguimiento': 'T2', 'estado_texto': 'COMPLETADO', 'estado_id': 3},
+            {'nro_pedido': '125', 'talon_ped': '99', 'num_seguimiento': 'T3', 'estado_texto': 'EN CAMINO', 'estado_id': 2},
+        ]
+
+        stats = self.db.process_bulk_status_update(updates)
+
+        self.assertEqual((stats['exitosos'], stats['entregados']), (3, 1))
+        self.db.conexion.ejecutar_consulta_con_parametros.assert_called_once()
+        sql, params = self.db.conexion.ejecutar_consulta_con_parametros.call_args.args
+        self.assertIn("(VALUES (?, ?), (?, ?))", sql)
+        self.assertEqual(params, [" 123", "99", " 124", "99"])
+        entregados = self.db.conexion.ejecutar_update_lote.call_args_list[1].args[1]
+        self.assertEqual([params[1:] for params in entregados], [(" 123", "99")])
+
+    def test_process_bulk_error_de_existencia_no_marca_entregados(self):
+        self.db.conexion.ejecutar_update_lote = Mock(side_effect=lambda sql, filas, chunk: [True] * len(filas))
+        self.db.conexion.ejecutar_consulta_con_parametros = Mock(return_value=None)
+
+        stats = self.db.process_bulk_status_update([
+            {'nro_pedido': '123', 'talon_ped': '99', 'num_seguimiento': 'T1', 'estado_texto': 'COMPLETADO', 'estado_id': 3},
+        ])
+
+        self.assertEqual((stats['exitosos'], stats['entregados']), (1, 0))
+        self.db.conexion.ejecutar_update_lote.assert_called_once()
+
+
 class TestWeliverySync(unittest.TestCase):
     """Pruebas para la clase WeliverySync."""
     
@@ -4,16 +4,28 @@ import logging
 import os
 from typing import Optional, Dict, Any
 
+from GestionAPI.common.cache_etiquetas import CacheEtiquetas, obtener_cache_etiquetas
+from GestionAPI.common.rate_limiter import ESTADOS_LIMITADOS, LimitadorProveedor, obtener_limitador
+
 # Usar el logger configurado por el módulo padre
 logger = logging.getLogger('welivery_sync')
 
+# Intentos ante respuestas 429/503 (el limitador pausa entre uno y otro)
+MAX_INTENTOS_LIMITADA = 3
+
 class WeliveryAPI:
     """
     Cliente API para interactuar con la API de Welivery de forma asíncrona.
     Maneja autenticación básica y consultas de estado de envío.
+    Las etiquetas descargadas se guardan en la caché local (common/cache_etiquetas.py)
+    y todas las solicitudes pasan por el limitador del proveedor (common/rate_limiter.py).
     """
+
+    PROVEEDOR_ETIQUETAS = 'welivery'
     
-    def __init__(self, base_url: str, user: str, password: str):
+    def __init__(self, base_url: str, user: str, password: str,
+                 cache_etiquetas: Optional[CacheEtiquetas] = None,
+                 limitador: Optional[LimitadorProveedor] = None):
         """
         Inicializa el cliente API de Welivery.
         
@@ -21,11 +33,20 @@ class WeliveryAPI:
             base_url (str): URL base de la API de Welivery
             user (str): Usuario para autenticación
             password (str): Contraseña para autenticación
+            cache_etiquetas (CacheEtiquetas, optional): Caché de etiquetas descargadas.
+            limitador (LimitadorProveedor, optional): Limitador de solicitudes. Por defecto
+                el compartido por todos los clientes de Welivery.
         """
         self.base_url = base_url
         self.user = user
         self.password = password
         self._session = None
+        self._cache_etiquetas = cache_etiquetas or obtener_cache_etiquetas()
+        self._limitador = limitador
+
+    def _obtener_limitador(self) -> LimitadorProveedor:
+        """Limitador propio, o el compartido por todos los clientes de Welivery."""
+        return self._limitador or obtener_limitador(self.PROVEEDOR_ETIQUETAS)
 
     async def _get_session(self):
         """Obtiene o crea una sesión HTTP reutilizable."""
@@ -55,29 +76,37 @@ class WeliveryAPI:
         
         try:
             session = await self._get_session()
+            limitador = self._obtener_limitador()
             
-            async with session.request(
-                method=method,
-                url=url,
-                params=params
-            ) as response:
+            for intento in range(MAX_INTENTOS_LIMITADA):
+                async with limitador, session.request(
+                    method=method,
+                    url=url,
+                    params=params
+                ) as response:
+                    limitador.registrar_respuesta(response.status, response.headers.get('Retry-After'))
                         
-                        if response.status == 200:
-                            data = await response.json()
-                            return data
-                        elif response.status == 401:
-                            logger.error("Error de autenticación: credenciales inválidas")
-                            return None
-                        elif response.status == 404:
-                            # No loguear, es normal que algunos envíos no existan
-                            return None
-                        elif response.status == 400:
-                            # No loguear, es normal que algunos envíos no tengan acceso
-                            return None
-                        else:
-                            text = await response.text()
-                            logger.error(f"Error {response.status}: {text}")
-                            return None
+                    if response.status == 200:
+                        data = await response.json()
+                        return data
+                    elif response.status in ESTADOS_LIMITADOS and intento < MAX_INTENTOS_LIMITADA - 1:
+                        # El limitador ya pausó y bajó la tasa: se reintenta
+                        await response.read()
+                        continue
+                    elif response.status == 401:
+                        logger.error("Error de autenticación: credenciales inválidas")
+                        return None
+                    elif response.status == 404:
+                        # No loguear, es normal que algunos envíos no existan
+                        return None
+                    elif response.status == 400:
+                        # No loguear, es normal que algunos envíos no tengan acceso
+                        return None
+                    else:
+                        text = await response.text()
+                        logger.error(f"Error {response.status}: {text}")
+                        return None
+            return None
                             
         except asyncio.TimeoutError:
             logger.error(f"Timeout al consultar la API de Welivery: {url}")
@@ -188,7 +217,8 @@ class WeliveryAPI:
 
     async def download_label(self, tracking_number: str, file_path: str) -> bool:
         """
-        Descarga la etiqueta de un envío y la guarda en un archivo.
+        Descarga la etiqueta de un envío y la guarda en un archivo. Si ya se
+        descargó antes, se copia desde la caché local sin consultar la API.
         
         Args:
             tracking_number (str): Número de seguimiento del envío
@@ -198,6 +228,13 @@ class WeliveryAPI:
             bool: True si la descarga fue exitosa, False en caso contrario
         """
         try:
+            content = self._cache_etiquetas.obtener(self.PROVEEDOR_ETIQUETAS, tracking_number)
+            if content:
+                with open(file_path, 'wb') as f:
+                    f.write(content)
+                logger.info(f"Etiqueta obtenida de la caché local: {file_path}")
+                return True
+
             # Obtener la URL de la etiqueta
             label_url = await self.get_label_url(tracking_number)
             
@@ -208,9 +245,13 @@ class WeliveryAPI:
             # Descargar el archivo PDF
             session = await self._get_session()
             
-            async with session.get(label_url) as response:
+            limitador = self._obtener_limitador()
+            async with limitador, session.get(label_url) as response:
+                limitador.registrar_respuesta(response.status, response.headers.get('Retry-After'))
                 if response.status == 200:
                     content = await response.read()
+                    if content:
+                        self._cache_etiquetas.guardar(self.PROVEEDOR_ETIQUETAS, tracking_number, content)
                     
                     # Guardar el archivo
                     with open(file_path, 'wb') as f:
@@ -0,0 +1,126 @@
+"""
+Acceso a la base de datos sin bloquear el event loop.
+
+Los scripts de sincronización son asyncio, pero pyodbc es bloqueante: una
+consulta hecha directamente desde una corrutina frena todas las llamadas HTTP
+en curso. Este módulo ejecuta las operaciones de base en un ThreadPoolExecutor
+dedicado a cada pool de conexiones, con tantos hilos como conexiones admite el
+pool, de modo que la red y la base se solapan sin que los hilos compitan por
+conexiones que no existen.
+
+Hay dos formas de uso:
+
+    db = AsyncDB(conexion)
+    filas = await db.fetch(QRY_...)
+    resultados = await db.execute_many(QRY_UPDATE, filas)
+
+    class WeliveryDB(AsyncDBMixin): ...
+    pedidos = await welivery_db.aio.get_pedidos_pendientes_envio()
+"""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from GestionAPI.common.pool import TAMANO_MAXIMO_POOL
+
+# Un executor por pool de conexiones; la clave None es el executor compartido
+# por las clases *DB que abren una Conexion por operación.
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def obtener_executor(pool=None):
+    """
+    Devuelve el executor dedicado a `pool`, creándolo la primera vez.
+
+    Args:
+        pool (ConnectionPool, optional): Pool de conexiones. Si es None se usa un
+            executor compartido de TAMANO_MAXIMO_POOL hilos.
+    """
+    with _executors_lock:
+        executor = _executors.get(pool)
+        if executor is None:
+            hilos = getattr(pool, 'tamano_maximo', None) or TAMANO_MAXIMO_POOL
+            executor = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="db")
+            _executors[pool] = executor
+        return executor
+
+
+async def ejecutar_en_executor(executor, func, *args, **kwargs):
+    """Ejecuta func(*args, **kwargs) en `executor` y espera el resultado sin bloquear el loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+
+
+class AsyncDB:
+    """
+    Fachada asíncrona sobre Conexion.
+
+    Args:
+        conexion (Conexion): Conexión cuyo pool determina el executor a usar.
+    """
+
+    def __init__(self, conexion):
+        self.conexion = conexion
+        self.executor = obtener_executor(conexion.pool)
+
+    async def ejecutar(self, func, *args, **kwargs):
+        """Ejecuta cualquier función bloqueante en el executor de la base."""
+        return await ejecutar_en_executor(self.executor, func, *args, **kwargs)
+
+    async def fetch(self, sql, params=None):
+        """Ejecuta un SELECT y devuelve las filas (None si hubo error)."""
+        if params is None:
+            return await self.ejecutar(self.conexion.ejecutar_consulta, sql)
+        return await self.ejecutar(self.conexion.ejecutar_consulta_con_parametros, sql, params)
+
+    async def execute(self, sql, params=None):
+        """Ejecuta una sentencia de escritura; devuelve True si se aplicó."""
+        return await self.ejecutar(self.conexion.ejecutar_update, sql, params)
+
+    async def execute_many(self, sql, rows, chunk_size=500):
+        """Ejecuta la sentencia para muchas filas (ver Conexion.ejecutar_update_lote)."""
+        return await self.ejecutar(self.conexion.ejecutar_update_lote, sql, rows, chunk_size)
+
+
+class _MetodosAsync:
+    """Expone cada método de una clase *DB como corrutina que corre en el executor."""
+
+    def __init__(self, db, executor):
+        self._db = db
+        self._executor = executor
+
+    def __getattr__(self, nombre):
+        metodo = getattr(self._db, nombre)
+        if not callable(metodo):
+            raise AttributeError(f"'{type(self._db).__name__}.{nombre}' no es un método")
+
+        async def variante(*args, **kwargs):
+            return await ejecutar_en_executor(self._executor, metodo, *args, **kwargs)
+
+        variante.__name__ = nombre
+        variante.__doc__ = metodo.__doc__
+        return variante
+
+
+class AsyncDBMixin:
+    """
+    Agrega variantes awaitables a las clases *DB.
+
+    `await db.aio.metodo(...)` ejecuta `db.metodo(...)` en el executor del pool de
+    `db.conexion` (o en el compartido si la clase abre una conexión por operación).
+    `await db.en_hilo(func, ...)` hace lo mismo con cualquier función bloqueante.
+    """
+
+    def _executor_db(self):
+        conexion = getattr(self, 'conexion', None)
+        return obtener_executor(conexion.pool if conexion is not None else None)
+
+    @property
+    def aio(self):
+        return _MetodosAsync(self, self._executor_db())
+
+    async def en_hilo(self, func, *args, **kwargs):
+        return await ejecutar_en_executor(self._executor_db(), func, *args, **kwargs)
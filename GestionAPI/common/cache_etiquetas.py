@@ -0,0 +1,201 @@
+"""
+Caché en disco de etiquetas descargadas, compartida entre procesos.
+
+Cuando la impresión falla, los scripts de rótulos (Andreani y Welivery) vuelven
+a pedir la misma etiqueta en cada corrida. Con esta caché, los reintentos y las
+reimpresiones se sirven localmente y sólo los números nuevos van a la API.
+
+El contenido se guarda por su huella (sha256) en objetos/<huella>.bin y cada
+etiqueta (proveedor + número) apunta a su huella con un archivo claves/*.ref.
+Al leer se recalcula la huella: si no coincide, el archivo se descarta y la
+etiqueta se vuelve a descargar. Las escrituras son atómicas (temporal +
+os.replace) y el tamaño total se mantiene bajo un tope eliminando los objetos
+usados hace más tiempo (la fecha de modificación se actualiza en cada lectura).
+"""
+
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Ubicación por defecto (se puede cambiar con la variable de entorno)
+DIRECTORIO_DEFECTO = os.environ.get(
+    "GESTIONAPI_CACHE_ETIQUETAS",
+    os.path.join(os.path.expanduser("~"), ".gestionapi", "etiquetas")
+)
+
+# Tamaño máximo de la caché; al superarlo se libera hasta FRACCION_TRAS_LIMPIEZA
+TAMANO_MAXIMO_BYTES = 200 * 1024 * 1024
+FRACCION_TRAS_LIMPIEZA = 0.9
+
+
+class CacheEtiquetas:
+    """
+    Caché de etiquetas direccionada por contenido, con tope de tamaño y desalojo LRU.
+
+    Args:
+        directorio (str, optional): Carpeta de la caché. Por defecto DIRECTORIO_DEFECTO.
+        tamano_maximo (int): Tamaño máximo en bytes de los objetos guardados.
+    """
+
+    def __init__(self, directorio=None, tamano_maximo=TAMANO_MAXIMO_BYTES):
+        self.directorio = directorio or DIRECTORIO_DEFECTO
+        self.tamano_maximo = tamano_maximo
+        self._dir_objetos = os.path.join(self.directorio, "objetos")
+        self._dir_claves = os.path.join(self.directorio, "claves")
+        self._lock = threading.Lock()
+        self._tamano = None  # Se calcula al primer guardado
+
+    def _ruta_clave(self, proveedor, clave):
+        clave_segura = re.sub(r"[^A-Za-z0-9_.-]", "_", f"{proveedor}_{str(clave).strip()}")
+        return os.path.join(self._dir_claves, clave_segura + ".ref")
+
+    def _ruta_objeto(self, huella):
+        return os.path.join(self._dir_objetos, huella + ".bin")
+
+    @staticmethod
+    def _escribir_atomico(ruta, datos):
+        directorio = os.path.dirname(ruta)
+        os.makedirs(directorio, exist_ok=True)
+        descriptor, temporal = tempfile.mkstemp(prefix=".tmp-", dir=directorio)
+        try:
+            with os.fdopen(descriptor, "wb") as f:
+                f.write(datos)
+            os.replace(temporal, ruta)
+        except Exception:
+            try:
+                os.remove(temporal)
+            except OSError:
+                pass
+            raise
+
+    @staticmethod
+    def _eliminar(ruta):
+        try:
+            os.remove(ruta)
+        except OSError:
+            pass
+
+    def obtener(self, proveedor, clave):
+        """
+        Devuelve la etiqueta guardada para (proveedor, clave), o None si no está
+        o no pasa la verificación de integridad.
+        """
+        ruta_clave = self._ruta_clave(proveedor, clave)
+        try:
+            with open(ruta_clave, "r", encoding="ascii") as f:
+                huella = f.read().strip()
+            ruta_objeto = self._ruta_objeto(huella)
+            with open(ruta_objeto, "rb") as f:
+                contenido = f.read()
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"No se pudo leer la etiqueta {proveedor}/{clave} de la caché: {e}")
+            return None
+
+        if hashlib.sha256(contenido).hexdigest() != huella:
+            logger.warning(f"Etiqueta {proveedor}/{clave} corrupta en la caché: se descarta")
+            self._eliminar(ruta_objeto)
+            self._eliminar(ruta_clave)
+            return None
+
+        try:
+            os.utime(ruta_objeto)  # Marca de uso para el desalojo LRU
+        except OSError:
+            pass
+        logger.info(f"Etiqueta {proveedor}/{clave} obtenida de la caché local")
+        return contenido
+
+    def guardar(self, proveedor, clave, contenido):
+        """Guarda la etiqueta y libera espacio si la caché supera el tamaño máximo."""
+        if not contenido:
+            return
+        huella = hashlib.sha256(contenido).hexdigest()
+        ruta_objeto = self._ruta_objeto(huella)
+        try:
+            nuevo = not os.path.exists(ruta_objeto)
+            if nuevo:
+                self._escribir_atomico(ruta_objeto, contenido)
+            self._escribir_atomico(self._ruta_clave(proveedor, clave), huella.encode("ascii"))
+        except OSError as e:
+            logger.warning(f"No se pudo guardar la etiqueta {proveedor}/{clave} en la caché: {e}")
+            return
+
+        with self._lock:
+            if self._tamano is None:
+                self._tamano = sum(tamano for _, tamano, _ in self._listar_objetos())
+            elif nuevo:
+                self._tamano += len(contenido)
+            if self._tamano > self.tamano_maximo:
+                self._desalojar()
+
+    def invalidar(self, proveedor, clave):
+        """Olvida la etiqueta (el objeto queda hasta que lo desaloje el tope de tamaño)."""
+        self._eliminar(self._ruta_clave(proveedor, clave))
+
+    def _listar_objetos(self):
+        """Lista (ruta, tamaño, última modificación) de los objetos guardados."""
+        objetos = []
+        try:
+            entradas = os.scandir(self._dir_objetos)
+        except FileNotFoundError:
+            return objetos
+        with entradas:
+            for entrada in entradas:
+                if not entrada.name.endswith(".bin"):
+                    continue
+                try:
+                    estado = entrada.stat()
+                except OSError:
+                    continue
+                objetos.append((entrada.path, estado.st_size, estado.st_mtime))
+        return objetos
+
+    def _desalojar(self):
+        """Elimina los objetos menos usados hasta bajar del tope y las claves que quedaron huérfanas."""
+        objetos = sorted(self._listar_objetos(), key=lambda objeto: objeto[2])
+        tamano = sum(tamano for _, tamano, _ in objetos)
+        objetivo = self.tamano_maximo * FRACCION_TRAS_LIMPIEZA
+        eliminados = 0
+        for ruta, tamano_objeto, _ in objetos:
+            if tamano <= objetivo:
+                break
+            self._eliminar(ruta)
+            tamano -= tamano_objeto
+            eliminados += 1
+        self._tamano = tamano
+        logger.info(f"Caché de etiquetas: {eliminados} etiquetas desalojadas, quedan {tamano} bytes")
+
+        # Las claves sin objeto se borran de una vez (obtener() también las toleraría)
+        vigentes = {os.path.basename(ruta)[:-len(".bin")] for ruta, _, _ in self._listar_objetos()}
+        try:
+            entradas = os.scandir(self._dir_claves)
+        except FileNotFoundError:
+            return
+        with entradas:
+            for entrada in entradas:
+                try:
+                    with open(entrada.path, "r", encoding="ascii") as f:
+                        huella = f.read().strip()
+                except (OSError, ValueError):
+                    continue
+                if huella not in vigentes:
+                    self._eliminar(entrada.path)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def obtener_cache_etiquetas():
+    """Devuelve la caché de etiquetas por defecto del proceso."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = CacheEtiquetas()
+        return _cache
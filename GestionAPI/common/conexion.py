@@ -1,27 +1,79 @@
 import pyodbc
 import logging
+import threading
+import time
+
+from GestionAPI.common.pool import obtener_pool, PoolAgotadoError
+from GestionAPI.common.filas import clase_para_cursor
+from GestionAPI.common.estado_sync import marcar_comprobantes_sincronizados, TAMANO_BLOQUE_SYNC
 
 logger = logging.getLogger(__name__)
 
+# Filas por fetchmany en iterar_consulta
+TAMANO_BLOQUE_LECTURA = 1000
+
 class Conexion:
-    def __init__(self, server, database, user, password):
+    def __init__(self, server, database, user, password, tamano_pool=None):
         self.server = server
         self.database = database
         self.user = user
         self.password = password
+        # La conexión prestada es propia de cada hilo: la misma instancia puede
+        # usarse a la vez desde varios hilos (p. ej. desde common.async_db).
+        self._local = threading.local()
         self.connection = None
+        # Las conexiones físicas se toman de un pool compartido por credencial;
+        # tamano_pool sólo tiene efecto en la primera instancia que crea el pool.
+        opciones_pool = {'tamano_maximo': tamano_pool} if tamano_pool else {}
+        self._pool = obtener_pool(
+            (server, database, user, password),
+            self._abrir_conexion,
+            nombre=f"{server}/{database} ({user})",
+            **opciones_pool
+        )
+
+    @property
+    def connection(self):
+        """Conexión del pool tomada por el hilo actual en la última llamada a conectar()."""
+        return getattr(self._local, 'connection', None)
+
+    @connection.setter
+    def connection(self, conexion):
+        self._local.connection = conexion
+
+    @property
+    def pool(self):
+        """Pool de conexiones compartido por esta credencial."""
+        return self._pool
+
+    def _abrir_conexion(self):
+        return pyodbc.connect(
+            f'DRIVER={{ODBC Driver 17 for SQL Server}};SERVER={self.server};DATABASE={self.database};UID={self.user};PWD={self.password}'
+        )
 
     def conectar(self):
+        """
+        Toma una conexión del pool y devuelve un cursor.
+        self.connection.close() devuelve la conexión al pool en lugar de cerrarla.
+        """
+        conexion = None
         try:
-            self.connection = pyodbc.connect(
-                f'DRIVER={{ODBC Driver 17 for SQL Server}};SERVER={self.server};DATABASE={self.database};UID={self.user};PWD={self.password}'
-            )
-            if self.connection:
-                return self.connection.cursor()
+            conexion = self._pool.adquirir()
+            self.connection = conexion
+            return conexion.cursor()
         except pyodbc.Error as e:
+            logger.error(f"Error al conectar a la base de datos: {e}")
+            if conexion:
+                conexion.invalidar()
+            return None
+        except PoolAgotadoError as e:
             logger.error(f"Error al conectar a la base de datos: {e}")
             return None
 
+    def estadisticas_pool(self):
+        """Devuelve las estadísticas del pool de conexiones de esta credencial."""
+        return self._pool.estadisticas()
+
     def ejecutar_consulta(self, sql):
         cursor = self.conectar()
         if cursor:
@@ -36,6 +88,60 @@ class Conexion:
                 cursor.close()
                 self.connection.close()
 
+    def iterar_consulta(self, sql, params=None, tamano_bloque=TAMANO_BLOQUE_LECTURA):
+        """
+        Ejecuta un SELECT y devuelve las filas a medida que llegan del servidor.
+
+        Las filas se leen de a `tamano_bloque` con fetchmany, así la memoria queda
+        acotada sin importar el tamaño del resultado, y los nombres de columna se
+        toman de la misma ejecución (no hace falta obtener_nombres_columnas). Cada
+        fila es una tupla con nombre (ver common.filas): fila['Columna'], fila.get(...).
+        La conexión queda tomada del pool hasta que se agota o se cierra el generador.
+
+        Args:
+            sql (str): Consulta SQL
+            params (list): Parámetros de la consulta (opcional)
+            tamano_bloque (int): Filas por fetchmany
+
+        Yields:
+            FilaBase: Una fila por registro
+
+        Raises:
+            pyodbc.Error: Si la consulta falla; a diferencia de ejecutar_consulta, un
+                error a mitad de la lectura no se puede confundir con un resultado parcial.
+        """
+        cursor = self.conectar()
+        if not cursor:
+            raise pyodbc.OperationalError("No se pudo obtener una conexión a la base de datos")
+        conexion = self.connection  # Se conserva: el hilo puede usar self.connection entre filas
+        try:
+            cursor.execute(sql, params if params else ())
+            clase = clase_para_cursor(sql, cursor.description)
+            while True:
+                filas = cursor.fetchmany(tamano_bloque)
+                if not filas:
+                    break
+                yield from map(clase, filas)
+            conexion.commit()
+        except pyodbc.Error as e:
+            logger.error(f"Error al leer la consulta: {e}")
+            raise
+        finally:
+            cursor.close()
+            conexion.close()
+
+    def consultar_filas(self, sql, params=None):
+        """
+        Ejecuta un SELECT una sola vez y devuelve todas las filas con nombre.
+
+        Reemplaza el par ejecutar_consulta + obtener_nombres_columnas (que ejecuta
+        la consulta dos veces) seguido de dict(zip(...)) por fila.
+
+        Returns:
+            list: Filas (FilaBase), accesibles por nombre de columna o por posición
+        """
+        return list(self.iterar_consulta(sql, params))
+
     def ejecutar_consulta_con_parametros(self, sql, params=None):
         """
         Ejecuta una consulta SELECT con parámetros.
@@ -82,7 +188,6 @@ class Conexion:
                     if error_code in ('40001', '1205') and retry_count < max_retries:
                         retry_count += 1
                         logger.warning(f"Deadlock detectado. Reintentando ({retry_count}/{max_retries})...")
-                        import time
                         time.sleep(1 * retry_count)  # Esperar 1, 2, 3 segundos
                         continue
                     
@@ -110,6 +215,97 @@ class Conexion:
         
         return False
 
+    def ejecutar_update_lote(self, sql, rows, chunk_size=500, max_retries=3):
+        """
+        Ejecuta la misma sentencia para muchas filas de parámetros usando
+        `fast_executemany`, con una sola conexión del pool.
+
+        Cada bloque de `chunk_size` filas se envía en un único round trip y se
+        confirma en su propia transacción; si el bloque es víctima de un deadlock
+        (40001 / 1205) se revierte y se reintenta igual que en ejecutar_update.
+        Si falla por otro motivo, se reprocesa fila por fila para identificar
+        cuáles fallaron sin perder el resto del bloque.
+
+        Args:
+            sql (str): Sentencia parametrizada (UPDATE / INSERT / MERGE)
+            rows (list): Lista de tuplas de parámetros, una por fila
+            chunk_size (int): Cantidad de filas por bloque / transacción
+            max_retries (int): Reintentos por bloque ante deadlock
+
+        Returns:
+            list: Un bool por fila (en el mismo orden que `rows`) indicando si se aplicó
+        """
+        rows = [tuple(row) for row in rows]
+        resultados = [False] * len(rows)
+        if not rows:
+            return resultados
+
+        cursor = self.conectar()
+        if not cursor:
+            return resultados
+
+        try:
+            for inicio in range(0, len(rows), chunk_size):
+                bloque = rows[inicio:inicio + chunk_size]
+                estado_bloque = self._ejecutar_bloque(cursor, sql, bloque, max_retries)
+                resultados[inicio:inicio + len(bloque)] = estado_bloque
+        except Exception as e:
+            logger.error(f"Error inesperado al ejecutar el update por lotes: {e}")
+            try:
+                self.connection.rollback()
+            except Exception:
+                pass
+        finally:
+            cursor.close()
+            self.connection.close()
+
+        fallidas = resultados.count(False)
+        if fallidas:
+            logger.warning(f"Update por lotes: {len(rows) - fallidas} filas aplicadas, {fallidas} con error")
+        return resultados
+
+    def _ejecutar_bloque(self, cursor, sql, bloque, max_retries):
+        """Ejecuta un bloque de filas en una transacción, con reintentos ante deadlock."""
+        retry_count = 0
+        while True:
+            try:
+                cursor.fast_executemany = True
+                cursor.executemany(sql, bloque)
+                self.connection.commit()
+                return [True] * len(bloque)
+            except pyodbc.Error as e:
+                self.connection.rollback()
+                error_code = e.args[0] if e.args else None
+
+                if error_code in ('40001', '1205') and retry_count < max_retries:
+                    retry_count += 1
+                    logger.warning(f"Deadlock detectado en bloque de {len(bloque)} filas. "
+                                   f"Reintentando ({retry_count}/{max_retries})...")
+                    time.sleep(1 * retry_count)  # Esperar 1, 2, 3 segundos
+                    continue
+
+                if error_code in ('40001', '1205'):
+                    logger.error(f"Se agotaron los reintentos ({max_retries}) para el bloque de {len(bloque)} filas")
+                    return [False] * len(bloque)
+
+                logger.warning(f"Error en bloque de {len(bloque)} filas, se reprocesa fila por fila: {e}")
+                return self._ejecutar_filas(cursor, sql, bloque)
+
+    def _ejecutar_filas(self, cursor, sql, bloque):
+        """Ejecuta las filas de un bloque de a una para aislar las que fallan."""
+        cursor.fast_executemany = False
+        resultados = []
+        for params in bloque:
+            try:
+                cursor.execute(sql, params)
+                resultados.append(True)
+            except pyodbc.Error as e:
+                logger.error(f"Error al ejecutar el update: {e}")
+                logger.error(f"Parámetros: {params}")
+                resultados.append(False)
+        self.connection.commit()
+        return resultados
+
     def obtener_nombres_columnas(self, sql):
         cursor = self.conectar()
         if cursor:
@@ -125,24 +321,37 @@ class Conexion:
                 cursor.close()
                 self.connection.close()
 
-    def actEstadoSync(self, comprobante):
-        resultado = False
-        sql = ''' 
-                UPDATE EB_T_HistorialSincVentas_Solar 
-                SET ESTADO_SYNC = 1, FECHA_SYNC = GETDATE()
-                WHERE N_COMP in ''' + comprobante
-        
+    def actEstadoSyncLote(self, comprobantes, tamano_bloque=TAMANO_BLOQUE_SYNC):
+        """
+        Marca como sincronizados muchos comprobantes en EB_T_HistorialSincVentas_Solar,
+        por bloques y con sentencias de texto fijo (ver common.estado_sync).
+
+        Args:
+            comprobantes (list): Valores de N_COMP
+            tamano_bloque (int): Comprobantes por bloque / transacción
+
+        Returns:
+            bool: True si se actualizaron todos los bloques
+        """
+        comprobantes = list(comprobantes)
+        if not comprobantes:
+            return True
+
         cursor = self.conectar()
-        if cursor:
-            try:
-                cursor.execute(sql)
-                self.connection.commit()
-                resultado = True
-                logger.info(f'Consulta ejecutada con éxito: {sql}')
-            except pyodbc.Error as e:
-                logger.error(f"Error al ejecutar la consulta: {e}")
-                logger.error(f"SQL: {sql}")
-            finally:
-                cursor.close()
-                self.connection.close()
-        return resultado
+        if not cursor:
+            return False
+        cursor.close()
+        try:
+            actualizadas = marcar_comprobantes_sincronizados(self.connection, comprobantes, tamano_bloque)
+            logger.info(f'Estado de sincronización actualizado: {actualizadas} de {len(comprobantes)} comprobantes')
+            return True
+        except pyodbc.Error as e:
+            logger.error(f"Error al actualizar el estado de sincronización: {e}")
+            return False
+        finally:
+            self.connection.close()
+
+    def actEstadoSync(self, comprobante):
+        """Marca como sincronizado un comprobante (N_COMP) o una lista de comprobantes."""
+        comprobantes = [comprobante] if isinstance(comprobante, str) else comprobante
+        return self.actEstadoSyncLote(comprobantes)
@@ -1,6 +1,8 @@
 import pyodbc
 import logging
 
+from GestionAPI.common.estado_sync import marcar_comprobantes_sincronizados, TAMANO_BLOQUE_SYNC
+
 logger = logging.getLogger('solar_sync')
 
 class DatabaseConnection:
@@ -54,22 +56,25 @@ class DatabaseConnection:
                 cursor.close()
                 self.connection.close()
 
-    def actualizar_estado_sync(self, comprobantes):
-        sql = ''' 
-                UPDATE EB_T_HistorialSincVentas_Solar 
-                SET ESTADO_SYNC = 1, FECHA_SYNC = GETDATE()
-                WHERE N_COMP in ''' + comprobantes
-        
+    def actualizar_estado_sync(self, comprobantes, tamano_bloque=TAMANO_BLOQUE_SYNC):
+        """
+        Marca como sincronizados los comprobantes (lista de N_COMP) en
+        EB_T_HistorialSincVentas_Solar, por bloques y con sentencias de texto fijo.
+        """
+        comprobantes = [comprobantes] if isinstance(comprobantes, str) else list(comprobantes)
+        if not comprobantes:
+            return True
+
         cursor = self.conectar()
         if cursor:
+            cursor.close()
             try:
-                cursor.execute(sql)
-                self.connection.commit()
-                logger.info(f"Estado de sincronización actualizado para comprobantes: {comprobantes}")
+                actualizadas = marcar_comprobantes_sincronizados(self.connection, comprobantes, tamano_bloque)
+                logger.info(f"Estado de sincronización actualizado: {actualizadas} de {len(comprobantes)} comprobantes")
                 return True
             except pyodbc.Error as e:
                 logger.error(f"Error al actualizar estado de sincronización: {str(e)}")
                 return False
             finally:
-                cursor.close()
-                self.connection.close()
\ No newline at end of file
+                self.connection.close()
+        return False
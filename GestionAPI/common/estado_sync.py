@@ -0,0 +1,85 @@
+"""
+Marcado masivo de comprobantes como sincronizados con Solar.
+
+En lugar de concatenar los N_COMP en un IN ('A', 'B', ...) —un texto SQL distinto
+en cada llamada, que SQL Server compila de nuevo y que no escala más allá de unos
+miles de valores— los comprobantes se cargan por bloques en una tabla temporal
+con fast_executemany y se actualizan con un UPDATE ... JOIN de texto fijo. Todas
+las sentencias son siempre las mismas, así que el plan se reutiliza, y un
+catch-up de decenas de miles de comprobantes se resuelve en pocos round trips.
+
+Lo usan Conexion.actEstadoSyncLote / actEstadoSync y DatabaseConnection.actualizar_estado_sync.
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Comprobantes por bloque: cada bloque se carga, se actualiza y se confirma junto
+TAMANO_BLOQUE_SYNC = 1000
+
+TABLA_TEMPORAL_SYNC = "#N_COMP_SINCRONIZADOS"
+
+QRY_CREAR_TEMPORAL_SYNC = f"""
+    IF OBJECT_ID('tempdb..{TABLA_TEMPORAL_SYNC}') IS NOT NULL DROP TABLE {TABLA_TEMPORAL_SYNC};
+    CREATE TABLE {TABLA_TEMPORAL_SYNC} (N_COMP VARCHAR(20) COLLATE DATABASE_DEFAULT NOT NULL PRIMARY KEY);
+"""
+
+QRY_INSERT_TEMPORAL_SYNC = f"INSERT INTO {TABLA_TEMPORAL_SYNC} (N_COMP) VALUES (?)"
+
+QRY_MARCAR_SINCRONIZADOS = f"""
+    UPDATE H
+    SET ESTADO_SYNC = 1, FECHA_SYNC = GETDATE()
+    FROM EB_T_HistorialSincVentas_Solar AS H
+    INNER JOIN {TABLA_TEMPORAL_SYNC} AS T ON T.N_COMP = H.N_COMP
+"""
+
+QRY_VACIAR_TEMPORAL_SYNC = f"TRUNCATE TABLE {TABLA_TEMPORAL_SYNC}"
+
+QRY_BORRAR_TEMPORAL_SYNC = f"DROP TABLE {TABLA_TEMPORAL_SYNC}"
+
+
+def marcar_comprobantes_sincronizados(connection, comprobantes, tamano_bloque=TAMANO_BLOQUE_SYNC):
+    """
+    Marca los comprobantes como sincronizados (ESTADO_SYNC = 1) uniendo contra una tabla temporal.
+
+    Cada bloque se confirma por separado: si uno falla, los anteriores quedan
+    aplicados y la excepción se propaga para que el llamador la registre.
+
+    Args:
+        connection: Conexión pyodbc abierta (o ConexionPooled); el llamador la cierra.
+        comprobantes (iterable): Valores de N_COMP (se ignoran vacíos y repetidos).
+        tamano_bloque (int): Comprobantes por bloque / transacción.
+
+    Returns:
+        int: Filas de EB_T_HistorialSincVentas_Solar actualizadas.
+    """
+    valores = list(dict.fromkeys(str(c).strip() for c in comprobantes if c and str(c).strip()))
+    if not valores:
+        return 0
+
+    cursor = connection.cursor()
+    actualizadas = 0
+    try:
+        cursor.execute(QRY_CREAR_TEMPORAL_SYNC)
+        cursor.fast_executemany = True
+        for inicio in range(0, len(valores), tamano_bloque):
+            bloque = valores[inicio:inicio + tamano_bloque]
+            try:
+                cursor.executemany(QRY_INSERT_TEMPORAL_SYNC, [(valor,) for valor in bloque])
+                cursor.execute(QRY_MARCAR_SINCRONIZADOS)
+                actualizadas += max(cursor.rowcount, 0)
+                cursor.execute(QRY_VACIAR_TEMPORAL_SYNC)
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+        cursor.execute(QRY_BORRAR_TEMPORAL_SYNC)
+        connection.commit()
+    finally:
+        cursor.close()
+
+    if actualizadas < len(valores):
+        logger.warning(f"{len(valores) - actualizadas} de {len(valores)} comprobantes no figuran en "
+                       f"EB_T_HistorialSincVentas_Solar")
+    return actualizadas
@@ -0,0 +1,159 @@
+"""
+Conversión de etiquetas PDF a lenguaje nativo de impresoras térmicas (EPL/ZPL).
+
+Las impresoras Zebra reciben el trabajo ya rasterizado, sin pasar por un visor
+de PDF ni por el driver de Windows. Cada página del PDF se rasteriza una única
+vez a 1 bit (con pypdfium2) y se envuelve en el comando gráfico del lenguaje de
+la impresora: GW en EPL2, ^GFA en ZPL. El resultado se guarda en disco por
+etiqueta (CacheTrabajosRaw), así las reimpresiones se envían directamente.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+LENGUAJE_EPL = "epl"
+LENGUAJE_ZPL = "zpl"
+LENGUAJES = (LENGUAJE_EPL, LENGUAJE_ZPL)
+
+# Resolución de la GC420t y de la mayoría de las impresoras de escritorio Zebra
+DPI_DEFECTO = 203
+
+# Nivel de gris (0-255) por debajo del cual un punto se imprime negro
+UMBRAL_NEGRO = 128
+
+_INVERTIR_BITS = bytes(b ^ 0xFF for b in range(256))
+
+
+class ConversionRawError(Exception):
+    """Error al convertir una etiqueta a lenguaje de impresora."""
+    pass
+
+
+def rasterizar_pdf(contenido, dpi=DPI_DEFECTO):
+    """
+    Rasteriza cada página del PDF a un mapa de bits de 1 bit por punto.
+
+    Args:
+        contenido (bytes): PDF de la etiqueta.
+        dpi (int): Resolución de la impresora.
+
+    Returns:
+        list: Por página, una tupla (bytes_por_fila, filas, datos) donde los bits en 1
+            son puntos negros y cada fila está completada a un múltiplo de 8 puntos.
+
+    Raises:
+        ConversionRawError: Si falta pypdfium2 o el PDF no se puede leer.
+    """
+    try:
+        import numpy as np
+        import pypdfium2 as pdfium
+    except ImportError as e:
+        raise ConversionRawError(f"Se necesita pypdfium2 para rasterizar etiquetas: {e}") from e
+
+    try:
+        documento = pdfium.PdfDocument(contenido)
+    except Exception as e:
+        raise ConversionRawError(f"No se pudo leer el PDF de la etiqueta: {e}") from e
+
+    paginas = []
+    try:
+        for pagina in documento:
+            gris = pagina.render(scale=dpi / 72, grayscale=True).to_numpy()
+            negros = gris < UMBRAL_NEGRO
+            filas, _ = negros.shape
+            bits = np.packbits(negros, axis=1)  # Completa cada fila a múltiplo de 8
+            paginas.append((bits.shape[1], filas, bits.tobytes()))
+    finally:
+        documento.close()
+    return paginas
+
+
+def bitmap_a_epl(bytes_por_fila, filas, datos):
+    """Arma un trabajo EPL2 que imprime el mapa de bits desde el origen."""
+    # En el comando GW de EPL un bit en 0 imprime negro: se invierte el mapa
+    invertidos = datos.translate(_INVERTIR_BITS)
+    return (
+        b"\nN\n"
+        + f"q{bytes_por_fila * 8}\n".encode("ascii")
+        + f"GW0,0,{bytes_por_fila},{filas},".encode("ascii")
+        + invertidos
+        + b"\nP1\n"
+    )
+
+
+def bitmap_a_zpl(bytes_por_fila, filas, datos):
+    """Arma un trabajo ZPL que imprime el mapa de bits desde el origen."""
+    total = len(datos)
+    return (
+        f"^XA^PW{bytes_por_fila * 8}^LL{filas}^FO0,0^GFA,{total},{total},{bytes_por_fila},".encode("ascii")
+        + datos.hex().upper().encode("ascii")
+        + b"^FS^XZ\n"
+    )
+
+
+def convertir_pdf_a_raw(contenido, lenguaje=LENGUAJE_EPL, dpi=DPI_DEFECTO):
+    """
+    Convierte una etiqueta PDF (una o más páginas) a un trabajo EPL o ZPL.
+
+    Returns:
+        bytes: Trabajo listo para enviar a la impresora.
+    """
+    if lenguaje not in LENGUAJES:
+        raise ConversionRawError(f"Lenguaje de impresora no soportado: {lenguaje}")
+    armar = bitmap_a_epl if lenguaje == LENGUAJE_EPL else bitmap_a_zpl
+    return b"".join(armar(*pagina) for pagina in rasterizar_pdf(contenido, dpi))
+
+
+class CacheTrabajosRaw:
+    """
+    Caché en disco de trabajos EPL/ZPL ya convertidos, uno por etiqueta.
+
+    Args:
+        directorio (str): Carpeta donde se guardan los trabajos.
+        lenguaje (str): 'epl' o 'zpl'.
+        dpi (int): Resolución usada al rasterizar.
+    """
+
+    def __init__(self, directorio, lenguaje=LENGUAJE_EPL, dpi=DPI_DEFECTO):
+        if lenguaje not in LENGUAJES:
+            raise ConversionRawError(f"Lenguaje de impresora no soportado: {lenguaje}")
+        self.directorio = directorio
+        self.lenguaje = lenguaje
+        self.dpi = dpi
+
+    def _ruta(self, clave, contenido):
+        # La huella del PDF evita reutilizar un trabajo si la etiqueta cambió
+        huella = hashlib.sha256(contenido).hexdigest()[:16]
+        clave_segura = re.sub(r"[^A-Za-z0-9_.-]", "_", str(clave).strip())
+        return os.path.join(self.directorio, f"{clave_segura}_{huella}_{self.dpi}.{self.lenguaje}")
+
+    def obtener(self, clave, contenido):
+        """
+        Devuelve el trabajo raw de la etiqueta `clave`, convirtiéndolo sólo la primera vez.
+
+        Args:
+            clave (str): Identificador de la etiqueta (número de seguimiento o de pedido).
+            contenido (bytes): PDF de la etiqueta.
+        """
+        ruta = self._ruta(clave, contenido)
+        try:
+            with open(ruta, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            pass
+
+        trabajo = convertir_pdf_a_raw(contenido, self.lenguaje, self.dpi)
+        try:
+            os.makedirs(self.directorio, exist_ok=True)
+            descriptor, temporal = tempfile.mkstemp(prefix=".raw-", dir=self.directorio)
+            with os.fdopen(descriptor, "wb") as f:
+                f.write(trabajo)
+            os.replace(temporal, ruta)
+        except OSError as e:
+            logger.warning(f"No se pudo guardar el trabajo raw de la etiqueta {clave}: {e}")
+        return trabajo
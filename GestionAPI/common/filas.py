@@ -0,0 +1,81 @@
+"""
+Filas con nombre para los resultados de Conexion.
+
+Armar un diccionario por fila (dict(zip(columnas, fila))) copia los nombres de
+columna en cada fila y es caro cuando el resultado tiene decenas de miles de
+líneas. En su lugar, por cada descripción de cursor se crea una sola vez una
+clase derivada de tuple (sin __dict__), que guarda el índice de cada columna a
+nivel de clase. Cada fila es entonces una tupla con los valores y se lee por
+nombre (fila['Detalle.Cantidad'], fila.get(...), fila.Comprobante), por
+posición (fila[0]) o se convierte con fila.como_dict(). Como sigue siendo una
+tupla, `x in fila` busca entre los valores; para preguntar por una columna se
+usa fila.tiene_columna(nombre).
+"""
+
+import keyword
+from functools import lru_cache
+
+
+class FilaBase(tuple):
+    """Tupla de valores accesible por nombre de columna."""
+
+    __slots__ = ()
+    _columnas = ()
+    _indices = {}
+
+    def __getitem__(self, clave):
+        if isinstance(clave, str):
+            return tuple.__getitem__(self, self._indices[clave])
+        return tuple.__getitem__(self, clave)
+
+    def get(self, clave, defecto=None):
+        indice = self._indices.get(clave)
+        return defecto if indice is None else tuple.__getitem__(self, indice)
+
+    def tiene_columna(self, clave):
+        return clave in self._indices
+
+    def keys(self):
+        return self._columnas
+
+    def como_dict(self):
+        return dict(zip(self._columnas, self))
+
+    def __repr__(self):
+        return f"Fila({', '.join(f'{c}={v!r}' for c, v in zip(self._columnas, self))})"
+
+
+def _propiedad(indice):
+    return property(lambda fila: tuple.__getitem__(fila, indice))
+
+
+@lru_cache(maxsize=256)
+def clase_fila(columnas):
+    """
+    Devuelve la clase de fila para una tupla de nombres de columna (una por descripción).
+
+    Las columnas que son identificadores válidos también se exponen como atributos.
+    """
+    atributos = {
+        '__slots__': (),
+        '_columnas': columnas,
+        '_indices': {nombre: indice for indice, nombre in enumerate(columnas)},
+    }
+    for indice, nombre in enumerate(columnas):
+        if nombre.isidentifier() and not keyword.iskeyword(nombre) and not hasattr(FilaBase, nombre):
+            atributos[nombre] = _propiedad(indice)
+    return type('Fila', (FilaBase,), atributos)
+
+
+# Clase de fila por texto SQL (se reutiliza mientras las columnas del cursor no cambien)
+_clases_por_sql = {}
+
+
+def clase_para_cursor(sql, descripcion):
+    """Devuelve la clase de fila de `sql`, validando que las columnas del cursor no hayan cambiado."""
+    columnas = tuple(columna[0] for columna in descripcion)
+    clase = _clases_por_sql.get(sql)
+    if clase is None or clase._columnas != columnas:
+        clase = clase_fila(columnas)
+        _clases_por_sql[sql] = clase
+    return clase
@@ -0,0 +1,140 @@
+"""
+Lectura incremental de un arreglo dentro de una respuesta JSON.
+
+Las APIs de stock devuelven un objeto con un arreglo muy grande (p. ej.
+{"Items": [...]}) y resp.json() necesita el texto completo en memoria además de
+los objetos ya decodificados. LectorArregloJSON recibe la respuesta por
+fragmentos de bytes (tal como llegan de la red, ya descomprimidos si venían con
+gzip), ubica la clave del arreglo en el primer nivel del objeto y devuelve cada
+elemento apenas termina de llegar. Del texto sólo se conserva el elemento que
+está incompleto.
+
+    lector = LectorArregloJSON('Items')
+    for fragmento in resp.iter_content(TAMANO_FRAGMENTO):
+        items.extend(lector.alimentar(fragmento))
+    items.extend(lector.finalizar())
+"""
+
+import codecs
+import json
+
+_ESPACIOS = ' \t\r\n'
+
+
+class LectorArregloJSON:
+    """Decodifica incrementalmente los elementos de objeto[clave] a partir de fragmentos de bytes."""
+
+    def __init__(self, clave, encoding='utf-8'):
+        self.clave = clave
+        self._decodificador_texto = codecs.getincrementaldecoder(encoding)()
+        self._decodificador_json = json.JSONDecoder()
+        self._buffer = ''
+        # Estado del recorrido previo al arreglo (texto fuera del arreglo)
+        self._profundidad = 0
+        self._en_cadena = False
+        self._escape = False
+        self._inicio_cadena = None
+        self._pendiente = 0
+        self._ultima_cadena = None
+        self._esperando_valor = False
+        # 'buscando' -> 'arreglo' -> 'terminado'
+        self._estado = 'buscando'
+        self.encontrado = False
+
+    def alimentar(self, fragmento):
+        """Agrega un fragmento de bytes y devuelve la lista de elementos que quedaron completos."""
+        self._buffer += self._decodificador_texto.decode(fragmento)
+        return self._procesar(final=False)
+
+    def finalizar(self):
+        """Procesa lo que quedó en el buffer al terminar la respuesta y devuelve los últimos elementos."""
+        self._buffer += self._decodificador_texto.decode(b'', final=True)
+        elementos = self._procesar(final=True)
+        if self._estado == 'arreglo':
+            raise ValueError(f"La respuesta terminó antes de cerrar el arreglo '{self.clave}'")
+        return elementos
+
+    def _procesar(self, final):
+        if self._estado == 'buscando':
+            self._buscar_arreglo()
+        if self._estado == 'arreglo':
+            return self._leer_elementos(final)
+        if self._estado == 'terminado':
+            self._buffer = ''
+        return []
+
+    def _buscar_arreglo(self):
+        """Recorre el texto hasta el '[' de la clave buscada en el primer nivel del objeto."""
+        buffer = self._buffer
+        # El buffer puede empezar con una cadena abierta ya recorrida en el fragmento anterior
+        indice = self._pendiente
+        while indice < len(buffer):
+            caracter = buffer[indice]
+            if self._en_cadena:
+                if self._escape:
+                    self._escape = False
+                elif caracter == '\\':
+                    self._escape = True
+                elif caracter == '"':
+                    self._en_cadena = False
+                    if self._profundidad == 1:
+                        # Las claves de primer nivel son cortas: se conserva sólo la última
+                        self._ultima_cadena = json.loads(buffer[self._inicio_cadena:indice + 1])
+                    self._inicio_cadena = None
+            elif caracter == '"':
+                self._en_cadena = True
+                self._inicio_cadena = indice
+            elif caracter == ':':
+                self._esperando_valor = self._profundidad == 1 and self._ultima_cadena == self.clave
+            elif caracter in '{[':
+                if caracter == '[' and self._esperando_valor:
+                    self._estado = 'arreglo'
+                    self.encontrado = True
+                    self._buffer = buffer[indice + 1:]
+                    return
+                self._profundidad += 1
+            elif caracter in '}]':
+                self._profundidad -= 1
+            if caracter not in _ESPACIOS and caracter not in ':"' and not self._en_cadena:
+                self._esperando_valor = False
+            indice += 1
+
+        # Se conserva sólo la cadena abierta (posible clave partida entre fragmentos)
+        if self._inicio_cadena is not None:
+            self._buffer = buffer[self._inicio_cadena:]
+            self._pendiente = len(self._buffer)
+            self._inicio_cadena = 0
+        else:
+            self._buffer = ''
+            self._pendiente = 0
+
+    def _leer_elementos(self, final):
+        """Decodifica los elementos completos del arreglo que hay en el buffer."""
+        buffer = self._buffer
+        elementos = []
+        posicion = 0
+        while True:
+            while posicion < len(buffer) and (buffer[posicion] in _ESPACIOS or buffer[posicion] == ','):
+                posicion += 1
+            if posicion >= len(buffer):
+                break
+            if buffer[posicion] == ']':
+                self._estado = 'terminado'
+                self._buffer = ''
+                return elementos
+            try:
+                elemento, fin = self._decodificador_json.raw_decode(buffer, posicion)
+            except json.JSONDecodeError:
+                if final:
+                    raise
+                break
+            # Un número cortado ("12" de "123", "4.5" de "4.5e3") sólo es válido si le sigue un separador
+            if fin >= len(buffer) or buffer[fin] not in _ESPACIOS + ',]':
+                if not final:
+                    break
+                if fin < len(buffer):
+                    raise json.JSONDecodeError("Se esperaba ',' o ']'", buffer, fin)
+            elementos.append(elemento)
+            posicion = fin
+        self._buffer = buffer[posicion:]
+        return elementos
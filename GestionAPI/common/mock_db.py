@@ -0,0 +1,46 @@
+"""
+Dobles de prueba de Conexion para los tests de los módulos (sin base real).
+
+Reemplazan el pool de una Conexion por un Mock, así los métodos que usan
+conectar() / connection.close() se prueban sobre un cursor Mock cuyas llamadas
+se pueden inspeccionar.
+"""
+
+from unittest.mock import Mock
+
+from GestionAPI.common.conexion import Conexion
+
+
+def conexion_mock(base='base'):
+    """
+    Crea una Conexion cuyo pool presta siempre la misma conexión Mock.
+
+    Returns:
+        tuple: (conexion, conexión prestada, cursor)
+    """
+    conexion = Conexion('servidor', base, 'usuario', 'clave')
+    raw = Mock()
+    conexion._pool = Mock()
+    conexion._pool.adquirir.return_value = raw
+    return conexion, raw, raw.cursor.return_value
+
+
+def conexion_mock_por_prestamo(base='base', tamano_maximo=3):
+    """Crea una Conexion cuyo pool presta una conexión Mock nueva en cada adquisición."""
+    conexion = Conexion('servidor', base, 'usuario', 'clave')
+    conexion._pool = Mock(tamano_maximo=tamano_maximo)
+    conexion._pool.adquirir.side_effect = lambda: Mock()
+    return conexion
+
+
+def sentencias(cursor):
+    """Textos SQL pasados a cursor.execute, en orden."""
+    return [llamada.args[0] for llamada in cursor.execute.call_args_list]
+
+
+def registro_de_llamadas(**mocks):
+    """Mock que registra en un único mock_calls, en orden, las llamadas a los `mocks` indicados por nombre."""
+    registro = Mock()
+    for nombre, mock in mocks.items():
+        registro.attach_mock(mock, nombre)
+    return registro
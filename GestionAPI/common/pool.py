@@ -0,0 +1,302 @@
+"""
+Pool de conexiones reutilizables para SQL Server.
+
+Conexion toma y devuelve conexiones de este pool en lugar de abrir una conexión
+nueva (TCP + TLS + login) en cada consulta. Hay un pool por credencial
+(servidor, base, usuario, contraseña), por lo que todas las clases *DB que apuntan
+a la misma base comparten las mismas conexiones físicas.
+"""
+
+import atexit
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Valores por defecto de los pools
+TAMANO_MAXIMO_POOL = 5
+TIMEOUT_ESPERA_SEG = 30
+INTERVALO_VERIFICACION_SEG = 10
+MAX_INACTIVIDAD_SEG = 300
+
+
+class PoolAgotadoError(Exception):
+    """Se superó el tiempo de espera para obtener una conexión del pool."""
+    pass
+
+
+class ConexionPooled:
+    """
+    Envoltorio de una conexión pyodbc prestada por el pool.
+
+    Expone la misma interfaz que la conexión original; close() no cierra la
+    conexión física sino que la devuelve al pool, de modo que el código existente
+    que hace `conexion.connection.close()` sigue funcionando sin cambios.
+    """
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+        self._liberada = False
+
+    def cursor(self):
+        return self._raw.cursor()
+
+    def commit(self):
+        self._raw.commit()
+
+    def rollback(self):
+        self._raw.rollback()
+
+    def close(self):
+        """Devuelve la conexión al pool (idempotente)."""
+        if not self._liberada:
+            self._liberada = True
+            self._pool.liberar(self._raw)
+
+    def invalidar(self):
+        """Descarta la conexión física en lugar de devolverla al pool."""
+        if not self._liberada:
+            self._liberada = True
+            self._pool.liberar(self._raw, descartar=True)
+
+    def __getattr__(self, nombre):
+        return getattr(self._raw, nombre)
+
+    def __del__(self):
+        # Red de seguridad: si el llamador no cerró la conexión, no se pierde el lugar en el pool
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """
+    Pool acotado de conexiones con verificación al préstamo y desalojo por inactividad.
+
+    Args:
+        fabrica (callable): Función sin argumentos que abre una conexión física nueva.
+        tamano_maximo (int): Cantidad máxima de conexiones físicas abiertas a la vez.
+        timeout_espera (float): Segundos máximos de espera cuando el pool está lleno.
+        intervalo_verificacion (float): Si una conexión estuvo inactiva más de este
+            tiempo se valida con `SELECT 1` antes de prestarla (0 = validar siempre).
+        max_inactividad (float): Las conexiones inactivas más de este tiempo se cierran.
+        nombre (str): Descripción del pool para los logs (sin contraseña).
+    """
+
+    def __init__(self, fabrica, tamano_maximo=TAMANO_MAXIMO_POOL, timeout_espera=TIMEOUT_ESPERA_SEG,
+                 intervalo_verificacion=INTERVALO_VERIFICACION_SEG, max_inactividad=MAX_INACTIVIDAD_SEG,
+                 nombre="pool"):
+        self._fabrica = fabrica
+        self.tamano_maximo = tamano_maximo
+        self.timeout_espera = timeout_espera
+        self.intervalo_verificacion = intervalo_verificacion
+        self.max_inactividad = max_inactividad
+        self.nombre = nombre
+
+        self._condicion = threading.Condition()
+        self._inactivas = []  # Lista de (conexion_raw, timestamp_devolucion); la más reciente al final
+        self._en_uso = 0
+        self._stats = {
+            'checkouts': 0,
+            'esperas': 0,
+            'segundos_espera': 0.0,
+            'conexiones_creadas': 0,
+            'desalojos': 0,
+            'verificaciones_fallidas': 0,
+        }
+
+    def adquirir(self):
+        """
+        Presta una conexión del pool, creando una nueva si hay lugar.
+
+        Returns:
+            ConexionPooled: Conexión lista para usar.
+
+        Raises:
+            PoolAgotadoError: Si no se liberó ninguna conexión dentro de timeout_espera.
+        """
+        limite = time.monotonic() + self.timeout_espera
+        espero = False
+
+        with self._condicion:
+            while True:
+                self._desalojar_inactivas()
+
+                if self._inactivas:
+                    raw, devuelta_en = self._inactivas.pop()
+                    self._en_uso += 1
+                    break
+
+                if self._en_uso < self.tamano_maximo:
+                    raw, devuelta_en = None, None
+                    self._en_uso += 1
+                    break
+
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    raise PoolAgotadoError(
+                        f"No hay conexiones disponibles en {self.nombre} "
+                        f"después de {self.timeout_espera}s (máximo {self.tamano_maximo})"
+                    )
+                if not espero:
+                    espero = True
+                    self._stats['esperas'] += 1
+                inicio_espera = time.monotonic()
+                self._condicion.wait(restante)
+                self._stats['segundos_espera'] += time.monotonic() - inicio_espera
+
+            self._stats['checkouts'] += 1
+
+        # La verificación y la apertura se hacen fuera del lock para no bloquear al resto
+        try:
+            if raw is not None and not self._verificar(raw, devuelta_en):
+                raw = None
+            if raw is None:
+                raw = self._fabrica()
+                with self._condicion:
+                    self._stats['conexiones_creadas'] += 1
+        except Exception:
+            with self._condicion:
+                self._en_uso -= 1
+                self._condicion.notify()
+            raise
+
+        return ConexionPooled(self, raw)
+
+    def liberar(self, raw, descartar=False):
+        """
+        Recibe una conexión devuelta. Descarta cualquier transacción pendiente y la
+        deja disponible, o la cierra si está rota o se pidió descartarla.
+        """
+        if not descartar:
+            try:
+                raw.rollback()
+            except Exception as e:
+                logger.debug(f"Conexión descartada al devolverla a {self.nombre}: {e}")
+                descartar = True
+
+        if descartar:
+            self._cerrar_fisica(raw)
+
+        with self._condicion:
+            self._en_uso -= 1
+            if not descartar:
+                self._inactivas.append((raw, time.monotonic()))
+            self._condicion.notify()
+
+    def _verificar(self, raw, devuelta_en):
+        """Valida con un ping las conexiones que estuvieron inactivas un tiempo."""
+        if time.monotonic() - devuelta_en < self.intervalo_verificacion:
+            return True
+        try:
+            cursor = raw.cursor()
+            try:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            finally:
+                cursor.close()
+            return True
+        except Exception as e:
+            logger.warning(f"Conexión inválida descartada de {self.nombre}: {e}")
+            with self._condicion:
+                self._stats['verificaciones_fallidas'] += 1
+                self._stats['desalojos'] += 1
+            self._cerrar_fisica(raw)
+            return False
+
+    def _desalojar_inactivas(self):
+        """Cierra las conexiones inactivas más de max_inactividad. Requiere el lock tomado."""
+        ahora = time.monotonic()
+        vigentes = []
+        for raw, devuelta_en in self._inactivas:
+            if ahora - devuelta_en > self.max_inactividad:
+                self._stats['desalojos'] += 1
+                self._cerrar_fisica(raw)
+            else:
+                vigentes.append((raw, devuelta_en))
+        self._inactivas = vigentes
+
+    @staticmethod
+    def _cerrar_fisica(raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def cerrar(self):
+        """Cierra todas las conexiones inactivas del pool."""
+        with self._condicion:
+            for raw, _ in self._inactivas:
+                self._cerrar_fisica(raw)
+            self._inactivas = []
+
+    def estadisticas(self):
+        """
+        Returns:
+            dict: Contadores del pool (checkouts, esperas, conexiones creadas, desalojos...)
+                  y cuántas conexiones fueron reutilizadas en lugar de abrirse de nuevo.
+        """
+        with self._condicion:
+            stats = dict(self._stats)
+            stats['reutilizadas'] = stats['checkouts'] - stats['conexiones_creadas']
+            stats['en_uso'] = self._en_uso
+            stats['disponibles'] = len(self._inactivas)
+            stats['tamano_maximo'] = self.tamano_maximo
+        stats['segundos_espera'] = round(stats['segundos_espera'], 3)
+        return stats
+
+
+# Registro de pools por credencial
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def obtener_pool(clave, fabrica, nombre=None, **opciones):
+    """
+    Devuelve el pool asociado a la credencial `clave`, creándolo la primera vez.
+
+    Args:
+        clave (tuple): Identifica la credencial (servidor, base, usuario, contraseña).
+        fabrica (callable): Abre una conexión física nueva para esa credencial.
+        nombre (str, optional): Descripción para logs y estadísticas.
+        **opciones: Parámetros de ConnectionPool usados sólo al crear el pool.
+    """
+    with _pools_lock:
+        pool = _pools.get(clave)
+        if pool is None:
+            pool = ConnectionPool(fabrica, nombre=nombre or "pool", **opciones)
+            _pools[clave] = pool
+        return pool
+
+
+def estadisticas_pools():
+    """Devuelve las estadísticas de todos los pools activos, indexadas por nombre."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    return {pool.nombre: pool.estadisticas() for pool in pools}
+
+
+def registrar_estadisticas_pools(log=None):
+    """Escribe en el log las estadísticas de todos los pools activos."""
+    log = log or logger
+    for nombre, stats in estadisticas_pools().items():
+        log.info(
+            f"Pool {nombre}: {stats['checkouts']} checkouts, "
+            f"{stats['conexiones_creadas']} conexiones creadas, "
+            f"{stats['reutilizadas']} reutilizadas, {stats['esperas']} esperas "
+            f"({stats['segundos_espera']}s), {stats['desalojos']} desalojos"
+        )
+
+
+def cerrar_pools():
+    """Cierra las conexiones inactivas de todos los pools (se ejecuta al salir del proceso)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.cerrar()
+
+
+atexit.register(cerrar_pools)
@@ -0,0 +1,219 @@
+"""
+Limitadores de tasa para las llamadas a APIs externas.
+
+TokenBucket reparte permisos a una tasa constante (solicitudes por segundo) y
+permite ráfagas cortas hasta `capacidad`. Es seguro para usar desde muchas
+corrutinas a la vez: los que esperan se atienden en orden de llegada.
+
+LimitadorProveedor combina una cubeta y un semáforo por proveedor (Andreani,
+Welivery, Hasar, Mercado Pago) y se adapta a las respuestas: ante un 429 o 503
+reduce la tasa a la mitad y pausa todas las solicitudes el tiempo indicado en
+Retry-After; con cada respuesta correcta la tasa vuelve a subir de a poco hasta
+la configurada. Todos los clientes de un mismo proveedor comparten el limitador
+(obtener_limitador), así el total de solicitudes del proceso queda acotado.
+"""
+
+import asyncio
+import logging
+import time
+import weakref
+from email.utils import parsedate_to_datetime
+
+logger = logging.getLogger(__name__)
+
+# Tasa (solicitudes por segundo) y solicitudes simultáneas por proveedor
+LIMITES_POR_PROVEEDOR = {
+    'andreani': {'tasa': 10, 'concurrencia': 8},
+    'welivery': {'tasa': 5, 'concurrencia': 5},
+    'hasar': {'tasa': 3, 'concurrencia': 3},
+    'mercadopago': {'tasa': 5, 'concurrencia': 5},
+}
+LIMITE_DEFECTO = {'tasa': 5, 'concurrencia': 5}
+
+# Estados HTTP con los que el servidor pide bajar el ritmo
+ESTADOS_LIMITADOS = (429, 503)
+
+# Pausa ante un 429/503 sin Retry-After: se duplica con cada rechazo consecutivo
+PAUSA_BASE_SEG = 1.0
+PAUSA_MAXIMA_SEG = 60.0
+
+
+class TokenBucket:
+    """
+    Cubeta de tokens asíncrona.
+
+    Args:
+        tasa (float): Tokens que se reponen por segundo (solicitudes por segundo).
+        capacidad (float, optional): Máximo de tokens acumulables (tamaño de ráfaga).
+            Por defecto igual a la tasa, con un mínimo de 1.
+    """
+
+    def __init__(self, tasa, capacidad=None):
+        if tasa <= 0:
+            raise ValueError("La tasa debe ser mayor a cero")
+        self.tasa = float(tasa)
+        self.capacidad = float(capacidad) if capacidad else max(1.0, self.tasa)
+        self._tokens = self.capacidad
+        self._ultima_reposicion = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.segundos_espera = 0.0
+
+    def _reponer(self):
+        ahora = time.monotonic()
+        self._tokens = min(self.capacidad, self._tokens + (ahora - self._ultima_reposicion) * self.tasa)
+        self._ultima_reposicion = ahora
+
+    async def adquirir(self, tokens=1):
+        """Espera hasta que haya `tokens` disponibles y los consume."""
+        # El lock hace que los que esperan se atiendan en orden (FIFO)
+        async with self._lock:
+            while True:
+                self._reponer()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                espera = (tokens - self._tokens) / self.tasa
+                self.segundos_espera += espera
+                await asyncio.sleep(espera)
+
+    def ajustar_tasa(self, tasa):
+        """Cambia la tasa; la ráfaga permitida pasa a ser la de la nueva tasa."""
+        self._reponer()
+        self.tasa = float(tasa)
+        self.capacidad = max(1.0, self.tasa)
+        self._tokens = min(self._tokens, self.capacidad)
+
+    async def __aenter__(self):
+        await self.adquirir()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
+def segundos_retry_after(valor):
+    """
+    Interpreta el header Retry-After (segundos o fecha HTTP).
+
+    Returns:
+        float: Segundos a esperar, o None si no viene o no se puede interpretar.
+    """
+    if not valor:
+        return None
+    valor = valor.strip()
+    if valor.isdigit():
+        return float(valor)
+    try:
+        fecha = parsedate_to_datetime(valor)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, fecha.timestamp() - time.time())
+
+
+class LimitadorProveedor:
+    """
+    Limitador adaptativo de solicitudes a un proveedor.
+
+    Se usa como context manager alrededor de cada solicitud y se le informa el
+    estado HTTP de la respuesta:
+
+        async with limitador:
+            async with session.get(url) as response:
+                limitador.registrar_respuesta(response.status, response.headers.get('Retry-After'))
+
+    Args:
+        nombre (str): Nombre del proveedor (para los logs).
+        tasa (float): Solicitudes por segundo máximas.
+        concurrencia (int): Solicitudes simultáneas máximas.
+        tasa_minima (float, optional): Tasa a la que se puede bajar ante rechazos.
+            Por defecto un 10% de la tasa.
+    """
+
+    def __init__(self, nombre, tasa, concurrencia, tasa_minima=None):
+        self.nombre = nombre
+        self.tasa_maxima = float(tasa)
+        self.tasa_minima = float(tasa_minima) if tasa_minima else self.tasa_maxima / 10
+        self.concurrencia = concurrencia
+        self._cubeta = TokenBucket(tasa)
+        self._semaforo = asyncio.Semaphore(concurrencia)
+        self._pausa_hasta = 0.0
+        self._rechazos_seguidos = 0
+        self.stats = {"solicitudes": 0, "limitadas": 0, "segundos_pausa": 0.0}
+
+    @property
+    def tasa(self):
+        return self._cubeta.tasa
+
+    @property
+    def segundos_espera(self):
+        """Segundos acumulados esperando turno en la cubeta y en las pausas por 429/503."""
+        return self._cubeta.segundos_espera + self.stats["segundos_pausa"]
+
+    async def __aenter__(self):
+        await self._semaforo.acquire()
+        try:
+            espera = self._pausa_hasta - time.monotonic()
+            if espera > 0:
+                self.stats["segundos_pausa"] += espera
+                await asyncio.sleep(espera)
+            await self._cubeta.adquirir()
+        except BaseException:
+            self._semaforo.release()
+            raise
+        self.stats["solicitudes"] += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._semaforo.release()
+        return False
+
+    def registrar_respuesta(self, estado, retry_after=None):
+        """
+        Ajusta el ritmo según la respuesta del servidor.
+
+        Args:
+            estado (int): Código HTTP recibido.
+            retry_after (str, optional): Valor del header Retry-After.
+        """
+        if estado in ESTADOS_LIMITADOS:
+            self.stats["limitadas"] += 1
+            self._rechazos_seguidos += 1
+            pausa = segundos_retry_after(retry_after)
+            if pausa is None:
+                pausa = min(PAUSA_MAXIMA_SEG, PAUSA_BASE_SEG * 2 ** (self._rechazos_seguidos - 1))
+            self._pausa_hasta = max(self._pausa_hasta, time.monotonic() + pausa)
+            self._cubeta.ajustar_tasa(max(self.tasa_minima, self.tasa / 2))
+            logger.warning(f"{self.nombre}: respuesta {estado}; se pausa {pausa:.1f}s "
+                           f"y se baja la tasa a {self.tasa:.2f} solicitudes/s")
+        elif estado < 400:
+            self._rechazos_seguidos = 0
+            if self.tasa < self.tasa_maxima:
+                # Recuperación gradual: +5% de la tasa máxima por respuesta correcta
+                self._cubeta.ajustar_tasa(min(self.tasa_maxima, self.tasa + self.tasa_maxima * 0.05))
+
+
+# Un juego de limitadores por event loop (las primitivas de asyncio no se comparten entre loops)
+_limitadores = weakref.WeakKeyDictionary()
+
+
+def obtener_limitador(proveedor):
+    """
+    Devuelve el limitador compartido del proveedor para el event loop en curso,
+    con los límites de LIMITES_POR_PROVEEDOR.
+    """
+    por_proveedor = _limitadores.setdefault(asyncio.get_running_loop(), {})
+    if proveedor not in por_proveedor:
+        limites = LIMITES_POR_PROVEEDOR.get(proveedor, LIMITE_DEFECTO)
+        por_proveedor[proveedor] = LimitadorProveedor(proveedor, limites['tasa'], limites['concurrencia'])
+    return por_proveedor[proveedor]
+
+
+def configurar_limitador(proveedor, tasa, concurrencia):
+    """
+    Reemplaza el limitador compartido del proveedor en el event loop en curso por
+    uno con los límites indicados (p. ej. los de --rps / --concurrencia de un script).
+    Debe llamarse antes de empezar las solicitudes.
+    """
+    por_proveedor = _limitadores.setdefault(asyncio.get_running_loop(), {})
+    por_proveedor[proveedor] = LimitadorProveedor(proveedor, tasa, concurrencia)
+    return por_proveedor[proveedor]
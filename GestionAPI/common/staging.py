@@ -0,0 +1,88 @@
+"""
+Carga masiva a través de una tabla temporal (staging).
+
+Los upserts por lote de los módulos (MERGE de liquidaciones de MercadoPago,
+ingresos de Hasar, cambios de stock de Jauser) siguen la misma secuencia: crear
+la temporal, cargarla por bloques con fast_executemany, aplicarla con sentencias
+set-based y eliminarla, todo en una transacción. Como la conexión vuelve al pool
+al terminar (ConexionPooled.close no la cierra), la temporal no desaparece sola:
+aplicar_con_staging la elimina tanto al confirmar como al revertir, antes de que
+el llamador devuelva la conexión.
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Filas por executemany al cargar la temporal
+TAMANO_LOTE_STAGING = 1000
+
+QRY_BORRAR_TEMPORAL_SI_EXISTE = "IF OBJECT_ID('tempdb..{tabla}') IS NOT NULL DROP TABLE {tabla}"
+
+
+def insertar_filas(cursor, sql, filas, tamanos=None, conexion=None, tamano_lote=TAMANO_LOTE_STAGING):
+    """
+    Inserta `filas` con fast_executemany en lotes de `tamano_lote`.
+
+    Args:
+        cursor: Cursor pyodbc.
+        sql (str): INSERT parametrizado.
+        filas (list): Tuplas de valores, en el orden de `tamanos`.
+        tamanos (list): Tipos y tamaños de los parámetros para setinputsizes (opcional).
+        conexion: Si se indica, se confirma cada lote; si no, el llamador confirma todo junto.
+        tamano_lote (int): Filas por executemany.
+    """
+    cursor.fast_executemany = True
+    if tamanos:
+        cursor.setinputsizes(tamanos)
+    try:
+        for inicio in range(0, len(filas), tamano_lote):
+            cursor.executemany(sql, filas[inicio:inicio + tamano_lote])
+            if conexion is not None:
+                conexion.commit()
+    finally:
+        if tamanos:
+            cursor.setinputsizes(None)
+
+
+def aplicar_con_staging(cursor, conexion, staging, qry_crear, qry_insert, filas, aplicar,
+                        tamanos=None, tamano_lote=TAMANO_LOTE_STAGING):
+    """
+    Carga `filas` en la temporal `staging`, ejecuta `aplicar(cursor)` y confirma.
+
+    Si algo falla se revierte la transacción, se elimina la temporal (si quedó) y
+    la excepción se propaga para que el llamador la registre y decida el reintento.
+
+    Args:
+        cursor: Cursor de `conexion`.
+        conexion: Conexión pyodbc (o ConexionPooled); el llamador la devuelve al pool.
+        staging (str): Nombre de la temporal (#TABLA).
+        qry_crear (str): Sentencia que crea `staging`.
+        qry_insert (str): INSERT parametrizado sobre `staging`.
+        filas (list): Tuplas a cargar.
+        aplicar (callable): Recibe el cursor, aplica la temporal y devuelve el resultado.
+        tamanos (list): Tipos y tamaños para setinputsizes (opcional).
+        tamano_lote (int): Filas por executemany.
+
+    Returns:
+        Lo que devuelva `aplicar`.
+    """
+    borrar_si_existe = QRY_BORRAR_TEMPORAL_SI_EXISTE.format(tabla=staging)
+    try:
+        cursor.execute(borrar_si_existe)
+        cursor.execute(qry_crear)
+        insertar_filas(cursor, qry_insert, filas, tamanos, tamano_lote=tamano_lote)
+        logger.debug(f"{len(filas)} filas cargadas en {staging}")
+
+        resultado = aplicar(cursor)
+        cursor.execute(f"DROP TABLE {staging}")
+        conexion.commit()
+        return resultado
+    except Exception:
+        try:
+            conexion.rollback()
+            cursor.execute(borrar_si_existe)
+            conexion.commit()
+        except Exception as e:
+            logger.warning(f"No se pudo eliminar la temporal {staging}: {e}")
+        raise
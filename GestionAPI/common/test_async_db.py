@@ -0,0 +1,63 @@
+import unittest
+import sys
+import os
+import threading
+from unittest.mock import Mock
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from GestionAPI.common.mock_db import conexion_mock_por_prestamo
+from GestionAPI.common.async_db import AsyncDB, AsyncDBMixin, obtener_executor
+
+
+class TestAsyncDB(unittest.IsolatedAsyncioTestCase):
+    """Pruebas de la fachada asíncrona sobre Conexion."""
+
+    async def test_fetch_corre_fuera_del_hilo_del_loop(self):
+        """La consulta se ejecuta en el executor del pool, no en el hilo del event loop."""
+        conexion = conexion_mock_por_prestamo('base_async')
+        hilos = []
+        conexion.ejecutar_consulta = lambda sql: hilos.append(threading.get_ident()) or [(1,)]
+
+        filas = await AsyncDB(conexion).fetch("SELECT 1")
+
+        self.assertEqual(filas, [(1,)])
+        self.assertNotEqual(hilos, [threading.get_ident()])
+
+    def test_executor_dimensionado_al_pool(self):
+        """Cada pool tiene su executor, con tantos hilos como conexiones."""
+        pool = Mock(tamano_maximo=3)
+        executor = obtener_executor(pool)
+
+        self.assertIs(obtener_executor(pool), executor)
+        self.assertEqual(executor._max_workers, 3)
+
+    def test_conexion_prestada_por_hilo(self):
+        """Dos hilos que usan la misma Conexion no se pisan la conexión prestada."""
+        conexion = conexion_mock_por_prestamo('base_async')
+        conexion.conectar()
+        propia = conexion.connection
+        ajena = []
+
+        hilo = threading.Thread(target=lambda: (conexion.conectar(), ajena.append(conexion.connection)))
+        hilo.start()
+        hilo.join()
+
+        self.assertIs(conexion.connection, propia)
+        self.assertIsNot(ajena[0], propia)
+
+    async def test_mixin_expone_variantes_awaitables(self):
+        """db.aio.metodo(...) devuelve lo mismo que db.metodo(...), sin bloquear el loop."""
+        class EjemploDB(AsyncDBMixin):
+            def __init__(self):
+                self.conexion = conexion_mock_por_prestamo('base_async')
+
+            def sumar(self, a, b=0):
+                return a + b
+
+        self.assertEqual(await EjemploDB().aio.sumar(2, b=3), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import hashlib
+import unittest
+import sys
+import os
+import tempfile
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from GestionAPI.common.cache_etiquetas import CacheEtiquetas
+
+
+class TestCacheEtiquetas(unittest.TestCase):
+    """Pruebas de la caché de etiquetas en disco."""
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.cache = CacheEtiquetas(self.directorio.name, tamano_maximo=1000)
+
+    def tearDown(self):
+        self.directorio.cleanup()
+
+    def _objetos(self):
+        return os.listdir(os.path.join(self.directorio.name, "objetos"))
+
+    def test_comparte_etiquetas_entre_instancias(self):
+        """Otra instancia (otro proceso) lee la etiqueta; el mismo contenido se guarda una vez."""
+        self.cache.guardar('andreani', '360000123', b"%PDF-1")
+        self.cache.guardar('welivery', 'W-1', b"%PDF-1")
+
+        otra = CacheEtiquetas(self.directorio.name)
+        self.assertEqual(otra.obtener('andreani', '360000123'), b"%PDF-1")
+        self.assertEqual(otra.obtener('welivery', 'W-1'), b"%PDF-1")
+        self.assertIsNone(otra.obtener('welivery', '360000123'))
+        self.assertEqual(len(self._objetos()), 1)
+
+    def test_descarta_etiqueta_corrupta(self):
+        self.cache.guardar('andreani', '1', b"%PDF-1")
+        ruta = os.path.join(self.directorio.name, "objetos", self._objetos()[0])
+        with open(ruta, "wb") as f:
+            f.write(b"%PDF-truncado")
+
+        self.assertIsNone(self.cache.obtener('andreani', '1'))
+        self.assertEqual(self._objetos(), [])
+
+    def test_desaloja_las_menos_usadas(self):
+        """Al superar el tope se eliminan las etiquetas usadas hace más tiempo."""
+        for i in range(3):
+            contenido = bytes([i]) * 400
+            self.cache.guardar('andreani', str(i), contenido)
+            huella = hashlib.sha256(contenido).hexdigest()
+            os.utime(os.path.join(self.directorio.name, "objetos", huella + ".bin"), (i * 10, i * 10))
+        # 3 x 400 > 1000: al guardar la tercera se desalojó la más antigua
+        self.assertIsNone(self.cache.obtener('andreani', '0'))
+        self.assertEqual(self.cache.obtener('andreani', '1'), bytes([1]) * 400)
+        self.assertEqual(len(self._objetos()), 2)
+        self.assertFalse(os.path.exists(os.path.join(self.directorio.name, "claves", "andreani_0.ref")))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+import sys
+import os
+from unittest.mock import patch
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+import pyodbc
+from GestionAPI.common.mock_db import conexion_mock
+
+
+class TestEjecutarUpdateLote(unittest.TestCase):
+    """Pruebas para el update por lotes de Conexion."""
+
+    def test_un_round_trip_por_bloque(self):
+        """Cada bloque se envía con un executemany y se confirma por separado."""
+        conexion, raw, cursor = conexion_mock()
+        filas = [(i,) for i in range(5)]
+
+        resultados = conexion.ejecutar_update_lote("UPDATE T SET X = ?", filas, chunk_size=2)
+
+        self.assertEqual(resultados, [True] * 5)
+        self.assertEqual(cursor.executemany.call_count, 3)
+        self.assertEqual(raw.commit.call_count, 3)
+        self.assertTrue(cursor.fast_executemany)
+        self.assertEqual(conexion._pool.adquirir.call_count, 1)
+
+    @patch('GestionAPI.common.conexion.time.sleep')
+    def test_reintenta_bloque_ante_deadlock(self, mock_sleep):
+        """Un deadlock revierte y reintenta sólo el bloque afectado."""
+        conexion, raw, cursor = conexion_mock()
+        cursor.executemany.side_effect = [pyodbc.Error('40001', 'deadlock'), None]
+
+        resultados = conexion.ejecutar_update_lote("UPDATE T SET X = ?", [(1,), (2,)])
+
+        self.assertEqual(resultados, [True, True])
+        self.assertEqual(cursor.executemany.call_count, 2)
+        raw.rollback.assert_called_once()
+        mock_sleep.assert_called_once_with(1)
+
+    def test_error_en_bloque_se_aisla_por_fila(self):
+        """Si el bloque falla por otro motivo, se informa qué filas fallaron."""
+        conexion, raw, cursor = conexion_mock()
+        cursor.executemany.side_effect = pyodbc.Error('22001', 'truncado')
+        cursor.execute.side_effect = [None, pyodbc.Error('22001', 'truncado'), None]
+
+        resultados = conexion.ejecutar_update_lote("UPDATE T SET X = ?", [(1,), (2,), (3,)])
+
+        self.assertEqual(resultados, [True, False, True])
+
+    def test_sin_filas_no_conecta(self):
+        """Con una lista vacía no se toma ninguna conexión."""
+        conexion, _, _ = conexion_mock()
+
+        self.assertEqual(conexion.ejecutar_update_lote("UPDATE T SET X = ?", []), [])
+        conexion._pool.adquirir.assert_not_called()
+
+
+
+class TestActEstadoSyncLote(unittest.TestCase):
+    """Pruebas del marcado de comprobantes sincronizados por lotes."""
+
+    def test_une_contra_tabla_temporal_por_bloque(self):
+        """Los N_COMP se cargan por bloques en la tabla temporal; el SQL no depende de los valores."""
+        conexion, raw, cursor = conexion_mock()
+        cursor.rowcount = 2
+
+        self.assertTrue(conexion.actEstadoSyncLote(['A', 'B', 'C', 'A'], tamano_bloque=2))
+
+        bloques = [c.args[1] for c in cursor.executemany.call_args_list]
+        self.assertEqual(bloques, [[('A',), ('B',)], [('C',)]])
+        sentencias = {c.args[0] for c in cursor.execute.call_args_list}
+        self.assertFalse(any("'A'" in sql for sql in sentencias))
+        self.assertEqual(raw.commit.call_count, 3)  # Un commit por bloque y otro al borrar la temporal
+
+
+class TestIterarConsulta(unittest.TestCase):
+    """Pruebas de la lectura por bloques de Conexion."""
+
+    def test_filas_por_bloques_con_nombres_de_la_misma_ejecucion(self):
+        conexion, raw, cursor = conexion_mock()
+        cursor.description = [('Comprobante',), ('Importe',)]
+        cursor.fetchmany.side_effect = [[('A', 1), ('B', 2)], [('C', 3)], []]
+
+        filas = list(conexion.iterar_consulta("SELECT ...", tamano_bloque=2))
+
+        self.assertEqual([fila.como_dict() for fila in filas],
+                         [{'Comprobante': 'A', 'Importe': 1}, {'Comprobante': 'B', 'Importe': 2},
+                          {'Comprobante': 'C', 'Importe': 3}])
+        cursor.execute.assert_called_once()
+        cursor.fetchmany.assert_called_with(2)
+        raw.close.assert_called_once()
+
+    def test_error_se_propaga(self):
+        """Un error de lectura no se confunde con un resultado vacío o parcial."""
+        conexion, raw, cursor = conexion_mock()
+        cursor.execute.side_effect = pyodbc.Error('42000', 'sintaxis')
+
+        with self.assertRaises(pyodbc.Error):
+            list(conexion.iterar_consulta("SELECT ..."))
+        raw.close.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
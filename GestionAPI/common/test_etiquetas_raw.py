@@ -0,0 +1,74 @@
+import io
+import unittest
+import sys
+import os
+import tempfile
+from unittest.mock import patch
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from GestionAPI.common import etiquetas_raw
+from GestionAPI.common.etiquetas_raw import CacheTrabajosRaw, bitmap_a_epl, bitmap_a_zpl, convertir_pdf_a_raw
+
+try:
+    import pypdfium2
+    from pypdf import PdfWriter
+except ImportError:
+    pypdfium2 = None
+
+
+def _pdf_etiqueta():
+    """PDF de 4x6 pulgadas con un rectángulo negro de 1x1 pulgada en la esquina superior izquierda."""
+    writer = PdfWriter()
+    pagina = writer.add_blank_page(width=288, height=432)
+    from pypdf.generic import DecodedStreamObject, NameObject
+    contenido = DecodedStreamObject()
+    contenido.set_data(b"0 g 0 360 72 72 re f")
+    pagina[NameObject("/Contents")] = writer._add_object(contenido)
+    salida = io.BytesIO()
+    writer.write(salida)
+    return salida.getvalue()
+
+
+class TestComandosRaw(unittest.TestCase):
+    """Pruebas del armado de trabajos EPL y ZPL."""
+
+    def test_epl_invierte_bits(self):
+        """En EPL los puntos negros se envían como bits en 0."""
+        trabajo = bitmap_a_epl(1, 2, bytes([0b10000000, 0x00]))
+        self.assertIn(b"GW0,0,1,2," + bytes([0b01111111, 0xFF]) + b"\nP1\n", trabajo)
+        self.assertTrue(trabajo.startswith(b"\nN\nq8\n"))
+
+    def test_zpl_en_hexadecimal(self):
+        trabajo = bitmap_a_zpl(1, 2, bytes([0x80, 0x00]))
+        self.assertEqual(trabajo, b"^XA^PW8^LL2^FO0,0^GFA,2,2,1,8000^FS^XZ\n")
+
+
+@unittest.skipIf(pypdfium2 is None, "pypdfium2/pypdf no están instalados")
+class TestConversionPdf(unittest.TestCase):
+    """Pruebas de rasterización y caché de trabajos raw."""
+
+    def test_rasteriza_a_la_resolucion_de_la_impresora(self):
+        """Una etiqueta de 4x6 pulgadas a 203 dpi da 812x1218 puntos."""
+        (bytes_por_fila, filas, datos), = etiquetas_raw.rasterizar_pdf(_pdf_etiqueta())
+        self.assertEqual((bytes_por_fila, filas), (812 // 8 + 1, 1218))
+        # Esquina superior izquierda negra, inferior derecha blanca
+        self.assertEqual(datos[0], 0xFF)
+        self.assertEqual(datos[-1], 0x00)
+
+    def test_cache_convierte_una_sola_vez(self):
+        pdf = _pdf_etiqueta()
+        with tempfile.TemporaryDirectory() as directorio:
+            cache = CacheTrabajosRaw(directorio, "zpl")
+            with patch.object(etiquetas_raw, "convertir_pdf_a_raw", wraps=convertir_pdf_a_raw) as convertir:
+                primero = cache.obtener("360000123", pdf)
+                segundo = CacheTrabajosRaw(directorio, "zpl").obtener("360000123", pdf)
+
+            self.assertEqual(convertir.call_count, 1)
+            self.assertEqual(primero, segundo)
+            self.assertTrue(primero.startswith(b"^XA"))
+
+
+if __name__ == '__main__':
+    unittest.main()
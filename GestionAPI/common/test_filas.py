@@ -0,0 +1,46 @@
+import unittest
+import sys
+import os
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from GestionAPI.common.filas import clase_fila, clase_para_cursor
+
+
+class TestFilas(unittest.TestCase):
+    """Pruebas de las filas con nombre."""
+
+    def test_acceso_por_nombre_posicion_y_atributo(self):
+        Fila = clase_fila(('Comprobante', 'Detalle.Cantidad'))
+        fila = Fila(('A001', 3))
+
+        self.assertEqual(fila['Detalle.Cantidad'], 3)
+        self.assertEqual(fila[0], 'A001')
+        self.assertEqual(fila.Comprobante, 'A001')
+        self.assertEqual(fila.get('Detalle.IVA', 0), 0)
+        self.assertEqual(fila.como_dict(), {'Comprobante': 'A001', 'Detalle.Cantidad': 3})
+        self.assertFalse(hasattr(fila, '__dict__'))
+
+    def test_in_busca_valores_como_tuple(self):
+        """`in` se comporta como en una tupla; los nombres de columna se consultan con tiene_columna."""
+        Fila = clase_fila(('Comprobante', 'Importe'))
+        fila = Fila(('A001', 10))
+
+        self.assertIn('A001', fila)
+        self.assertNotIn('Comprobante', fila)
+        self.assertTrue(fila.tiene_columna('Comprobante'))
+        self.assertFalse(fila.tiene_columna('A001'))
+        self.assertEqual(fila, ('A001', 10))
+
+    def test_una_clase_por_consulta(self):
+        """La clase se reutiliza para el mismo SQL y se rehace si cambian las columnas."""
+        descripcion = [('A', str), ('B', int)]
+        clase = clase_para_cursor("SELECT A, B FROM T", descripcion)
+
+        self.assertIs(clase_para_cursor("SELECT A, B FROM T", descripcion), clase)
+        self.assertEqual(clase_para_cursor("SELECT A, B FROM T", [('A', str), ('C', int)])._columnas, ('A', 'C'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+import sys
+import os
+import json
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from GestionAPI.common.lector_json import LectorArregloJSON
+
+
+def _leer(texto, tamano):
+    """Alimenta el lector con `texto` en fragmentos de `tamano` bytes y devuelve todos los elementos."""
+    datos = texto.encode('utf-8')
+    lector = LectorArregloJSON('Items')
+    elementos = []
+    for inicio in range(0, len(datos), tamano):
+        elementos.extend(lector.alimentar(datos[inicio:inicio + tamano]))
+    elementos.extend(lector.finalizar())
+    return elementos
+
+
+class TestLectorArregloJSON(unittest.TestCase):
+    """Pruebas de la decodificación incremental del arreglo 'Items'."""
+
+    def test_fragmentos_de_cualquier_tamano(self):
+        """El resultado no depende de dónde se corten los fragmentos (claves, números, UTF-8)."""
+        documento = {
+            "Meta": {"Items": [0], "nota": "\"Items\": [1]"},
+            "Items": [{"Código": "Ñ-1", "Piezas": "12", "Lista": [1, {"a": "]"}]}, 123, 4.5e3, None, True],
+            "Total": 5
+        }
+        texto = json.dumps(documento, ensure_ascii=False, indent=1)
+
+        for tamano in (1, 2, 3, 7, 64, len(texto)):
+            with self.subTest(tamano=tamano):
+                self.assertEqual(_leer(texto, tamano), documento["Items"])
+
+    def test_devuelve_elementos_a_medida_que_llegan(self):
+        """Cada item se entrega apenas está completo, sin esperar el resto de la respuesta."""
+        lector = LectorArregloJSON('Items')
+
+        self.assertEqual(lector.alimentar(b'{"Items": [{"a": 1}, {"b"'), [{"a": 1}])
+        self.assertEqual(lector.alimentar(b': 2}]}'), [{"b": 2}])
+        self.assertEqual(lector.finalizar(), [])
+
+    def test_sin_clave_devuelve_vacio(self):
+        """Si la respuesta no trae 'Items' no hay elementos, como resp.json().get('Items', [])."""
+        lector = LectorArregloJSON('Items')
+        lector.alimentar(b'{"Mensaje": "sin datos"}')
+
+        self.assertEqual(lector.finalizar(), [])
+        self.assertFalse(lector.encontrado)
+
+    def test_respuesta_cortada(self):
+        """Una respuesta que termina antes de cerrar el arreglo es un error."""
+        lector = LectorArregloJSON('Items')
+        lector.alimentar(b'{"Items": [{"a": 1}, {"b": ')
+
+        with self.assertRaises(ValueError):
+            lector.finalizar()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+import threading
+import sys
+import os
+from unittest.mock import Mock
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from GestionAPI.common.pool import ConnectionPool, PoolAgotadoError
+
+
+def _fabrica_mock():
+    """Devuelve una fábrica que crea conexiones Mock y la lista de conexiones creadas."""
+    creadas = []
+
+    def fabrica():
+        conexion = Mock()
+        creadas.append(conexion)
+        return conexion
+
+    return fabrica, creadas
+
+
+class TestConnectionPool(unittest.TestCase):
+    """Pruebas para el pool de conexiones."""
+
+    def test_reutiliza_conexion_devuelta(self):
+        """Una conexión devuelta al pool se presta de nuevo sin abrir otra."""
+        fabrica, creadas = _fabrica_mock()
+        pool = ConnectionPool(fabrica, tamano_maximo=2)
+
+        pool.adquirir().close()
+        pool.adquirir().close()
+
+        self.assertEqual(len(creadas), 1)
+        stats = pool.estadisticas()
+        self.assertEqual(stats['checkouts'], 2)
+        self.assertEqual(stats['conexiones_creadas'], 1)
+        self.assertEqual(stats['reutilizadas'], 1)
+        creadas[0].rollback.assert_called()
+        creadas[0].close.assert_not_called()
+
+    def test_pool_acotado(self):
+        """Con el pool lleno, adquirir espera y falla al superar el timeout."""
+        fabrica, _ = _fabrica_mock()
+        pool = ConnectionPool(fabrica, tamano_maximo=1, timeout_espera=0.05)
+
+        prestada = pool.adquirir()
+        with self.assertRaises(PoolAgotadoError):
+            pool.adquirir()
+        self.assertEqual(pool.estadisticas()['esperas'], 1)
+
+        prestada.close()
+        pool.adquirir().close()
+
+    def test_espera_hasta_que_se_libere(self):
+        """Un hilo en espera recibe la conexión en cuanto otro la devuelve."""
+        fabrica, creadas = _fabrica_mock()
+        pool = ConnectionPool(fabrica, tamano_maximo=1, timeout_espera=2)
+
+        prestada = pool.adquirir()
+        threading.Timer(0.05, prestada.close).start()
+        pool.adquirir().close()
+
+        self.assertEqual(len(creadas), 1)
+        self.assertEqual(pool.estadisticas()['esperas'], 1)
+
+    def test_verificacion_descarta_conexion_rota(self):
+        """Si el ping falla al prestar, se cierra la conexión y se abre una nueva."""
+        fabrica, creadas = _fabrica_mock()
+        pool = ConnectionPool(fabrica, intervalo_verificacion=0)
+
+        pool.adquirir().close()
+        creadas[0].cursor.return_value.execute.side_effect = Exception("Communication link failure")
+        pool.adquirir().close()
+
+        self.assertEqual(len(creadas), 2)
+        creadas[0].close.assert_called_once()
+        stats = pool.estadisticas()
+        self.assertEqual(stats['verificaciones_fallidas'], 1)
+        self.assertEqual(stats['desalojos'], 1)
+
+    def test_desalojo_por_inactividad(self):
+        """Las conexiones inactivas más de max_inactividad se cierran."""
+        fabrica, creadas = _fabrica_mock()
+        pool = ConnectionPool(fabrica, max_inactividad=0)
+
+        pool.adquirir().close()
+        pool.adquirir().close()
+
+        self.assertEqual(len(creadas), 2)
+        creadas[0].close.assert_called_once()
+        self.assertEqual(pool.estadisticas()['desalojos'], 1)
+
+    def test_rollback_fallido_descarta_conexion(self):
+        """Una conexión que no admite rollback al devolverse no vuelve al pool."""
+        fabrica, creadas = _fabrica_mock()
+        pool = ConnectionPool(fabrica)
+
+        conexion = pool.adquirir()
+        creadas[0].rollback.side_effect = Exception("Conexión cerrada")
+        conexion.close()
+
+        self.assertEqual(pool.estadisticas()['disponibles'], 0)
+        self.assertEqual(pool.estadisticas()['en_uso'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import asyncio
+import time
+import unittest
+import sys
+import os
+from email.utils import formatdate
+from unittest.mock import patch
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from GestionAPI.common.rate_limiter import (
+    LimitadorProveedor,
+    TokenBucket,
+    configurar_limitador,
+    obtener_limitador,
+    segundos_retry_after
+)
+
+
+class TestTokenBucket(unittest.IsolatedAsyncioTestCase):
+    """Pruebas para la cubeta de tokens."""
+
+    async def test_rafaga_inicial_sin_espera(self):
+        """Mientras haya tokens acumulados no se espera."""
+        cubeta = TokenBucket(tasa=1, capacidad=3)
+
+        inicio = time.monotonic()
+        for _ in range(3):
+            await cubeta.adquirir()
+
+        self.assertLess(time.monotonic() - inicio, 0.05)
+        self.assertEqual(cubeta.segundos_espera, 0)
+
+    async def test_respeta_la_tasa(self):
+        """Agotada la ráfaga, los permisos se entregan a la tasa configurada."""
+        cubeta = TokenBucket(tasa=50, capacidad=1)
+
+        inicio = time.monotonic()
+        await asyncio.gather(*(cubeta.adquirir() for _ in range(6)))
+
+        # 1 token inmediato + 5 a 50/s = al menos 0.1s
+        self.assertGreaterEqual(time.monotonic() - inicio, 0.09)
+
+    def test_tasa_invalida(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(tasa=0)
+
+
+class TestLimitadorProveedor(unittest.IsolatedAsyncioTestCase):
+    """Pruebas del limitador adaptativo por proveedor."""
+
+    async def test_acota_solicitudes_simultaneas(self):
+        limitador = LimitadorProveedor('prueba', tasa=1000, concurrencia=2)
+        en_vuelo = []
+        maximo = 0
+
+        async def solicitud():
+            nonlocal maximo
+            async with limitador:
+                en_vuelo.append(1)
+                maximo = max(maximo, len(en_vuelo))
+                await asyncio.sleep(0.01)
+                en_vuelo.pop()
+
+        await asyncio.gather(*(solicitud() for _ in range(8)))
+
+        self.assertEqual(maximo, 2)
+        self.assertEqual(limitador.stats["solicitudes"], 8)
+
+    async def test_429_pausa_y_baja_la_tasa(self):
+        """Un 429 pausa a todas las solicitudes y la tasa se recupera con respuestas correctas."""
+        limitador = LimitadorProveedor('prueba', tasa=100, concurrencia=4)
+
+        with patch('GestionAPI.common.rate_limiter.PAUSA_BASE_SEG', 0.1):
+            limitador.registrar_respuesta(429)
+        self.assertEqual(limitador.tasa, 50)
+
+        inicio = time.monotonic()
+        async with limitador:
+            pass
+        self.assertGreaterEqual(time.monotonic() - inicio, 0.09)
+
+        for _ in range(10):
+            limitador.registrar_respuesta(200)
+        self.assertEqual(limitador.tasa, 100)
+        self.assertEqual(limitador.stats["limitadas"], 1)
+
+    async def test_compartido_por_proveedor(self):
+        self.assertIs(obtener_limitador('andreani'), obtener_limitador('andreani'))
+        self.assertIsNot(obtener_limitador('andreani'), obtener_limitador('welivery'))
+
+    async def test_configurar_reemplaza_el_compartido(self):
+        """configurar_limitador fija los límites del limitador que luego devuelve obtener_limitador."""
+        limitador = configurar_limitador('andreani', 2, 3)
+
+        self.assertIs(obtener_limitador('andreani'), limitador)
+        self.assertEqual((limitador.tasa, limitador.concurrencia), (2, 3))
+
+    def test_retry_after(self):
+        self.assertEqual(segundos_retry_after("7"), 7.0)
+        self.assertAlmostEqual(segundos_retry_after(formatdate(time.time() + 30, usegmt=True)), 30, delta=2)
+        self.assertIsNone(segundos_retry_after("mañana"))
+        self.assertIsNone(segundos_retry_after(None))
+
+
+if __name__ == '__main__':
+    unittest.main()
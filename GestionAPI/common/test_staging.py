@@ -0,0 +1,79 @@
+import unittest
+import sys
+import os
+from unittest.mock import Mock
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from GestionAPI.common.mock_db import registro_de_llamadas, sentencias
+from GestionAPI.common.staging import aplicar_con_staging, insertar_filas
+
+STAGING = "#STAGING_PRUEBA"
+BORRAR_SI_EXISTE = f"IF OBJECT_ID('tempdb..{STAGING}') IS NOT NULL DROP TABLE {STAGING}"
+
+
+class TestInsertarFilas(unittest.TestCase):
+    """Pruebas de la carga por bloques con fast_executemany."""
+
+    def test_bloques_y_tamanos(self):
+        cursor, conexion = Mock(), Mock()
+        filas = [(i,) for i in range(5)]
+
+        insertar_filas(cursor, "INSERT", filas, [("tipo", 1, 0)], conexion, tamano_lote=2)
+
+        self.assertTrue(cursor.fast_executemany)
+        self.assertEqual([llamada.args[1] for llamada in cursor.executemany.call_args_list],
+                         [filas[0:2], filas[2:4], filas[4:5]])
+        self.assertEqual(conexion.commit.call_count, 3)
+        self.assertEqual(cursor.setinputsizes.call_args_list[-1].args, (None,))
+
+    def test_sin_tamanos_no_usa_setinputsizes(self):
+        cursor = Mock()
+
+        insertar_filas(cursor, "INSERT", [(1,)])
+
+        cursor.setinputsizes.assert_not_called()
+
+
+class TestAplicarConStaging(unittest.TestCase):
+    """Pruebas de la secuencia temporal → carga → aplicar → eliminar."""
+
+    def setUp(self):
+        self.cursor, self.conexion = Mock(), Mock()
+        self.orden = registro_de_llamadas(execute=self.cursor.execute, executemany=self.cursor.executemany,
+                                          commit=self.conexion.commit, rollback=self.conexion.rollback)
+
+    def test_secuencia_completa(self):
+        def aplicar(cursor):
+            cursor.execute("MERGE")
+            return (2, 1)
+
+        resultado = aplicar_con_staging(self.cursor, self.conexion, STAGING, "CREATE", "INSERT",
+                                        [(1,), (2,), (3,)], aplicar, tamano_lote=2)
+
+        self.assertEqual(resultado, (2, 1))
+        self.assertEqual([llamada[0] for llamada in self.orden.mock_calls],
+                         ['execute', 'execute', 'executemany', 'executemany', 'execute', 'execute', 'commit'])
+        self.assertEqual(sentencias(self.cursor), [BORRAR_SI_EXISTE, "CREATE", "MERGE", f"DROP TABLE {STAGING}"])
+
+    def test_error_revierte_elimina_la_temporal_y_propaga(self):
+        aplicar = Mock(side_effect=Exception("conflicto en el MERGE"))
+
+        with self.assertRaises(Exception):
+            aplicar_con_staging(self.cursor, self.conexion, STAGING, "CREATE", "INSERT", [(1,)], aplicar)
+
+        nombres = [llamada[0] for llamada in self.orden.mock_calls]
+        self.assertEqual(nombres[-3:], ['rollback', 'execute', 'commit'])
+        self.assertEqual(sentencias(self.cursor)[-1], BORRAR_SI_EXISTE)
+
+    def test_error_al_limpiar_no_oculta_el_original(self):
+        self.cursor.executemany.side_effect = ValueError("carga fallida")
+        self.conexion.rollback.side_effect = Exception("conexión caída")
+
+        with self.assertRaises(ValueError):
+            aplicar_con_staging(self.cursor, self.conexion, STAGING, "CREATE", "INSERT", [(1,)], Mock())
+
+
+if __name__ == '__main__':
+    unittest.main()
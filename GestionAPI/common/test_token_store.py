@@ -0,0 +1,62 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+from unittest.mock import patch
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from GestionAPI.common.token_store import TokenStore
+
+
+class TestTokenStore(unittest.TestCase):
+    """Pruebas del almacén de tokens en disco."""
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.ruta = os.path.join(self.directorio.name, "tokens.json")
+        self.store = TokenStore(self.ruta, ttl_por_proveedor={'jauser': 600})
+
+    def tearDown(self):
+        self.directorio.cleanup()
+
+    def test_comparte_token_entre_instancias(self):
+        """Otra instancia (otro proceso) lee el token guardado."""
+        self.store.guardar('jauser', 'usuario@url', 'abc')
+
+        self.assertEqual(TokenStore(self.ruta).obtener('jauser', 'usuario@url'), 'abc')
+        self.assertIsNone(self.store.obtener('jauser', 'otro@url'))
+        self.assertIsNone(self.store.obtener('solar', 'usuario@url'))
+
+    def test_token_vencido_no_se_devuelve(self):
+        """Pasado el TTL del proveedor, el token se considera vencido."""
+        with patch('GestionAPI.common.token_store.time.time', return_value=1000.0):
+            self.store.guardar('jauser', 'usuario@url', 'abc')
+        with patch('GestionAPI.common.token_store.time.time', return_value=1000.0 + 600):
+            self.assertIsNone(self.store.obtener('jauser', 'usuario@url'))
+
+    def test_invalidar_respeta_token_renovado(self):
+        """Invalidar un token viejo no borra el que otro proceso ya renovó."""
+        self.store.guardar('jauser', 'usuario@url', 'nuevo')
+
+        self.store.invalidar('jauser', 'usuario@url', 'viejo')
+        self.assertEqual(self.store.obtener('jauser', 'usuario@url'), 'nuevo')
+
+        self.store.invalidar('jauser', 'usuario@url', 'nuevo')
+        self.assertIsNone(self.store.obtener('jauser', 'usuario@url'))
+
+    def test_archivo_corrupto_se_ignora(self):
+        """Un archivo ilegible se trata como vacío y se reescribe en el próximo guardado."""
+        with open(self.ruta, "w", encoding="utf-8") as f:
+            f.write("{no es json")
+
+        self.assertIsNone(self.store.obtener('jauser', 'usuario@url'))
+        self.store.guardar('jauser', 'usuario@url', 'abc')
+        with open(self.ruta, encoding="utf-8") as f:
+            self.assertIn('jauser:usuario@url', json.load(f))
+
+
+if __name__ == '__main__':
+    unittest.main()
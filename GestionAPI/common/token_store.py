@@ -0,0 +1,182 @@
+"""
+Caché en disco de tokens de acceso compartida entre procesos.
+
+Los scripts programados (rótulos y estados de Andreani, stock de Jauser, ventas
+de Solar) consultan primero este archivo y sólo hacen login cuando el token
+guardado venció o la API lo rechazó. Así, varios procesos que arrancan en el
+mismo minuto reutilizan un único login.
+
+El archivo es un JSON {clave: {"token", "vence", "guardado"}}. Cada lectura y
+escritura se hace con un lock de archivo (msvcrt en Windows, fcntl en el resto)
+y la escritura es atómica (archivo temporal + os.replace), por lo que un proceso
+nunca ve el archivo a medio escribir. No se guardan contraseñas: la clave es el
+proveedor más la identidad (usuario y URL).
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import msvcrt
+except ImportError:  # No es Windows
+    msvcrt = None
+    import fcntl
+
+logger = logging.getLogger(__name__)
+
+# Ubicación por defecto del archivo (se puede cambiar con la variable de entorno)
+RUTA_DEFECTO = os.environ.get(
+    "GESTIONAPI_TOKEN_STORE",
+    os.path.join(os.path.expanduser("~"), ".gestionapi", "tokens.json")
+)
+
+# Vigencia (segundos) que se asume para el token de cada proveedor
+TTL_POR_PROVEEDOR = {
+    'andreani': 12 * 3600,
+    'jauser': 3600,
+    'solar': 30 * 60,
+}
+TTL_DEFECTO = 30 * 60
+
+# Se descarta el token un poco antes de su vencimiento para no usarlo justo al expirar
+MARGEN_VENCIMIENTO_SEG = 60
+
+
+class TokenStore:
+    """
+    Almacén de tokens en un archivo JSON con lock entre procesos.
+
+    Args:
+        ruta (str, optional): Ruta del archivo JSON. Por defecto RUTA_DEFECTO.
+        ttl_por_proveedor (dict, optional): Vigencia en segundos por proveedor.
+    """
+
+    def __init__(self, ruta=None, ttl_por_proveedor=None):
+        self.ruta = ruta or RUTA_DEFECTO
+        self.ttl_por_proveedor = dict(TTL_POR_PROVEEDOR)
+        if ttl_por_proveedor:
+            self.ttl_por_proveedor.update(ttl_por_proveedor)
+        self._lock_hilos = threading.Lock()
+
+    @staticmethod
+    def _clave(proveedor, identidad):
+        return f"{proveedor}:{identidad}"
+
+    @contextmanager
+    def _bloqueo(self):
+        """Lock exclusivo entre hilos y entre procesos sobre <ruta>.lock."""
+        os.makedirs(os.path.dirname(self.ruta) or ".", exist_ok=True)
+        with self._lock_hilos:
+            with open(self.ruta + ".lock", "a+b") as archivo_lock:
+                if msvcrt:
+                    archivo_lock.seek(0)
+                    # LK_LOCK reintenta durante ~10 s antes de fallar
+                    msvcrt.locking(archivo_lock.fileno(), msvcrt.LK_LOCK, 1)
+                else:
+                    fcntl.flock(archivo_lock.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if msvcrt:
+                        archivo_lock.seek(0)
+                        msvcrt.locking(archivo_lock.fileno(), msvcrt.LK_UNLCK, 1)
+                    else:
+                        fcntl.flock(archivo_lock.fileno(), fcntl.LOCK_UN)
+
+    def _leer(self):
+        try:
+            with open(self.ruta, "r", encoding="utf-8") as f:
+                datos = json.load(f)
+            return datos if isinstance(datos, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"No se pudo leer el almacén de tokens {self.ruta}: {e}")
+            return {}
+
+    def _escribir(self, datos):
+        """Escritura atómica: se escribe un temporal en el mismo directorio y se reemplaza."""
+        directorio = os.path.dirname(self.ruta) or "."
+        descriptor, temporal = tempfile.mkstemp(prefix=".tokens-", suffix=".tmp", dir=directorio)
+        try:
+            with os.fdopen(descriptor, "w", encoding="utf-8") as f:
+                json.dump(datos, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporal, self.ruta)
+        except Exception:
+            try:
+                os.remove(temporal)
+            except OSError:
+                pass
+            raise
+
+    def obtener(self, proveedor, identidad):
+        """
+        Devuelve el token vigente guardado para (proveedor, identidad), o None si no
+        hay uno o está por vencer.
+        """
+        try:
+            with self._bloqueo():
+                entrada = self._leer().get(self._clave(proveedor, identidad))
+        except OSError as e:
+            logger.warning(f"No se pudo acceder al almacén de tokens: {e}")
+            return None
+
+        if not entrada or entrada.get("vence", 0) - MARGEN_VENCIMIENTO_SEG <= time.time():
+            return None
+        return entrada.get("token")
+
+    def guardar(self, proveedor, identidad, token, ttl=None):
+        """Guarda el token con la vigencia del proveedor (o `ttl` segundos)."""
+        if not token:
+            return
+        ttl = ttl if ttl is not None else self.ttl_por_proveedor.get(proveedor, TTL_DEFECTO)
+        ahora = time.time()
+        try:
+            with self._bloqueo():
+                datos = self._leer()
+                # Se aprovecha la escritura para limpiar entradas vencidas
+                datos = {k: v for k, v in datos.items() if v.get("vence", 0) > ahora}
+                datos[self._clave(proveedor, identidad)] = {
+                    "token": token,
+                    "vence": ahora + ttl,
+                    "guardado": ahora,
+                }
+                self._escribir(datos)
+        except OSError as e:
+            logger.warning(f"No se pudo guardar el token de {proveedor}: {e}")
+
+    def invalidar(self, proveedor, identidad, token=None):
+        """
+        Elimina el token guardado. Si se indica `token`, sólo lo elimina si sigue siendo
+        ese (otro proceso pudo haberlo renovado mientras tanto).
+        """
+        clave = self._clave(proveedor, identidad)
+        try:
+            with self._bloqueo():
+                datos = self._leer()
+                entrada = datos.get(clave)
+                if entrada and (token is None or entrada.get("token") == token):
+                    del datos[clave]
+                    self._escribir(datos)
+        except OSError as e:
+            logger.warning(f"No se pudo invalidar el token de {proveedor}: {e}")
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def obtener_token_store():
+    """Devuelve el almacén de tokens por defecto del proceso."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = TokenStore()
+        return _store
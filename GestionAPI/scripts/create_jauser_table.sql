@@ -14,7 +14,8 @@ BEGIN
         codigo VARCHAR(100),
         model VARCHAR(255),
         tipo_deposito VARCHAR(20), -- 'NACIONAL' o 'FISCAL'
-        fecha_actualizacion DATETIME DEFAULT GETDATE()
+        fecha_actualizacion DATETIME DEFAULT GETDATE(),
+        hash_item CHAR(40) NULL -- Huella usada por la sincronización incremental
     );
     
     -- Crear índices para mejorar el rendimiento
@@ -24,6 +25,11 @@ BEGIN
 END
 GO
 
+-- Tablas creadas con versiones anteriores: agregar la huella de la sincronización incremental
+IF COL_LENGTH('jauser_stock', 'hash_item') IS NULL
+    ALTER TABLE jauser_stock ADD hash_item CHAR(40) NULL
+GO
+
 -- Verificar la creación de la tabla
 SELECT 
     TABLE_NAME,